@@ -0,0 +1,140 @@
+"""
+Estadísticas para tableros y listados
+American Carpas 1 SAS
+
+Calcula todos los contadores de un modelo en una sola consulta
+(aggregate con Count(..., filter=Q(...))) y guarda el resultado en caché
+por un tiempo corto. Cada modelo tiene una versión en caché que se
+incrementa al guardar o eliminar registros, invalidando sus estadísticas.
+El resultado se guarda junto con la versión con que se calculó, así que la
+versión y el resultado se leen con un solo get_many (una consulta a la
+tabla de caché), también para varios modelos a la vez con
+contar_varios_en_cache().
+
+Uso:
+    stats = contar_en_cache('ordenes', OrdenProduccion, {
+        'total': None,
+        'pendientes': Q(estado='PENDIENTE'),
+    })
+    tipos, categorias = contar_varios_en_cache('inicio', [
+        (TipoProveedor, {'total': Q(activo=True)}),
+        (CategoriaProveedor, {'total': Q(activo=True)}),
+    ])
+
+Cada app registra sus modelos en AppConfig.ready() con
+registrar_invalidacion(Modelo, ...). Si los contadores de un modelo filtran
+por campos de otro (estado_proyecto__es_estado_final), se registra también
+registrar_dependencia(Modelo, Relacionado, ...).
+
+La versión vive en la caché compartida (CACHES en settings.py), así que
+todos los workers de gunicorn ven la invalidación.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete
+
+
+# Tiempo de vida de las estadísticas en caché (segundos)
+TIEMPO_CACHE = getattr(settings, 'ESTADISTICAS_CACHE_SEGUNDOS', 60)
+
+
+def _clave_version(modelo):
+    return f'estadisticas:version:{modelo._meta.label_lower}'
+
+
+def version_modelo(modelo):
+    version = cache.get(_clave_version(modelo))
+    if version is None:
+        cache.add(_clave_version(modelo), 1, timeout=None)
+        version = cache.get(_clave_version(modelo), 1)
+    return version
+
+
+def invalidar_modelo(sender, **kwargs):
+    """Receptor de signals: marca como obsoletas las estadísticas del modelo"""
+    try:
+        cache.incr(_clave_version(sender))
+    except ValueError:
+        cache.set(_clave_version(sender), 2, timeout=None)
+
+
+def registrar_invalidacion(*modelos):
+    """Conecta post_save/post_delete de los modelos para invalidar sus estadísticas"""
+    for modelo in modelos:
+        uid = f'estadisticas_{modelo._meta.label_lower}'
+        post_save.connect(invalidar_modelo, sender=modelo, dispatch_uid=f'{uid}_save')
+        post_delete.connect(invalidar_modelo, sender=modelo, dispatch_uid=f'{uid}_delete')
+
+
+def registrar_dependencia(modelo, *relacionados):
+    """Invalida las estadísticas de `modelo` al guardar o eliminar registros de los relacionados"""
+    def invalidar(sender, **kwargs):
+        invalidar_modelo(modelo)
+
+    for relacionado in relacionados:
+        uid = f'estadisticas_{modelo._meta.label_lower}_{relacionado._meta.label_lower}'
+        post_save.connect(invalidar, sender=relacionado, weak=False, dispatch_uid=f'{uid}_save')
+        post_delete.connect(invalidar, sender=relacionado, weak=False, dispatch_uid=f'{uid}_delete')
+
+
+def contar(modelo, contadores, queryset=None):
+    """
+    Todos los contadores en una sola consulta.
+    `contadores` es {nombre: Q(...)} donde None significa "todos los registros".
+    """
+    queryset = modelo._default_manager.all() if queryset is None else queryset
+    return queryset.aggregate(**{
+        nombre: Count('pk', filter=filtro) if filtro is not None else Count('pk')
+        for nombre, filtro in contadores.items()
+    })
+
+
+def _clave_resultado(nombre, modelo):
+    return f'estadisticas:{nombre}:{modelo._meta.label_lower}'
+
+
+def _contar_pedidos(nombre, pedidos, timeout):
+    """
+    Resultados de [(modelo, contadores, queryset), ...] desde caché: un
+    get_many con las versiones y los resultados guardados, que solo se
+    usan si se calcularon con la versión vigente.
+    """
+    guardado = cache.get_many(
+        [_clave_version(modelo) for modelo, _, _ in pedidos]
+        + [_clave_resultado(nombre, modelo) for modelo, _, _ in pedidos]
+    )
+    resultados, nuevos = [], {}
+    for modelo, contadores, queryset in pedidos:
+        version = guardado.get(_clave_version(modelo))
+        if version is None:
+            version = version_modelo(modelo)
+        clave = _clave_resultado(nombre, modelo)
+        if clave in nuevos:
+            version_guardada, resultado = nuevos[clave]
+        else:
+            version_guardada, resultado = guardado.get(clave, (None, None))
+        if resultado is None or version_guardada != version:
+            resultado = contar(modelo, contadores, queryset)
+            nuevos[clave] = (version, resultado)
+        resultados.append(resultado)
+    if nuevos:
+        cache.set_many(nuevos, TIEMPO_CACHE if timeout is None else timeout)
+    return resultados
+
+
+def contar_en_cache(nombre, modelo, contadores, queryset=None, timeout=None):
+    """
+    Igual que contar(), pero servido desde caché hasta que el modelo cambie
+    o venza el tiempo de vida.
+    """
+    return _contar_pedidos(nombre, [(modelo, contadores, queryset)], timeout)[0]
+
+
+def contar_varios_en_cache(nombre, pedidos, timeout=None):
+    """
+    contar_en_cache() de varios modelos con una sola lectura de caché.
+    `pedidos` es [(modelo, contadores), ...]; retorna los resultados en orden.
+    """
+    return _contar_pedidos(nombre, [(modelo, contadores, None) for modelo, contadores in pedidos], timeout)
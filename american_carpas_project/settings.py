@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'proveedores',
     'proyectos',
     'inventario',
+    'vencimientos',
 ]
 
 MIDDLEWARE = [
@@ -100,6 +101,26 @@ DATABASES = {
 }
 
 
+# =====================================================
+# CACHÉ
+# =====================================================
+
+# Gunicorn corre varios workers: la caché tiene que ser compartida para que
+# la invalidación de reportes de inventario y de estadísticas de tableros
+# llegue a todos. Se usa la tabla de caché de la base de datos
+# (python manage.py createcachetable, lo ejecuta start.sh).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'TIMEOUT': 600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.test import SimpleTestCase, TestCase
+
+from . import estadisticas
+from .upsert import argumentos_upsert
+
+
+@contextmanager
+def como_mysql():
+    """
+    Simula un motor sin destino en los upserts (MySQL) y registra
+    (modelo, kwargs) de cada bulk_create sin ejecutarlo: en MySQL Django
+    lanza NotSupportedError si un upsert trae unique_fields.
+    """
+    llamadas = []
+
+    def bulk_create(queryset, objetos, **kwargs):
+        llamadas.append((queryset.model, kwargs))
+        return objetos
+
+    with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+            mock.patch.object(QuerySet, 'bulk_create', autospec=True, side_effect=bulk_create):
+        yield llamadas
+
+
+def upserts(llamadas):
+    """kwargs de las llamadas registradas por como_mysql() que son upserts"""
+    return [kwargs for _, kwargs in llamadas if kwargs.get('update_conflicts')]
+
+
+class ArgumentosUpsertTests(SimpleTestCase):
+
+    def test_con_destino_incluye_unique_fields(self):
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', True):
+            argumentos = argumentos_upsert(User, ['clave'], ['valor'])
+        self.assertEqual(argumentos, {'update_conflicts': True, 'unique_fields': ['clave'], 'update_fields': ['valor']})
+
+    def test_sin_destino_omite_unique_fields(self):
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            argumentos = argumentos_upsert(User, ['clave'], ['valor'])
+        self.assertEqual(argumentos, {'update_conflicts': True, 'update_fields': ['valor']})
+
+
+class EstadisticasTests(TestCase):
+
+    contadores = {'total': None, 'activos': Q(is_active=True)}
+
+    def setUp(self):
+        User.objects.create(username='ana')
+        User.objects.create(username='luis', is_active=False)
+
+    def desconectar(self, modelo, relacionados, prefijo):
+        for relacionado in relacionados:
+            uid = f'{prefijo}_{relacionado._meta.label_lower}'
+            self.addCleanup(post_save.disconnect, sender=relacionado, dispatch_uid=f'{uid}_save')
+            self.addCleanup(post_delete.disconnect, sender=relacionado, dispatch_uid=f'{uid}_delete')
+
+    def test_un_acierto_cuesta_una_consulta(self):
+        self.assertEqual(estadisticas.contar_en_cache('prueba', User, self.contadores), {'total': 2, 'activos': 1})
+
+        with self.assertNumQueries(1):
+            self.assertEqual(estadisticas.contar_en_cache('prueba', User, self.contadores)['total'], 2)
+        estadisticas.contar_varios_en_cache('prueba', [(User, self.contadores), (Group, {'total': None})])
+        with self.assertNumQueries(1):
+            usuarios, grupos = estadisticas.contar_varios_en_cache(
+                'prueba', [(User, self.contadores), (Group, {'total': None})]
+            )
+        self.assertEqual((usuarios['total'], grupos['total']), (2, 0))
+
+    def test_registrar_invalidacion(self):
+        estadisticas.registrar_invalidacion(User)
+        self.desconectar(User, [User], 'estadisticas')
+        estadisticas.contar_en_cache('prueba', User, self.contadores)
+
+        User.objects.create(username='eva')
+
+        self.assertEqual(estadisticas.contar_en_cache('prueba', User, self.contadores)['total'], 3)
+
+    def test_registrar_dependencia(self):
+        estadisticas.registrar_dependencia(User, Group)
+        self.desconectar(User, [Group], 'estadisticas_auth.user')
+        estadisticas.contar_en_cache('prueba', User, self.contadores)
+        User.objects.filter(username='luis').update(is_active=True)
+        self.assertEqual(estadisticas.contar_en_cache('prueba', User, self.contadores)['activos'], 1)
+
+        Group.objects.create(name='bodega')
+
+        self.assertEqual(estadisticas.contar_en_cache('prueba', User, self.contadores)['activos'], 2)
@@ -0,0 +1,29 @@
+"""
+Upsert (insertar o actualizar) con bulk_create en cualquier motor
+American Carpas 1 SAS
+
+bulk_create(update_conflicts=True) exige unique_fields en PostgreSQL y
+SQLite (ON CONFLICT (...) DO UPDATE), pero MySQL no acepta un destino: su
+ON DUPLICATE KEY UPDATE actúa sobre cualquier llave única, y Django lanza
+NotSupportedError si se le pasa unique_fields. upsert() pasa unique_fields
+solo cuando el motor lo soporta, así que las tablas que lo usan no deben
+tener otra llave única (aparte de la primaria autogenerada) que pueda chocar.
+"""
+
+from django.db import connections, router
+
+
+def argumentos_upsert(modelo, unique_fields, update_fields):
+    """kwargs de bulk_create para actualizar las filas que choquen por `unique_fields`"""
+    argumentos = {'update_conflicts': True, 'update_fields': list(update_fields)}
+    conexion = connections[router.db_for_write(modelo)]
+    if conexion.features.supports_update_conflicts_with_target:
+        argumentos['unique_fields'] = list(unique_fields)
+    return argumentos
+
+
+def upsert(modelo, objetos, unique_fields, update_fields, batch_size=None):
+    """Inserta los objetos y actualiza `update_fields` de los que ya existen"""
+    return modelo.objects.bulk_create(
+        objetos, batch_size=batch_size, **argumentos_upsert(modelo, unique_fields, update_fields)
+    )
@@ -25,8 +25,21 @@ from .models import (
     # Órdenes de Producción
     OrdenProduccion, OrdenProduccionItem,
     OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio,
+    ResumenOrdenProduccion,
     # Historial
     HistorialInventario,
+    # Reservas
+    ReservaInventario,
+    # Reposición y Saldos
+    SugerenciaReposicion, SaldoInventario,
+    # Planificación
+    EstacionTrabajo,
+    # Conteos
+    ConteoFisico, ConteoFisicoDetalle,
+    # Costeo y Consumo
+    CosteoMovimiento, ConsumoMaterialDiario,
+    # Requisiciones de Compra
+    EquivalenciaMaterial, RequisicionCompra, RequisicionCompraLinea,
 )
 
 
@@ -166,15 +179,15 @@ class InventarioLonaAdmin(admin.ModelAdmin):
     list_display = [
         'codigo_rollo', 'tipo_lona', 'ancho_lona', 'color_lona',
         'metros_disponibles_display', 'metros_iniciales', 
-        'ubicacion', 'estado_badge', 'activo'
+        'ubicacion', 'estado_badge', 'es_retazo', 'activo'
     ]
     list_filter = [
         'tipo_lona', 'ancho_lona', 'color_lona', 'tratamiento',
-        'ubicacion__bodega', 'estado', 'activo'
+        'ubicacion__bodega', 'estado', 'es_retazo', 'activo'
     ]
     search_fields = ['codigo_rollo', 'lote_serial', 'observaciones']
     readonly_fields = [
-        'codigo_rollo', 'codigo_qr', 'metros_utilizados', 
+        'codigo_rollo', 'codigo_qr', 'es_retazo', 'metros_utilizados', 
         'metros_reales_disponibles', 'valor_inventario', 'porcentaje_disponible',
         'fecha_creacion', 'fecha_actualizacion'
     ]
@@ -193,7 +206,7 @@ class InventarioLonaAdmin(admin.ModelAdmin):
             'fields': (
                 'metros_iniciales', 'metros_disponibles', 'metros_reservados',
                 'metros_minimo_alerta', 'metros_utilizados', 'metros_reales_disponibles',
-                'porcentaje_disponible'
+                'porcentaje_disponible', 'es_retazo'
             )
         }),
         ('Costos', {
@@ -523,6 +536,7 @@ class OrdenProduccionAdmin(admin.ModelAdmin):
             color, pct, f'{pct}%'
         )
     porcentaje_avance_display.short_description = 'Avance'
+    porcentaje_avance_display.admin_order_field = 'porcentaje_avance'
     
     def codigo_completo(self, obj):
         return obj.codigo_completo
@@ -533,6 +547,24 @@ class OrdenProduccionAdmin(admin.ModelAdmin):
     porcentaje_avance.short_description = '% Avance'
 
 
+@admin.register(ResumenOrdenProduccion)
+class ResumenOrdenProduccionAdmin(admin.ModelAdmin):
+    list_display = [
+        'orden', 'cantidad_items', 'total_productos', 'metros_lona_requeridos',
+        'metros_lona_utilizados', 'lineas_pendientes', 'estado_materiales', 'fecha_actualizacion'
+    ]
+    list_filter = ['estado_materiales']
+    search_fields = ['orden__numero_orden', 'orden__cliente']
+    list_select_related = ['orden']
+
+    def has_add_permission(self, request):
+        # Se genera automáticamente desde la orden
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(OrdenProduccionItem)
 class OrdenProduccionItemAdmin(admin.ModelAdmin):
     list_display = [
@@ -616,6 +648,242 @@ class HistorialInventarioAdmin(admin.ModelAdmin):
     item_display.short_description = 'Ítem'
 
 
+# =============================================================================
+# RESERVAS DE INVENTARIO
+# =============================================================================
+
+@admin.register(ReservaInventario)
+class ReservaInventarioAdmin(admin.ModelAdmin):
+    """
+    Las reservas se crean y cierran desde inventario/reservas.py para que los
+    contadores de los ítems queden consistentes; aquí solo se consultan.
+    """
+    list_display = [
+        'fecha_reserva', 'orden', 'tipo_inventario', 'item_display',
+        'cantidad_reservada', 'cantidad_consumida', 'unidad_medida', 'estado_badge'
+    ]
+    list_filter = ['estado', 'tipo_inventario', 'fecha_reserva']
+    search_fields = [
+        'orden__numero_orden', 'lona__codigo_rollo',
+        'estructura__codigo_lote', 'accesorio__codigo'
+    ]
+    list_select_related = ['orden', 'lona', 'estructura', 'accesorio']
+    date_hierarchy = 'fecha_reserva'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def estado_badge(self, obj):
+        colors = {
+            'ACTIVA': 'primary',
+            'LIBERADA': 'secondary',
+            'CONSUMIDA': 'success',
+        }
+        return format_html(
+            '<span class="badge bg-{}">{}</span>',
+            colors.get(obj.estado, 'secondary'),
+            obj.get_estado_display()
+        )
+    estado_badge.short_description = 'Estado'
+
+    def item_display(self, obj):
+        item = obj.item_inventario
+        if item:
+            return getattr(item, 'codigo_rollo', None) or getattr(item, 'codigo_lote', None) or item.codigo
+        return '-'
+    item_display.short_description = 'Ítem'
+
+
+# =============================================================================
+# REPORTE DE REPOSICIÓN
+# =============================================================================
+
+@admin.register(SugerenciaReposicion)
+class SugerenciaReposicionAdmin(admin.ModelAdmin):
+    list_display = [
+        'fecha_reporte', 'tipo_inventario', 'codigo', 'descripcion',
+        'cantidad_disponible', 'cantidad_minima', 'consumo_diario',
+        'dias_cobertura', 'cantidad_sugerida', 'unidad_medida', 'proveedor'
+    ]
+    list_filter = ['fecha_reporte', 'tipo_inventario']
+    search_fields = ['codigo', 'descripcion']
+    date_hierarchy = 'fecha_reporte'
+    list_select_related = ['proveedor']
+
+
+@admin.register(SaldoInventario)
+class SaldoInventarioAdmin(admin.ModelAdmin):
+    list_display = ['fecha_corte', 'tipo_inventario', 'item_display', 'cantidad', 'unidad_medida']
+    list_filter = ['fecha_corte', 'tipo_inventario']
+    search_fields = ['lona__codigo_rollo', 'estructura__codigo_lote', 'accesorio__codigo']
+    date_hierarchy = 'fecha_corte'
+    list_select_related = ['lona', 'estructura', 'accesorio']
+
+    def item_display(self, obj):
+        item = obj.item_inventario
+        if item:
+            return getattr(item, 'codigo_rollo', None) or getattr(item, 'codigo_lote', None) or item.codigo
+        return '-'
+    item_display.short_description = 'Ítem'
+
+
+# =============================================================================
+# PLANIFICACIÓN DE PRODUCCIÓN
+# =============================================================================
+
+@admin.register(EstacionTrabajo)
+class EstacionTrabajoAdmin(admin.ModelAdmin):
+    list_display = ['codigo', 'capacidad_diaria', 'trabaja_sabado', 'activo']
+    list_filter = ['activo', 'trabaja_sabado']
+    list_editable = ['capacidad_diaria', 'trabaja_sabado', 'activo']
+
+
+# =============================================================================
+# CONTEO FÍSICO
+# =============================================================================
+
+@admin.register(ConteoFisico)
+class ConteoFisicoAdmin(admin.ModelAdmin):
+    """
+    Los conteos se abren, registran y concilian desde inventario/conteos.py
+    para que los ajustes queden en el historial; aquí solo se consultan.
+    """
+    list_display = [
+        'codigo', 'ubicacion', 'tipo_inventario', 'fecha_inicio',
+        'fecha_conciliacion', 'creado_por', 'estado_badge'
+    ]
+    list_filter = ['estado', 'tipo_inventario', 'ubicacion']
+    search_fields = ['codigo', 'ubicacion__codigo', 'observaciones']
+    list_select_related = ['ubicacion', 'creado_por']
+    date_hierarchy = 'fecha_inicio'
+    readonly_fields = ['codigo', 'ubicacion', 'tipo_inventario', 'estado', 'fecha_inicio',
+                       'fecha_conciliacion', 'creado_por', 'conciliado_por']
+
+    def has_add_permission(self, request):
+        return False
+
+    def estado_badge(self, obj):
+        colors = {
+            'ABIERTO': 'warning',
+            'CONCILIADO': 'success',
+            'CANCELADO': 'secondary',
+        }
+        return format_html(
+            '<span class="badge bg-{}">{}</span>',
+            colors.get(obj.estado, 'secondary'),
+            obj.get_estado_display()
+        )
+    estado_badge.short_description = 'Estado'
+
+
+@admin.register(ConteoFisicoDetalle)
+class ConteoFisicoDetalleAdmin(admin.ModelAdmin):
+    list_display = [
+        'conteo', 'codigo', 'tipo_inventario', 'cantidad_esperada',
+        'cantidad_contada', 'diferencia', 'unidad_medida', 'fecha_conteo'
+    ]
+    list_filter = ['tipo_inventario', 'conteo__estado']
+    search_fields = ['codigo', 'conteo__codigo']
+    list_select_related = ['conteo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# =============================================================================
+# COSTEO DE MOVIMIENTOS
+# =============================================================================
+
+@admin.register(CosteoMovimiento)
+class CosteoMovimientoAdmin(admin.ModelAdmin):
+    """Solo consulta: el costeo lo calcula inventario/costeo.py"""
+    list_display = [
+        'fecha_movimiento', 'historial', 'clave_material', 'metodo', 'orden_produccion',
+        'cantidad', 'costo_unitario', 'costo_total', 'saldo_cantidad', 'saldo_valor'
+    ]
+    list_filter = ['metodo', 'fecha_movimiento']
+    search_fields = ['clave_material', 'orden_produccion__numero_orden']
+    list_select_related = ['historial', 'orden_produccion']
+    date_hierarchy = 'fecha_movimiento'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =============================================================================
+# CONSUMO DE MATERIALES
+# =============================================================================
+
+@admin.register(ConsumoMaterialDiario)
+class ConsumoMaterialDiarioAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'tipo_inventario', 'descripcion', 'cantidad', 'unidad_medida', 'movimientos']
+    list_filter = ['tipo_inventario', 'fecha']
+    search_fields = ['descripcion', 'clave_material']
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =============================================================================
+# REQUISICIONES DE COMPRA
+# =============================================================================
+
+@admin.register(EquivalenciaMaterial)
+class EquivalenciaMaterialAdmin(admin.ModelAdmin):
+    list_display = ['clave_material', 'descripcion', 'tipo_inventario', 'producto', 'factor_conversion', 'activo']
+    list_filter = ['tipo_inventario', 'activo']
+    search_fields = ['clave_material', 'descripcion', 'producto__nombre', 'producto__sku_codigo']
+    list_select_related = ['producto__id_proveedor']
+    raw_id_fields = ['producto']
+
+
+class RequisicionCompraLineaInline(admin.TabularInline):
+    model = RequisicionCompraLinea
+    extra = 0
+    fields = [
+        'descripcion', 'cantidad_reposicion', 'cantidad_ordenes', 'cantidad_faltante', 'unidad_inventario',
+        'producto', 'cantidad_pedida', 'unidad_compra', 'precio_unitario', 'moneda', 'subtotal_cop',
+    ]
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RequisicionCompra)
+class RequisicionCompraAdmin(admin.ModelAdmin):
+    """Las genera inventario/requisiciones.py; aquí solo se aprueban o anulan"""
+    list_display = [
+        'id_requisicion', 'fecha_generacion', 'proveedor', 'estado',
+        'total_estimado', 'monto_minimo_pedido', 'cumple_minimo', 'tiempo_entrega_dias'
+    ]
+    list_filter = ['estado', 'cumple_minimo', 'fecha_generacion']
+    search_fields = ['proveedor__razon_social', 'lineas__descripcion']
+    list_select_related = ['proveedor']
+    date_hierarchy = 'fecha_generacion'
+    readonly_fields = [
+        'proveedor', 'fecha_generacion', 'total_estimado', 'monto_minimo_pedido',
+        'cumple_minimo', 'tiempo_entrega_dias', 'generada_por', 'fecha_creacion'
+    ]
+    inlines = [RequisicionCompraLineaInline]
+
+    def has_add_permission(self, request):
+        return False
+
+
 # =============================================================================
 # CONFIGURACIÓN DE BÚSQUEDA PARA AUTOCOMPLETE
 # =============================================================================
@@ -11,4 +11,4 @@ class InventarioConfig(AppConfig):
         Método que se ejecuta cuando la aplicación está lista.
         Aquí se pueden importar signals si se necesitan.
         """
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,72 @@
+"""
+Caché de reportes de inventario
+American Carpas 1 SAS
+
+Los reportes agregados (valorización, ocupación, stock mínimo...) se guardan
+en caché bajo una clave que incluye una "versión de stock". Cada movimiento
+de inventario incrementa la versión, de modo que todas las entradas
+anteriores quedan obsoletas sin tener que borrarlas una por una.
+
+La versión vive en la tabla VersionCacheInventario y se incrementa con un
+UPDATE atómico (F('version') + 1) al confirmar la transacción del
+movimiento: así no queda bloqueada durante la transacción (los movimientos
+no se serializan entre sí), ningún incremento se pierde aunque varios
+workers de gunicorn lo hagan a la vez, y todos ven la invalidación. Los
+reportes sí viven en la caché compartida (CACHES en settings.py).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import VersionCacheInventario
+
+
+CLAVE_VERSION = 'stock'
+
+# Tiempo máximo de vida de un reporte en caché (segundos)
+TIEMPO_CACHE = getattr(settings, 'INVENTARIO_CACHE_SEGUNDOS', 600)
+
+
+def version_stock():
+    """Versión actual del stock (0 si nunca se ha incrementado)"""
+    version = VersionCacheInventario.objects.filter(clave=CLAVE_VERSION).values_list('version', flat=True).first()
+    return version or 0
+
+
+def incrementar_version():
+    """Incrementa la versión del stock con un solo UPDATE (la crea si no existe)"""
+    actualizar = VersionCacheInventario.objects.filter(clave=CLAVE_VERSION)
+    if actualizar.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersionCacheInventario.objects.create(clave=CLAVE_VERSION, version=1)
+    except IntegrityError:
+        # Otro worker la creó al mismo tiempo
+        actualizar.update(version=F('version') + 1)
+
+
+def invalidar_stock(*args, **kwargs):
+    """
+    Marca como obsoletos todos los reportes en caché al confirmar la
+    transacción actual (de inmediato si no hay una abierta).
+    Acepta argumentos para poder usarse directamente como receptor de signals.
+    """
+    # Un solo incremento por transacción aunque se guarden muchos ítems
+    pendientes = transaction.get_connection().run_on_commit
+    if not any(funcion is incrementar_version for _, funcion, *_ in pendientes):
+        transaction.on_commit(incrementar_version)
+
+
+def obtener(nombre, calcular, timeout=None):
+    """
+    Retorna el reporte `nombre` desde caché o lo calcula con `calcular()`.
+    """
+    clave = f'inventario:{nombre}:v{version_stock()}'
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = calcular()
+        cache.set(clave, resultado, TIEMPO_CACHE if timeout is None else timeout)
+    return resultado
@@ -0,0 +1,317 @@
+"""
+Analítica de consumo y pronóstico de demanda de materiales
+American Carpas 1 SAS
+
+1. actualizar_consumo() resume las SALIDAS de HistorialInventario en
+   ConsumoMaterialDiario (una fila por especificación de material y día).
+   Es incremental: solo recalcula los días que tienen salidas nuevas desde
+   la última ejecución (marca = mayor id de historial ya incluido) y, por
+   seguridad, los últimos INVENTARIO_DIAS_REVISION_CONSUMO días: un
+   movimiento cuya transacción confirma después de otra con id mayor queda
+   por debajo de la marca, pero su fecha es la de hoy.
+2. series_semanales() arma las series por semana desde la tabla resumen.
+3. pronosticos() calcula para cada serie el promedio móvil y el suavizado
+   exponencial simple de la próxima semana, y la cobertura con la
+   existencia actual.
+
+La especificación de material es la misma del costeo (costeo.clave_material):
+tipo/ancho/color de lona, tipo/medida/calibre/material de estructura y
+tipo/nombre de accesorio.
+"""
+
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from american_carpas_project.upsert import upsert
+
+from .costeo import CAMPOS_CLAVE, clave_material
+from .models import (
+    HistorialInventario, ConsumoMaterialDiario,
+    InventarioLona, InventarioEstructura, InventarioAccesorio,
+)
+
+
+CERO = Decimal('0')
+
+# Semanas de historia y parámetros por defecto de los pronósticos
+SEMANAS_HISTORIA = 26
+VENTANA_PROMEDIO_MOVIL = 4
+ALFA_SUAVIZADO = Decimal('0.3')
+
+# Días recientes que la actualización incremental siempre vuelve a resumir
+DIAS_REVISION = getattr(settings, 'INVENTARIO_DIAS_REVISION_CONSUMO', 2)
+
+# Campos descriptivos de la especificación (solo para mostrar)
+CAMPOS_DESCRIPCION = {
+    'LONA': ['lona__tipo_lona__nombre', 'lona__ancho_lona__valor_metros', 'lona__color_lona__nombre'],
+    'ESTRUCTURA': [
+        'estructura__tipo_estructura__nombre', 'estructura__medida_tubo__valor_medida',
+        'estructura__calibre__valor_calibre', 'estructura__material__nombre',
+    ],
+    'ACCESORIO': ['accesorio__tipo_accesorio__nombre', 'accesorio__nombre'],
+}
+
+NIVELES_SPARKLINE = '▁▂▃▄▅▆▇█'
+
+
+def descripcion_material(tipo, fila):
+    if tipo == 'LONA':
+        return f"{fila['lona__tipo_lona__nombre']} {fila['lona__ancho_lona__valor_metros']}m {fila['lona__color_lona__nombre']}"
+    if tipo == 'ESTRUCTURA':
+        material = fila['estructura__material__nombre']
+        return (
+            f"{fila['estructura__tipo_estructura__nombre']} {fila['estructura__medida_tubo__valor_medida']} "
+            f"Cal.{fila['estructura__calibre__valor_calibre']}" + (f" {material}" if material else '')
+        )
+    return f"{fila['accesorio__tipo_accesorio__nombre']} - {fila['accesorio__nombre']}"
+
+
+def unidad_material(tipo, fila):
+    if tipo == 'LONA':
+        return 'metros'
+    if tipo == 'ESTRUCTURA':
+        return 'piezas' if fila['estructura__tipo_control'] == 'PIEZAS' else 'metros'
+    return 'unidades'
+
+
+# =============================================================================
+# RESUMEN DIARIO INCREMENTAL
+# =============================================================================
+
+def _consumo_agrupado(tipo, desde=None, hasta=None, hasta_id=None):
+    """
+    SALIDAS de un tipo agrupadas por especificación y día (una consulta).
+    Retorna filas con la clave ya calculada.
+    """
+    campo_fk = tipo.lower()
+    qs = HistorialInventario.objects.filter(
+        tipo_movimiento='SALIDA', tipo_inventario=tipo, **{f'{campo_fk}__isnull': False}
+    )
+    if desde:
+        qs = qs.filter(fecha_movimiento__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha_movimiento__lt=hasta)
+    if hasta_id:
+        qs = qs.filter(id_historial__lte=hasta_id)
+
+    filas = (
+        qs.annotate(dia=TruncDate('fecha_movimiento'))
+        .values('dia', *CAMPOS_CLAVE[tipo], *CAMPOS_DESCRIPCION[tipo])
+        .annotate(
+            total=Sum('cantidad_movimiento'),
+            cantidad_movimientos=Count('pk'),
+            ultimo=Max('id_historial'),
+        )
+        .order_by()
+    )
+    for fila in filas:
+        fila['tipo_inventario'] = tipo
+        fila['clave'] = clave_material(fila)
+        yield fila
+
+
+def _resumir(tipo, desde=None, hasta=None, hasta_id=None, dias=None):
+    """Filas de ConsumoMaterialDiario (sin guardar) para un tipo y rango"""
+    resumen = {}
+    for fila in _consumo_agrupado(tipo, desde, hasta, hasta_id):
+        if dias is not None and fila['dia'] not in dias:
+            continue
+        # Un accesorio con el nombre escrito distinto puede caer en la misma clave
+        clave = (fila['clave'], fila['dia'])
+        consumo = resumen.get(clave)
+        if consumo is None:
+            resumen[clave] = ConsumoMaterialDiario(
+                fecha=fila['dia'],
+                clave_material=fila['clave'],
+                tipo_inventario=tipo,
+                descripcion=descripcion_material(tipo, fila)[:200],
+                unidad_medida=unidad_material(tipo, fila),
+                cantidad=fila['total'],
+                movimientos=fila['cantidad_movimientos'],
+                ultimo_historial=fila['ultimo'],
+            )
+        else:
+            consumo.cantidad += fila['total']
+            consumo.movimientos += fila['cantidad_movimientos']
+            consumo.ultimo_historial = max(consumo.ultimo_historial, fila['ultimo'])
+    return list(resumen.values())
+
+
+@transaction.atomic
+def actualizar_consumo(completo=False, batch_size=1000):
+    """
+    Actualiza ConsumoMaterialDiario. Por defecto solo recalcula los días con
+    SALIDAS posteriores a la última marca o de los últimos DIAS_REVISION
+    días; con `completo` reconstruye todo.
+    Retorna la cantidad de filas escritas.
+    """
+    hasta_id = HistorialInventario.objects.aggregate(ultimo=Max('id_historial'))['ultimo']
+    if hasta_id is None:
+        return 0
+
+    if completo:
+        ConsumoMaterialDiario.objects.all().delete()
+        dias, desde, hasta = None, None, None
+    else:
+        marca = ConsumoMaterialDiario.objects.aggregate(marca=Max('ultimo_historial'))['marca'] or 0
+        revision = timezone.now().date() - timedelta(days=DIAS_REVISION)
+        dias = set(
+            HistorialInventario.objects
+            .filter(Q(id_historial__gt=marca) | Q(fecha_movimiento__gte=revision))
+            .filter(tipo_movimiento='SALIDA', id_historial__lte=hasta_id)
+            .annotate(dia=TruncDate('fecha_movimiento'))
+            .values_list('dia', flat=True)
+            .distinct()
+        )
+        if not dias:
+            return 0
+        desde, hasta = min(dias), max(dias) + timedelta(days=1)
+
+    consumos = []
+    for tipo in CAMPOS_CLAVE:
+        consumos.extend(_resumir(tipo, desde, hasta, hasta_id, dias))
+
+    upsert(
+        ConsumoMaterialDiario, consumos,
+        unique_fields=['clave_material', 'fecha'],
+        update_fields=[
+            'descripcion', 'unidad_medida', 'cantidad', 'movimientos',
+            'ultimo_historial', 'fecha_actualizacion',
+        ],
+        batch_size=batch_size,
+    )
+    return len(consumos)
+
+
+# =============================================================================
+# SERIES Y PRONÓSTICOS
+# =============================================================================
+
+def _inicio_semana(fecha):
+    return fecha - timedelta(days=fecha.weekday())
+
+
+def series_semanales(tipo_inventario=None, semanas=SEMANAS_HISTORIA, hasta=None):
+    """
+    Consumo semanal (lunes a domingo) por especificación, desde la tabla
+    resumen. Las semanas sin consumo quedan en cero.
+    Retorna (semanas, {clave: {'descripcion', 'tipo', 'unidad', 'valores'}}).
+    """
+    hasta = hasta or timezone.now().date()
+    ultima = _inicio_semana(hasta)
+    fechas = [ultima - timedelta(weeks=n) for n in range(semanas - 1, -1, -1)]
+    posicion = {fecha: indice for indice, fecha in enumerate(fechas)}
+
+    qs = ConsumoMaterialDiario.objects.filter(fecha__gte=fechas[0], fecha__lte=hasta)
+    if tipo_inventario:
+        qs = qs.filter(tipo_inventario=tipo_inventario)
+
+    series = OrderedDict()
+    for fila in qs.order_by('clave_material', 'fecha').values(
+        'clave_material', 'tipo_inventario', 'descripcion', 'unidad_medida', 'fecha', 'cantidad',
+    ):
+        serie = series.setdefault(fila['clave_material'], {
+            'descripcion': fila['descripcion'],
+            'tipo': fila['tipo_inventario'],
+            'unidad': fila['unidad_medida'],
+            'valores': [CERO] * semanas,
+        })
+        serie['descripcion'] = fila['descripcion']  # La más reciente
+        serie['valores'][posicion[_inicio_semana(fila['fecha'])]] += fila['cantidad']
+    return fechas, series
+
+
+def promedio_movil(valores, ventana=VENTANA_PROMEDIO_MOVIL):
+    """Pronóstico del próximo período: promedio de los últimos `ventana` valores"""
+    ultimos = valores[-ventana:]
+    return sum(ultimos, CERO) / len(ultimos) if ultimos else CERO
+
+
+def suavizado_exponencial(valores, alfa=ALFA_SUAVIZADO):
+    """Pronóstico del próximo período por suavizado exponencial simple"""
+    if not valores:
+        return CERO
+    nivel = valores[0]
+    for valor in valores[1:]:
+        nivel = alfa * valor + (1 - alfa) * nivel
+    return nivel
+
+
+def sparkline(valores):
+    """Mini gráfico de texto (▁▂▃▄▅▆▇█) de la serie"""
+    maximo = max(valores, default=CERO)
+    if maximo <= 0:
+        return NIVELES_SPARKLINE[0] * len(valores)
+    ultimo_nivel = len(NIVELES_SPARKLINE) - 1
+    return ''.join(NIVELES_SPARKLINE[int(valor / maximo * ultimo_nivel)] for valor in valores)
+
+
+def existencias_por_clave(tipo_inventario=None):
+    """Existencia disponible por especificación (una consulta agrupada por tipo)"""
+    modelos = [
+        ('LONA', InventarioLona, 'metros_disponibles'),
+        ('ESTRUCTURA', InventarioEstructura, None),
+        ('ACCESORIO', InventarioAccesorio, 'cantidad_disponible'),
+    ]
+    existencias = {}
+    for tipo, modelo, campo in modelos:
+        if tipo_inventario and tipo != tipo_inventario:
+            continue
+        # Los campos de la clave vienen del historial (lona__tipo_lona_id ...)
+        prefijo = f'{tipo.lower()}__'
+        campos = [c[len(prefijo):] for c in CAMPOS_CLAVE[tipo]]
+        sumas = {'metros': Sum('metros_disponibles'), 'piezas': Sum('piezas_disponibles')} if campo is None \
+            else {'total': Sum(campo)}
+        filas = (
+            modelo.objects.filter(activo=True).exclude(estado='BAJA')
+            .values(*campos).annotate(**sumas).order_by()
+        )
+        for fila in filas:
+            clave = clave_material({'tipo_inventario': tipo, **{prefijo + c: fila[c] for c in campos}})
+            if campo is None:
+                total = fila['piezas'] if fila['tipo_control'] == 'PIEZAS' else fila['metros']
+            else:
+                total = fila['total']
+            existencias[clave] = existencias.get(clave, CERO) + Decimal(total or 0)
+    return existencias
+
+
+def pronosticos(tipo_inventario=None, semanas=SEMANAS_HISTORIA, ventana=VENTANA_PROMEDIO_MOVIL,
+                alfa=ALFA_SUAVIZADO, hasta=None):
+    """
+    Pronóstico de la próxima semana por especificación y semanas de
+    cobertura con la existencia actual, ordenado por consumo pronosticado.
+    """
+    fechas, series = series_semanales(tipo_inventario, semanas, hasta)
+    existencias = existencias_por_clave(tipo_inventario)
+
+    resultado = []
+    for clave, serie in series.items():
+        valores = serie['valores']
+        movil = promedio_movil(valores, ventana)
+        suavizado = suavizado_exponencial(valores, alfa)
+        pronostico = max(movil, suavizado)
+        existencia = existencias.get(clave, CERO)
+        resultado.append({
+            'clave': clave,
+            'tipo': serie['tipo'],
+            'descripcion': serie['descripcion'],
+            'unidad': serie['unidad'],
+            'serie': valores,
+            'sparkline': sparkline(valores),
+            'total': sum(valores, CERO),
+            'promedio_semanal': (sum(valores, CERO) / len(valores)).quantize(Decimal('0.01')),
+            'promedio_movil': movil.quantize(Decimal('0.01')),
+            'suavizado': suavizado.quantize(Decimal('0.01')),
+            'existencia': existencia,
+            'semanas_cobertura': (existencia / pronostico).quantize(Decimal('0.1')) if pronostico > 0 else None,
+        })
+    resultado.sort(key=lambda fila: max(fila['promedio_movil'], fila['suavizado']), reverse=True)
+    return fechas, resultado
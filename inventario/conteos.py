@@ -0,0 +1,322 @@
+"""
+Conteo físico (inventario cíclico) por ubicación
+American Carpas 1 SAS
+
+Flujo:
+1. iniciar_conteo(): congela en ConteoFisicoDetalle la existencia esperada
+   de cada ítem de la ubicación (una consulta por tabla + un bulk_create).
+2. registrar_conteos(): recibe las lecturas del escáner en bloque
+   ("CODIGO", "CODIGO;cantidad") y las guarda con un solo bulk_update.
+3. conciliar(): calcula las diferencias, ajusta las existencias y registra
+   todos los AJUSTE_POSITIVO / AJUSTE_NEGATIVO del conteo en un solo lote.
+
+La diferencia se calcula contra la existencia congelada al abrir el conteo
+y se aplica sobre la existencia actual, de modo que los movimientos hechos
+mientras el conteo estaba abierto no se pierden.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_inventario import invalidar_stock
+from .costeo import programar_costeo_lote
+from .models import ConteoFisico, ConteoFisicoDetalle, HistorialInventario
+from .reservas import MODELOS_INVENTARIO, campos_stock
+
+
+CERO = Decimal('0')
+
+MOTIVO_AJUSTE = 'Conteo físico'
+
+# Qué hacer al conciliar con las líneas que nadie contó
+NO_CONTADOS_CHOICES = [
+    ('IGNORAR', 'No ajustar (quedan sin contar)'),
+    ('CERO', 'Ajustar a cero (faltante)'),
+]
+
+# Campos que se leen al congelar y se escriben al conciliar, por tipo
+CAMPOS_ITEM = {
+    'LONA': ('codigo_rollo', ['metros_disponibles']),
+    'ESTRUCTURA': ('codigo_lote', ['tipo_control', 'metros_disponibles', 'piezas_disponibles']),
+    'ACCESORIO': ('codigo', ['cantidad_disponible']),
+}
+
+_SEPARADOR_LECTURA = re.compile(r'[;,\t ]+')
+
+
+def _esperado(tipo, fila):
+    """(cantidad, unidad) de una fila de values() según el tipo de ítem"""
+    if tipo == 'LONA':
+        return fila['metros_disponibles'], 'metros'
+    if tipo == 'ESTRUCTURA':
+        if fila['tipo_control'] == 'PIEZAS':
+            return Decimal(fila['piezas_disponibles']), 'piezas'
+        return fila['metros_disponibles'], 'metros'
+    return Decimal(fila['cantidad_disponible']), 'unidades'
+
+
+def _validar_abierto(conteo):
+    if conteo.estado != 'ABIERTO':
+        raise ValidationError(
+            f"El conteo {conteo.codigo} está {conteo.get_estado_display().lower()}."
+        )
+
+
+# =============================================================================
+# APERTURA
+# =============================================================================
+
+@transaction.atomic
+def iniciar_conteo(ubicacion, usuario=None, tipo_inventario=None, observaciones=None):
+    """
+    Abre un conteo de la ubicación y congela la existencia esperada de todos
+    sus ítems activos (excepto los dados de baja).
+    """
+    if ConteoFisico.objects.filter(ubicacion=ubicacion, estado='ABIERTO').exists():
+        raise ValidationError(f"La ubicación {ubicacion.codigo} ya tiene un conteo abierto.")
+
+    conteo = ConteoFisico.objects.create(
+        ubicacion=ubicacion,
+        tipo_inventario=tipo_inventario or None,
+        observaciones=observaciones,
+        creado_por=usuario,
+    )
+
+    detalles = []
+    for tipo, (modelo, campo_fk) in MODELOS_INVENTARIO.items():
+        if tipo_inventario and tipo != tipo_inventario:
+            continue
+        campo_codigo, campos = CAMPOS_ITEM[tipo]
+        filas = (
+            modelo.objects
+            .filter(ubicacion=ubicacion, activo=True)
+            .exclude(estado='BAJA')
+            .values('pk', campo_codigo, *campos)
+            .order_by(campo_codigo)
+        )
+        for fila in filas:
+            cantidad, unidad = _esperado(tipo, fila)
+            detalles.append(ConteoFisicoDetalle(
+                conteo=conteo,
+                tipo_inventario=tipo,
+                codigo=fila[campo_codigo],
+                unidad_medida=unidad,
+                cantidad_esperada=cantidad,
+                **{f'{campo_fk}_id': fila['pk']},
+            ))
+
+    ConteoFisicoDetalle.objects.bulk_create(detalles, batch_size=1000)
+    return conteo
+
+
+# =============================================================================
+# REGISTRO DE LECTURAS
+# =============================================================================
+
+def interpretar_lecturas(texto):
+    """
+    Convierte el texto del escáner en una lista de (codigo, cantidad).
+    Una lectura por línea: "CODIGO" (cantidad None) o "CODIGO;cantidad"
+    (también separado por coma, tabulador o espacio).
+    Lanza ValidationError con todas las líneas inválidas.
+    """
+    lecturas, errores = [], []
+    for numero, linea in enumerate((texto or '').splitlines(), start=1):
+        linea = linea.strip()
+        if not linea:
+            continue
+        partes = _SEPARADOR_LECTURA.split(linea, maxsplit=1)
+        codigo = partes[0].upper()
+        cantidad = None
+        if len(partes) > 1 and partes[1]:
+            try:
+                cantidad = Decimal(partes[1].replace(',', '.'))
+            except InvalidOperation:
+                errores.append(f"Línea {numero}: cantidad inválida '{partes[1]}'.")
+                continue
+            if not cantidad.is_finite() or cantidad < 0:
+                errores.append(f"Línea {numero}: la cantidad debe ser un número mayor o igual a cero.")
+                continue
+        lecturas.append((codigo, cantidad))
+    if errores:
+        raise ValidationError(errores)
+    return lecturas
+
+
+@transaction.atomic
+def registrar_conteos(conteo, lecturas, usuario=None, acumular=True):
+    """
+    Registra un bloque de lecturas (codigo, cantidad) en el conteo.
+
+    - Código sin cantidad: confirma el lote completo (contado = esperado).
+    - Código con cantidad: se suma a lo ya contado si `acumular`, o lo
+      reemplaza en caso contrario (recontar).
+
+    Una consulta para leer las líneas y un bulk_update para guardarlas.
+    Retorna {'actualizados': n, 'no_encontrados': [codigos]}.
+    """
+    conteo = ConteoFisico.objects.select_for_update().get(pk=conteo.pk)
+    _validar_abierto(conteo)
+
+    codigos = {codigo for codigo, _ in lecturas}
+    detalles = {
+        d.codigo.upper(): d
+        for d in ConteoFisicoDetalle.objects.filter(conteo=conteo, codigo__in=codigos)
+    }
+
+    errores, no_encontrados, modificados = [], [], {}
+    ahora = timezone.now()
+    for codigo, cantidad in lecturas:
+        detalle = detalles.get(codigo)
+        if detalle is None:
+            if codigo not in no_encontrados:
+                no_encontrados.append(codigo)
+            continue
+        if cantidad is None:
+            detalle.cantidad_contada = detalle.cantidad_esperada
+        else:
+            if detalle.unidad_medida in ('piezas', 'unidades') and cantidad != cantidad.to_integral_value():
+                errores.append(f"{codigo}: la cantidad en {detalle.unidad_medida} debe ser entera.")
+                continue
+            if acumular and detalle.cantidad_contada is not None:
+                detalle.cantidad_contada += cantidad
+            else:
+                detalle.cantidad_contada = cantidad
+        detalle.fecha_conteo = ahora
+        detalle.contado_por = usuario
+        modificados[codigo] = detalle
+
+    if errores:
+        raise ValidationError(errores)
+
+    ConteoFisicoDetalle.objects.bulk_update(
+        modificados.values(),
+        ['cantidad_contada', 'fecha_conteo', 'contado_por'],
+        batch_size=1000,
+    )
+    return {'actualizados': len(modificados), 'no_encontrados': no_encontrados}
+
+
+# =============================================================================
+# CONCILIACIÓN
+# =============================================================================
+
+def resumen_conteo(conteo):
+    """Totales del conteo calculados en memoria sobre sus líneas"""
+    resumen = {'lineas': 0, 'contadas': 0, 'con_diferencia': 0, 'sobrantes': 0, 'faltantes': 0}
+    for esperada, contada in conteo.detalles.values_list('cantidad_esperada', 'cantidad_contada'):
+        resumen['lineas'] += 1
+        if contada is None:
+            continue
+        resumen['contadas'] += 1
+        if contada > esperada:
+            resumen['con_diferencia'] += 1
+            resumen['sobrantes'] += 1
+        elif contada < esperada:
+            resumen['con_diferencia'] += 1
+            resumen['faltantes'] += 1
+    resumen['pendientes'] = resumen['lineas'] - resumen['contadas']
+    return resumen
+
+
+@transaction.atomic
+def conciliar(conteo, usuario=None, no_contados='IGNORAR'):
+    """
+    Cierra el conteo aplicando las diferencias contra la existencia congelada.
+
+    Bloquea los ítems con diferencia (una consulta por tabla), los actualiza
+    con bulk_update y registra todo el historial con un solo bulk_create.
+    Retorna la lista de movimientos de HistorialInventario creados.
+    """
+    conteo = ConteoFisico.objects.select_for_update().get(pk=conteo.pk)
+    _validar_abierto(conteo)
+
+    detalles = list(conteo.detalles.all())
+    if no_contados == 'CERO':
+        for detalle in detalles:
+            if detalle.cantidad_contada is None:
+                detalle.cantidad_contada = CERO
+
+    con_diferencia = [
+        d for d in detalles
+        if d.cantidad_contada is not None and d.cantidad_contada != d.cantidad_esperada
+    ]
+
+    ahora = timezone.now()
+    movimientos = []
+    for tipo, (modelo, campo_fk) in MODELOS_INVENTARIO.items():
+        lineas = [d for d in con_diferencia if d.tipo_inventario == tipo]
+        if not lineas:
+            continue
+        items = modelo.objects.select_for_update().in_bulk(
+            [getattr(d, f'{campo_fk}_id') for d in lineas]
+        )
+
+        modificados = []
+        for detalle in lineas:
+            item = items.get(getattr(detalle, f'{campo_fk}_id'))
+            if item is None:
+                continue
+            _, campo_disponible, _, _ = campos_stock(item)
+            anterior = Decimal(getattr(item, campo_disponible))
+            nueva = max(anterior + detalle.cantidad_contada - detalle.cantidad_esperada, CERO)
+            movimiento = nueva - anterior
+            detalle.diferencia = movimiento
+            if movimiento == 0:
+                continue
+
+            setattr(item, campo_disponible, int(nueva) if detalle.unidad_medida in ('piezas', 'unidades') else nueva)
+            if nueva <= 0:
+                item.estado = 'AGOTADO'
+            elif item.estado == 'AGOTADO':
+                item.estado = 'DISPONIBLE'
+            item.fecha_actualizacion = ahora
+            modificados.append(item)
+
+            movimientos.append(HistorialInventario(
+                fecha_movimiento=ahora,
+                tipo_movimiento='AJUSTE_POSITIVO' if movimiento > 0 else 'AJUSTE_NEGATIVO',
+                tipo_inventario=tipo,
+                cantidad_anterior=anterior,
+                cantidad_movimiento=abs(movimiento),
+                cantidad_nueva=nueva,
+                unidad_medida=detalle.unidad_medida,
+                documento_referencia=conteo.codigo,
+                motivo=MOTIVO_AJUSTE,
+                registrado_por=usuario,
+                **{campo_fk: item},
+            ))
+
+        campos = [c for c in CAMPOS_ITEM[tipo][1] if c != 'tipo_control']
+        modelo.objects.bulk_update(
+            modificados, campos + ['estado', 'fecha_actualizacion'], batch_size=1000
+        )
+        if tipo == 'LONA':
+            modelo.clasificar_retazos([item.pk for item in modificados])
+
+    HistorialInventario.objects.bulk_create(movimientos, batch_size=1000)
+    programar_costeo_lote(movimientos)
+    ConteoFisicoDetalle.objects.bulk_update(
+        detalles, ['cantidad_contada', 'diferencia'], batch_size=1000
+    )
+
+    conteo.estado = 'CONCILIADO'
+    conteo.fecha_conciliacion = ahora
+    conteo.conciliado_por = usuario
+    conteo.save(update_fields=['estado', 'fecha_conciliacion', 'conciliado_por'])
+    invalidar_stock()
+    return movimientos
+
+
+@transaction.atomic
+def cancelar(conteo):
+    """Cancela un conteo abierto sin tocar existencias"""
+    conteo = ConteoFisico.objects.select_for_update().get(pk=conteo.pk)
+    _validar_abierto(conteo)
+    conteo.estado = 'CANCELADO'
+    conteo.save(update_fields=['estado'])
+    return conteo
@@ -0,0 +1,449 @@
+"""
+Costeo de movimientos de inventario (FIFO / promedio ponderado)
+American Carpas 1 SAS
+
+Cada movimiento que mueve existencias en HistorialInventario se costea por
+especificación de material (no por lote):
+
+    LONA        tipo, ancho y color
+    ESTRUCTURA  tipo, medida de tubo, calibre, material y tipo de control
+    ACCESORIO   tipo y nombre
+
+Las entradas (ENTRADA, AJUSTE_POSITIVO, DEVOLUCION) entran al costo del lote.
+Las salidas (SALIDA, AJUSTE_NEGATIVO, BAJA) se valoran con el método de
+settings.INVENTARIO_METODO_COSTEO ('PROMEDIO' por defecto, o 'FIFO'). Si no
+hay saldo suficiente (lotes cargados sin movimiento de entrada) el faltante
+se valora al costo del lote.
+
+El resultado queda en CosteoMovimiento junto con el saldo de la
+especificación después de cada movimiento, así que:
+- el costo de material de una orden es un SUM sobre CosteoMovimiento;
+- el recosteo arranca en el primer movimiento afectado de cada
+  especificación, tomando el saldo guardado en el movimiento anterior, en
+  lugar de recorrer toda la historia (o desde el principio si la
+  especificación se costeó con otro método).
+
+El costeo automático corre al confirmar la transacción del movimiento; si
+falla se registra en el log y el movimiento queda sin costear para el
+comando recostear_inventario.
+"""
+
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Trim, Upper
+from django.db.models.lookups import Exact
+
+from .models import CosteoMovimiento, HistorialInventario
+
+
+logger = logging.getLogger(__name__)
+
+METODO_COSTEO = getattr(settings, 'INVENTARIO_METODO_COSTEO', 'PROMEDIO')
+
+CERO = Decimal('0')
+CENTAVO = Decimal('0.01')
+DIEZMILESIMA = Decimal('0.0001')
+
+MOVIMIENTOS_ENTRADA = HistorialInventario.MOVIMIENTOS_ENTRADA
+MOVIMIENTOS_SALIDA = HistorialInventario.MOVIMIENTOS_SALIDA
+
+# Campos del ítem que forman la especificación de material, por tipo
+CAMPOS_CLAVE = {
+    'LONA': ['lona__tipo_lona_id', 'lona__ancho_lona_id', 'lona__color_lona_id'],
+    'ESTRUCTURA': [
+        'estructura__tipo_estructura_id', 'estructura__medida_tubo_id', 'estructura__calibre_id',
+        'estructura__material_id', 'estructura__tipo_control',
+    ],
+    'ACCESORIO': ['accesorio__tipo_accesorio_id', 'accesorio__nombre'],
+}
+
+CAMPOS_FILA = [
+    'id_historial', 'fecha_movimiento', 'tipo_movimiento', 'tipo_inventario',
+    'cantidad_movimiento', 'orden_produccion_id', 'lona_id', 'estructura_id', 'accesorio_id',
+    'lona__costo_por_metro', 'estructura__costo_por_metro', 'estructura__costo_por_pieza',
+    'accesorio__costo_unitario',
+] + [campo for campos in CAMPOS_CLAVE.values() for campo in campos]
+
+
+# =============================================================================
+# ESPECIFICACIÓN DE MATERIAL
+# =============================================================================
+
+def clave_material(fila):
+    """
+    Clave 'TIPO|valor|valor...' de una fila de values(CAMPOS_FILA).
+    La más larga es la de accesorio (tipo + nombre de hasta 150 caracteres);
+    las columnas clave_material tienen 200 para que siempre quepa.
+    """
+    tipo = fila['tipo_inventario']
+    valores = [fila[campo] for campo in CAMPOS_CLAVE[tipo]]
+    if tipo == 'ACCESORIO':
+        valores[-1] = (valores[-1] or '').strip().upper()
+    return '|'.join([tipo] + [str(valor) for valor in valores])
+
+
+def filtro_clave(clave):
+    """Q de HistorialInventario para los movimientos de una especificación"""
+    tipo = clave.split('|', 1)[0]
+    campos = CAMPOS_CLAVE[tipo]
+    valores = clave.split('|', len(campos))[1:]
+    filtro = Q(tipo_inventario=tipo)
+    for campo, valor in zip(campos, valores):
+        if campo == 'accesorio__nombre':
+            # Misma normalización que clave_material (sin espacios de borde, en mayúsculas)
+            filtro &= Q(Exact(Upper(Trim('accesorio__nombre')), valor))
+        elif valor == 'None':
+            filtro &= Q(**{f'{campo}__isnull': True})
+        else:
+            filtro &= Q(**{campo: valor})
+    return filtro
+
+
+def _costo_lote(fila):
+    if fila['tipo_inventario'] == 'LONA':
+        return fila['lona__costo_por_metro']
+    if fila['tipo_inventario'] == 'ESTRUCTURA':
+        if fila['estructura__tipo_control'] == 'PIEZAS':
+            return fila['estructura__costo_por_pieza']
+        return fila['estructura__costo_por_metro']
+    return fila['accesorio__costo_unitario']
+
+
+def _movimientos_costeables():
+    """Movimientos que mueven existencias y siguen ligados a un ítem"""
+    return HistorialInventario.objects.filter(
+        tipo_movimiento__in=MOVIMIENTOS_ENTRADA + MOVIMIENTOS_SALIDA,
+    ).filter(
+        Q(lona__isnull=False) | Q(estructura__isnull=False) | Q(accesorio__isnull=False)
+    )
+
+
+# =============================================================================
+# SALDO POR ESPECIFICACIÓN
+# =============================================================================
+
+class _Saldo:
+    """Existencia y valor de una especificación durante el recosteo"""
+
+    def __init__(self, metodo, cantidad=CERO, valor=CERO, capas=None):
+        self.metodo = metodo
+        self.cantidad = Decimal(cantidad)
+        self.valor = Decimal(valor)
+        self.capas = [[Decimal(c), Decimal(u)] for c, u in (capas or [])]
+
+    @classmethod
+    def desde_costeo(cls, costeo):
+        return cls(costeo.metodo, costeo.saldo_cantidad, costeo.saldo_valor, costeo.capas)
+
+    def entrada(self, cantidad, costo):
+        self.cantidad += cantidad
+        self.valor += cantidad * costo
+        if self.metodo == 'FIFO':
+            self.capas.append([cantidad, costo])
+        return cantidad * costo
+
+    def salida(self, cantidad, costo_lote):
+        """Retorna el costo total de la salida y descarga el saldo"""
+        if self.metodo == 'FIFO':
+            costo, pendiente = CERO, cantidad
+            while pendiente > 0 and self.capas:
+                capa = self.capas[0]
+                usado = min(capa[0], pendiente)
+                costo += usado * capa[1]
+                capa[0] -= usado
+                pendiente -= usado
+                if capa[0] <= 0:
+                    self.capas.pop(0)
+            costo += pendiente * costo_lote
+        elif self.cantidad > 0:
+            costo = self.valor / self.cantidad * min(cantidad, self.cantidad)
+            costo += max(cantidad - self.cantidad, CERO) * costo_lote
+        else:
+            costo = cantidad * costo_lote
+
+        self.cantidad = max(self.cantidad - cantidad, CERO)
+        self.valor = max(self.valor - costo, CERO) if self.cantidad > 0 else CERO
+        if self.metodo == 'FIFO':
+            self.valor = sum((c * u for c, u in self.capas), CERO)
+        return costo
+
+    def capas_json(self):
+        return [[str(c), str(u)] for c, u in self.capas]
+
+
+# =============================================================================
+# RECOSTEO
+# =============================================================================
+
+def _saldo_anterior(clave, fecha, historial_id, metodo):
+    """Saldo guardado en el último movimiento costeado antes del punto indicado"""
+    anterior = (
+        CosteoMovimiento.objects
+        .filter(clave_material=clave, metodo=metodo)
+        .filter(Q(fecha_movimiento__lt=fecha) | Q(fecha_movimiento=fecha, historial_id__lt=historial_id))
+        .order_by('-fecha_movimiento', '-historial_id')
+        .first()
+    )
+    return _Saldo.desde_costeo(anterior) if anterior else _Saldo(metodo)
+
+
+def _costear(filas, inicios, metodo, batch_size):
+    """
+    Recorre las filas (ordenadas por fecha) y crea los costeos de cada
+    especificación desde su punto de inicio. Retorna la cantidad creada.
+    """
+    saldos, pendientes, creados = {}, [], 0
+    for fila in filas:
+        clave = clave_material(fila)
+        if inicios is not None and clave not in inicios:
+            continue
+        inicio = inicios[clave] if inicios is not None else None
+        if inicio and (fila['fecha_movimiento'], fila['id_historial']) < inicio:
+            continue
+        saldo = saldos.get(clave)
+        if saldo is None:
+            saldo = _saldo_anterior(clave, *inicio, metodo) if inicio else _Saldo(metodo)
+            saldos[clave] = saldo
+
+        cantidad = fila['cantidad_movimiento']
+        costo_lote = _costo_lote(fila) or CERO
+        if fila['tipo_movimiento'] in MOVIMIENTOS_ENTRADA:
+            total = saldo.entrada(cantidad, costo_lote)
+        else:
+            total = -saldo.salida(cantidad, costo_lote)
+            cantidad = -cantidad
+
+        pendientes.append(CosteoMovimiento(
+            historial_id=fila['id_historial'],
+            clave_material=clave,
+            metodo=metodo,
+            fecha_movimiento=fila['fecha_movimiento'],
+            orden_produccion_id=fila['orden_produccion_id'],
+            cantidad=cantidad,
+            costo_unitario=(abs(total) / abs(cantidad)).quantize(DIEZMILESIMA, ROUND_HALF_UP) if cantidad else CERO,
+            costo_total=total.quantize(CENTAVO, ROUND_HALF_UP),
+            saldo_cantidad=saldo.cantidad,
+            saldo_valor=saldo.valor.quantize(CENTAVO, ROUND_HALF_UP),
+            capas=saldo.capas_json(),
+        ))
+        if len(pendientes) >= batch_size:
+            CosteoMovimiento.objects.bulk_create(pendientes)
+            creados += len(pendientes)
+            pendientes = []
+
+    CosteoMovimiento.objects.bulk_create(pendientes)
+    return creados + len(pendientes)
+
+
+def _bloquear_claves(claves):
+    """
+    Serializa los recosteos concurrentes de las mismas especificaciones:
+    bloquea (SELECT ... FOR UPDATE) el primer movimiento de cada clave, en
+    orden de clave para no generar bloqueos cruzados. El segundo recosteo
+    espera y luego borra y rehace lo que dejó el primero, en lugar de chocar
+    con él en el OneToOne de CosteoMovimiento.
+    """
+    for clave in sorted(claves):
+        list(
+            _movimientos_costeables().filter(filtro_clave(clave))
+            .order_by('fecha_movimiento', 'id_historial')
+            .select_for_update().values_list('pk', flat=True)[:1]
+        )
+
+
+@transaction.atomic
+def recostear(inicios=None, metodo=None, batch_size=1000):
+    """
+    Recostea las especificaciones indicadas desde su primer movimiento
+    afectado. `inicios` es {clave: (fecha, id_historial)}; None como punto de
+    inicio recostea toda la historia de la clave, y `inicios=None` recostea
+    todo el inventario en una sola pasada. Retorna la cantidad de movimientos
+    costeados.
+    """
+    metodo = metodo or METODO_COSTEO
+    movimientos = _movimientos_costeables()
+
+    if inicios is None:
+        CosteoMovimiento.objects.all().delete()
+    else:
+        if not inicios:
+            return 0
+        # El saldo guardado con otro método no sirve de punto de partida:
+        # esas claves se recostean desde el principio
+        inicios = dict(inicios)
+        otro_metodo = (
+            CosteoMovimiento.objects.filter(clave_material__in=list(inicios)).exclude(metodo=metodo)
+            .values_list('clave_material', flat=True).distinct()
+        )
+        for clave in otro_metodo:
+            inicios[clave] = None
+        filtro_claves = Q()
+        for clave in inicios:
+            filtro_claves |= filtro_clave(clave)
+        movimientos = movimientos.filter(filtro_claves)
+        _bloquear_claves(inicios)
+
+        # Borrar los costeos desde el punto de inicio de cada clave
+        for clave, inicio in inicios.items():
+            borrar = CosteoMovimiento.objects.filter(clave_material=clave)
+            if inicio:
+                fecha, historial_id = inicio
+                borrar = borrar.filter(
+                    Q(fecha_movimiento__gt=fecha) | Q(fecha_movimiento=fecha, historial_id__gte=historial_id)
+                )
+            borrar.delete()
+
+        primeros = [inicio for inicio in inicios.values() if inicio]
+        if len(primeros) == len(inicios):
+            movimientos = movimientos.filter(fecha_movimiento__gte=min(primeros)[0])
+
+    filas = (
+        movimientos.values(*CAMPOS_FILA)
+        .order_by('fecha_movimiento', 'id_historial')
+        .iterator(chunk_size=2000)
+    )
+    return _costear(filas, inicios, metodo, batch_size)
+
+
+def inicios_pendientes():
+    """
+    Primer movimiento sin costear de cada especificación: {clave: (fecha, id)}.
+    Incluye los movimientos con fecha anterior a otros ya costeados, por lo
+    que el recosteo de esas claves también corrige los posteriores.
+    """
+    inicios = {}
+    filas = (
+        _movimientos_costeables()
+        .filter(costeo__isnull=True)
+        .values(*CAMPOS_FILA)
+        .order_by('fecha_movimiento', 'id_historial')
+    )
+    for fila in filas:
+        inicios.setdefault(clave_material(fila), (fila['fecha_movimiento'], fila['id_historial']))
+    return inicios
+
+
+def inicios_desde(fecha):
+    """Punto de inicio de todas las especificaciones con movimientos desde `fecha`"""
+    inicios = {}
+    filas = (
+        _movimientos_costeables()
+        .filter(fecha_movimiento__gte=fecha)
+        .values(*CAMPOS_FILA)
+        .order_by('fecha_movimiento', 'id_historial')
+    )
+    for fila in filas:
+        inicios.setdefault(clave_material(fila), (fila['fecha_movimiento'], fila['id_historial']))
+    return inicios
+
+
+def costear_pendientes(metodo=None):
+    """Costea los movimientos nuevos (y recostea lo posterior a ellos)"""
+    metodo = metodo or METODO_COSTEO
+    inicios = inicios_pendientes()
+    # Si cambió el método, las claves con costeos de otro método se recostean completas
+    otro_metodo = set(
+        CosteoMovimiento.objects.exclude(metodo=metodo)
+        .values_list('clave_material', flat=True).distinct()
+    )
+    for clave in otro_metodo:
+        inicios[clave] = None
+    return recostear(inicios, metodo)
+
+
+def costear_movimiento(historial_id, metodo=None):
+    """Recostea la especificación de un movimiento desde ese movimiento"""
+    fila = _movimientos_costeables().filter(pk=historial_id).values(*CAMPOS_FILA).first()
+    if fila is None:
+        return 0
+    return recostear({clave_material(fila): (fila['fecha_movimiento'], fila['id_historial'])}, metodo)
+
+
+def _costear_al_confirmar(costear, *args):
+    """
+    Programa `costear(*args)` para después del commit. El movimiento ya está
+    guardado: si el costeo falla no se propaga el error, se registra y el
+    movimiento queda sin costear para recostear_inventario.
+    """
+    def ejecutar():
+        try:
+            costear(*args)
+        except Exception:
+            logger.exception('No se pudo costear %s%r; queda pendiente para recostear_inventario',
+                              costear.__name__, args)
+
+    transaction.on_commit(ejecutar)
+
+
+def programar_costeo(historial):
+    """Costea el movimiento al confirmar la transacción actual"""
+    if historial.tipo_movimiento in MOVIMIENTOS_ENTRADA + MOVIMIENTOS_SALIDA:
+        _costear_al_confirmar(costear_movimiento, historial.pk)
+
+
+def costear_items(desde, metodo=None):
+    """
+    Recostea las especificaciones de los ítems {(tipo_inventario, pk): fecha}
+    desde su primer movimiento en esa fecha o después.
+    """
+    por_tipo = {}
+    for (tipo, pk), fecha in desde.items():
+        ids, primera = por_tipo.get(tipo, (set(), fecha))
+        ids.add(pk)
+        por_tipo[tipo] = (ids, min(primera, fecha))
+    filtro = Q()
+    for tipo, (ids, fecha) in por_tipo.items():
+        filtro |= Q(tipo_inventario=tipo, fecha_movimiento__gte=fecha, **{f'{tipo.lower()}_id__in': ids})
+    if not filtro:
+        return 0
+
+    inicios = {}
+    filas = (
+        _movimientos_costeables().filter(filtro)
+        .values(*CAMPOS_FILA)
+        .order_by('fecha_movimiento', 'id_historial')
+    )
+    for fila in filas:
+        inicios.setdefault(clave_material(fila), (fila['fecha_movimiento'], fila['id_historial']))
+    return recostear(inicios, metodo)
+
+
+def programar_costeo_lote(historiales):
+    """
+    Costea al confirmar la transacción los movimientos creados con
+    bulk_create, que no disparan signals (y en MySQL quedan sin pk): se
+    recostean las especificaciones de sus ítems desde la fecha más antigua.
+    """
+    desde = {}
+    for historial in historiales:
+        if historial.tipo_movimiento not in MOVIMIENTOS_ENTRADA + MOVIMIENTOS_SALIDA:
+            continue
+        item = (
+            historial.tipo_inventario,
+            historial.lona_id or historial.estructura_id or historial.accesorio_id,
+        )
+        if item[1] is None:
+            continue
+        fecha = historial.fecha_movimiento
+        desde[item] = min(desde.get(item, fecha), fecha)
+    if desde:
+        _costear_al_confirmar(costear_items, desde)
+
+
+# =============================================================================
+# CONSULTAS
+# =============================================================================
+
+def costo_material_orden(orden):
+    """
+    Costo del material consumido por la orden: salidas menos devoluciones
+    costeadas, en una sola consulta agregada.
+    """
+    total = CosteoMovimiento.objects.filter(orden_produccion=orden).aggregate(
+        total=Sum('costo_total')
+    )['total']
+    return -(total or CERO)
@@ -0,0 +1,194 @@
+"""
+Etiquetas con código de barras / QR y búsqueda por escaneo
+American Carpas 1 SAS
+
+Las etiquetas llevan el código del lote (LON-0001, EST-0001, ACC-0001) en
+Code128 y en QR. Al escanear, el prefijo del código indica la tabla, así la
+búsqueda es una sola consulta por el índice único del código. Los códigos
+sin prefijo conocido (o el UUID de codigo_qr) se resuelven con una sola
+consulta UNION ALL sobre las tres tablas.
+"""
+
+import io
+import uuid
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.barcode import code128, qr
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from django.db.models import CharField, Value
+from django.urls import reverse
+
+from .models import InventarioLona, InventarioEstructura
+from .reservas import MODELOS_INVENTARIO, campos_stock, codigo_item, cantidad_libre
+
+
+# Prefijo del código -> (tipo, campo código, relaciones para la tarjeta)
+PREFIJOS = {
+    'LON': ('LONA', 'codigo_rollo', ['tipo_lona', 'ancho_lona', 'color_lona', 'ubicacion']),
+    'EST': ('ESTRUCTURA', 'codigo_lote', ['tipo_estructura', 'medida_tubo', 'calibre', 'ubicacion']),
+    'ACC': ('ACCESORIO', 'codigo', ['tipo_accesorio', 'ubicacion']),
+}
+
+CAMPO_CODIGO = {tipo: campo for tipo, campo, _ in PREFIJOS.values()}
+RELACIONES = {tipo: relaciones for tipo, _, relaciones in PREFIJOS.values()}
+
+# Hoja carta, 3 columnas x 8 filas
+COLUMNAS = 3
+FILAS = 8
+MARGEN_X = 6 * mm
+MARGEN_Y = 12 * mm
+
+
+# =============================================================================
+# BÚSQUEDA POR ESCANEO
+# =============================================================================
+
+def _por_codigo_exacto(tipo, valor, campo=None):
+    modelo, _ = MODELOS_INVENTARIO[tipo]
+    return modelo.objects.select_related(*RELACIONES[tipo]).filter(
+        **{campo or CAMPO_CODIGO[tipo]: valor}
+    ).first()
+
+
+def buscar_por_codigo(codigo):
+    """
+    Ítem de inventario por código exacto (o UUID del QR). Retorna (tipo, item)
+    o (None, None) si no existe.
+    """
+    codigo = (codigo or '').strip().upper()
+    if not codigo:
+        return None, None
+
+    prefijo = codigo.split('-', 1)[0]
+    if prefijo in PREFIJOS:
+        tipo = PREFIJOS[prefijo][0]
+        item = _por_codigo_exacto(tipo, codigo)
+        if item:
+            return tipo, item
+
+    # Código sin prefijo conocido o UUID del QR: una consulta sobre las tres tablas
+    try:
+        campo, valor = 'codigo_qr', uuid.UUID(codigo)
+    except ValueError:
+        campo, valor = None, codigo
+
+    consultas = []
+    for tipo, (modelo, _) in MODELOS_INVENTARIO.items():
+        filtro = {campo or CAMPO_CODIGO[tipo]: valor}
+        consultas.append(
+            modelo.objects.filter(**filtro)
+            .annotate(tipo=Value(tipo, output_field=CharField()))
+            .values_list('tipo', 'pk')
+            .order_by()
+        )
+    encontrado = list(consultas[0].union(*consultas[1:], all=True)[:1])
+    if not encontrado:
+        return None, None
+    tipo, pk = encontrado[0]
+    return tipo, _por_codigo_exacto(tipo, pk, 'pk')
+
+
+def descripcion_item(item):
+    """Descripción corta sin el código (para etiqueta y tarjeta)"""
+    if isinstance(item, InventarioLona):
+        return f"{item.tipo_lona} {item.ancho_lona} {item.color_lona}"
+    if isinstance(item, InventarioEstructura):
+        return f"{item.tipo_estructura} {item.medida_tubo} Cal.{item.calibre.valor_calibre}"
+    return item.nombre
+
+
+def tarjeta(tipo, item):
+    """Datos compactos del ítem para la respuesta del escáner"""
+    _, campo_disponible, campo_reservado, unidad = campos_stock(item)
+    ubicacion = item.ubicacion
+    url_detalle = {
+        'LONA': 'inventario:lona_detail',
+        'ESTRUCTURA': 'inventario:estructura_detail',
+        'ACCESORIO': 'inventario:accesorio_detail',
+    }[tipo]
+    return {
+        'encontrado': True,
+        'tipo': tipo,
+        'id': item.pk,
+        'codigo': codigo_item(item),
+        'descripcion': descripcion_item(item),
+        'estado': item.estado,
+        'disponible': float(getattr(item, campo_disponible)),
+        'reservado': float(getattr(item, campo_reservado)),
+        'libre': float(cantidad_libre(item)),
+        'unidad': unidad,
+        'ubicacion': ubicacion.codigo if ubicacion else None,
+        'lote_proveedor': item.lote_serial,
+        'url': reverse(url_detalle, args=[item.pk]),
+    }
+
+
+# =============================================================================
+# ETIQUETAS PDF
+# =============================================================================
+
+def items_para_etiquetas(tipo, ids):
+    """Ítems del tipo indicado en el orden de los ids recibidos"""
+    modelo, _ = MODELOS_INVENTARIO[tipo]
+    items = modelo.objects.select_related(*RELACIONES[tipo]).in_bulk(ids)
+    return [items[pk] for pk in ids if pk in items]
+
+
+def _dibujar_etiqueta(pdf, item, x, y, ancho, alto):
+    codigo = codigo_item(item)
+    relleno = 3 * mm
+
+    # QR a la derecha
+    lado_qr = alto - 2 * relleno
+    widget = qr.QrCodeWidget(codigo)
+    x1, y1, x2, y2 = widget.getBounds()
+    dibujo = Drawing(lado_qr, lado_qr, transform=[lado_qr / (x2 - x1), 0, 0, lado_qr / (y2 - y1), 0, 0])
+    dibujo.add(widget)
+    renderPDF.draw(dibujo, pdf, x + ancho - lado_qr - relleno, y + relleno)
+
+    # Code128, código y descripción a la izquierda
+    ancho_texto = ancho - lado_qr - 3 * relleno
+    barras = code128.Code128(codigo, barHeight=10 * mm, barWidth=0.8)
+    if barras.width > ancho_texto:
+        barras = code128.Code128(codigo, barHeight=10 * mm, barWidth=0.8 * ancho_texto / barras.width)
+    barras.drawOn(pdf, x + relleno - barras.lquiet, y + alto - relleno - 10 * mm)
+
+    pdf.setFont('Helvetica-Bold', 10)
+    pdf.drawString(x + relleno, y + alto - relleno - 14 * mm, codigo)
+    pdf.setFont('Helvetica', 6.5)
+    descripcion = descripcion_item(item)
+    while descripcion and pdf.stringWidth(descripcion, 'Helvetica', 6.5) > ancho_texto:
+        descripcion = descripcion[:-1]
+    pdf.drawString(x + relleno, y + alto - relleno - 18 * mm, descripcion)
+    if item.ubicacion_id:
+        pdf.drawString(x + relleno, y + alto - relleno - 21 * mm, f"Ubic.: {item.ubicacion.codigo}")
+
+
+def generar_etiquetas_pdf(items, copias=1):
+    """PDF en hoja carta con una cuadrícula de etiquetas (COLUMNAS x FILAS)"""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.setTitle('Etiquetas de inventario')
+    ancho_pagina, alto_pagina = letter
+    ancho = (ancho_pagina - 2 * MARGEN_X) / COLUMNAS
+    alto = (alto_pagina - 2 * MARGEN_Y) / FILAS
+
+    por_hoja = COLUMNAS * FILAS
+    posicion = 0
+    for item in items:
+        for _ in range(copias):
+            if posicion and posicion % por_hoja == 0:
+                pdf.showPage()
+            celda = posicion % por_hoja
+            fila, columna = divmod(celda, COLUMNAS)
+            x = MARGEN_X + columna * ancho
+            y = alto_pagina - MARGEN_Y - (fila + 1) * alto
+            _dibujar_etiqueta(pdf, item, x, y, ancho, alto)
+            posicion += 1
+
+    pdf.save()
+    return buffer.getvalue()
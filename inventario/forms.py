@@ -5,6 +5,8 @@ American Carpas 1 SAS
 Versión: 2.0 - Fase 2: Catálogos Completos
 """
 
+from decimal import Decimal
+
 from django import forms
 from .models import (
     # Catálogos Base
@@ -20,6 +22,7 @@ from .models import (
     # Órdenes de Producción
     OrdenProduccion, OrdenProduccionItem,
 )
+from .conteos import NO_CONTADOS_CHOICES
 
 
 # =============================================================================
@@ -647,4 +650,147 @@ class OrdenProduccionItemForm(forms.ModelForm):
                 'class': 'form-control',
                 'rows': 2
             }),
-        }
\ No newline at end of file
+        }
+
+# =============================================================================
+# FORMULARIO - RECEPCIÓN MASIVA
+# =============================================================================
+
+class RecepcionMasivaForm(forms.Form):
+    """Carga de una planilla de entrega del proveedor (.xlsx o .csv)"""
+    
+    TIPO_CHOICES = [
+        ('LONA', 'Lonas'),
+        ('ESTRUCTURA', 'Estructura'),
+        ('ACCESORIO', 'Accesorios'),
+    ]
+    
+    tipo_inventario = forms.ChoiceField(
+        choices=TIPO_CHOICES,
+        label='Tipo de Inventario',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    archivo = forms.FileField(
+        label='Planilla',
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.xlsx,.csv'
+        }),
+        help_text='Formatos permitidos: Excel (.xlsx) o CSV. La primera fila debe tener los encabezados'
+    )
+    documento = forms.CharField(
+        max_length=50,
+        required=False,
+        label='Documento de Referencia',
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Ej: Remisión 4512'
+        }),
+        help_text='Si se deja vacío se usa el número de factura de cada fila'
+    )
+    
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError('Formato no soportado, use .xlsx o .csv')
+        return archivo
+
+
+class ConteoFisicoForm(forms.Form):
+    """Apertura de un conteo físico de una ubicación"""
+    
+    ubicacion = forms.ModelChoiceField(
+        queryset=UbicacionAlmacen.objects.filter(activo=True),
+        label='Ubicación',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    tipo_inventario = forms.ChoiceField(
+        choices=[('', 'Todos')] + RecepcionMasivaForm.TIPO_CHOICES,
+        required=False,
+        label='Tipo de Inventario',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    observaciones = forms.CharField(
+        required=False,
+        label='Observaciones',
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2})
+    )
+
+
+class LecturasConteoForm(forms.Form):
+    """Bloque de lecturas del escáner para un conteo abierto"""
+    
+    lecturas = forms.CharField(
+        label='Lecturas',
+        widget=forms.Textarea(attrs={
+            'class': 'form-control font-monospace',
+            'rows': 8,
+            'autofocus': True,
+            'placeholder': 'LON-0001\nEST-0007;12\nACC-0003;150'
+        }),
+        help_text='Una lectura por línea. Solo el código confirma el lote completo; '
+                  'CÓDIGO;cantidad registra la cantidad contada'
+    )
+    acumular = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Sumar a lo ya contado',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
+class ConciliarConteoForm(forms.Form):
+    """Opciones para conciliar un conteo físico"""
+    
+    no_contados = forms.ChoiceField(
+        choices=NO_CONTADOS_CHOICES,
+        initial='IGNORAR',
+        label='Líneas sin contar',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+
+class AsignarLonaForm(forms.Form):
+    """Especificación y largo de un corte de lona para una orden de producción"""
+    
+    tipo_lona = forms.ModelChoiceField(
+        queryset=TipoLona.objects.filter(activo=True),
+        label='Tipo de Lona',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    ancho_lona = forms.ModelChoiceField(
+        queryset=AnchoLona.objects.filter(activo=True),
+        label='Ancho',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    color_lona = forms.ModelChoiceField(
+        queryset=ColorLona.objects.filter(activo=True),
+        label='Color',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    tratamiento = forms.ModelChoiceField(
+        queryset=TratamientoLona.objects.filter(activo=True),
+        required=False,
+        empty_label='Cualquiera',
+        label='Tratamiento',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    metros = forms.DecimalField(
+        min_value=Decimal('0.01'),
+        max_digits=10,
+        decimal_places=2,
+        label='Metros del Corte',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+    item = forms.ModelChoiceField(
+        queryset=OrdenProduccionItem.objects.none(),
+        required=False,
+        empty_label='Sin ítem',
+        label='Ítem de la Orden',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
+    def __init__(self, *args, orden=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if orden is not None:
+            self.fields['item'].queryset = orden.items.all()
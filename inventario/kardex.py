@@ -0,0 +1,171 @@
+"""
+Kardex (libro de movimientos) de inventario
+American Carpas 1 SAS
+
+Paginación por llave (keyset) sobre (fecha_movimiento, id_historial): cada
+página se pide "después de" o "antes de" la última fila vista, así el costo
+es el mismo en la primera página que en la millonésima (sin OFFSET).
+El saldo acumulado de cada fila es cantidad_nueva del movimiento; solo se
+muestra cuando se consulta un único ítem (entre ítems distintos no tiene
+sentido como saldo corrido).
+"""
+
+import csv
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+
+from .models import HistorialInventario
+from .reservas import MODELOS_INVENTARIO, codigo_item
+
+
+TAMANO_PAGINA = 50
+
+
+# =============================================================================
+# CONSULTA BASE
+# =============================================================================
+
+def movimientos(tipo_inventario=None, item=None, desde=None, hasta=None):
+    """Movimientos filtrados por tipo de inventario, ítem y rango de fechas"""
+    qs = HistorialInventario.objects.select_related(
+        'lona', 'estructura', 'accesorio', 'orden_produccion', 'ejecutado_por', 'registrado_por'
+    )
+    if item is not None:
+        _, _, campo_fk, _ = _tipo_item(item)
+        qs = qs.filter(**{campo_fk: item})
+    elif tipo_inventario:
+        qs = qs.filter(tipo_inventario=tipo_inventario)
+    if desde:
+        qs = qs.filter(fecha_movimiento__gte=datetime.combine(desde, time.min))
+    if hasta:
+        qs = qs.filter(fecha_movimiento__lt=datetime.combine(hasta + timedelta(days=1), time.min))
+    return qs
+
+
+def _tipo_item(item):
+    for tipo, (modelo, campo_fk) in MODELOS_INVENTARIO.items():
+        if isinstance(item, modelo):
+            return tipo, modelo, campo_fk, codigo_item(item)
+    raise TypeError(f"Tipo de ítem de inventario no soportado: {type(item).__name__}")
+
+
+def buscar_item(tipo_inventario, codigo):
+    """Ítem por código exacto dentro de un tipo de inventario (o None)"""
+    modelo, _ = MODELOS_INVENTARIO[tipo_inventario]
+    campo = {'LONA': 'codigo_rollo', 'ESTRUCTURA': 'codigo_lote', 'ACCESORIO': 'codigo'}[tipo_inventario]
+    return modelo.objects.filter(**{campo: codigo.strip()}).first()
+
+
+# =============================================================================
+# PAGINACIÓN POR LLAVE
+# =============================================================================
+
+def codificar_cursor(movimiento):
+    return f"{movimiento.fecha_movimiento.isoformat()}_{movimiento.id_historial}"
+
+
+def decodificar_cursor(cursor):
+    """Retorna (fecha_movimiento, id_historial) o None si el cursor es inválido"""
+    try:
+        fecha, pk = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(fecha), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def pagina(qs, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Página en orden cronológico. `despues` / `antes` son cursores de
+    la última / primera fila de la página vista.
+    """
+    llave_despues = decodificar_cursor(despues) if despues else None
+    llave_antes = decodificar_cursor(antes) if antes else None
+
+    if llave_antes:
+        fecha, pk = llave_antes
+        filas = list(
+            qs.filter(Q(fecha_movimiento__lt=fecha) | Q(fecha_movimiento=fecha, id_historial__lt=pk))
+            .order_by('-fecha_movimiento', '-id_historial')[:tamano + 1]
+        )
+        hay_anterior = len(filas) > tamano
+        filas = list(reversed(filas[:tamano]))
+        hay_siguiente = True
+    else:
+        if llave_despues:
+            fecha, pk = llave_despues
+            qs = qs.filter(Q(fecha_movimiento__gt=fecha) | Q(fecha_movimiento=fecha, id_historial__gt=pk))
+        filas = list(qs.order_by('fecha_movimiento', 'id_historial')[:tamano + 1])
+        hay_siguiente = len(filas) > tamano
+        filas = filas[:tamano]
+        hay_anterior = llave_despues is not None
+
+    for fila in filas:
+        fila.es_entrada = fila.tipo_movimiento in HistorialInventario.MOVIMIENTOS_ENTRADA
+        fila.es_salida = fila.tipo_movimiento in HistorialInventario.MOVIMIENTOS_SALIDA
+
+    return {
+        'movimientos': filas,
+        'hay_anterior': hay_anterior and bool(filas),
+        'hay_siguiente': hay_siguiente and bool(filas),
+        'cursor_anterior': codificar_cursor(filas[0]) if filas else None,
+        'cursor_siguiente': codificar_cursor(filas[-1]) if filas else None,
+    }
+
+
+# =============================================================================
+# EXPORTACIÓN
+# =============================================================================
+
+COLUMNAS_EXPORTACION = [
+    'Fecha', 'Tipo Movimiento', 'Tipo Inventario', 'Ítem', 'Entrada', 'Salida',
+    'Saldo', 'Unidad', 'Documento', 'Motivo', 'Ejecutado Por',
+]
+_POSICION_SALDO = COLUMNAS_EXPORTACION.index('Saldo')
+
+
+def columnas_exportacion(con_saldo=True):
+    """Títulos de la exportación; sin saldo cuando se mezclan varios ítems"""
+    if con_saldo:
+        return list(COLUMNAS_EXPORTACION)
+    return COLUMNAS_EXPORTACION[:_POSICION_SALDO] + COLUMNAS_EXPORTACION[_POSICION_SALDO + 1:]
+
+
+def filas_exportacion(qs, con_saldo=True, tamano_lote=2000):
+    """Genera las filas del kardex en orden cronológico usando iterator()"""
+    for mov in qs.order_by('fecha_movimiento', 'id_historial').iterator(chunk_size=tamano_lote):
+        item = mov.item_inventario
+        entrada = mov.cantidad_movimiento if mov.tipo_movimiento in HistorialInventario.MOVIMIENTOS_ENTRADA else None
+        salida = mov.cantidad_movimiento if mov.tipo_movimiento in HistorialInventario.MOVIMIENTOS_SALIDA else None
+        fila = [
+            mov.fecha_movimiento.strftime('%Y-%m-%d %H:%M'),
+            mov.get_tipo_movimiento_display(),
+            mov.get_tipo_inventario_display(),
+            codigo_item(item) if item else '',
+            entrada,
+            salida,
+            mov.cantidad_nueva,
+            mov.unidad_medida,
+            mov.documento_referencia or '',
+            mov.motivo or '',
+            str(mov.ejecutado_por) if mov.ejecutado_por_id else '',
+        ]
+        if not con_saldo:
+            del fila[_POSICION_SALDO]
+        yield fila
+
+
+class _Eco:
+    """Objeto tipo archivo que devuelve lo escrito (para csv + StreamingHttpResponse)"""
+
+    def write(self, valor):
+        return valor
+
+
+def csv_en_streaming(qs, con_saldo=True):
+    """Genera el CSV línea por línea sin armarlo en memoria"""
+    escritor = csv.writer(_Eco())
+    yield '\ufeff'  # BOM para que Excel reconozca UTF-8
+    yield escritor.writerow(columnas_exportacion(con_saldo))
+    for fila in filas_exportacion(qs, con_saldo):
+        yield escritor.writerow(['' if v is None else v for v in fila])
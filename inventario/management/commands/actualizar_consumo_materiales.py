@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para actualizar el resumen diario de consumo de materiales
+Uso: python manage.py actualizar_consumo_materiales [--completo]
+
+Pensado para ejecutarse periódicamente (cron / tarea programada). Solo
+recalcula los días con salidas nuevas desde la última ejecución y los últimos
+INVENTARIO_DIAS_REVISION_CONSUMO días; --completo
+reconstruye todo el resumen desde el historial.
+"""
+
+from django.core.management.base import BaseCommand
+
+from inventario.consumo import actualizar_consumo
+
+
+class Command(BaseCommand):
+    help = 'Resume las salidas del historial en el consumo diario por especificación de material'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Reconstruir todo el resumen',
+        )
+
+    def handle(self, *args, **options):
+        filas = actualizar_consumo(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Consumo diario actualizado ({filas} filas)'
+        ))
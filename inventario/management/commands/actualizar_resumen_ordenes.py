@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para recalcular el resumen de las órdenes de producción
+Uso: python manage.py actualizar_resumen_ordenes [--orden ID ...]
+
+Los signals mantienen el resumen al día; este comando sirve para la carga
+inicial y después de modificaciones masivas hechas con update() o SQL.
+"""
+
+from django.core.management.base import BaseCommand
+
+from inventario.resumen_ordenes import actualizar_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen (ítems y materiales) de las órdenes de producción'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orden',
+            type=int,
+            nargs='+',
+            help='IDs de las órdenes a recalcular. Por defecto todas',
+        )
+
+    def handle(self, *args, **options):
+        resumenes = actualizar_resumenes(options['orden'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Resumen actualizado para {len(resumenes)} órdenes'
+        ))
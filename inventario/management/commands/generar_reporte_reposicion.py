@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para generar el reporte diario de reposición
+Uso: python manage.py generar_reporte_reposicion [--fecha AAAA-MM-DD] [--ventana 30] [--cobertura 30]
+
+Pensado para ejecutarse una vez al día (cron / tarea programada).
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.stock_minimo import (
+    generar_reporte_reposicion, VENTANA_CONSUMO_DIAS, DIAS_COBERTURA_OBJETIVO,
+)
+
+
+class Command(BaseCommand):
+    help = 'Genera la foto diaria de ítems en stock mínimo con la cantidad sugerida a pedir'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha del reporte (AAAA-MM-DD). Por defecto hoy',
+        )
+        parser.add_argument(
+            '--ventana',
+            type=int,
+            default=VENTANA_CONSUMO_DIAS,
+            help='Días de historial para calcular el consumo promedio',
+        )
+        parser.add_argument(
+            '--cobertura',
+            type=int,
+            default=DIAS_COBERTURA_OBJETIVO,
+            help='Días de consumo que debe cubrir el pedido además del tiempo de entrega',
+        )
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+        if options['ventana'] <= 0:
+            raise CommandError('La ventana debe ser mayor a cero')
+
+        sugerencias = generar_reporte_reposicion(
+            fecha=fecha,
+            ventana=options['ventana'],
+            cobertura=options['cobertura'],
+        )
+
+        por_tipo = {}
+        for s in sugerencias:
+            por_tipo[s.tipo_inventario] = por_tipo.get(s.tipo_inventario, 0) + 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Reporte de reposición generado: {len(sugerencias)} ítems en stock mínimo'
+        ))
+        for tipo, cantidad in sorted(por_tipo.items()):
+            self.stdout.write(f'  - {tipo}: {cantidad}')
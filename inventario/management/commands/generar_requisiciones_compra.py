@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para generar las requisiciones de compra en borrador
+Uso: python manage.py generar_requisiciones_compra [--fecha AAAA-MM-DD] [--ventana 30] [--cobertura 30] [--simulacion]
+
+Reemplaza las requisiciones en BORRADOR por una por proveedor con los
+faltantes actuales (stock mínimo y órdenes abiertas) y la mejor oferta de
+cada especificación. Lista también los faltantes sin oferta, con su clave
+para registrar la equivalencia.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.requisiciones import calcular_requisiciones, generar_requisiciones
+from inventario.stock_minimo import VENTANA_CONSUMO_DIAS, DIAS_COBERTURA_OBJETIVO
+
+
+class Command(BaseCommand):
+    help = 'Genera las requisiciones de compra en borrador a partir de los faltantes de inventario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha de las requisiciones (AAAA-MM-DD). Por defecto hoy',
+        )
+        parser.add_argument(
+            '--ventana',
+            type=int,
+            default=VENTANA_CONSUMO_DIAS,
+            help='Días de historial para calcular el consumo promedio',
+        )
+        parser.add_argument(
+            '--cobertura',
+            type=int,
+            default=DIAS_COBERTURA_OBJETIVO,
+            help='Días de consumo que debe cubrir la reposición además del tiempo de entrega',
+        )
+        parser.add_argument(
+            '--simulacion',
+            action='store_true',
+            help='Calcula y muestra el plan sin guardar requisiciones',
+        )
+
+    def handle(self, *args, **options):
+        fecha = None
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+        if options['ventana'] <= 0:
+            raise CommandError('La ventana debe ser mayor a cero')
+
+        if options['simulacion']:
+            plan = calcular_requisiciones(options['ventana'], options['cobertura'])
+        else:
+            plan = generar_requisiciones(
+                fecha=fecha,
+                ventana=options['ventana'],
+                cobertura=options['cobertura'],
+            )
+
+        for requisicion in plan['requisiciones']:
+            aviso = '' if requisicion['cumple_minimo'] else ' (no cumple monto mínimo)'
+            self.stdout.write(
+                f"  - {requisicion['razon_social']}: {len(requisicion['lineas'])} líneas, "
+                f"${requisicion['total']:,.2f} COP{aviso}"
+            )
+        if plan['sin_oferta']:
+            self.stdout.write(self.style.WARNING(f"Faltantes sin oferta: {len(plan['sin_oferta'])}"))
+            for faltante in plan['sin_oferta']:
+                self.stdout.write(
+                    f"  - {faltante['descripcion']}: {faltante['faltante']} {faltante['unidad']} "
+                    f"[{faltante['clave']}]"
+                )
+
+        accion = 'calculadas (simulación)' if options['simulacion'] else 'generadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Requisiciones {accion}: {len(plan['requisiciones'])} proveedores, "
+            f"{plan['faltantes']} faltantes"
+        ))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para generar cortes de saldos de inventario
+Uso: python manage.py generar_saldos_inventario [--fecha AAAA-MM-DD]
+
+Por defecto genera el corte del día anterior. Conviene programarlo a diario
+(o al menos en cada cierre de mes) después de medianoche.
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventario.saldos import generar_corte
+
+
+class Command(BaseCommand):
+    help = 'Genera el corte de saldos de inventario al cierre de una fecha'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha del corte (AAAA-MM-DD). Por defecto ayer',
+        )
+
+    def handle(self, *args, **options):
+        fecha = timezone.now().date() - timedelta(days=1)
+        if options['fecha']:
+            try:
+                fecha = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+
+        registros = generar_corte(fecha)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Corte de saldos al {fecha:%Y-%m-%d} generado: {len(registros)} ítems'
+        ))
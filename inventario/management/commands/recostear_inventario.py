@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para costear los movimientos de inventario
+Uso: python manage.py recostear_inventario [--desde AAAA-MM-DD] [--completo] [--metodo FIFO|PROMEDIO]
+
+Sin opciones costea los movimientos pendientes (p. ej. los creados con
+bulk_create) y recostea lo posterior a ellos en sus especificaciones.
+--desde recostea desde esa fecha (p. ej. después de corregir el costo de un
+lote) y --completo recalcula toda la historia.
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario import costeo
+
+
+class Command(BaseCommand):
+    help = 'Costea los movimientos de inventario con FIFO o promedio ponderado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=str,
+            help='Recostear desde esta fecha (AAAA-MM-DD)',
+        )
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Recalcular toda la historia',
+        )
+        parser.add_argument(
+            '--metodo',
+            choices=['FIFO', 'PROMEDIO'],
+            help=f'Método de costeo. Por defecto {costeo.METODO_COSTEO} (INVENTARIO_METODO_COSTEO)',
+        )
+
+    def handle(self, *args, **options):
+        metodo = options['metodo'] or costeo.METODO_COSTEO
+
+        if options['completo']:
+            costeados = costeo.recostear(None, metodo)
+        elif options['desde']:
+            try:
+                desde = datetime.strptime(options['desde'], '%Y-%m-%d')
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+            costeados = costeo.recostear(costeo.inicios_desde(desde), metodo)
+        else:
+            costeados = costeo.costear_pendientes(metodo)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {costeados} movimientos costeados ({metodo})'
+        ))
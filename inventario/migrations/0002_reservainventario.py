@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:29
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaInventario',
+            fields=[
+                ('id_reserva', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('cantidad_reservada', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Cantidad Reservada')),
+                ('cantidad_consumida', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Cantidad Consumida')),
+                ('unidad_medida', models.CharField(help_text='metros, unidades, piezas', max_length=20, verbose_name='Unidad de Medida')),
+                ('estado', models.CharField(choices=[('ACTIVA', 'Activa'), ('LIBERADA', 'Liberada'), ('CONSUMIDA', 'Consumida')], default='ACTIVA', max_length=20, verbose_name='Estado')),
+                ('fecha_reserva', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Reserva')),
+                ('fecha_cierre', models.DateTimeField(blank=True, help_text='Fecha en que se liberó o consumió la reserva', null=True, verbose_name='Fecha de Cierre')),
+                ('accesorio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='inventario.inventarioaccesorio', verbose_name='Accesorio')),
+                ('estructura', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='inventario.inventarioestructura', verbose_name='Estructura')),
+                ('lona', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reservas', to='inventario.inventariolona', verbose_name='Lona')),
+                ('orden', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservas', to='inventario.ordenproduccion', verbose_name='Orden de Producción')),
+                ('registrado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas_registradas', to=settings.AUTH_USER_MODEL, verbose_name='Registrado Por')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Inventario',
+                'verbose_name_plural': 'Reservas de Inventario',
+                'db_table': 'inv_reserva_inventario',
+                'ordering': ['-fecha_reserva'],
+                'indexes': [models.Index(fields=['orden', 'estado'], name='inv_reserva_orden_estado_idx'), models.Index(fields=['lona', 'estado'], name='inv_reserva_lona_estado_idx'), models.Index(fields=['estructura', 'estado'], name='inv_reserva_estr_estado_idx'), models.Index(fields=['accesorio', 'estado'], name='inv_reserva_acc_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0003_alter_tipodocumentoproveedor_dias_alerta_vencimiento'),
+        ('inventario', '0002_reservainventario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SugerenciaReposicion',
+            fields=[
+                ('id_sugerencia', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_reporte', models.DateField(default=django.utils.timezone.now, verbose_name='Fecha del Reporte')),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('codigo', models.CharField(max_length=20, verbose_name='Código')),
+                ('descripcion', models.CharField(max_length=200, verbose_name='Descripción')),
+                ('unidad_medida', models.CharField(max_length=20, verbose_name='Unidad de Medida')),
+                ('cantidad_disponible', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Cantidad Disponible')),
+                ('cantidad_minima', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Cantidad Mínima')),
+                ('consumo_diario', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Consumo Diario Promedio')),
+                ('dias_cobertura', models.DecimalField(blank=True, decimal_places=1, help_text='Días que alcanza la existencia al ritmo de consumo actual', max_digits=8, null=True, verbose_name='Días de Cobertura')),
+                ('cantidad_sugerida', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Cantidad Sugerida')),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Generación')),
+            ],
+            options={
+                'verbose_name': 'Sugerencia de Reposición',
+                'verbose_name_plural': 'Sugerencias de Reposición',
+                'db_table': 'inv_reporte_reposicion',
+                'ordering': ['-fecha_reporte', models.OrderBy(models.F('dias_cobertura'), nulls_last=True)],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['tipo_movimiento', 'fecha_movimiento'], name='inv_hist_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventarioaccesorio',
+            index=models.Index(fields=['activo', 'cantidad_disponible', 'cantidad_minima_alerta'], name='inv_acc_stock_min_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventarioestructura',
+            index=models.Index(fields=['activo', 'tipo_control', 'metros_disponibles', 'metros_minimo_alerta'], name='inv_estr_stock_min_m_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventarioestructura',
+            index=models.Index(fields=['activo', 'tipo_control', 'piezas_disponibles', 'piezas_minimo_alerta'], name='inv_estr_stock_min_p_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventariolona',
+            index=models.Index(fields=['activo', 'metros_disponibles', 'metros_minimo_alerta'], name='inv_lona_stock_min_idx'),
+        ),
+        migrations.AddField(
+            model_name='sugerenciareposicion',
+            name='accesorio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_reposicion', to='inventario.inventarioaccesorio', verbose_name='Accesorio'),
+        ),
+        migrations.AddField(
+            model_name='sugerenciareposicion',
+            name='estructura',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_reposicion', to='inventario.inventarioestructura', verbose_name='Estructura'),
+        ),
+        migrations.AddField(
+            model_name='sugerenciareposicion',
+            name='lona',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sugerencias_reposicion', to='inventario.inventariolona', verbose_name='Lona'),
+        ),
+        migrations.AddField(
+            model_name='sugerenciareposicion',
+            name='proveedor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sugerencias_reposicion', to='proveedores.proveedor', verbose_name='Proveedor'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='sugerenciareposicion',
+            unique_together={('fecha_reporte', 'tipo_inventario', 'codigo')},
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_stock_minimo_reposicion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoInventario',
+            fields=[
+                ('id_saldo', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_corte', models.DateField(help_text='Saldo al final del día', verbose_name='Fecha de Corte')),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Cantidad')),
+                ('unidad_medida', models.CharField(max_length=20, verbose_name='Unidad de Medida')),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Generación')),
+                ('accesorio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.inventarioaccesorio', verbose_name='Accesorio')),
+                ('estructura', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.inventarioestructura', verbose_name='Estructura')),
+                ('lona', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saldos', to='inventario.inventariolona', verbose_name='Lona')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Inventario',
+                'verbose_name_plural': 'Saldos de Inventario',
+                'db_table': 'inv_saldo_inventario',
+                'ordering': ['-fecha_corte', 'tipo_inventario'],
+                'indexes': [models.Index(fields=['fecha_corte', 'tipo_inventario'], name='inv_saldo_fecha_tipo_idx')],
+                'unique_together': {('fecha_corte', 'accesorio'), ('fecha_corte', 'estructura'), ('fecha_corte', 'lona')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_saldoinventario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['fecha_movimiento', 'id_historial'], name='inv_hist_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['tipo_inventario', 'fecha_movimiento', 'id_historial'], name='inv_hist_tinv_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['lona', 'fecha_movimiento', 'id_historial'], name='inv_hist_lona_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['estructura', 'fecha_movimiento', 'id_historial'], name='inv_hist_estr_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historialinventario',
+            index=models.Index(fields=['accesorio', 'fecha_movimiento', 'id_historial'], name='inv_hist_acc_fecha_id_idx'),
+        ),
+    ]
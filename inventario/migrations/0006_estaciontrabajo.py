@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:40
+
+from decimal import Decimal
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_historial_kardex_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstacionTrabajo',
+            fields=[
+                ('id_estacion', models.AutoField(primary_key=True, serialize=False)),
+                ('codigo', models.CharField(choices=[('ESTRUCTURA', 'Fabricación de Estructura'), ('PINTURA', 'Pintura de Estructura'), ('CONFECCION', 'Confección de Lona')], max_length=20, unique=True, verbose_name='Estación')),
+                ('capacidad_diaria', models.DecimalField(decimal_places=2, help_text='Metros cuadrados de carpa que la estación procesa en un día', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Capacidad Diaria (m²)')),
+                ('trabaja_sabado', models.BooleanField(default=True, verbose_name='Trabaja Sábados')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('activo', models.BooleanField(default=True, verbose_name='Activo')),
+            ],
+            options={
+                'verbose_name': 'Estación de Trabajo',
+                'verbose_name_plural': 'Estaciones de Trabajo',
+                'db_table': 'inv_estacion_trabajo',
+                'ordering': ['codigo'],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def calcular_avance(apps, schema_editor):
+    """Llena porcentaje_avance de las órdenes existentes (25% por fase completada)"""
+    OrdenProduccion = apps.get_model('inventario', 'OrdenProduccion')
+    fases = ['estructura_fabricada', 'estructura_pintada', 'lona_fabricada', 'terminada']
+    avance = sum(
+        models.Case(models.When(**{fase: True}, then=models.Value(25)), default=models.Value(0))
+        for fase in fases
+    )
+    OrdenProduccion.objects.update(porcentaje_avance=avance)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_estaciontrabajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenOrdenProduccion',
+            fields=[
+                ('orden', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='inventario.ordenproduccion', verbose_name='Orden de Producción')),
+                ('cantidad_items', models.PositiveIntegerField(default=0, verbose_name='Líneas de Ítems')),
+                ('total_productos', models.PositiveIntegerField(default=0, verbose_name='Total Productos')),
+                ('metros_lona_requeridos', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Metros Lona Requeridos')),
+                ('metros_lona_utilizados', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Metros Lona Utilizados')),
+                ('metros_estructura_requeridos', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Metros Estructura Requeridos')),
+                ('metros_estructura_utilizados', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Metros Estructura Utilizados')),
+                ('piezas_estructura_requeridas', models.PositiveIntegerField(default=0, verbose_name='Piezas Estructura Requeridas')),
+                ('piezas_estructura_utilizadas', models.PositiveIntegerField(default=0, verbose_name='Piezas Estructura Utilizadas')),
+                ('accesorios_requeridos', models.PositiveIntegerField(default=0, verbose_name='Accesorios Requeridos')),
+                ('accesorios_entregados', models.PositiveIntegerField(default=0, verbose_name='Accesorios Entregados')),
+                ('lineas_material', models.PositiveIntegerField(default=0, verbose_name='Líneas de Material')),
+                ('lineas_pendientes', models.PositiveIntegerField(default=0, verbose_name='Líneas Pendientes')),
+                ('estado_materiales', models.CharField(choices=[('SIN_MATERIAL', 'Sin Material Asignado'), ('PENDIENTE', 'Pendiente'), ('PARCIAL', 'Parcial'), ('COMPLETO', 'Completo')], db_index=True, default='SIN_MATERIAL', max_length=20, verbose_name='Estado de Materiales')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Orden',
+                'verbose_name_plural': 'Resúmenes de Órdenes',
+                'db_table': 'inv_orden_produccion_resumen',
+            },
+        ),
+        migrations.AddField(
+            model_name='ordenproduccion',
+            name='porcentaje_avance',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, help_text='Se calcula al guardar según las fases completadas', verbose_name='% Avance'),
+        ),
+        migrations.RunPython(calcular_avance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventario', '0007_orden_avance_resumen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteoFisico',
+            fields=[
+                ('id_conteo', models.AutoField(primary_key=True, serialize=False)),
+                ('codigo', models.CharField(help_text='Autogenerado: CF-0001', max_length=30, unique=True, verbose_name='Código')),
+                ('tipo_inventario', models.CharField(blank=True, choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], help_text='Vacío para contar todos los tipos de la ubicación', max_length=20, null=True, verbose_name='Tipo de Inventario')),
+                ('estado', models.CharField(choices=[('ABIERTO', 'Abierto'), ('CONCILIADO', 'Conciliado'), ('CANCELADO', 'Cancelado')], default='ABIERTO', max_length=20, verbose_name='Estado')),
+                ('fecha_inicio', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Inicio')),
+                ('fecha_conciliacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Conciliación')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('conciliado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conteos_conciliados', to=settings.AUTH_USER_MODEL, verbose_name='Conciliado Por')),
+                ('creado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conteos_creados', to=settings.AUTH_USER_MODEL, verbose_name='Creado Por')),
+                ('ubicacion', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='conteos_fisicos', to='inventario.ubicacionalmacen', verbose_name='Ubicación')),
+            ],
+            options={
+                'verbose_name': 'Conteo Físico',
+                'verbose_name_plural': 'Conteos Físicos',
+                'db_table': 'inv_conteo_fisico',
+                'ordering': ['-fecha_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConteoFisicoDetalle',
+            fields=[
+                ('id_detalle', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('codigo', models.CharField(max_length=30, verbose_name='Código del Ítem')),
+                ('unidad_medida', models.CharField(max_length=20, verbose_name='Unidad de Medida')),
+                ('cantidad_esperada', models.DecimalField(decimal_places=2, help_text='Existencia del sistema al abrir el conteo', max_digits=12, verbose_name='Cantidad Esperada')),
+                ('cantidad_contada', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Cantidad Contada')),
+                ('diferencia', models.DecimalField(blank=True, decimal_places=2, help_text='Se llena al conciliar', max_digits=12, null=True, verbose_name='Diferencia Ajustada')),
+                ('fecha_conteo', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Conteo')),
+                ('accesorio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='conteos', to='inventario.inventarioaccesorio', verbose_name='Accesorio')),
+                ('contado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lineas_conteo', to=settings.AUTH_USER_MODEL, verbose_name='Contado Por')),
+                ('conteo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detalles', to='inventario.conteofisico', verbose_name='Conteo')),
+                ('estructura', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='conteos', to='inventario.inventarioestructura', verbose_name='Estructura')),
+                ('lona', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='conteos', to='inventario.inventariolona', verbose_name='Lona')),
+            ],
+            options={
+                'verbose_name': 'Detalle de Conteo Físico',
+                'verbose_name_plural': 'Detalles de Conteo Físico',
+                'db_table': 'inv_conteo_fisico_detalle',
+                'ordering': ['conteo', 'tipo_inventario', 'codigo'],
+                'unique_together': {('conteo', 'codigo')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0008_conteo_fisico'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CosteoMovimiento',
+            fields=[
+                ('historial', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='costeo', serialize=False, to='inventario.historialinventario', verbose_name='Movimiento')),
+                ('clave_material', models.CharField(help_text='Tipo de inventario y características que agrupan los lotes', max_length=150, verbose_name='Especificación de Material')),
+                ('metodo', models.CharField(choices=[('FIFO', 'FIFO (primero en entrar, primero en salir)'), ('PROMEDIO', 'Promedio ponderado')], max_length=10, verbose_name='Método de Costeo')),
+                ('fecha_movimiento', models.DateTimeField(verbose_name='Fecha del Movimiento')),
+                ('cantidad', models.DecimalField(decimal_places=2, help_text='Positiva en entradas, negativa en salidas', max_digits=12, verbose_name='Cantidad')),
+                ('costo_unitario', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Costo Unitario')),
+                ('costo_total', models.DecimalField(decimal_places=2, help_text='Positivo en entradas, negativo en salidas', max_digits=16, verbose_name='Costo Total')),
+                ('saldo_cantidad', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saldo Cantidad')),
+                ('saldo_valor', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Saldo Valor')),
+                ('capas', models.JSONField(blank=True, default=list, help_text='Capas restantes [cantidad, costo] después del movimiento', verbose_name='Capas FIFO')),
+                ('fecha_calculo', models.DateTimeField(auto_now=True, verbose_name='Fecha de Cálculo')),
+                ('orden_produccion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='costeos', to='inventario.ordenproduccion', verbose_name='Orden de Producción')),
+            ],
+            options={
+                'verbose_name': 'Costeo de Movimiento',
+                'verbose_name_plural': 'Costeo de Movimientos',
+                'db_table': 'inv_costeo_movimiento',
+                'ordering': ['clave_material', 'fecha_movimiento', 'historial'],
+                'indexes': [models.Index(fields=['clave_material', 'fecha_movimiento', 'historial'], name='inv_costeo_clave_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0009_costeo_movimiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoMaterialDiario',
+            fields=[
+                ('id_consumo', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('clave_material', models.CharField(max_length=150, verbose_name='Especificación de Material')),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('descripcion', models.CharField(max_length=200, verbose_name='Descripción')),
+                ('unidad_medida', models.CharField(max_length=20, verbose_name='Unidad de Medida')),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Cantidad Consumida')),
+                ('movimientos', models.PositiveIntegerField(default=0, verbose_name='Movimientos')),
+                ('ultimo_historial', models.PositiveIntegerField(default=0, help_text='Mayor id de historial incluido (marca de avance incremental)', verbose_name='Último Movimiento')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Consumo Diario de Material',
+                'verbose_name_plural': 'Consumo Diario de Materiales',
+                'db_table': 'inv_consumo_material_diario',
+                'ordering': ['-fecha', 'clave_material'],
+                'indexes': [models.Index(fields=['tipo_inventario', 'fecha'], name='inv_consumo_tipo_fecha_idx'), models.Index(fields=['fecha'], name='inv_consumo_fecha_idx')],
+                'unique_together': {('clave_material', 'fecha')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:03
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def clasificar_retazos(apps, schema_editor):
+    """Marca como retazo los rollos usados que ya están por debajo del mínimo"""
+    InventarioLona = apps.get_model('inventario', 'InventarioLona')
+    minimo = Decimal(str(getattr(settings, 'INVENTARIO_METROS_RETAZO', '20')))
+    InventarioLona.objects.filter(
+        metros_disponibles__gt=0,
+        metros_disponibles__lt=minimo,
+    ).filter(metros_disponibles__lt=F('metros_iniciales')).update(es_retazo=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0010_consumo_material_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventariolona',
+            name='es_retazo',
+            field=models.BooleanField(default=False, help_text='Rollo ya usado con menos metros que el mínimo de retazo', verbose_name='Es Retazo'),
+        ),
+        migrations.AddIndex(
+            model_name='inventariolona',
+            index=models.Index(fields=['es_retazo', 'tipo_lona', 'ancho_lona', 'color_lona', 'tratamiento', 'metros_disponibles'], name='inv_lona_retazo_idx'),
+        ),
+        migrations.RunPython(clasificar_retazos, migrations.RunPython.noop),
+    ]
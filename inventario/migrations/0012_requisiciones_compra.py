@@ -0,0 +1,103 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:41
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0008_historial_precios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventario', '0011_lona_retazo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequisicionCompra',
+            fields=[
+                ('id_requisicion', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha_generacion', models.DateField(default=django.utils.timezone.now, verbose_name='Fecha de Generación')),
+                ('estado', models.CharField(choices=[('BORRADOR', 'Borrador'), ('APROBADA', 'Aprobada'), ('RECIBIDA', 'Recibida'), ('ANULADA', 'Anulada')], default='BORRADOR', max_length=20, verbose_name='Estado')),
+                ('total_estimado', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Total Estimado (COP)')),
+                ('monto_minimo_pedido', models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Monto Mínimo del Proveedor')),
+                ('cumple_minimo', models.BooleanField(default=True, verbose_name='Cumple Monto Mínimo')),
+                ('tiempo_entrega_dias', models.PositiveIntegerField(default=0, help_text='El mayor tiempo de entrega de las líneas', verbose_name='Tiempo de Entrega (días)')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de Creación')),
+                ('generada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requisiciones_generadas', to=settings.AUTH_USER_MODEL, verbose_name='Generada por')),
+                ('proveedor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='requisiciones_compra', to='proveedores.proveedor', verbose_name='Proveedor')),
+            ],
+            options={
+                'verbose_name': 'Requisición de Compra',
+                'verbose_name_plural': 'Requisiciones de Compra',
+                'db_table': 'inv_requisicion_compra',
+                'ordering': ['-fecha_generacion', 'proveedor'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EquivalenciaMaterial',
+            fields=[
+                ('id_equivalencia', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('clave_material', models.CharField(help_text='Clave de la especificación (ver requisiciones pendientes sin oferta)', max_length=150, verbose_name='Especificación de Material')),
+                ('descripcion', models.CharField(blank=True, max_length=200, verbose_name='Descripción')),
+                ('factor_conversion', models.DecimalField(decimal_places=4, default=1, help_text='Metros, piezas o unidades de inventario por cada unidad del producto (ej: rollo de 50 m = 50)', max_digits=12, validators=[django.core.validators.MinValueValidator(Decimal('0.0001'))], verbose_name='Factor de Conversión')),
+                ('activo', models.BooleanField(default=True, verbose_name='Activo')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equivalencias_inventario', to='proveedores.productoservicioproveedor', verbose_name='Producto del Proveedor')),
+            ],
+            options={
+                'verbose_name': 'Equivalencia de Material',
+                'verbose_name_plural': 'Equivalencias de Material',
+                'db_table': 'inv_equivalencia_material',
+                'ordering': ['clave_material'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequisicionCompraLinea',
+            fields=[
+                ('id_linea', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo_inventario', models.CharField(choices=[('LONA', 'Lona'), ('ESTRUCTURA', 'Estructura'), ('ACCESORIO', 'Accesorio')], max_length=20, verbose_name='Tipo de Inventario')),
+                ('clave_material', models.CharField(max_length=150, verbose_name='Especificación de Material')),
+                ('descripcion', models.CharField(max_length=200, verbose_name='Descripción')),
+                ('unidad_inventario', models.CharField(max_length=20, verbose_name='Unidad de Inventario')),
+                ('cantidad_reposicion', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Reposición de Stock Mínimo')),
+                ('cantidad_ordenes', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Faltante para Órdenes')),
+                ('cantidad_faltante', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Faltante Total')),
+                ('factor_conversion', models.DecimalField(decimal_places=4, default=1, max_digits=12, verbose_name='Factor de Conversión')),
+                ('cantidad_pedida', models.PositiveIntegerField(help_text='Redondeada a unidades enteras y a la cantidad mínima del producto', verbose_name='Cantidad a Pedir')),
+                ('unidad_compra', models.CharField(max_length=30, verbose_name='Unidad de Compra')),
+                ('moneda', models.CharField(max_length=3, verbose_name='Moneda')),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Precio Unitario')),
+                ('precio_cop', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Precio Unitario (COP)')),
+                ('subtotal_cop', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Subtotal (COP)')),
+                ('tiempo_entrega_dias', models.PositiveIntegerField(default=0, verbose_name='Tiempo de Entrega (días)')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='lineas_requisicion', to='proveedores.productoservicioproveedor', verbose_name='Producto del Proveedor')),
+                ('requisicion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lineas', to='inventario.requisicioncompra', verbose_name='Requisición')),
+            ],
+            options={
+                'verbose_name': 'Línea de Requisición',
+                'verbose_name_plural': 'Líneas de Requisición',
+                'db_table': 'inv_requisicion_compra_linea',
+                'ordering': ['requisicion', 'tipo_inventario', 'descripcion'],
+                'unique_together': {('requisicion', 'clave_material')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='requisicioncompra',
+            index=models.Index(fields=['estado', 'fecha_generacion'], name='inv_requisicion_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equivalenciamaterial',
+            index=models.Index(fields=['clave_material', 'activo'], name='inv_equiv_clave_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='equivalenciamaterial',
+            unique_together={('clave_material', 'producto')},
+        ),
+    ]
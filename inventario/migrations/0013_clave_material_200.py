@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0012_requisiciones_compra'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='consumomaterialdiario',
+            name='clave_material',
+            field=models.CharField(max_length=200, verbose_name='Especificación de Material'),
+        ),
+        migrations.AlterField(
+            model_name='costeomovimiento',
+            name='clave_material',
+            field=models.CharField(help_text='Tipo de inventario y características que agrupan los lotes', max_length=200, verbose_name='Especificación de Material'),
+        ),
+        migrations.AlterField(
+            model_name='equivalenciamaterial',
+            name='clave_material',
+            field=models.CharField(help_text='Clave de la especificación (ver requisiciones pendientes sin oferta)', max_length=200, verbose_name='Especificación de Material'),
+        ),
+        migrations.AlterField(
+            model_name='requisicioncompralinea',
+            name='clave_material',
+            field=models.CharField(max_length=200, verbose_name='Especificación de Material'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Q, Sum
+
+
+TAMANO_LOTE = 500
+
+
+def _agrupado(modelo, ids, **sumas):
+    qs = modelo.objects.filter(orden_id__in=ids)
+    if modelo.__name__ == 'OrdenProduccionItem':
+        qs = qs.filter(activo=True)
+    else:
+        qs = qs.exclude(estado='CANCELADO')
+        sumas['lineas'] = Count('pk')
+        sumas['pendientes'] = Count('pk', filter=Q(estado='PENDIENTE'))
+    filas = qs.values('orden_id').annotate(**sumas).order_by()
+    return {fila.pop('orden_id'): fila for fila in filas}
+
+
+def _estado_materiales(lineas, pendientes):
+    if not lineas:
+        return 'SIN_MATERIAL'
+    if pendientes == lineas:
+        return 'PENDIENTE'
+    if pendientes == 0:
+        return 'COMPLETO'
+    return 'PARCIAL'
+
+
+def crear_resumenes(apps, schema_editor):
+    """
+    Crea el resumen de las órdenes que no lo tienen (las anteriores a 0007),
+    por lotes, con la misma lógica de inventario/resumen_ordenes.py.
+    """
+    OrdenProduccion = apps.get_model('inventario', 'OrdenProduccion')
+    OrdenProduccionItem = apps.get_model('inventario', 'OrdenProduccionItem')
+    OrdenProduccionLona = apps.get_model('inventario', 'OrdenProduccionLona')
+    OrdenProduccionEstructura = apps.get_model('inventario', 'OrdenProduccionEstructura')
+    OrdenProduccionAccesorio = apps.get_model('inventario', 'OrdenProduccionAccesorio')
+    ResumenOrdenProduccion = apps.get_model('inventario', 'ResumenOrdenProduccion')
+
+    cero = Decimal('0')
+    ids = list(
+        OrdenProduccion.objects.filter(resumen__isnull=True).order_by('pk').values_list('pk', flat=True)
+    )
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        bloque = ids[inicio:inicio + TAMANO_LOTE]
+        items = _agrupado(OrdenProduccionItem, bloque, cantidad_items=Count('pk'), total_productos=Sum('cantidad'))
+        lonas = _agrupado(
+            OrdenProduccionLona, bloque,
+            requeridos=Sum('metros_requeridos'), utilizados=Sum('metros_utilizados'),
+        )
+        estructuras = _agrupado(
+            OrdenProduccionEstructura, bloque,
+            requeridos=Sum('metros_requeridos'), utilizados=Sum('metros_utilizados'),
+            piezas_requeridas=Sum('piezas_requeridas'), piezas_utilizadas=Sum('piezas_utilizadas'),
+        )
+        accesorios = _agrupado(
+            OrdenProduccionAccesorio, bloque,
+            requeridos=Sum('cantidad_requerida'), entregados=Sum('cantidad_entregada'),
+        )
+
+        resumenes = []
+        for pk in bloque:
+            it = items.get(pk, {})
+            lo = lonas.get(pk, {})
+            es = estructuras.get(pk, {})
+            ac = accesorios.get(pk, {})
+            lineas = lo.get('lineas', 0) + es.get('lineas', 0) + ac.get('lineas', 0)
+            pendientes = lo.get('pendientes', 0) + es.get('pendientes', 0) + ac.get('pendientes', 0)
+            resumenes.append(ResumenOrdenProduccion(
+                orden_id=pk,
+                cantidad_items=it.get('cantidad_items', 0),
+                total_productos=it.get('total_productos') or 0,
+                metros_lona_requeridos=lo.get('requeridos') or cero,
+                metros_lona_utilizados=lo.get('utilizados') or cero,
+                metros_estructura_requeridos=es.get('requeridos') or cero,
+                metros_estructura_utilizados=es.get('utilizados') or cero,
+                piezas_estructura_requeridas=es.get('piezas_requeridas') or 0,
+                piezas_estructura_utilizadas=es.get('piezas_utilizadas') or 0,
+                accesorios_requeridos=ac.get('requeridos') or 0,
+                accesorios_entregados=ac.get('entregados') or 0,
+                lineas_material=lineas,
+                lineas_pendientes=pendientes,
+                estado_materiales=_estado_materiales(lineas, pendientes),
+            ))
+        ResumenOrdenProduccion.objects.bulk_create(resumenes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0013_clave_material_200'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0014_resumen_ordenes_existentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCacheInventario',
+            fields=[
+                ('clave', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Clave')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de Caché',
+                'verbose_name_plural': 'Versiones de Caché',
+                'db_table': 'inv_version_cache',
+            },
+        ),
+    ]
@@ -16,6 +16,7 @@ Fecha: Noviembre 2025
 
 import uuid
 from decimal import Decimal
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.contrib.auth.models import User
@@ -517,6 +518,11 @@ class InventarioLona(models.Model):
         verbose_name="Stock Mínimo (metros)",
         help_text="Genera alerta cuando llegue a este nivel"
     )
+    es_retazo = models.BooleanField(
+        default=False,
+        verbose_name="Es Retazo",
+        help_text="Rollo ya usado con menos metros que el mínimo de retazo"
+    )
     
     # Costos
     costo_por_metro = models.DecimalField(
@@ -620,6 +626,21 @@ class InventarioLona(models.Model):
         verbose_name = 'Inventario de Lona'
         verbose_name_plural = 'Inventario de Lonas'
         ordering = ['-fecha_ingreso', 'tipo_lona']
+        indexes = [
+            # Índice de cobertura para la consulta de stock mínimo
+            models.Index(
+                fields=['activo', 'metros_disponibles', 'metros_minimo_alerta'],
+                name='inv_lona_stock_min_idx'
+            ),
+            # Bolsa de retazos: búsqueda por especificación y largo
+            models.Index(
+                fields=['es_retazo', 'tipo_lona', 'ancho_lona', 'color_lona', 'tratamiento', 'metros_disponibles'],
+                name='inv_lona_retazo_idx'
+            ),
+        ]
+
+    # Por debajo de estos metros un rollo ya usado pasa a la bolsa de retazos
+    METROS_RETAZO = Decimal(str(getattr(settings, 'INVENTARIO_METROS_RETAZO', '20')))
 
     def __str__(self):
         return f"{self.codigo_rollo} - {self.tipo_lona} {self.ancho_lona} {self.color_lona}"
@@ -634,9 +655,38 @@ class InventarioLona(models.Model):
             self.estado = 'AGOTADO'
         elif self.metros_disponibles <= self.metros_minimo_alerta and self.estado == 'DISPONIBLE':
             pass  # Mantener disponible pero se generará alerta
+
+        # Clasificar como retazo los rollos usados que quedaron cortos
+        self.es_retazo = (
+            0 < self.metros_disponibles < self.METROS_RETAZO
+            and self.metros_disponibles < self.metros_iniciales
+        )
         
         super().save(*args, **kwargs)
 
+    @classmethod
+    def condicion_retazo(cls):
+        """Condición SQL equivalente a la clasificación de save()"""
+        return (
+            models.Q(metros_disponibles__gt=0, metros_disponibles__lt=cls.METROS_RETAZO)
+            & models.Q(metros_disponibles__lt=models.F('metros_iniciales'))
+        )
+
+    @classmethod
+    def clasificar_retazos(cls, ids=None):
+        """
+        Marca/desmarca es_retazo con dos UPDATE por conjunto (todos los rollos
+        o solo los `ids`). Para actualizaciones con F() o bulk_update, que no
+        pasan por save(). Retorna (marcados, desmarcados).
+        """
+        lonas = cls.objects.all()
+        if ids is not None:
+            lonas = lonas.filter(pk__in=list(ids))
+        condicion = cls.condicion_retazo()
+        marcados = lonas.filter(condicion, es_retazo=False).update(es_retazo=True)
+        desmarcados = lonas.filter(es_retazo=True).exclude(condicion).update(es_retazo=False)
+        return marcados, desmarcados
+
     def _generar_codigo(self):
         """Genera código único para el rollo"""
         ultimo = InventarioLona.objects.order_by('-id_lona').first()
@@ -911,6 +961,17 @@ class InventarioEstructura(models.Model):
         verbose_name = 'Inventario de Estructura'
         verbose_name_plural = 'Inventario de Estructuras'
         ordering = ['-fecha_ingreso', 'tipo_estructura']
+        indexes = [
+            # Índices de cobertura para la consulta de stock mínimo (METROS / PIEZAS)
+            models.Index(
+                fields=['activo', 'tipo_control', 'metros_disponibles', 'metros_minimo_alerta'],
+                name='inv_estr_stock_min_m_idx'
+            ),
+            models.Index(
+                fields=['activo', 'tipo_control', 'piezas_disponibles', 'piezas_minimo_alerta'],
+                name='inv_estr_stock_min_p_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.codigo_lote} - {self.tipo_estructura} {self.medida_tubo} Cal.{self.calibre.valor_calibre}"
@@ -1098,6 +1159,13 @@ class InventarioAccesorio(models.Model):
         verbose_name = 'Inventario de Accesorio'
         verbose_name_plural = 'Inventario de Accesorios'
         ordering = ['tipo_accesorio', 'nombre']
+        indexes = [
+            # Índice de cobertura para la consulta de stock mínimo
+            models.Index(
+                fields=['activo', 'cantidad_disponible', 'cantidad_minima_alerta'],
+                name='inv_acc_stock_min_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -1225,6 +1293,13 @@ class OrdenProduccion(models.Model):
         null=True,
         verbose_name="Fecha Terminada"
     )
+    porcentaje_avance = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        db_index=True,
+        verbose_name="% Avance",
+        help_text="Se calcula al guardar según las fases completadas"
+    )
     
     # Autorización (FK a Trabajadores)
     solicitado_por = models.ForeignKey(
@@ -1315,6 +1390,14 @@ class OrdenProduccion(models.Model):
     def __str__(self):
         return f"OP-{self.numero_orden} ({self.año})"
 
+    # Fase -> campo de fecha en que se completó
+    FASES = [
+        ('estructura_fabricada', 'fecha_estructura_fabricada'),
+        ('estructura_pintada', 'fecha_estructura_pintada'),
+        ('lona_fabricada', 'fecha_lona_fabricada'),
+        ('terminada', 'fecha_terminada'),
+    ]
+
     def save(self, *args, **kwargs):
         # Asignar año si no existe
         if not self.año:
@@ -1324,8 +1407,36 @@ class OrdenProduccion(models.Model):
         if not self.numero_orden:
             self.numero_orden = self._generar_numero_orden()
         
+        # Fechas de las fases y avance almacenado (para filtrar/ordenar en SQL)
+        campos = self._actualizar_fases()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | set(campos)
+        
         super().save(*args, **kwargs)
 
+    def _actualizar_fases(self):
+        """
+        Registra la fecha de las fases recién completadas y recalcula el avance.
+        Retorna los campos modificados.
+        """
+        hoy = timezone.now().date()
+        campos = ['porcentaje_avance']
+        for fase, campo_fecha in self.FASES:
+            if getattr(self, fase) and not getattr(self, campo_fecha):
+                setattr(self, campo_fecha, hoy)
+                campos.append(campo_fecha)
+        
+        if not self.fecha_inicio_produccion and any(getattr(self, fase) for fase, _ in self.FASES):
+            self.fecha_inicio_produccion = hoy
+            campos.append('fecha_inicio_produccion')
+        if self.terminada and not self.fecha_fin_produccion:
+            self.fecha_fin_produccion = self.fecha_terminada
+            campos.append('fecha_fin_produccion')
+        
+        self.porcentaje_avance = self.calcular_porcentaje_avance()
+        return campos
+
     def _generar_numero_orden(self):
         """Genera el siguiente número de orden para el año actual"""
         ultimo = OrdenProduccion.objects.filter(
@@ -1340,17 +1451,10 @@ class OrdenProduccion(models.Model):
     def codigo_completo(self):
         return f"OP-{self.numero_orden}-{self.año}"
 
-    @property
-    def porcentaje_avance(self):
+    def calcular_porcentaje_avance(self):
         """Calcula el porcentaje de avance basado en las fases"""
-        fases = [
-            self.estructura_fabricada,
-            self.estructura_pintada,
-            self.lona_fabricada,
-            self.terminada
-        ]
-        completadas = sum(1 for f in fases if f)
-        return int((completadas / len(fases)) * 100)
+        completadas = sum(1 for fase, _ in self.FASES if getattr(self, fase))
+        return int((completadas / len(self.FASES)) * 100)
 
 
 class OrdenProduccionItem(models.Model):
@@ -1765,6 +1869,115 @@ class OrdenProduccionAccesorio(models.Model):
         return f"{self.orden} - {self.accesorio.nombre}: {self.cantidad_requerida}"
 
 
+class ResumenOrdenProduccion(models.Model):
+    """
+    Resumen precalculado de una orden de producción: ítems y totales de
+    material requerido / utilizado. Se actualiza al guardar o eliminar
+    ítems y detalles de material (ver inventario/signals.py), para que los
+    listados filtren y ordenen por estado de materiales sin subconsultas.
+    """
+    
+    ESTADO_MATERIALES_CHOICES = [
+        ('SIN_MATERIAL', 'Sin Material Asignado'),
+        ('PENDIENTE', 'Pendiente'),
+        ('PARCIAL', 'Parcial'),
+        ('COMPLETO', 'Completo'),
+    ]
+    
+    orden = models.OneToOneField(
+        OrdenProduccion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen',
+        verbose_name="Orden de Producción"
+    )
+    
+    # Ítems
+    cantidad_items = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Líneas de Ítems"
+    )
+    total_productos = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Total Productos"
+    )
+    
+    # Lonas
+    metros_lona_requeridos = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Metros Lona Requeridos"
+    )
+    metros_lona_utilizados = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Metros Lona Utilizados"
+    )
+    
+    # Estructura
+    metros_estructura_requeridos = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Metros Estructura Requeridos"
+    )
+    metros_estructura_utilizados = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Metros Estructura Utilizados"
+    )
+    piezas_estructura_requeridas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Piezas Estructura Requeridas"
+    )
+    piezas_estructura_utilizadas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Piezas Estructura Utilizadas"
+    )
+    
+    # Accesorios
+    accesorios_requeridos = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Accesorios Requeridos"
+    )
+    accesorios_entregados = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Accesorios Entregados"
+    )
+    
+    # Estado de materiales
+    lineas_material = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Líneas de Material"
+    )
+    lineas_pendientes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Líneas Pendientes"
+    )
+    estado_materiales = models.CharField(
+        max_length=20,
+        choices=ESTADO_MATERIALES_CHOICES,
+        default='SIN_MATERIAL',
+        db_index=True,
+        verbose_name="Estado de Materiales"
+    )
+    fecha_actualizacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Última Actualización"
+    )
+
+    class Meta:
+        db_table = 'inv_orden_produccion_resumen'
+        verbose_name = 'Resumen de Orden'
+        verbose_name_plural = 'Resúmenes de Órdenes'
+
+    def __str__(self):
+        return f"Resumen {self.orden}"
+
+
 # =============================================================================
 # HISTORIAL DE MOVIMIENTOS (TRAZABILIDAD)
 # =============================================================================
@@ -1785,6 +1998,11 @@ class HistorialInventario(models.Model):
         ('DEVOLUCION', 'Devolución'),
         ('BAJA', 'Baja'),
     ]
+
+    # Efecto de cada tipo de movimiento sobre la existencia física.
+    # RESERVA y LIBERACION no mueven existencias.
+    MOVIMIENTOS_ENTRADA = ['ENTRADA', 'AJUSTE_POSITIVO', 'DEVOLUCION']
+    MOVIMIENTOS_SALIDA = ['SALIDA', 'AJUSTE_NEGATIVO', 'BAJA']
     
     TIPO_INVENTARIO_CHOICES = [
         ('LONA', 'Lona'),
@@ -1925,6 +2143,15 @@ class HistorialInventario(models.Model):
         verbose_name = 'Historial de Inventario'
         verbose_name_plural = 'Historial de Inventario'
         ordering = ['-fecha_movimiento']
+        indexes = [
+            models.Index(fields=['tipo_movimiento', 'fecha_movimiento'], name='inv_hist_tipo_fecha_idx'),
+            # Paginación por llave del kardex: (fecha_movimiento, id_historial)
+            models.Index(fields=['fecha_movimiento', 'id_historial'], name='inv_hist_fecha_id_idx'),
+            models.Index(fields=['tipo_inventario', 'fecha_movimiento', 'id_historial'], name='inv_hist_tinv_fecha_id_idx'),
+            models.Index(fields=['lona', 'fecha_movimiento', 'id_historial'], name='inv_hist_lona_fecha_id_idx'),
+            models.Index(fields=['estructura', 'fecha_movimiento', 'id_historial'], name='inv_hist_estr_fecha_id_idx'),
+            models.Index(fields=['accesorio', 'fecha_movimiento', 'id_historial'], name='inv_hist_acc_fecha_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.fecha_movimiento.strftime('%Y-%m-%d')} - {self.tipo_movimiento} - {self.tipo_inventario}"
@@ -1938,4 +2165,1046 @@ class HistorialInventario(models.Model):
             return self.estructura
         elif self.accesorio:
             return self.accesorio
-        return None
\ No newline at end of file
+        return None
+
+# =============================================================================
+# RESERVAS DE INVENTARIO
+# =============================================================================
+
+class ReservaInventario(models.Model):
+    """
+    Reserva de material de inventario para una orden de producción.
+    Los contadores metros_reservados / piezas_reservadas / cantidad_reservada
+    de cada ítem son la suma de sus reservas ACTIVAS; esta tabla deja la
+    trazabilidad de quién reservó, cuánto y cuándo se liberó o consumió.
+    """
+
+    ESTADO_CHOICES = [
+        ('ACTIVA', 'Activa'),
+        ('LIBERADA', 'Liberada'),
+        ('CONSUMIDA', 'Consumida'),
+    ]
+
+    id_reserva = models.AutoField(primary_key=True)
+    orden = models.ForeignKey(
+        OrdenProduccion,
+        on_delete=models.CASCADE,
+        related_name='reservas',
+        verbose_name="Orden de Producción"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+
+    # Referencias al Inventario (solo una será usada)
+    lona = models.ForeignKey(
+        InventarioLona,
+        on_delete=models.PROTECT,
+        related_name='reservas',
+        blank=True,
+        null=True,
+        verbose_name="Lona"
+    )
+    estructura = models.ForeignKey(
+        InventarioEstructura,
+        on_delete=models.PROTECT,
+        related_name='reservas',
+        blank=True,
+        null=True,
+        verbose_name="Estructura"
+    )
+    accesorio = models.ForeignKey(
+        InventarioAccesorio,
+        on_delete=models.PROTECT,
+        related_name='reservas',
+        blank=True,
+        null=True,
+        verbose_name="Accesorio"
+    )
+
+    # Cantidades
+    cantidad_reservada = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        verbose_name="Cantidad Reservada"
+    )
+    cantidad_consumida = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Cantidad Consumida"
+    )
+    unidad_medida = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Medida",
+        help_text="metros, unidades, piezas"
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='ACTIVA',
+        verbose_name="Estado"
+    )
+    fecha_reserva = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha de Reserva"
+    )
+    fecha_cierre = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Fecha de Cierre",
+        help_text="Fecha en que se liberó o consumió la reserva"
+    )
+
+    # Auditoría
+    registrado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='reservas_registradas',
+        blank=True,
+        null=True,
+        verbose_name="Registrado Por"
+    )
+
+    class Meta:
+        db_table = 'inv_reserva_inventario'
+        verbose_name = 'Reserva de Inventario'
+        verbose_name_plural = 'Reservas de Inventario'
+        ordering = ['-fecha_reserva']
+        indexes = [
+            models.Index(fields=['orden', 'estado'], name='inv_reserva_orden_estado_idx'),
+            models.Index(fields=['lona', 'estado'], name='inv_reserva_lona_estado_idx'),
+            models.Index(fields=['estructura', 'estado'], name='inv_reserva_estr_estado_idx'),
+            models.Index(fields=['accesorio', 'estado'], name='inv_reserva_acc_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.orden} - {self.item_inventario}: {self.cantidad_reservada} {self.unidad_medida}"
+
+    @property
+    def item_inventario(self):
+        """Retorna el ítem de inventario reservado"""
+        return self.lona or self.estructura or self.accesorio
+
+    @property
+    def cantidad_pendiente(self):
+        """Cantidad reservada que aún no se ha consumido"""
+        return self.cantidad_reservada - self.cantidad_consumida
+
+
+# =============================================================================
+# REPORTE DE REPOSICIÓN
+# =============================================================================
+
+class SugerenciaReposicion(models.Model):
+    """
+    Foto diaria de los ítems en stock mínimo con la cantidad sugerida a pedir.
+    La genera el comando `generar_reporte_reposicion`; una fila por ítem y fecha.
+    """
+
+    id_sugerencia = models.AutoField(primary_key=True)
+    fecha_reporte = models.DateField(
+        default=timezone.now,
+        verbose_name="Fecha del Reporte"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+
+    # Referencias al Inventario (solo una será usada)
+    lona = models.ForeignKey(
+        InventarioLona,
+        on_delete=models.CASCADE,
+        related_name='sugerencias_reposicion',
+        blank=True,
+        null=True,
+        verbose_name="Lona"
+    )
+    estructura = models.ForeignKey(
+        InventarioEstructura,
+        on_delete=models.CASCADE,
+        related_name='sugerencias_reposicion',
+        blank=True,
+        null=True,
+        verbose_name="Estructura"
+    )
+    accesorio = models.ForeignKey(
+        InventarioAccesorio,
+        on_delete=models.CASCADE,
+        related_name='sugerencias_reposicion',
+        blank=True,
+        null=True,
+        verbose_name="Accesorio"
+    )
+    codigo = models.CharField(
+        max_length=20,
+        verbose_name="Código"
+    )
+    descripcion = models.CharField(
+        max_length=200,
+        verbose_name="Descripción"
+    )
+    proveedor = models.ForeignKey(
+        'proveedores.Proveedor',
+        on_delete=models.SET_NULL,
+        related_name='sugerencias_reposicion',
+        blank=True,
+        null=True,
+        verbose_name="Proveedor"
+    )
+
+    # Cálculo
+    unidad_medida = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Medida"
+    )
+    cantidad_disponible = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name="Cantidad Disponible"
+    )
+    cantidad_minima = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name="Cantidad Mínima"
+    )
+    consumo_diario = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        verbose_name="Consumo Diario Promedio"
+    )
+    dias_cobertura = models.DecimalField(
+        max_digits=8,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        verbose_name="Días de Cobertura",
+        help_text="Días que alcanza la existencia al ritmo de consumo actual"
+    )
+    cantidad_sugerida = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name="Cantidad Sugerida"
+    )
+    fecha_creacion = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha de Generación"
+    )
+
+    class Meta:
+        db_table = 'inv_reporte_reposicion'
+        verbose_name = 'Sugerencia de Reposición'
+        verbose_name_plural = 'Sugerencias de Reposición'
+        ordering = ['-fecha_reporte', models.F('dias_cobertura').asc(nulls_last=True)]
+        unique_together = ['fecha_reporte', 'tipo_inventario', 'codigo']
+
+    def __str__(self):
+        return f"{self.fecha_reporte} - {self.codigo}: {self.cantidad_sugerida} {self.unidad_medida}"
+
+
+# =============================================================================
+# SALDOS DE INVENTARIO (CORTES)
+# =============================================================================
+
+class SaldoInventario(models.Model):
+    """
+    Saldo de un ítem al cierre de una fecha de corte.
+    Sirve de punto de partida para reconstruir existencias a cualquier fecha
+    sumando solo los movimientos posteriores al corte más cercano.
+    Lo genera el comando `generar_saldos_inventario`.
+    """
+
+    id_saldo = models.AutoField(primary_key=True)
+    fecha_corte = models.DateField(
+        verbose_name="Fecha de Corte",
+        help_text="Saldo al final del día"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+
+    # Referencias al Inventario (solo una será usada)
+    lona = models.ForeignKey(
+        InventarioLona,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        blank=True,
+        null=True,
+        verbose_name="Lona"
+    )
+    estructura = models.ForeignKey(
+        InventarioEstructura,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        blank=True,
+        null=True,
+        verbose_name="Estructura"
+    )
+    accesorio = models.ForeignKey(
+        InventarioAccesorio,
+        on_delete=models.CASCADE,
+        related_name='saldos',
+        blank=True,
+        null=True,
+        verbose_name="Accesorio"
+    )
+
+    cantidad = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Cantidad"
+    )
+    unidad_medida = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Medida"
+    )
+    fecha_creacion = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha de Generación"
+    )
+
+    class Meta:
+        db_table = 'inv_saldo_inventario'
+        verbose_name = 'Saldo de Inventario'
+        verbose_name_plural = 'Saldos de Inventario'
+        ordering = ['-fecha_corte', 'tipo_inventario']
+        unique_together = [
+            ['fecha_corte', 'lona'],
+            ['fecha_corte', 'estructura'],
+            ['fecha_corte', 'accesorio'],
+        ]
+        indexes = [
+            models.Index(fields=['fecha_corte', 'tipo_inventario'], name='inv_saldo_fecha_tipo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha_corte} - {self.item_inventario}: {self.cantidad} {self.unidad_medida}"
+
+    @property
+    def item_inventario(self):
+        """Retorna el ítem de inventario del saldo"""
+        return self.lona or self.estructura or self.accesorio
+
+
+# =============================================================================
+# PLANIFICACIÓN DE PRODUCCIÓN
+# =============================================================================
+
+class EstacionTrabajo(models.Model):
+    """
+    Estación de trabajo de planta con su capacidad diaria.
+    La capacidad se expresa en m² de carpa procesados por día.
+    """
+
+    CODIGO_CHOICES = [
+        ('ESTRUCTURA', 'Fabricación de Estructura'),
+        ('PINTURA', 'Pintura de Estructura'),
+        ('CONFECCION', 'Confección de Lona'),
+    ]
+
+    id_estacion = models.AutoField(primary_key=True)
+    codigo = models.CharField(
+        max_length=20,
+        choices=CODIGO_CHOICES,
+        unique=True,
+        verbose_name="Estación"
+    )
+    capacidad_diaria = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        verbose_name="Capacidad Diaria (m²)",
+        help_text="Metros cuadrados de carpa que la estación procesa en un día"
+    )
+    trabaja_sabado = models.BooleanField(
+        default=True,
+        verbose_name="Trabaja Sábados"
+    )
+    observaciones = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Observaciones"
+    )
+    activo = models.BooleanField(
+        default=True,
+        verbose_name="Activo"
+    )
+
+    class Meta:
+        db_table = 'inv_estacion_trabajo'
+        verbose_name = 'Estación de Trabajo'
+        verbose_name_plural = 'Estaciones de Trabajo'
+        ordering = ['codigo']
+
+    def __str__(self):
+        return f"{self.get_codigo_display()} ({self.capacidad_diaria} m²/día)"
+
+
+# =============================================================================
+# CONTEO FÍSICO (INVENTARIO CÍCLICO)
+# =============================================================================
+
+class ConteoFisico(models.Model):
+    """
+    Sesión de conteo físico de una ubicación del almacén.
+    Al abrirla se congela la existencia esperada de cada ítem de la ubicación;
+    al conciliarla se registran todos los ajustes en un solo lote.
+    """
+
+    ESTADO_CHOICES = [
+        ('ABIERTO', 'Abierto'),
+        ('CONCILIADO', 'Conciliado'),
+        ('CANCELADO', 'Cancelado'),
+    ]
+
+    id_conteo = models.AutoField(primary_key=True)
+    codigo = models.CharField(
+        max_length=30,
+        unique=True,
+        verbose_name="Código",
+        help_text="Autogenerado: CF-0001"
+    )
+    ubicacion = models.ForeignKey(
+        UbicacionAlmacen,
+        on_delete=models.PROTECT,
+        related_name='conteos_fisicos',
+        verbose_name="Ubicación"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        blank=True,
+        null=True,
+        verbose_name="Tipo de Inventario",
+        help_text="Vacío para contar todos los tipos de la ubicación"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='ABIERTO',
+        verbose_name="Estado"
+    )
+    fecha_inicio = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha de Inicio"
+    )
+    fecha_conciliacion = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Fecha de Conciliación"
+    )
+    observaciones = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Observaciones"
+    )
+
+    # Auditoría
+    creado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='conteos_creados',
+        blank=True,
+        null=True,
+        verbose_name="Creado Por"
+    )
+    conciliado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='conteos_conciliados',
+        blank=True,
+        null=True,
+        verbose_name="Conciliado Por"
+    )
+
+    class Meta:
+        db_table = 'inv_conteo_fisico'
+        verbose_name = 'Conteo Físico'
+        verbose_name_plural = 'Conteos Físicos'
+        ordering = ['-fecha_inicio']
+
+    def __str__(self):
+        return f"{self.codigo} - {self.ubicacion.codigo}"
+
+    def save(self, *args, **kwargs):
+        if not self.codigo:
+            self.codigo = self._generar_codigo()
+        super().save(*args, **kwargs)
+
+    def _generar_codigo(self):
+        ultimo = ConteoFisico.objects.order_by('-id_conteo').first()
+        nuevo_num = (ultimo.id_conteo + 1) if ultimo else 1
+        return f"CF-{nuevo_num:04d}"
+
+
+class ConteoFisicoDetalle(models.Model):
+    """
+    Una línea por ítem de la ubicación: existencia esperada (congelada al
+    abrir el conteo) y cantidad contada.
+    """
+
+    id_detalle = models.AutoField(primary_key=True)
+    conteo = models.ForeignKey(
+        ConteoFisico,
+        on_delete=models.CASCADE,
+        related_name='detalles',
+        verbose_name="Conteo"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+    codigo = models.CharField(
+        max_length=30,
+        verbose_name="Código del Ítem"
+    )
+
+    # Referencias al Inventario (solo una será usada)
+    lona = models.ForeignKey(
+        InventarioLona,
+        on_delete=models.CASCADE,
+        related_name='conteos',
+        blank=True,
+        null=True,
+        verbose_name="Lona"
+    )
+    estructura = models.ForeignKey(
+        InventarioEstructura,
+        on_delete=models.CASCADE,
+        related_name='conteos',
+        blank=True,
+        null=True,
+        verbose_name="Estructura"
+    )
+    accesorio = models.ForeignKey(
+        InventarioAccesorio,
+        on_delete=models.CASCADE,
+        related_name='conteos',
+        blank=True,
+        null=True,
+        verbose_name="Accesorio"
+    )
+
+    # Cantidades
+    unidad_medida = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Medida"
+    )
+    cantidad_esperada = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Cantidad Esperada",
+        help_text="Existencia del sistema al abrir el conteo"
+    )
+    cantidad_contada = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Cantidad Contada"
+    )
+    diferencia = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        verbose_name="Diferencia Ajustada",
+        help_text="Se llena al conciliar"
+    )
+    fecha_conteo = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Fecha de Conteo"
+    )
+    contado_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='lineas_conteo',
+        blank=True,
+        null=True,
+        verbose_name="Contado Por"
+    )
+
+    class Meta:
+        db_table = 'inv_conteo_fisico_detalle'
+        verbose_name = 'Detalle de Conteo Físico'
+        verbose_name_plural = 'Detalles de Conteo Físico'
+        ordering = ['conteo', 'tipo_inventario', 'codigo']
+        unique_together = ['conteo', 'codigo']
+
+    def __str__(self):
+        return f"{self.conteo.codigo} - {self.codigo}"
+
+    @property
+    def item_inventario(self):
+        """Retorna el ítem de inventario contado"""
+        return self.lona or self.estructura or self.accesorio
+
+    @property
+    def variacion(self):
+        """Contado menos esperado (None si aún no se contó)"""
+        if self.cantidad_contada is None:
+            return None
+        return self.cantidad_contada - self.cantidad_esperada
+
+
+# =============================================================================
+# COSTEO DE MOVIMIENTOS
+# =============================================================================
+
+class CosteoMovimiento(models.Model):
+    """
+    Costo calculado de un movimiento de HistorialInventario (FIFO o promedio
+    ponderado por especificación de material) y saldo de la especificación
+    después del movimiento. Lo mantiene inventario/costeo.py.
+    """
+
+    METODO_CHOICES = [
+        ('FIFO', 'FIFO (primero en entrar, primero en salir)'),
+        ('PROMEDIO', 'Promedio ponderado'),
+    ]
+
+    historial = models.OneToOneField(
+        HistorialInventario,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='costeo',
+        verbose_name="Movimiento"
+    )
+    clave_material = models.CharField(
+        max_length=200,
+        verbose_name="Especificación de Material",
+        help_text="Tipo de inventario y características que agrupan los lotes"
+    )
+    metodo = models.CharField(
+        max_length=10,
+        choices=METODO_CHOICES,
+        verbose_name="Método de Costeo"
+    )
+    fecha_movimiento = models.DateTimeField(
+        verbose_name="Fecha del Movimiento"
+    )
+    orden_produccion = models.ForeignKey(
+        OrdenProduccion,
+        on_delete=models.SET_NULL,
+        related_name='costeos',
+        blank=True,
+        null=True,
+        verbose_name="Orden de Producción"
+    )
+
+    # Costo del movimiento (negativo para salidas)
+    cantidad = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Cantidad",
+        help_text="Positiva en entradas, negativa en salidas"
+    )
+    costo_unitario = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        verbose_name="Costo Unitario"
+    )
+    costo_total = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        verbose_name="Costo Total",
+        help_text="Positivo en entradas, negativo en salidas"
+    )
+
+    # Saldo de la especificación después del movimiento
+    saldo_cantidad = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Saldo Cantidad"
+    )
+    saldo_valor = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        verbose_name="Saldo Valor"
+    )
+    capas = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Capas FIFO",
+        help_text="Capas restantes [cantidad, costo] después del movimiento"
+    )
+    fecha_calculo = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Fecha de Cálculo"
+    )
+
+    class Meta:
+        db_table = 'inv_costeo_movimiento'
+        verbose_name = 'Costeo de Movimiento'
+        verbose_name_plural = 'Costeo de Movimientos'
+        ordering = ['clave_material', 'fecha_movimiento', 'historial']
+        indexes = [
+            models.Index(
+                fields=['clave_material', 'fecha_movimiento', 'historial'],
+                name='inv_costeo_clave_fecha_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.historial_id} - {self.clave_material}: {self.costo_total}"
+
+
+# =============================================================================
+# CONSUMO DE MATERIALES
+# =============================================================================
+
+class ConsumoMaterialDiario(models.Model):
+    """
+    Total diario de SALIDAS por especificación de material (color de lona,
+    medida de tubo, accesorio). Se actualiza de forma incremental desde
+    HistorialInventario con inventario/consumo.py; los tableros de compras
+    leen de aquí en lugar de recorrer el historial.
+    """
+
+    id_consumo = models.AutoField(primary_key=True)
+    fecha = models.DateField(
+        verbose_name="Fecha"
+    )
+    clave_material = models.CharField(
+        max_length=200,
+        verbose_name="Especificación de Material"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+    descripcion = models.CharField(
+        max_length=200,
+        verbose_name="Descripción"
+    )
+    unidad_medida = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Medida"
+    )
+    cantidad = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name="Cantidad Consumida"
+    )
+    movimientos = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Movimientos"
+    )
+    ultimo_historial = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Último Movimiento",
+        help_text="Mayor id de historial incluido (marca de avance incremental)"
+    )
+    fecha_actualizacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Última Actualización"
+    )
+
+    class Meta:
+        db_table = 'inv_consumo_material_diario'
+        verbose_name = 'Consumo Diario de Material'
+        verbose_name_plural = 'Consumo Diario de Materiales'
+        ordering = ['-fecha', 'clave_material']
+        unique_together = ['clave_material', 'fecha']
+        indexes = [
+            models.Index(fields=['tipo_inventario', 'fecha'], name='inv_consumo_tipo_fecha_idx'),
+            models.Index(fields=['fecha'], name='inv_consumo_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} - {self.descripcion}: {self.cantidad} {self.unidad_medida}"
+
+
+# =============================================================================
+# REQUISICIONES DE COMPRA
+# =============================================================================
+
+class EquivalenciaMaterial(models.Model):
+    """
+    Relaciona una especificación de material del inventario (la clave de
+    costeo.clave_material) con un producto del catálogo de un proveedor.
+    El generador de requisiciones (inventario/requisiciones.py) busca aquí,
+    por clave, las ofertas que pueden cubrir cada faltante.
+    """
+
+    id_equivalencia = models.AutoField(primary_key=True)
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+    clave_material = models.CharField(
+        max_length=200,
+        verbose_name="Especificación de Material",
+        help_text="Clave de la especificación (ver requisiciones pendientes sin oferta)"
+    )
+    descripcion = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Descripción"
+    )
+    producto = models.ForeignKey(
+        'proveedores.ProductoServicioProveedor',
+        on_delete=models.CASCADE,
+        related_name='equivalencias_inventario',
+        verbose_name="Producto del Proveedor"
+    )
+    factor_conversion = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=1,
+        validators=[MinValueValidator(Decimal('0.0001'))],
+        verbose_name="Factor de Conversión",
+        help_text="Metros, piezas o unidades de inventario por cada unidad del producto (ej: rollo de 50 m = 50)"
+    )
+    activo = models.BooleanField(
+        default=True,
+        verbose_name="Activo"
+    )
+    fecha_registro = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Registro"
+    )
+
+    class Meta:
+        db_table = 'inv_equivalencia_material'
+        verbose_name = 'Equivalencia de Material'
+        verbose_name_plural = 'Equivalencias de Material'
+        ordering = ['clave_material']
+        unique_together = ['clave_material', 'producto']
+        indexes = [
+            models.Index(fields=['clave_material', 'activo'], name='inv_equiv_clave_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.descripcion or self.clave_material} → {self.producto_id}"
+
+
+class RequisicionCompra(models.Model):
+    """
+    Requisición de compra a un proveedor. Las de estado BORRADOR las genera
+    el comando `generar_requisiciones_compra` y se reemplazan en cada
+    ejecución; las APROBADAS se descuentan de los faltantes hasta recibirse.
+    """
+
+    ESTADO_CHOICES = [
+        ('BORRADOR', 'Borrador'),
+        ('APROBADA', 'Aprobada'),
+        ('RECIBIDA', 'Recibida'),
+        ('ANULADA', 'Anulada'),
+    ]
+
+    id_requisicion = models.AutoField(primary_key=True)
+    proveedor = models.ForeignKey(
+        'proveedores.Proveedor',
+        on_delete=models.PROTECT,
+        related_name='requisiciones_compra',
+        verbose_name="Proveedor"
+    )
+    fecha_generacion = models.DateField(
+        default=timezone.now,
+        verbose_name="Fecha de Generación"
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='BORRADOR',
+        verbose_name="Estado"
+    )
+    total_estimado = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        default=0,
+        verbose_name="Total Estimado (COP)"
+    )
+    monto_minimo_pedido = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=0,
+        verbose_name="Monto Mínimo del Proveedor"
+    )
+    cumple_minimo = models.BooleanField(
+        default=True,
+        verbose_name="Cumple Monto Mínimo"
+    )
+    tiempo_entrega_dias = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tiempo de Entrega (días)",
+        help_text="El mayor tiempo de entrega de las líneas"
+    )
+    observaciones = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name="Observaciones"
+    )
+    generada_por = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='requisiciones_generadas',
+        blank=True,
+        null=True,
+        verbose_name="Generada por"
+    )
+    fecha_creacion = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Fecha de Creación"
+    )
+
+    class Meta:
+        db_table = 'inv_requisicion_compra'
+        verbose_name = 'Requisición de Compra'
+        verbose_name_plural = 'Requisiciones de Compra'
+        ordering = ['-fecha_generacion', 'proveedor']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_generacion'], name='inv_requisicion_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f"REQ-{self.pk:05d} - {self.proveedor}"
+
+
+class RequisicionCompraLinea(models.Model):
+    """
+    Línea de una requisición: el faltante de una especificación de material
+    (en unidades de inventario) y lo que se pide del producto del proveedor.
+    """
+
+    id_linea = models.AutoField(primary_key=True)
+    requisicion = models.ForeignKey(
+        RequisicionCompra,
+        on_delete=models.CASCADE,
+        related_name='lineas',
+        verbose_name="Requisición"
+    )
+    producto = models.ForeignKey(
+        'proveedores.ProductoServicioProveedor',
+        on_delete=models.PROTECT,
+        related_name='lineas_requisicion',
+        verbose_name="Producto del Proveedor"
+    )
+    tipo_inventario = models.CharField(
+        max_length=20,
+        choices=HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        verbose_name="Tipo de Inventario"
+    )
+    clave_material = models.CharField(
+        max_length=200,
+        verbose_name="Especificación de Material"
+    )
+    descripcion = models.CharField(
+        max_length=200,
+        verbose_name="Descripción"
+    )
+    unidad_inventario = models.CharField(
+        max_length=20,
+        verbose_name="Unidad de Inventario"
+    )
+
+    # Faltante (unidades de inventario)
+    cantidad_reposicion = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Reposición de Stock Mínimo"
+    )
+    cantidad_ordenes = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name="Faltante para Órdenes"
+    )
+    cantidad_faltante = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name="Faltante Total"
+    )
+
+    # Pedido (unidades del producto)
+    factor_conversion = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=1,
+        verbose_name="Factor de Conversión"
+    )
+    cantidad_pedida = models.PositiveIntegerField(
+        verbose_name="Cantidad a Pedir",
+        help_text="Redondeada a unidades enteras y a la cantidad mínima del producto"
+    )
+    unidad_compra = models.CharField(
+        max_length=30,
+        verbose_name="Unidad de Compra"
+    )
+    moneda = models.CharField(
+        max_length=3,
+        verbose_name="Moneda"
+    )
+    precio_unitario = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Precio Unitario"
+    )
+    precio_cop = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        verbose_name="Precio Unitario (COP)"
+    )
+    subtotal_cop = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        verbose_name="Subtotal (COP)"
+    )
+    tiempo_entrega_dias = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Tiempo de Entrega (días)"
+    )
+
+    class Meta:
+        db_table = 'inv_requisicion_compra_linea'
+        verbose_name = 'Línea de Requisición'
+        verbose_name_plural = 'Líneas de Requisición'
+        ordering = ['requisicion', 'tipo_inventario', 'descripcion']
+        unique_together = ['requisicion', 'clave_material']
+
+    def __str__(self):
+        return f"{self.descripcion}: {self.cantidad_pedida} {self.unidad_compra}"
+
+
+# =============================================================================
+# CACHÉ DE REPORTES
+# =============================================================================
+
+class VersionCacheInventario(models.Model):
+    """
+    Versión de los reportes de inventario en caché (ver cache_inventario.py).
+    Se incrementa con un UPDATE ... SET version = version + 1 al confirmar
+    cada movimiento, atómico aunque varios workers lo hagan a la vez.
+    """
+    clave = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name="Clave"
+    )
+    version = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Versión"
+    )
+
+    class Meta:
+        db_table = 'inv_version_cache'
+        verbose_name = 'Versión de Caché'
+        verbose_name_plural = 'Versiones de Caché'
+
+    def __str__(self):
+        return f"{self.clave}: {self.version}"
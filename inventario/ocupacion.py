@@ -0,0 +1,243 @@
+"""
+Ocupación de las ubicaciones del almacén
+American Carpas 1 SAS
+
+Lotes, metros, piezas, unidades y valor guardados en cada UbicacionAlmacen,
+calculados con una sola consulta UNION ALL agrupada por ubicación sobre las
+tres tablas de inventario. El resultado se guarda en la caché de reportes
+(se invalida con cada movimiento de stock) y se presenta como un árbol
+
+    bodega -> zona -> estante -> nivel -> ubicaciones
+
+para el mapa del almacén. Una ubicación está libre cuando no tiene lotes
+con existencia (los lotes agotados o dados de baja no ocupan espacio).
+"""
+
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, DecimalField, F, IntegerField, Sum, Value, When
+
+from .cache_inventario import obtener
+from .models import UbicacionAlmacen, InventarioLona, InventarioEstructura, InventarioAccesorio
+from .valorizacion import valor_lona, valor_estructura, valor_accesorio
+
+
+CERO = Decimal('0')
+
+# Estados de lote que no ocupan espacio físico
+ESTADOS_SIN_OCUPACION = ['AGOTADO', 'BAJA']
+
+# Niveles del árbol y texto para los valores vacíos
+NIVELES = ['bodega', 'zona', 'estante', 'nivel']
+SIN_DATO = {'bodega': 'Sin bodega', 'zona': 'Sin zona', 'estante': 'Sin estante', 'nivel': 'Sin nivel'}
+
+CAMPOS_TOTALES = ['lotes', 'metros', 'piezas', 'unidades', 'valor']
+
+
+# =============================================================================
+# CONSULTA AGRUPADA
+# =============================================================================
+
+def grupos_por_ubicacion():
+    """
+    Una sola consulta UNION ALL con los totales por ubicación y categoría.
+    Retorna una lista de {ubicacion_id, categoria, lotes, metros, piezas, unidades, valor}.
+    """
+    texto = CharField()
+    metros = DecimalField(max_digits=18, decimal_places=2)
+    entero = IntegerField()
+
+    def agrupar(qs, categoria, metros_expr, piezas_expr, unidades_expr, valor_expr):
+        return (
+            qs.filter(activo=True)
+            .exclude(estado__in=ESTADOS_SIN_OCUPACION)
+            .annotate(
+                categoria=Value(categoria, output_field=texto),
+                m=metros_expr, p=piezas_expr, u=unidades_expr, v=valor_expr,
+            )
+            .values('ubicacion_id', 'categoria')
+            .annotate(lotes=Count('pk'), metros=Sum('m'), piezas=Sum('p'), unidades=Sum('u'), valor=Sum('v'))
+            .order_by()
+        )
+
+    lonas = agrupar(
+        InventarioLona.objects, 'LONA',
+        F('metros_disponibles'), Value(0, output_field=entero), Value(0, output_field=entero),
+        valor_lona(),
+    )
+    estructuras = agrupar(
+        InventarioEstructura.objects, 'ESTRUCTURA',
+        Case(When(tipo_control='METROS', then=F('metros_disponibles')), default=Value(0), output_field=metros),
+        Case(When(tipo_control='PIEZAS', then=F('piezas_disponibles')), default=Value(0), output_field=entero),
+        Value(0, output_field=entero),
+        valor_estructura(),
+    )
+    accesorios = agrupar(
+        InventarioAccesorio.objects, 'ACCESORIO',
+        Value(0, output_field=metros), Value(0, output_field=entero), F('cantidad_disponible'),
+        valor_accesorio(),
+    )
+    return list(lonas.union(estructuras, accesorios, all=True))
+
+
+# =============================================================================
+# OCUPACIÓN POR UBICACIÓN
+# =============================================================================
+
+def _totales_vacios():
+    return {'lotes': 0, 'metros': CERO, 'piezas': 0, 'unidades': 0, 'valor': CERO}
+
+
+def _sumar(destino, origen):
+    for campo in CAMPOS_TOTALES:
+        destino[campo] += origen[campo]
+
+
+def calcular_ocupacion():
+    """
+    Ocupación de todas las ubicaciones activas (sin caché): dos consultas,
+    una para las ubicaciones y la UNION ALL agrupada para los lotes.
+    """
+    ubicaciones = {}
+    for ubicacion in UbicacionAlmacen.objects.filter(activo=True).values(
+        'id_ubicacion', 'codigo', 'nombre', 'bodega', 'zona', 'estante', 'nivel', 'capacidad_descripcion',
+    ):
+        ubicacion.update(_totales_vacios())
+        ubicacion['categorias'] = {}
+        ubicaciones[ubicacion['id_ubicacion']] = ubicacion
+
+    for fila in grupos_por_ubicacion():
+        ubicacion = ubicaciones.get(fila['ubicacion_id'])
+        if ubicacion is None:
+            continue  # Lotes en ubicaciones inactivas
+        totales = {
+            'lotes': fila['lotes'],
+            'metros': fila['metros'] or CERO,
+            'piezas': fila['piezas'] or 0,
+            'unidades': fila['unidades'] or 0,
+            'valor': fila['valor'] or CERO,
+        }
+        _sumar(ubicacion, totales)
+        ubicacion['categorias'][fila['categoria']] = totales
+
+    for ubicacion in ubicaciones.values():
+        ubicacion['libre'] = ubicacion['lotes'] == 0
+    return list(ubicaciones.values())
+
+
+def ocupacion_ubicaciones():
+    """Ocupación por ubicación desde la caché de reportes"""
+    return obtener('ocupacion', calcular_ocupacion)
+
+
+# =============================================================================
+# ÁRBOL BODEGA -> ZONA -> ESTANTE -> NIVEL
+# =============================================================================
+
+def _json_totales(totales):
+    return {
+        'lotes': totales['lotes'],
+        'metros': float(totales['metros']),
+        'piezas': totales['piezas'],
+        'unidades': totales['unidades'],
+        'valor': float(totales['valor']),
+    }
+
+
+def _nodo(nivel, nombre):
+    nodo = {'nivel': nivel, 'nombre': nombre, 'ubicaciones_total': 0, 'ubicaciones_libres': 0, 'hijos': {}}
+    nodo.update(_totales_vacios())
+    return nodo
+
+
+def _cerrar(nodo):
+    """Convierte los hijos a lista ordenada y los totales a tipos JSON"""
+    if 'hijos' not in nodo:
+        return nodo  # Ubicación (hoja)
+    nodo.update(_json_totales(nodo))
+    nodo['hijos'] = [_cerrar(hijo) for _, hijo in sorted(nodo['hijos'].items())]
+    return nodo
+
+
+def arbol_ocupacion(bodega=None):
+    """
+    Árbol de ocupación listo para JSON. Cada nodo trae los totales de todo lo
+    que cuelga de él; las hojas son las ubicaciones con sus totales por categoría.
+    """
+    raiz = _nodo('almacen', 'Almacén')
+    for ubicacion in ocupacion_ubicaciones():
+        if bodega and ubicacion['bodega'] != bodega:
+            continue
+        ruta = [raiz]
+        for nivel in NIVELES:
+            nombre = ubicacion[nivel] or SIN_DATO[nivel]
+            padre = ruta[-1]
+            if nombre not in padre['hijos']:
+                padre['hijos'][nombre] = _nodo(nivel, nombre)
+            ruta.append(padre['hijos'][nombre])
+
+        for nodo in ruta:
+            _sumar(nodo, ubicacion)
+            nodo['ubicaciones_total'] += 1
+            nodo['ubicaciones_libres'] += int(ubicacion['libre'])
+
+        hoja = {
+            'nivel': 'ubicacion',
+            'id': ubicacion['id_ubicacion'],
+            'codigo': ubicacion['codigo'],
+            'nombre': ubicacion['nombre'],
+            'capacidad': ubicacion['capacidad_descripcion'],
+            'libre': ubicacion['libre'],
+            'categorias': {
+                categoria: _json_totales(totales)
+                for categoria, totales in ubicacion['categorias'].items()
+            },
+        }
+        hoja.update(_json_totales(ubicacion))
+        ruta[-1]['hijos'][ubicacion['codigo']] = hoja
+
+    return _cerrar(raiz)
+
+
+# =============================================================================
+# UBICACIONES LIBRES
+# =============================================================================
+
+def ubicaciones_libres(tipo_inventario=None, bodega=None, zona=None, limite=10):
+    """
+    Ubicaciones activas sin lotes, en el orden físico del almacén.
+    Con `tipo_inventario` se priorizan las ubicaciones de zonas donde ya se
+    guarda ese tipo de material (para mantener juntos los mismos materiales).
+    """
+    ocupacion = ocupacion_ubicaciones()
+
+    zonas_del_tipo = set()
+    if tipo_inventario:
+        zonas_del_tipo = {
+            (u['bodega'], u['zona']) for u in ocupacion if tipo_inventario in u['categorias']
+        }
+
+    libres = [
+        u for u in ocupacion
+        if u['libre']
+        and (not bodega or u['bodega'] == bodega)
+        and (not zona or u['zona'] == zona)
+    ]
+    libres.sort(key=lambda u: (
+        (u['bodega'], u['zona']) not in zonas_del_tipo,
+        u['bodega'] or '', u['zona'] or '', u['estante'] or '', u['nivel'] or '', u['codigo'],
+    ))
+    return [
+        {
+            'id': u['id_ubicacion'],
+            'codigo': u['codigo'],
+            'nombre': u['nombre'],
+            'bodega': u['bodega'],
+            'zona': u['zona'],
+            'estante': u['estante'],
+            'nivel': u['nivel'],
+            'capacidad': u['capacidad_descripcion'],
+            'zona_con_mismo_material': (u['bodega'], u['zona']) in zonas_del_tipo,
+        }
+        for u in libres[:limite]
+    ]
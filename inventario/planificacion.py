@@ -0,0 +1,247 @@
+"""
+Planificación de producción con capacidad finita
+American Carpas 1 SAS
+
+Asigna las órdenes abiertas a días de trabajo en cada estación
+(estructura, pintura, confección) respetando la capacidad diaria de
+EstacionTrabajo. Las órdenes se atienden en orden de prioridad usando una
+cola de prioridad (heapq):
+
+    urgentes primero -> prioridad (1 = muy alta) -> fecha de entrega -> antigüedad
+
+Secuencia de fases de cada orden:
+    ESTRUCTURA -> PINTURA
+    CONFECCION (en paralelo con la estructura)
+    La orden termina cuando terminan pintura y confección.
+
+El esfuerzo se mide en m² de carpa, calculados desde las dimensiones y
+cantidades de OrdenProduccionItem. El plan se calcula en memoria con dos
+consultas, por lo que puede recalcularse en cada cambio.
+"""
+
+import heapq
+import re
+from datetime import date, timedelta
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import OrdenProduccion, OrdenProduccionItem, EstacionTrabajo
+
+
+# Capacidades por defecto (m²/día) si la estación no está configurada
+CAPACIDAD_POR_DEFECTO = {
+    'ESTRUCTURA': 120.0,
+    'PINTURA': 150.0,
+    'CONFECCION': 100.0,
+}
+
+# Área asumida cuando las dimensiones del ítem no se pueden interpretar
+AREA_POR_DEFECTO_M2 = 9.0
+
+# Área adicional de confección por cada cortina
+AREA_CORTINA_M2 = 6.0
+
+ESTADOS_PLANIFICABLES = ['AUTORIZADA', 'EN_PROCESO']
+
+# Fase -> campo booleano de la orden que indica que ya se completó
+FASE_COMPLETADA = {
+    'ESTRUCTURA': 'estructura_fabricada',
+    'PINTURA': 'estructura_pintada',
+    'CONFECCION': 'lona_fabricada',
+}
+
+_PATRON_DIMENSIONES = re.compile(r'(\d+(?:[.,]\d+)?)\s*[xX×*]\s*(\d+(?:[.,]\d+)?)')
+
+
+# =============================================================================
+# ESFUERZO
+# =============================================================================
+
+def area_item(dimensiones):
+    """Área en m² de un texto como '10x20', '3x3MTS' o '2 X 2 MTS'"""
+    if dimensiones:
+        encontrado = _PATRON_DIMENSIONES.search(dimensiones)
+        if encontrado:
+            ancho, largo = (float(v.replace(',', '.')) for v in encontrado.groups())
+            if ancho > 0 and largo > 0:
+                return ancho * largo
+    return AREA_POR_DEFECTO_M2
+
+
+def esfuerzo_orden(orden):
+    """Esfuerzo (m²) por estación para los ítems activos de la orden"""
+    area = 0.0
+    cortinas = 0.0
+    for item in orden.items.all():
+        area += area_item(item.dimensiones) * item.cantidad
+        if item.incluye_cortinas:
+            cortinas += (item.cantidad_cortinas or 0) * item.cantidad * AREA_CORTINA_M2
+    if area == 0:
+        area = AREA_POR_DEFECTO_M2
+    return {
+        'ESTRUCTURA': area,
+        'PINTURA': area,
+        'CONFECCION': area + cortinas,
+    }
+
+
+# =============================================================================
+# CALENDARIO DE CAPACIDAD
+# =============================================================================
+
+class _Estacion:
+    """Capacidad restante por día de una estación durante la planificación"""
+
+    def __init__(self, codigo, capacidad, trabaja_sabado, inicio):
+        self.codigo = codigo
+        self.capacidad = capacidad
+        self.trabaja_sabado = trabaja_sabado
+        self.inicio = inicio
+        self.restante = {}        # día (offset desde inicio) -> capacidad libre
+        self.primer_dia_libre = 0  # todos los días anteriores están llenos
+
+    def es_laborable(self, dia):
+        semana = (self.inicio + timedelta(days=dia)).weekday()
+        return semana < 5 or (semana == 5 and self.trabaja_sabado)
+
+    def asignar(self, esfuerzo, desde):
+        """
+        Consume capacidad desde el día `desde` hasta cubrir el esfuerzo.
+        Retorna (primer_día, último_día) usados.
+        """
+        dia = max(desde, self.primer_dia_libre)
+        primero = None
+        while True:
+            if self.es_laborable(dia):
+                libre = self.restante.get(dia, self.capacidad)
+                if libre > 1e-9:
+                    usado = min(libre, esfuerzo)
+                    self.restante[dia] = libre - usado
+                    esfuerzo -= usado
+                    if primero is None:
+                        primero = dia
+                    if esfuerzo <= 1e-9:
+                        break
+            dia += 1
+
+        # Avanzar el puntero sobre días ya llenos
+        while (not self.es_laborable(self.primer_dia_libre)
+               or self.restante.get(self.primer_dia_libre, self.capacidad) <= 1e-9):
+            self.primer_dia_libre += 1
+        return primero, dia
+
+    def ultimo_dia(self):
+        """Último día (offset desde inicio) con trabajo asignado, o None"""
+        return max(self.restante) if self.restante else None
+
+    def carga_dias(self):
+        """Días laborables ocupados hasta el último día con trabajo asignado"""
+        ultimo = self.ultimo_dia()
+        if ultimo is None:
+            return 0
+        return sum(1 for dia in range(ultimo + 1) if self.es_laborable(dia))
+
+
+def _estaciones(inicio):
+    configuradas = {
+        e.codigo: e for e in EstacionTrabajo.objects.filter(activo=True)
+    }
+    estaciones = {}
+    for codigo, capacidad in CAPACIDAD_POR_DEFECTO.items():
+        conf = configuradas.get(codigo)
+        estaciones[codigo] = _Estacion(
+            codigo,
+            float(conf.capacidad_diaria) if conf else capacidad,
+            conf.trabaja_sabado if conf else True,
+            inicio,
+        )
+    return estaciones
+
+
+# =============================================================================
+# PLAN
+# =============================================================================
+
+def ordenes_abiertas():
+    return (
+        OrdenProduccion.objects
+        .filter(activo=True, terminada=False, estado__in=ESTADOS_PLANIFICABLES)
+        .select_related('proyecto')
+        .prefetch_related(Prefetch('items', queryset=OrdenProduccionItem.objects.filter(activo=True)))
+    )
+
+
+def _llave_prioridad(orden):
+    entrega = orden.fecha_entrega_requerida or date.max
+    return (not orden.es_urgente, orden.prioridad, entrega, orden.fecha_orden, orden.pk)
+
+
+def planificar(ordenes=None, inicio=None):
+    """
+    Calcula el plan de producción.
+    Retorna {'inicio', 'ordenes': [...], 'atrasadas', 'carga'} donde cada orden
+    trae las fechas por fase, la fecha proyectada de terminación y si queda atrasada.
+    """
+    inicio = inicio or timezone.now().date()
+    ordenes = list(ordenes_abiertas() if ordenes is None else ordenes)
+    estaciones = _estaciones(inicio)
+
+    cola = [(_llave_prioridad(orden), indice) for indice, orden in enumerate(ordenes)]
+    heapq.heapify(cola)
+
+    def fecha(dia):
+        return inicio + timedelta(days=dia)
+
+    plan = []
+    while cola:
+        _, indice = heapq.heappop(cola)
+        orden = ordenes[indice]
+        esfuerzo = esfuerzo_orden(orden)
+        fases = {}
+
+        fin_estructura = -1
+        if not orden.estructura_fabricada:
+            primero, ultimo = estaciones['ESTRUCTURA'].asignar(esfuerzo['ESTRUCTURA'], 0)
+            fases['ESTRUCTURA'] = (fecha(primero), fecha(ultimo))
+            fin_estructura = ultimo
+
+        fin_pintura = fin_estructura
+        if not orden.estructura_pintada:
+            primero, ultimo = estaciones['PINTURA'].asignar(esfuerzo['PINTURA'], fin_estructura + 1)
+            fases['PINTURA'] = (fecha(primero), fecha(ultimo))
+            fin_pintura = ultimo
+
+        fin_confeccion = -1
+        if not orden.lona_fabricada:
+            primero, ultimo = estaciones['CONFECCION'].asignar(esfuerzo['CONFECCION'], 0)
+            fases['CONFECCION'] = (fecha(primero), fecha(ultimo))
+            fin_confeccion = ultimo
+
+        fin = max(fin_pintura, fin_confeccion, 0)
+        fin_proyectado = fecha(fin)
+        entrega = orden.fecha_entrega_requerida
+        dias_atraso = (fin_proyectado - entrega).days if entrega else 0
+
+        plan.append({
+            'orden': orden,
+            'esfuerzo_m2': round(esfuerzo['ESTRUCTURA'], 1),
+            'fases': fases,
+            'fecha_fin_proyectada': fin_proyectado,
+            'atrasada': dias_atraso > 0,
+            'dias_atraso': max(dias_atraso, 0),
+        })
+
+    return {
+        'inicio': inicio,
+        'ordenes': plan,
+        'atrasadas': sum(1 for p in plan if p['atrasada']),
+        'carga': {
+            codigo: {
+                'capacidad_diaria': e.capacidad,
+                'dias_ocupados': e.carga_dias(),
+                'hasta': fecha(e.ultimo_dia()) if e.restante else None,
+            }
+            for codigo, e in estaciones.items()
+        },
+    }
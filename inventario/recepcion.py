@@ -0,0 +1,459 @@
+"""
+Recepción masiva de inventario desde planillas del proveedor
+American Carpas 1 SAS
+
+Lee un .xlsx (openpyxl en modo solo lectura) o .csv fila por fila, resuelve
+los catálogos (tipo de lona, ancho, color, medida de tubo, calibre,
+ubicación, proveedor...) con diccionarios cargados una sola vez y valida
+todas las filas. Si no hay errores crea los lotes y sus movimientos de
+ENTRADA con bulk_create en una sola transacción; si hay errores no se
+guarda nada y se reportan por número de fila.
+
+Encabezados esperados (sin importar mayúsculas, tildes ni espacios):
+
+    LONA:       tipo_lona, ancho, color, tratamiento*, gramaje*, metros,
+                costo_por_metro, metros_minimo_alerta*, fecha_fabricacion*,
+                garantia_meses*
+    ESTRUCTURA: tipo_estructura, medida_tubo, calibre, material*, acabado*,
+                tipo_control* (METROS/PIEZAS), metros | piezas,
+                longitud_pieza*, costo_por_metro* | costo_por_pieza*,
+                peso_por_metro*
+    ACCESORIO:  tipo_accesorio, nombre, cantidad, costo_unitario,
+                cantidad_minima_alerta*, descripcion*
+
+    Comunes:    ubicacion, proveedor*, lote_serial*, numero_factura*,
+                fecha_ingreso*, observaciones*
+
+    (* opcionales)
+"""
+
+import csv
+import io
+import unicodedata
+import zipfile
+from contextlib import closing
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from django.db import transaction
+from django.utils import timezone
+
+from proveedores.models import Proveedor
+
+from .cache_inventario import invalidar_stock
+from .costeo import programar_costeo_lote
+from .models import (
+    UbicacionAlmacen,
+    TipoLona, AnchoLona, ColorLona, TratamientoLona,
+    TipoEstructura, MedidaTubo, Calibre, MaterialEstructura, AcabadoEstructura,
+    TipoAccesorio,
+    InventarioLona, InventarioEstructura, InventarioAccesorio,
+    HistorialInventario,
+)
+from .reservas import MODELOS_INVENTARIO, campos_stock
+
+
+# Máximo de filas por archivo
+MAXIMO_FILAS = 5000
+
+
+class ErrorFila(Exception):
+    """Error de validación de una celda de la planilla"""
+
+
+# =============================================================================
+# LECTURA DEL ARCHIVO
+# =============================================================================
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni espacios extremos: 'Tipo Lona ' -> 'tipo lona'"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+def _encabezado(valor):
+    return normalizar(valor or '').replace(' ', '_')
+
+
+def leer_filas(archivo):
+    """
+    Genera (número_de_fila, {encabezado: valor}) sin cargar todo el archivo
+    en memoria. Acepta .xlsx y .csv (UTF-8 o UTF-8 con BOM).
+    """
+    nombre = (getattr(archivo, 'name', '') or '').lower()
+    libro = None
+    if nombre.endswith('.csv'):
+        texto = io.TextIOWrapper(getattr(archivo, 'file', archivo), encoding='utf-8-sig', newline='')
+        muestra = texto.read(4096)
+        texto.seek(0)
+        # Excel en español guarda los CSV separados por ';'
+        separador = ';' if muestra.count(';') > muestra.count(',') else ','
+        filas = enumerate(csv.reader(texto, delimiter=separador), start=1)
+    elif nombre.endswith('.xlsx'):
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        filas = enumerate(libro.active.iter_rows(values_only=True), start=1)
+    else:
+        raise ErrorFila('Formato no soportado, use .xlsx o .csv')
+
+    # En modo solo lectura openpyxl deja el archivo abierto hasta close()
+    try:
+        encabezados = None
+        for numero, valores in filas:
+            if encabezados is None:
+                encabezados = [_encabezado(v) for v in valores]
+                continue
+            if not any(v not in (None, '') for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        if libro is not None:
+            libro.close()
+
+
+# =============================================================================
+# CATÁLOGOS EN MEMORIA
+# =============================================================================
+
+def _mapa(queryset, *campos):
+    """{valor normalizado de cualquiera de los campos: pk}"""
+    mapa = {}
+    for fila in queryset.values('pk', *campos):
+        for campo in campos:
+            if fila[campo] not in (None, ''):
+                mapa[normalizar(fila[campo])] = fila['pk']
+    return mapa
+
+
+def _mapa_decimal(queryset, campo):
+    """{Decimal normalizado: pk} para catálogos numéricos (ancho, calibre)"""
+    return {
+        valor.normalize(): pk
+        for pk, valor in queryset.values_list('pk', campo)
+    }
+
+
+class Catalogos:
+    """Todos los catálogos necesarios para un tipo de inventario"""
+
+    def __init__(self, tipo_inventario):
+        self.ubicaciones = _mapa(UbicacionAlmacen.objects.filter(activo=True), 'codigo', 'nombre')
+        self.proveedores = _mapa(
+            Proveedor.objects.all(), 'numero_documento', 'razon_social', 'nombre_comercial'
+        )
+        if tipo_inventario == 'LONA':
+            self.tipos_lona = _mapa(TipoLona.objects.filter(activo=True), 'codigo', 'nombre')
+            self.anchos = _mapa_decimal(AnchoLona.objects.filter(activo=True), 'valor_metros')
+            self.colores = _mapa(ColorLona.objects.filter(activo=True), 'nombre')
+            self.tratamientos = _mapa(TratamientoLona.objects.filter(activo=True), 'codigo', 'nombre')
+        elif tipo_inventario == 'ESTRUCTURA':
+            self.tipos_estructura = _mapa(TipoEstructura.objects.filter(activo=True), 'codigo', 'nombre')
+            self.medidas = _mapa(MedidaTubo.objects.filter(activo=True), 'valor_medida')
+            self.calibres = _mapa_decimal(Calibre.objects.filter(activo=True), 'valor_calibre')
+            self.materiales = _mapa(MaterialEstructura.objects.filter(activo=True), 'codigo', 'nombre')
+            self.acabados = _mapa(AcabadoEstructura.objects.filter(activo=True), 'codigo', 'nombre')
+        else:
+            self.tipos_accesorio = _mapa(TipoAccesorio.objects.filter(activo=True), 'codigo', 'nombre')
+
+
+# =============================================================================
+# VALIDACIÓN DE CELDAS
+# =============================================================================
+
+def _texto(fila, campo, requerido=False, largo=None):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if requerido and not valor:
+        raise ErrorFila(f"'{campo}' es obligatorio")
+    if largo and len(valor) > largo:
+        raise ErrorFila(f"'{campo}' supera {largo} caracteres")
+    return valor or None
+
+
+def _decimal(fila, campo, requerido=False, minimo=None):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        if requerido:
+            raise ErrorFila(f"'{campo}' es obligatorio")
+        return None
+    try:
+        numero = Decimal(str(valor).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ErrorFila(f"'{campo}' no es un número: {valor}")
+    if minimo is not None and numero < minimo:
+        raise ErrorFila(f"'{campo}' debe ser mayor o igual a {minimo}")
+    return numero
+
+
+def _entero(fila, campo, requerido=False, minimo=0):
+    numero = _decimal(fila, campo, requerido, minimo)
+    if numero is None:
+        return None
+    if numero != numero.to_integral_value():
+        raise ErrorFila(f"'{campo}' debe ser un número entero")
+    return int(numero)
+
+
+def _fecha(fila, campo):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = str(valor).strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            pass
+    raise ErrorFila(f"'{campo}' no es una fecha válida (AAAA-MM-DD o DD/MM/AAAA): {valor}")
+
+
+def _catalogo(fila, campo, mapa, requerido=True):
+    valor = _texto(fila, campo, requerido)
+    if valor is None:
+        return None
+    pk = mapa.get(normalizar(valor))
+    if pk is None:
+        raise ErrorFila(f"'{campo}' no existe en el catálogo: {valor}")
+    return pk
+
+
+def _catalogo_decimal(fila, campo, mapa):
+    numero = _decimal(fila, campo, requerido=True)
+    pk = mapa.get(numero.normalize())
+    if pk is None:
+        raise ErrorFila(f"'{campo}' no existe en el catálogo: {fila.get(campo)}")
+    return pk
+
+
+def _comunes(fila, catalogos, hoy):
+    return {
+        'ubicacion_id': _catalogo(fila, 'ubicacion', catalogos.ubicaciones),
+        'proveedor_id': _catalogo(fila, 'proveedor', catalogos.proveedores, requerido=False),
+        'lote_serial': _texto(fila, 'lote_serial', largo=50),
+        'fecha_ingreso': _fecha(fila, 'fecha_ingreso') or hoy,
+        'observaciones': _texto(fila, 'observaciones'),
+    }
+
+
+# =============================================================================
+# CONSTRUCCIÓN DE LOTES POR TIPO
+# =============================================================================
+
+def _lona(fila, catalogos, hoy):
+    metros = _decimal(fila, 'metros', requerido=True, minimo=Decimal('0.01'))
+    datos = {
+        'tipo_lona_id': _catalogo(fila, 'tipo_lona', catalogos.tipos_lona),
+        'ancho_lona_id': _catalogo_decimal(fila, 'ancho', catalogos.anchos),
+        'color_lona_id': _catalogo(fila, 'color', catalogos.colores),
+        'tratamiento_id': _catalogo(fila, 'tratamiento', catalogos.tratamientos, requerido=False),
+        'gramaje': _decimal(fila, 'gramaje', minimo=0),
+        'metros_iniciales': metros,
+        'metros_disponibles': metros,
+        'costo_por_metro': _decimal(fila, 'costo_por_metro', requerido=True, minimo=0),
+        'numero_factura': _texto(fila, 'numero_factura', largo=50),
+        'fecha_fabricacion': _fecha(fila, 'fecha_fabricacion'),
+        'garantia_meses': _entero(fila, 'garantia_meses'),
+        **_comunes(fila, catalogos, hoy),
+    }
+    minimo = _decimal(fila, 'metros_minimo_alerta', minimo=0)
+    if minimo is not None:
+        datos['metros_minimo_alerta'] = minimo
+    return InventarioLona(**datos), metros, 'metros'
+
+
+def _estructura(fila, catalogos, hoy):
+    control = (_texto(fila, 'tipo_control') or 'METROS').upper()
+    if control not in ('METROS', 'PIEZAS'):
+        raise ErrorFila(f"'tipo_control' debe ser METROS o PIEZAS: {control}")
+    datos = {
+        'tipo_estructura_id': _catalogo(fila, 'tipo_estructura', catalogos.tipos_estructura),
+        'medida_tubo_id': _catalogo(fila, 'medida_tubo', catalogos.medidas),
+        'calibre_id': _catalogo_decimal(fila, 'calibre', catalogos.calibres),
+        'material_id': _catalogo(fila, 'material', catalogos.materiales, requerido=False),
+        'acabado_id': _catalogo(fila, 'acabado', catalogos.acabados, requerido=False),
+        'peso_por_metro': _decimal(fila, 'peso_por_metro', minimo=0),
+        'tipo_control': control,
+        'longitud_pieza': _decimal(fila, 'longitud_pieza', minimo=0),
+        'costo_por_metro': _decimal(fila, 'costo_por_metro', minimo=0) or Decimal('0'),
+        'costo_por_pieza': _decimal(fila, 'costo_por_pieza', minimo=0) or Decimal('0'),
+        'numero_factura': _texto(fila, 'numero_factura', largo=50),
+        **_comunes(fila, catalogos, hoy),
+    }
+    if control == 'PIEZAS':
+        cantidad = _entero(fila, 'piezas', requerido=True, minimo=1)
+        datos.update(piezas_iniciales=cantidad, piezas_disponibles=cantidad)
+        unidad = 'piezas'
+    else:
+        cantidad = _decimal(fila, 'metros', requerido=True, minimo=Decimal('0.01'))
+        datos.update(metros_iniciales=cantidad, metros_disponibles=cantidad)
+        unidad = 'metros'
+    return InventarioEstructura(**datos), cantidad, unidad
+
+
+def _accesorio(fila, catalogos, hoy):
+    cantidad = _entero(fila, 'cantidad', requerido=True, minimo=1)
+    datos = {
+        'tipo_accesorio_id': _catalogo(fila, 'tipo_accesorio', catalogos.tipos_accesorio),
+        'nombre': _texto(fila, 'nombre', requerido=True, largo=150),
+        'descripcion': _texto(fila, 'descripcion'),
+        'cantidad_inicial': cantidad,
+        'cantidad_disponible': cantidad,
+        'costo_unitario': _decimal(fila, 'costo_unitario', requerido=True, minimo=0),
+        **_comunes(fila, catalogos, hoy),
+    }
+    minimo = _entero(fila, 'cantidad_minima_alerta')
+    if minimo is not None:
+        datos['cantidad_minima_alerta'] = minimo
+    return InventarioAccesorio(**datos), Decimal(cantidad), 'unidades'
+
+
+# tipo -> (modelo, campo código, prefijo, campo pk, constructor, campo FK en historial)
+TIPOS_RECEPCION = {
+    'LONA': (InventarioLona, 'codigo_rollo', 'LON', 'id_lona', _lona, 'lona'),
+    'ESTRUCTURA': (InventarioEstructura, 'codigo_lote', 'EST', 'id_estructura', _estructura, 'estructura'),
+    'ACCESORIO': (InventarioAccesorio, 'codigo', 'ACC', 'id_accesorio', _accesorio, 'accesorio'),
+}
+
+
+# Columnas de la plantilla descargable por tipo
+COLUMNAS_PLANTILLA = {
+    'LONA': [
+        'tipo_lona', 'ancho', 'color', 'tratamiento', 'gramaje', 'metros', 'costo_por_metro',
+        'metros_minimo_alerta', 'fecha_fabricacion', 'garantia_meses',
+    ],
+    'ESTRUCTURA': [
+        'tipo_estructura', 'medida_tubo', 'calibre', 'material', 'acabado', 'tipo_control',
+        'metros', 'piezas', 'longitud_pieza', 'costo_por_metro', 'costo_por_pieza', 'peso_por_metro',
+    ],
+    'ACCESORIO': [
+        'tipo_accesorio', 'nombre', 'cantidad', 'costo_unitario', 'cantidad_minima_alerta', 'descripcion',
+    ],
+}
+COLUMNAS_COMUNES = ['ubicacion', 'proveedor', 'lote_serial', 'numero_factura', 'fecha_ingreso', 'observaciones']
+
+
+# =============================================================================
+# RECEPCIÓN
+# =============================================================================
+
+def validar_archivo(archivo, tipo_inventario):
+    """
+    Valida todas las filas. Retorna (lotes, errores) donde lotes es una
+    lista de (número_fila, instancia sin guardar, cantidad, unidad) y
+    errores una lista de (número_fila, mensaje).
+    """
+    _, _, _, _, construir, _ = TIPOS_RECEPCION[tipo_inventario]
+    catalogos = Catalogos(tipo_inventario)
+    hoy = timezone.now().date()
+    lotes, errores = [], []
+
+    try:
+        with closing(leer_filas(archivo)) as filas:
+            for numero, fila in filas:
+                if len(lotes) + len(errores) >= MAXIMO_FILAS:
+                    errores.append((numero, f'El archivo supera el máximo de {MAXIMO_FILAS} filas'))
+                    break
+                try:
+                    lotes.append((numero, *construir(fila, catalogos, hoy)))
+                except ErrorFila as e:
+                    errores.append((numero, str(e)))
+    except ErrorFila as e:
+        errores.append((0, str(e)))
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, InvalidFileException, OSError, KeyError) as e:
+        errores.append((0, f'No se pudo leer el archivo: {e}'))
+
+    if not lotes and not errores:
+        errores.append((0, 'El archivo no tiene filas para importar'))
+    return lotes, errores
+
+
+@transaction.atomic
+def registrar_recepcion(tipo_inventario, lotes, usuario=None, documento=None):
+    """
+    Crea los lotes validados y un movimiento de ENTRADA por cada uno.
+    Los códigos se asignan en bloque con la misma numeración de _generar_codigo().
+    """
+    modelo, campo_codigo, prefijo, campo_pk, _, campo_fk = TIPOS_RECEPCION[tipo_inventario]
+    ahora = timezone.now()
+
+    # Bloquear el último registro mientras se asignan los códigos
+    ultimo = modelo.objects.select_for_update().order_by(f'-{campo_pk}').values_list('pk', flat=True).first()
+    siguiente = (ultimo or 0) + 1
+
+    instancias = []
+    for desplazamiento, (_, instancia, _, _) in enumerate(lotes):
+        setattr(instancia, campo_codigo, f"{prefijo}-{siguiente + desplazamiento:04d}")
+        instancia.creado_por = usuario
+        instancia.fecha_creacion = ahora
+        instancias.append(instancia)
+    modelo.objects.bulk_create(instancias, batch_size=500)
+
+    # MySQL no devuelve las llaves de bulk_create: recuperarlas por código
+    creados = modelo.objects.in_bulk(
+        [getattr(i, campo_codigo) for i in instancias], field_name=campo_codigo
+    )
+
+    historial = []
+    for (_, instancia, cantidad, unidad) in lotes:
+        item = creados[getattr(instancia, campo_codigo)]
+        historial.append(HistorialInventario(
+            fecha_movimiento=ahora,
+            tipo_movimiento='ENTRADA',
+            tipo_inventario=tipo_inventario,
+            cantidad_anterior=Decimal('0'),
+            cantidad_movimiento=cantidad,
+            cantidad_nueva=cantidad,
+            unidad_medida=unidad,
+            documento_referencia=documento or getattr(instancia, 'numero_factura', None),
+            motivo='Recepción masiva desde planilla',
+            registrado_por=usuario,
+            **{campo_fk: item},
+        ))
+    HistorialInventario.objects.bulk_create(historial, batch_size=500)
+    programar_costeo_lote(historial)
+
+    invalidar_stock()
+    return list(creados.values())
+
+
+def registrar_entrada(item, usuario=None, documento=None, motivo='Registro individual del lote'):
+    """
+    Movimiento de ENTRADA de un lote registrado uno a uno (formularios de
+    lona, estructura y accesorio), para que el historial, el costeo y los
+    saldos a fecha lo incluyan igual que a los de la recepción masiva.
+    """
+    tipo_inventario, campo_disponible, _, unidad = campos_stock(item)
+    _, campo_fk = MODELOS_INVENTARIO[tipo_inventario]
+    cantidad = Decimal(getattr(item, campo_disponible) or 0)
+    if cantidad <= 0:
+        return None
+    return HistorialInventario.objects.create(
+        fecha_movimiento=timezone.now(),
+        tipo_movimiento='ENTRADA',
+        tipo_inventario=tipo_inventario,
+        cantidad_anterior=Decimal('0'),
+        cantidad_movimiento=cantidad,
+        cantidad_nueva=cantidad,
+        unidad_medida=unidad,
+        documento_referencia=documento or getattr(item, 'numero_factura', None),
+        motivo=motivo,
+        registrado_por=usuario,
+        **{campo_fk: item},
+    )
+
+
+def recibir_archivo(archivo, tipo_inventario, usuario=None, documento=None):
+    """
+    Valida y, si todas las filas son correctas, registra la recepción.
+    Retorna (creados, errores).
+    """
+    lotes, errores = validar_archivo(archivo, tipo_inventario)
+    if errores:
+        return [], errores
+    return registrar_recepcion(tipo_inventario, lotes, usuario, documento), []
@@ -0,0 +1,377 @@
+"""
+Generador de requisiciones de compra
+American Carpas 1 SAS
+
+Une los faltantes del inventario con las ofertas del catálogo de proveedores
+y arma una requisición en borrador por proveedor. Todo el cálculo se hace en
+una pasada sobre la lista completa de faltantes:
+
+1. Faltantes por especificación de material (costeo.clave_material):
+   - reposición: cantidad sugerida de los ítems en stock mínimo
+     (stock_minimo.calcular_sugerencias);
+   - órdenes: material pendiente de las órdenes abiertas que no alcanza a
+     cubrir la existencia de la especificación;
+   - menos lo que ya viene en camino en requisiciones APROBADAS.
+2. Ofertas: EquivalenciaMaterial relaciona cada especificación con productos
+   de proveedores. Las ofertas de todas las especificaciones se leen en una
+   consulta por bloque de claves (índice clave_material + activo), con el
+   precio en COP del comparador de proveedores.
+3. Cada faltante se cotiza con cada oferta: la cantidad se lleva a unidades
+   del producto (factor_conversion), se redondea a unidades enteras y nunca
+   baja de cantidad_minima. Gana el menor subtotal; empata el menor tiempo
+   de entrega y luego la mejor calificación del proveedor.
+4. Monto mínimo de pedido (en COP): las líneas de un proveedor que no alcanza
+   su mínimo pasan a la siguiente mejor oferta de un proveedor que sí lo
+   alcanza. Lo que no se puede reasignar queda en una requisición marcada
+   como "no cumple mínimo".
+"""
+
+import math
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+
+from proveedores.comparador import ofertas_comparables, precio_final, precio_normalizado
+
+from .consumo import CAMPOS_DESCRIPCION, descripcion_material, existencias_por_clave, unidad_material
+from .costeo import CAMPOS_CLAVE, clave_material
+from .models import (
+    OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio,
+    RequisicionCompra, RequisicionCompraLinea,
+)
+from .reservas import ESTADOS_ORDEN_RESERVABLES, MODELOS_INVENTARIO
+from .stock_minimo import calcular_sugerencias, VENTANA_CONSUMO_DIAS, DIAS_COBERTURA_OBJETIVO
+
+
+CERO = Decimal('0')
+CENTAVO = Decimal('0.01')
+
+TAMANO_LOTE = 1000
+
+CANTIDAD = DecimalField(max_digits=14, decimal_places=4)
+
+# Material pendiente del detalle de órdenes, por tipo: (modelo, filas con pendiente, pendiente)
+PENDIENTE_ORDENES = {
+    'LONA': (
+        OrdenProduccionLona,
+        Q(metros_requeridos__gt=F('metros_utilizados')),
+        F('metros_requeridos') - F('metros_utilizados'),
+    ),
+    'ESTRUCTURA': (
+        OrdenProduccionEstructura,
+        Q(estructura__tipo_control='PIEZAS', piezas_requeridas__gt=F('piezas_utilizadas'))
+        | (~Q(estructura__tipo_control='PIEZAS') & Q(metros_requeridos__gt=F('metros_utilizados'))),
+        Case(
+            When(estructura__tipo_control='PIEZAS', then=F('piezas_requeridas') - F('piezas_utilizadas')),
+            default=F('metros_requeridos') - F('metros_utilizados'),
+            output_field=CANTIDAD,
+        ),
+    ),
+    'ACCESORIO': (
+        OrdenProduccionAccesorio,
+        Q(cantidad_requerida__gt=F('cantidad_entregada')),
+        F('cantidad_requerida') - F('cantidad_entregada'),
+    ),
+}
+
+
+# =============================================================================
+# FALTANTES
+# =============================================================================
+
+def _faltante(faltantes, tipo, fila):
+    """Entrada del faltante de la especificación de una fila (la crea si no existe)"""
+    clave = clave_material({'tipo_inventario': tipo, **fila})
+    if clave not in faltantes:
+        faltantes[clave] = {
+            'tipo_inventario': tipo,
+            'clave': clave,
+            'descripcion': descripcion_material(tipo, fila)[:200],
+            'unidad': unidad_material(tipo, fila),
+            'reposicion': CERO,
+            'ordenes': CERO,
+            'en_camino': CERO,
+        }
+    return faltantes[clave]
+
+
+def _agregar_reposicion(faltantes, ventana, cobertura):
+    """Cantidad sugerida de los ítems en stock mínimo, sumada por especificación"""
+    sugeridas = {tipo: {} for tipo in MODELOS_INVENTARIO}
+    for sugerencia in calcular_sugerencias(ventana=ventana, cobertura=cobertura):
+        if sugerencia.cantidad_sugerida > 0:
+            tipo = sugerencia.tipo_inventario
+            pk = getattr(sugerencia, f'{tipo.lower()}_id')
+            sugeridas[tipo][pk] = sugerencia.cantidad_sugerida
+
+    for tipo, cantidades in sugeridas.items():
+        modelo, campo_fk = MODELOS_INVENTARIO[tipo]
+        # Los campos de clave y descripción vienen con el prefijo del FK (lona__...)
+        prefijo = f'{campo_fk}__'
+        campos = [c[len(prefijo):] for c in CAMPOS_CLAVE[tipo] + CAMPOS_DESCRIPCION[tipo]]
+        ids = list(cantidades)
+        for inicio in range(0, len(ids), TAMANO_LOTE):
+            filas = modelo.objects.filter(pk__in=ids[inicio:inicio + TAMANO_LOTE]).values('pk', *campos)
+            for fila in filas:
+                faltante = _faltante(faltantes, tipo, {prefijo + c: fila[c] for c in campos})
+                faltante['reposicion'] += cantidades[fila['pk']]
+
+
+def _agregar_ordenes(faltantes):
+    """
+    Material pendiente de las órdenes abiertas (una consulta agrupada por tipo)
+    que supera la existencia disponible de la especificación.
+    """
+    existencias = existencias_por_clave()
+    for tipo, (modelo, con_pendiente, pendiente) in PENDIENTE_ORDENES.items():
+        filas = (
+            modelo.objects
+            .filter(con_pendiente, estado='PENDIENTE', orden__estado__in=ESTADOS_ORDEN_RESERVABLES)
+            .values(*CAMPOS_CLAVE[tipo], *CAMPOS_DESCRIPCION[tipo])
+            .annotate(pendiente=Sum(pendiente, output_field=CANTIDAD))
+            .order_by()
+        )
+        requerido = {}
+        for fila in filas:
+            clave = clave_material({'tipo_inventario': tipo, **fila})
+            anterior, _ = requerido.get(clave, (CERO, None))
+            requerido[clave] = (anterior + Decimal(fila['pendiente']), fila)
+        for clave, (cantidad, fila) in requerido.items():
+            falta = cantidad - existencias.get(clave, CERO)
+            if falta > 0:
+                _faltante(faltantes, tipo, fila)['ordenes'] += falta
+
+
+def _descontar_en_camino(faltantes):
+    """Resta lo pedido en requisiciones aprobadas (aún no recibidas)"""
+    filas = (
+        RequisicionCompraLinea.objects
+        .filter(requisicion__estado='APROBADA', clave_material__in=list(faltantes))
+        .values('clave_material')
+        .annotate(total=Sum(F('cantidad_pedida') * F('factor_conversion'), output_field=CANTIDAD))
+        .order_by()
+    )
+    for fila in filas:
+        faltantes[fila['clave_material']]['en_camino'] = fila['total']
+
+
+def faltantes_por_clave(ventana=VENTANA_CONSUMO_DIAS, cobertura=DIAS_COBERTURA_OBJETIVO):
+    """
+    Lista de faltantes por especificación de material, ordenada por tipo y
+    descripción. `faltante` = reposición + órdenes - en camino (solo > 0).
+    """
+    faltantes = {}
+    _agregar_reposicion(faltantes, ventana, cobertura)
+    _agregar_ordenes(faltantes)
+    _descontar_en_camino(faltantes)
+
+    resultado = []
+    for faltante in faltantes.values():
+        total = faltante['reposicion'] + faltante['ordenes'] - faltante['en_camino']
+        if total > 0:
+            faltante['faltante'] = total.quantize(CENTAVO)
+            resultado.append(faltante)
+    return sorted(resultado, key=lambda f: (f['tipo_inventario'], f['descripcion']))
+
+
+# =============================================================================
+# OFERTAS
+# =============================================================================
+
+def ofertas_por_clave(claves):
+    """
+    Ofertas vigentes de las especificaciones indicadas, por bloques de claves.
+    Retorna {clave_material: [oferta, ...]} con el factor de la equivalencia.
+    """
+    claves = sorted(set(claves))
+    ofertas = {}
+    for inicio in range(0, len(claves), TAMANO_LOTE):
+        filas = (
+            ofertas_comparables()
+            .filter(
+                equivalencias_inventario__clave_material__in=claves[inicio:inicio + TAMANO_LOTE],
+                equivalencias_inventario__activo=True,
+            )
+            .annotate(
+                precio_final=precio_final(),
+                precio_cop=precio_normalizado(),
+                clave_inventario=F('equivalencias_inventario__clave_material'),
+                factor=F('equivalencias_inventario__factor_conversion'),
+            )
+            .values(
+                'id_producto_servicio', 'nombre', 'sku_codigo', 'unidad_medida', 'moneda',
+                'precio_final', 'precio_cop', 'cantidad_minima', 'tiempo_entrega_dias', 'stock_disponible',
+                'id_proveedor_id', 'id_proveedor__razon_social', 'id_proveedor__monto_minimo_pedido',
+                'id_proveedor__calificacion', 'clave_inventario', 'factor',
+            )
+            .order_by()
+        )
+        for fila in filas:
+            ofertas.setdefault(fila['clave_inventario'], []).append(fila)
+    return ofertas
+
+
+def cotizar(faltante, oferta):
+    """
+    Línea (sin guardar) para cubrir el faltante con la oferta, o None si el
+    proveedor reporta menos stock del que hay que pedir.
+    """
+    cantidad = max(math.ceil(faltante['faltante'] / Decimal(oferta['factor'])), oferta['cantidad_minima'])
+    if oferta['stock_disponible'] is not None and oferta['stock_disponible'] < cantidad:
+        return None
+    precio_cop = Decimal(oferta['precio_cop']).quantize(CENTAVO)
+    return {
+        'faltante': faltante,
+        'oferta': oferta,
+        'proveedor_id': oferta['id_proveedor_id'],
+        'cantidad_pedida': cantidad,
+        'precio_cop': precio_cop,
+        'subtotal_cop': precio_cop * cantidad,
+    }
+
+
+def _candidatas(faltantes, ofertas):
+    """Cotizaciones de cada faltante de la mejor a la peor"""
+    candidatas = {}
+    for faltante in faltantes:
+        cotizaciones = [
+            linea for linea in (cotizar(faltante, oferta) for oferta in ofertas.get(faltante['clave'], []))
+            if linea is not None
+        ]
+        cotizaciones.sort(key=lambda l: (
+            l['subtotal_cop'], l['oferta']['tiempo_entrega_dias'],
+            -l['oferta']['id_proveedor__calificacion'], l['oferta']['id_producto_servicio'],
+        ))
+        if cotizaciones:
+            candidatas[faltante['clave']] = cotizaciones
+    return candidatas
+
+
+def _totales(asignadas):
+    totales = {}
+    for linea in asignadas.values():
+        totales[linea['proveedor_id']] = totales.get(linea['proveedor_id'], CERO) + linea['subtotal_cop']
+    return totales
+
+
+def _asignar(candidatas):
+    """
+    Mejor cotización por faltante, reasignando las líneas de proveedores que
+    no alcanzan su monto mínimo a otro proveedor que sí lo alcanza.
+    """
+    asignadas = {clave: cotizaciones[0] for clave, cotizaciones in candidatas.items()}
+    minimos = {
+        linea['proveedor_id']: linea['oferta']['id_proveedor__monto_minimo_pedido'] or CERO
+        for cotizaciones in candidatas.values() for linea in cotizaciones
+    }
+    while True:
+        totales = _totales(asignadas)
+        cumplen = {proveedor for proveedor, minimo in minimos.items() if totales.get(proveedor, CERO) >= minimo}
+        movidas = 0
+        for clave, linea in asignadas.items():
+            if linea['proveedor_id'] in cumplen:
+                continue
+            alterna = next((c for c in candidatas[clave] if c['proveedor_id'] in cumplen), None)
+            if alterna is not None:
+                asignadas[clave] = alterna
+                movidas += 1
+        # Los proveedores que cumplen solo ganan líneas, así que el ciclo termina
+        if not movidas:
+            return asignadas, totales, minimos
+
+
+def calcular_requisiciones(ventana=VENTANA_CONSUMO_DIAS, cobertura=DIAS_COBERTURA_OBJETIVO):
+    """
+    Plan de compra sin guardar: {'requisiciones': [...], 'sin_oferta': [...],
+    'faltantes': n}. Cada requisición agrupa las líneas de un proveedor.
+    """
+    faltantes = faltantes_por_clave(ventana, cobertura)
+    candidatas = _candidatas(faltantes, ofertas_por_clave(f['clave'] for f in faltantes))
+    asignadas, totales, minimos = _asignar(candidatas)
+
+    requisiciones = {}
+    for linea in asignadas.values():
+        oferta = linea['oferta']
+        requisicion = requisiciones.setdefault(linea['proveedor_id'], {
+            'proveedor_id': linea['proveedor_id'],
+            'razon_social': oferta['id_proveedor__razon_social'],
+            'monto_minimo_pedido': minimos[linea['proveedor_id']],
+            'total': totales[linea['proveedor_id']],
+            'cumple_minimo': totales[linea['proveedor_id']] >= minimos[linea['proveedor_id']],
+            'tiempo_entrega_dias': 0,
+            'lineas': [],
+        })
+        requisicion['tiempo_entrega_dias'] = max(requisicion['tiempo_entrega_dias'], oferta['tiempo_entrega_dias'])
+        requisicion['lineas'].append(linea)
+
+    for requisicion in requisiciones.values():
+        requisicion['lineas'].sort(key=lambda l: (l['faltante']['tipo_inventario'], l['faltante']['descripcion']))
+    return {
+        'requisiciones': sorted(requisiciones.values(), key=lambda r: r['razon_social']),
+        'sin_oferta': [f for f in faltantes if f['clave'] not in candidatas],
+        'faltantes': len(faltantes),
+    }
+
+
+# =============================================================================
+# REQUISICIONES EN BORRADOR
+# =============================================================================
+
+def _linea(requisicion, linea):
+    faltante = linea['faltante']
+    oferta = linea['oferta']
+    return RequisicionCompraLinea(
+        requisicion=requisicion,
+        producto_id=oferta['id_producto_servicio'],
+        tipo_inventario=faltante['tipo_inventario'],
+        clave_material=faltante['clave'],
+        descripcion=faltante['descripcion'],
+        unidad_inventario=faltante['unidad'],
+        cantidad_reposicion=faltante['reposicion'].quantize(CENTAVO),
+        cantidad_ordenes=faltante['ordenes'].quantize(CENTAVO),
+        cantidad_faltante=faltante['faltante'],
+        factor_conversion=oferta['factor'],
+        cantidad_pedida=linea['cantidad_pedida'],
+        unidad_compra=oferta['unidad_medida'],
+        moneda=oferta['moneda'],
+        precio_unitario=Decimal(oferta['precio_final']).quantize(CENTAVO),
+        precio_cop=linea['precio_cop'],
+        subtotal_cop=linea['subtotal_cop'],
+        tiempo_entrega_dias=oferta['tiempo_entrega_dias'],
+    )
+
+
+@transaction.atomic
+def generar_requisiciones(fecha=None, usuario=None, ventana=VENTANA_CONSUMO_DIAS,
+                          cobertura=DIAS_COBERTURA_OBJETIVO):
+    """
+    Reemplaza las requisiciones en borrador por las del plan actual.
+    Retorna el plan con la requisición guardada en cada entrada.
+    """
+    plan = calcular_requisiciones(ventana, cobertura)
+    RequisicionCompra.objects.filter(estado='BORRADOR').delete()
+
+    lineas = []
+    for datos in plan['requisiciones']:
+        requisicion = RequisicionCompra(
+            proveedor_id=datos['proveedor_id'],
+            total_estimado=datos['total'],
+            monto_minimo_pedido=datos['monto_minimo_pedido'],
+            cumple_minimo=datos['cumple_minimo'],
+            tiempo_entrega_dias=datos['tiempo_entrega_dias'],
+            generada_por=usuario,
+        )
+        if fecha:
+            requisicion.fecha_generacion = fecha
+        if not datos['cumple_minimo']:
+            requisicion.observaciones = (
+                f"El total estimado ({datos['total']:,.2f} COP) no alcanza el monto mínimo de pedido "
+                f"del proveedor ({datos['monto_minimo_pedido']:,.2f})."
+            )
+        requisicion.save()
+        datos['requisicion'] = requisicion
+        lineas.extend(_linea(requisicion, linea) for linea in datos['lineas'])
+
+    RequisicionCompraLinea.objects.bulk_create(lineas, batch_size=500)
+    return plan
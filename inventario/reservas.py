@@ -0,0 +1,533 @@
+"""
+Motor de reservas de inventario para órdenes de producción
+American Carpas 1 SAS
+
+Mantiene los contadores de reserva de cada ítem de inventario
+(metros_reservados, piezas_reservadas, cantidad_reservada) con
+actualizaciones atómicas usando F(), y deja cada operación registrada en
+ReservaInventario y en HistorialInventario.
+
+Convenciones del historial:
+- RESERVA / LIBERACION no mueven existencias físicas, por eso
+  cantidad_anterior y cantidad_nueva son iguales (existencia física) y
+  cantidad_movimiento es lo reservado o liberado.
+- Consumir una reserva registra una SALIDA normal.
+
+Cuando una orden sale de los estados reservables (signals.py) sus reservas
+activas se cierran solas: al completarla se consumen y al cancelarla se
+liberan.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .cache_inventario import invalidar_stock
+from .costeo import programar_costeo_lote
+from .models import (
+    InventarioLona, InventarioEstructura, InventarioAccesorio,
+    OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio,
+    OrdenProduccion, HistorialInventario, ReservaInventario,
+)
+
+
+# Estados de orden en los que se permite reservar material
+ESTADOS_ORDEN_RESERVABLES = ['BORRADOR', 'PENDIENTE', 'AUTORIZADA', 'EN_PROCESO']
+
+# Modelo de inventario y nombre del FK en Reserva/Historial por tipo
+MODELOS_INVENTARIO = {
+    'LONA': (InventarioLona, 'lona'),
+    'ESTRUCTURA': (InventarioEstructura, 'estructura'),
+    'ACCESORIO': (InventarioAccesorio, 'accesorio'),
+}
+
+
+# =============================================================================
+# UTILIDADES
+# =============================================================================
+
+def campos_stock(item):
+    """
+    Retorna (tipo_inventario, campo_disponible, campo_reservado, unidad)
+    para un ítem de inventario.
+    """
+    if isinstance(item, InventarioLona):
+        return 'LONA', 'metros_disponibles', 'metros_reservados', 'metros'
+    if isinstance(item, InventarioEstructura):
+        if item.tipo_control == 'PIEZAS':
+            return 'ESTRUCTURA', 'piezas_disponibles', 'piezas_reservadas', 'piezas'
+        return 'ESTRUCTURA', 'metros_disponibles', 'metros_reservados', 'metros'
+    if isinstance(item, InventarioAccesorio):
+        return 'ACCESORIO', 'cantidad_disponible', 'cantidad_reservada', 'unidades'
+    raise TypeError(f"Tipo de ítem de inventario no soportado: {type(item).__name__}")
+
+
+def codigo_item(item):
+    """Código visible del ítem (rollo, lote o accesorio)"""
+    return getattr(item, 'codigo_rollo', None) or getattr(item, 'codigo_lote', None) or item.codigo
+
+
+def cantidad_libre(item):
+    """Existencia disponible que no está comprometida en reservas"""
+    _, campo_disponible, campo_reservado, _ = campos_stock(item)
+    return Decimal(getattr(item, campo_disponible)) - Decimal(getattr(item, campo_reservado))
+
+
+def _normalizar_cantidad(item, cantidad):
+    """Convierte a Decimal y valida que piezas/unidades sean enteras"""
+    try:
+        cantidad = Decimal(str(cantidad))
+    except InvalidOperation:
+        raise ValidationError(f"{codigo_item(item)}: la cantidad '{cantidad}' no es un número válido.")
+    if not cantidad.is_finite() or cantidad <= 0:
+        raise ValidationError(f"{codigo_item(item)}: la cantidad debe ser mayor a cero.")
+    _, _, _, unidad = campos_stock(item)
+    if unidad in ('piezas', 'unidades') and cantidad != cantidad.to_integral_value():
+        raise ValidationError(f"{codigo_item(item)}: la cantidad en {unidad} debe ser entera.")
+    return cantidad
+
+
+def _valor_campo(item, cantidad):
+    """Cantidad en el tipo del campo del modelo (entero para piezas/unidades)"""
+    _, _, _, unidad = campos_stock(item)
+    if unidad in ('piezas', 'unidades'):
+        return int(cantidad)
+    return cantidad
+
+
+def _bloquear_items(tipo_inventario, ids):
+    """Bloquea (SELECT ... FOR UPDATE) los ítems indicados y los retorna por pk"""
+    modelo, _ = MODELOS_INVENTARIO[tipo_inventario]
+    return modelo.objects.select_for_update().in_bulk(list(ids))
+
+
+def _validar_orden(orden):
+    if orden.estado not in ESTADOS_ORDEN_RESERVABLES:
+        raise ValidationError(
+            f"La orden {orden.codigo_completo} está {orden.get_estado_display().lower()} "
+            f"y no admite reservas."
+        )
+
+
+def _historial(tipo_movimiento, item, orden, anterior, movimiento, nueva, usuario, motivo, ahora):
+    tipo_inventario, _, _, unidad = campos_stock(item)
+    _, campo_fk = MODELOS_INVENTARIO[tipo_inventario]
+    return HistorialInventario(
+        fecha_movimiento=ahora,
+        tipo_movimiento=tipo_movimiento,
+        tipo_inventario=tipo_inventario,
+        orden_produccion=orden,
+        cantidad_anterior=anterior,
+        cantidad_movimiento=movimiento,
+        cantidad_nueva=nueva,
+        unidad_medida=unidad,
+        documento_referencia=orden.codigo_completo if orden else None,
+        motivo=motivo,
+        registrado_por=usuario,
+        **{campo_fk: item},
+    )
+
+
+# =============================================================================
+# REQUERIMIENTOS DE UNA ORDEN
+# =============================================================================
+
+def requerimientos_orden(orden):
+    """
+    Material pendiente por ítem de inventario según el detalle de la orden.
+    Retorna {(tipo_inventario, pk): (item, cantidad_pendiente)}.
+    """
+    requerimientos = {}
+
+    def agregar(tipo, item, cantidad):
+        if cantidad <= 0:
+            return
+        clave = (tipo, item.pk)
+        _, acumulado = requerimientos.get(clave, (item, Decimal('0')))
+        requerimientos[clave] = (item, acumulado + Decimal(cantidad))
+
+    for det in OrdenProduccionLona.objects.filter(orden=orden, estado='PENDIENTE').select_related('lona'):
+        agregar('LONA', det.lona, det.metros_requeridos - det.metros_utilizados)
+
+    for det in OrdenProduccionEstructura.objects.filter(orden=orden, estado='PENDIENTE').select_related('estructura'):
+        if det.estructura.tipo_control == 'PIEZAS':
+            agregar('ESTRUCTURA', det.estructura, det.piezas_requeridas - det.piezas_utilizadas)
+        else:
+            agregar('ESTRUCTURA', det.estructura, det.metros_requeridos - det.metros_utilizados)
+
+    for det in OrdenProduccionAccesorio.objects.filter(orden=orden, estado='PENDIENTE').select_related('accesorio'):
+        agregar('ACCESORIO', det.accesorio, det.cantidad_requerida - det.cantidad_entregada)
+
+    return requerimientos
+
+
+def reservado_por_item(orden):
+    """
+    Cantidad reservada y aún no consumida por la orden, en una sola consulta.
+    Retorna {(tipo_inventario, pk): cantidad}.
+    """
+    filas = (
+        ReservaInventario.objects
+        .filter(orden=orden, estado='ACTIVA')
+        .values('tipo_inventario', 'lona_id', 'estructura_id', 'accesorio_id')
+        .annotate(
+            reservado=Sum('cantidad_reservada'),
+            consumido=Sum('cantidad_consumida'),
+        )
+        .order_by()
+    )
+    resultado = {}
+    for fila in filas:
+        pk = fila['lona_id'] or fila['estructura_id'] or fila['accesorio_id']
+        resultado[(fila['tipo_inventario'], pk)] = fila['reservado'] - fila['consumido']
+    return resultado
+
+
+def disponibilidad_orden(orden):
+    """
+    Estado de disponibilidad del material de la orden para mostrar en pantalla.
+    Lee los contadores de cada ítem (sin recorrer historial).
+    """
+    reservado = reservado_por_item(orden)
+    filas = []
+    for (tipo, pk), (item, requerido) in requerimientos_orden(orden).items():
+        _, _, _, unidad = campos_stock(item)
+        reservado_orden = reservado.get((tipo, pk), Decimal('0'))
+        libre = cantidad_libre(item)
+        faltante = max(requerido - reservado_orden, Decimal('0'))
+        filas.append({
+            'tipo_inventario': tipo,
+            'item': item,
+            'codigo': codigo_item(item),
+            'unidad': unidad,
+            'requerido': requerido,
+            'reservado': reservado_orden,
+            'libre': libre,
+            'faltante': faltante,
+            'alcanza': faltante <= libre,
+        })
+    return filas
+
+
+# =============================================================================
+# OPERACIONES
+# =============================================================================
+
+def _aplicar_reserva(orden, item, cantidad, usuario, ahora):
+    """Reserva sobre un ítem ya bloqueado. Retorna (reserva, historial)."""
+    tipo, campo_disponible, campo_reservado, unidad = campos_stock(item)
+    modelo, campo_fk = MODELOS_INVENTARIO[tipo]
+
+    modelo.objects.filter(pk=item.pk).update(
+        **{campo_reservado: F(campo_reservado) + _valor_campo(item, cantidad)}
+    )
+    setattr(item, campo_reservado, getattr(item, campo_reservado) + _valor_campo(item, cantidad))
+
+    reserva = ReservaInventario.objects.filter(
+        orden=orden, estado='ACTIVA', **{campo_fk: item}
+    ).first()
+    if reserva:
+        ReservaInventario.objects.filter(pk=reserva.pk).update(
+            cantidad_reservada=F('cantidad_reservada') + cantidad
+        )
+        reserva.cantidad_reservada += cantidad
+    else:
+        reserva = ReservaInventario(
+            orden=orden,
+            tipo_inventario=tipo,
+            cantidad_reservada=cantidad,
+            unidad_medida=unidad,
+            fecha_reserva=ahora,
+            registrado_por=usuario,
+            **{campo_fk: item},
+        )
+
+    existencia = getattr(item, campo_disponible)
+    historial = _historial(
+        'RESERVA', item, orden, existencia, cantidad, existencia, usuario,
+        'Reserva para orden de producción', ahora,
+    )
+    return reserva, historial
+
+
+@transaction.atomic
+def reservar(orden, item, cantidad, usuario=None):
+    """
+    Reserva una cantidad de un ítem de inventario para la orden.
+    Lanza ValidationError si no hay existencia libre suficiente.
+    """
+    _validar_orden(orden)
+    cantidad = _normalizar_cantidad(item, cantidad)
+    tipo, _, _, unidad = campos_stock(item)
+
+    item = _bloquear_items(tipo, [item.pk])[item.pk]
+    libre = cantidad_libre(item)
+    if cantidad > libre:
+        raise ValidationError(
+            f"{codigo_item(item)}: solo hay {libre} {unidad} libres, se requieren {cantidad}."
+        )
+
+    reserva, historial = _aplicar_reserva(orden, item, cantidad, usuario, timezone.now())
+    reserva.save()
+    historial.save()
+    invalidar_stock()
+    return reserva
+
+
+@transaction.atomic
+def reservar_orden(orden, usuario=None):
+    """
+    Reserva en una sola transacción todo el material pendiente de la orden.
+    Si algún ítem no alcanza no se reserva nada y se reportan todos los faltantes.
+    Retorna la lista de reservas creadas o ampliadas.
+    """
+    # Bloquear la orden antes de calcular lo pendiente: dos llamadas
+    # simultáneas leerían lo mismo como pendiente y reservarían dos veces
+    orden = OrdenProduccion.objects.select_for_update().get(pk=orden.pk)
+    _validar_orden(orden)
+    ya_reservado = reservado_por_item(orden)
+
+    pendientes = {}
+    for (tipo, pk), (item, requerido) in requerimientos_orden(orden).items():
+        cantidad = requerido - ya_reservado.get((tipo, pk), Decimal('0'))
+        if cantidad > 0:
+            pendientes[(tipo, pk)] = cantidad
+
+    if not pendientes:
+        return []
+
+    # Bloquear los ítems involucrados: una consulta por tabla
+    bloqueados = {}
+    for tipo in MODELOS_INVENTARIO:
+        ids = [pk for (t, pk) in pendientes if t == tipo]
+        if ids:
+            for pk, item in _bloquear_items(tipo, ids).items():
+                bloqueados[(tipo, pk)] = item
+
+    errores = []
+    for clave, cantidad in pendientes.items():
+        item = bloqueados[clave]
+        libre = cantidad_libre(item)
+        if cantidad > libre:
+            _, _, _, unidad = campos_stock(item)
+            errores.append(
+                f"{codigo_item(item)}: solo hay {libre} {unidad} libres, se requieren {cantidad}."
+            )
+    if errores:
+        raise ValidationError(errores)
+
+    ahora = timezone.now()
+    nuevas, actualizadas, movimientos = [], [], []
+    for clave, cantidad in pendientes.items():
+        reserva, historial = _aplicar_reserva(orden, bloqueados[clave], cantidad, usuario, ahora)
+        (actualizadas if reserva.pk else nuevas).append(reserva)
+        movimientos.append(historial)
+
+    ReservaInventario.objects.bulk_create(nuevas)
+    HistorialInventario.objects.bulk_create(movimientos)
+    programar_costeo_lote(movimientos)
+    invalidar_stock()
+    return actualizadas + nuevas
+
+
+def _cerrar_reserva(reserva, item, usuario, ahora):
+    """Libera lo pendiente de una reserva sobre un ítem ya bloqueado"""
+    tipo, campo_disponible, campo_reservado, _ = campos_stock(item)
+    modelo, _ = MODELOS_INVENTARIO[tipo]
+    pendiente = reserva.cantidad_pendiente
+
+    if pendiente > 0:
+        modelo.objects.filter(pk=item.pk).update(
+            **{campo_reservado: F(campo_reservado) - _valor_campo(item, pendiente)}
+        )
+    reserva.estado = 'LIBERADA'
+    reserva.fecha_cierre = ahora
+    reserva.save(update_fields=['estado', 'fecha_cierre'])
+
+    existencia = getattr(item, campo_disponible)
+    return _historial(
+        'LIBERACION', item, reserva.orden, existencia, pendiente, existencia, usuario,
+        'Liberación de reserva', ahora,
+    )
+
+
+@transaction.atomic
+def liberar(reserva, usuario=None):
+    """Libera la cantidad pendiente de una reserva activa"""
+    reserva = ReservaInventario.objects.select_for_update().get(pk=reserva.pk)
+    if reserva.estado != 'ACTIVA':
+        raise ValidationError("Solo se pueden liberar reservas activas.")
+    item = reserva.item_inventario
+    item = _bloquear_items(reserva.tipo_inventario, [item.pk])[item.pk]
+    historial = _cerrar_reserva(reserva, item, usuario, timezone.now())
+    historial.save()
+    invalidar_stock()
+    return reserva
+
+
+@transaction.atomic
+def liberar_orden(orden, usuario=None):
+    """Libera todas las reservas activas de la orden. Retorna cuántas se liberaron."""
+    reservas = list(
+        ReservaInventario.objects.select_for_update()
+        .filter(orden=orden, estado='ACTIVA')
+        .select_related('orden')
+    )
+    if not reservas:
+        return 0
+
+    bloqueados = {}
+    for tipo, (_, campo_fk) in MODELOS_INVENTARIO.items():
+        ids = [getattr(r, f'{campo_fk}_id') for r in reservas if r.tipo_inventario == tipo]
+        if ids:
+            for pk, item in _bloquear_items(tipo, ids).items():
+                bloqueados[(tipo, pk)] = item
+
+    ahora = timezone.now()
+    movimientos = []
+    for reserva in reservas:
+        _, campo_fk = MODELOS_INVENTARIO[reserva.tipo_inventario]
+        item = bloqueados[(reserva.tipo_inventario, getattr(reserva, f'{campo_fk}_id'))]
+        movimientos.append(_cerrar_reserva(reserva, item, usuario, ahora))
+
+    HistorialInventario.objects.bulk_create(movimientos)
+    programar_costeo_lote(movimientos)
+    invalidar_stock()
+    return len(reservas)
+
+
+def _registrar_uso_en_detalle(reserva, cantidad, ahora):
+    """Distribuye lo consumido entre las líneas pendientes de la orden para ese ítem"""
+    restante = cantidad
+    if reserva.tipo_inventario == 'LONA':
+        for det in OrdenProduccionLona.objects.filter(
+            orden=reserva.orden, lona=reserva.lona, estado='PENDIENTE'
+        ):
+            uso = min(restante, det.metros_requeridos - det.metros_utilizados)
+            if uso <= 0:
+                continue
+            det.metros_utilizados += uso
+            if det.metros_utilizados >= det.metros_requeridos:
+                det.estado = 'CORTADO'
+                det.fecha_corte = ahora.date()
+            det.save(update_fields=['metros_utilizados', 'estado', 'fecha_corte'])
+            restante -= uso
+            if restante <= 0:
+                break
+
+    elif reserva.tipo_inventario == 'ESTRUCTURA':
+        por_piezas = reserva.estructura.tipo_control == 'PIEZAS'
+        for det in OrdenProduccionEstructura.objects.filter(
+            orden=reserva.orden, estructura=reserva.estructura, estado='PENDIENTE'
+        ):
+            if por_piezas:
+                uso = min(restante, det.piezas_requeridas - det.piezas_utilizadas)
+                if uso <= 0:
+                    continue
+                det.piezas_utilizadas += int(uso)
+                det.save(update_fields=['piezas_utilizadas'])
+            else:
+                uso = min(restante, det.metros_requeridos - det.metros_utilizados)
+                if uso <= 0:
+                    continue
+                det.metros_utilizados += uso
+                det.save(update_fields=['metros_utilizados'])
+            restante -= uso
+            if restante <= 0:
+                break
+
+    else:
+        for det in OrdenProduccionAccesorio.objects.filter(
+            orden=reserva.orden, accesorio=reserva.accesorio, estado='PENDIENTE'
+        ):
+            uso = min(restante, det.cantidad_requerida - det.cantidad_entregada)
+            if uso <= 0:
+                continue
+            det.cantidad_entregada += int(uso)
+            if det.cantidad_entregada >= det.cantidad_requerida:
+                det.estado = 'ENTREGADO'
+                det.fecha_entrega = ahora.date()
+            det.save(update_fields=['cantidad_entregada', 'estado', 'fecha_entrega'])
+            restante -= uso
+            if restante <= 0:
+                break
+
+
+@transaction.atomic
+def consumir(reserva, cantidad=None, usuario=None, ejecutado_por=None):
+    """
+    Descarga del inventario material reservado (por defecto todo lo pendiente).
+    Descuenta existencia y reserva a la vez, registra la SALIDA y el uso en el
+    detalle de la orden.
+    """
+    reserva = ReservaInventario.objects.select_for_update().select_related('orden').get(pk=reserva.pk)
+    if reserva.estado != 'ACTIVA':
+        raise ValidationError("Solo se pueden consumir reservas activas.")
+
+    item = reserva.item_inventario
+    tipo, campo_disponible, campo_reservado, _ = campos_stock(item)
+    modelo, _ = MODELOS_INVENTARIO[tipo]
+    item = _bloquear_items(tipo, [item.pk])[item.pk]
+
+    pendiente = reserva.cantidad_pendiente
+    cantidad = pendiente if cantidad is None else _normalizar_cantidad(item, cantidad)
+    if cantidad > pendiente:
+        raise ValidationError(
+            f"{codigo_item(item)}: se intentan consumir {cantidad} y la reserva solo tiene {pendiente} pendientes."
+        )
+
+    ahora = timezone.now()
+    anterior = getattr(item, campo_disponible)
+    valor = _valor_campo(item, cantidad)
+    modelo.objects.filter(pk=item.pk).update(**{
+        campo_disponible: F(campo_disponible) - valor,
+        campo_reservado: F(campo_reservado) - valor,
+        'fecha_ultima_salida': ahora.date(),
+    })
+    modelo.objects.filter(pk=item.pk, **{f'{campo_disponible}__lte': 0}).update(estado='AGOTADO')
+    if tipo == 'LONA':
+        InventarioLona.clasificar_retazos([item.pk])
+
+    reserva.cantidad_consumida += cantidad
+    campos = ['cantidad_consumida']
+    if reserva.cantidad_consumida >= reserva.cantidad_reservada:
+        reserva.estado = 'CONSUMIDA'
+        reserva.fecha_cierre = ahora
+        campos += ['estado', 'fecha_cierre']
+    reserva.save(update_fields=campos)
+
+    _registrar_uso_en_detalle(reserva, cantidad, ahora)
+
+    historial = _historial(
+        'SALIDA', item, reserva.orden, anterior, cantidad, anterior - cantidad, usuario,
+        'Consumo de material reservado', ahora,
+    )
+    historial.ejecutado_por = ejecutado_por
+    historial.save()
+    invalidar_stock()
+    return historial
+
+
+@transaction.atomic
+def consumir_orden(orden, usuario=None, ejecutado_por=None):
+    """Consume todo lo pendiente de las reservas activas de la orden. Retorna cuántas se consumieron."""
+    reservas = list(ReservaInventario.objects.filter(orden=orden, estado='ACTIVA').order_by('pk'))
+    for reserva in reservas:
+        consumir(reserva, usuario=usuario, ejecutado_por=ejecutado_por)
+    return len(reservas)
+
+
+def cerrar_reservas_orden(orden, usuario=None):
+    """
+    Cierra las reservas activas de una orden que ya no admite reservas: si se
+    completó, lo pendiente se da por consumido; si se canceló, se libera.
+    Retorna cuántas reservas se cerraron.
+    """
+    if orden.estado in ESTADOS_ORDEN_RESERVABLES:
+        return 0
+    if orden.estado == 'COMPLETADA':
+        return consumir_orden(orden, usuario=usuario)
+    return liberar_orden(orden, usuario=usuario)
@@ -0,0 +1,135 @@
+"""
+Resumen precalculado de órdenes de producción
+American Carpas 1 SAS
+
+Mantiene ResumenOrdenProduccion (ítems y totales de material por orden) para
+que los listados ordenen y filtren por estado de materiales en SQL. Los
+signals recalculan solo la orden afectada al guardar o eliminar un ítem o
+una línea de material; el comando actualizar_resumen_ordenes recalcula
+todas (p. ej. después de cargas masivas con update() / bulk_create()).
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from american_carpas_project.upsert import upsert
+
+from .models import (
+    OrdenProduccion, OrdenProduccionItem, OrdenProduccionLona,
+    OrdenProduccionEstructura, OrdenProduccionAccesorio, ResumenOrdenProduccion,
+)
+
+
+CERO = Decimal('0')
+
+CAMPOS_RESUMEN = [
+    'cantidad_items', 'total_productos',
+    'metros_lona_requeridos', 'metros_lona_utilizados',
+    'metros_estructura_requeridos', 'metros_estructura_utilizados',
+    'piezas_estructura_requeridas', 'piezas_estructura_utilizadas',
+    'accesorios_requeridos', 'accesorios_entregados',
+    'lineas_material', 'lineas_pendientes', 'estado_materiales',
+]
+
+
+def _agrupado(modelo, ordenes_ids, **sumas):
+    """Totales por orden de una tabla de detalle (una consulta agrupada)"""
+    qs = modelo.objects.all()
+    if ordenes_ids is not None:
+        qs = qs.filter(orden_id__in=ordenes_ids)
+    if modelo is OrdenProduccionItem:
+        qs = qs.filter(activo=True)
+    else:
+        qs = qs.exclude(estado='CANCELADO')
+        sumas['lineas'] = Count('pk')
+        sumas['pendientes'] = Count('pk', filter=Q(estado='PENDIENTE'))
+    filas = qs.values('orden_id').annotate(**sumas).order_by()
+    return {fila.pop('orden_id'): fila for fila in filas}
+
+
+def _estado_materiales(lineas, pendientes):
+    if not lineas:
+        return 'SIN_MATERIAL'
+    if pendientes == lineas:
+        return 'PENDIENTE'
+    if pendientes == 0:
+        return 'COMPLETO'
+    return 'PARCIAL'
+
+
+def calcular_resumenes(ordenes_ids=None):
+    """
+    Resúmenes de las órdenes indicadas (o de todas) con cuatro consultas
+    agrupadas. Retorna una lista de ResumenOrdenProduccion sin guardar.
+    """
+    if ordenes_ids is None:
+        ids = list(OrdenProduccion.objects.values_list('pk', flat=True))
+    else:
+        ids = list(OrdenProduccion.objects.filter(pk__in=ordenes_ids).values_list('pk', flat=True))
+
+    items = _agrupado(
+        OrdenProduccionItem, ordenes_ids,
+        cantidad_items=Count('pk'), total_productos=Sum('cantidad'),
+    )
+    lonas = _agrupado(
+        OrdenProduccionLona, ordenes_ids,
+        requeridos=Sum('metros_requeridos'), utilizados=Sum('metros_utilizados'),
+    )
+    estructuras = _agrupado(
+        OrdenProduccionEstructura, ordenes_ids,
+        requeridos=Sum('metros_requeridos'), utilizados=Sum('metros_utilizados'),
+        piezas_requeridas=Sum('piezas_requeridas'), piezas_utilizadas=Sum('piezas_utilizadas'),
+    )
+    accesorios = _agrupado(
+        OrdenProduccionAccesorio, ordenes_ids,
+        requeridos=Sum('cantidad_requerida'), entregados=Sum('cantidad_entregada'),
+    )
+
+    resumenes = []
+    for pk in ids:
+        it = items.get(pk, {})
+        lo = lonas.get(pk, {})
+        es = estructuras.get(pk, {})
+        ac = accesorios.get(pk, {})
+        lineas = lo.get('lineas', 0) + es.get('lineas', 0) + ac.get('lineas', 0)
+        pendientes = lo.get('pendientes', 0) + es.get('pendientes', 0) + ac.get('pendientes', 0)
+        resumenes.append(ResumenOrdenProduccion(
+            orden_id=pk,
+            cantidad_items=it.get('cantidad_items', 0),
+            total_productos=it.get('total_productos') or 0,
+            metros_lona_requeridos=lo.get('requeridos') or CERO,
+            metros_lona_utilizados=lo.get('utilizados') or CERO,
+            metros_estructura_requeridos=es.get('requeridos') or CERO,
+            metros_estructura_utilizados=es.get('utilizados') or CERO,
+            piezas_estructura_requeridas=es.get('piezas_requeridas') or 0,
+            piezas_estructura_utilizadas=es.get('piezas_utilizadas') or 0,
+            accesorios_requeridos=ac.get('requeridos') or 0,
+            accesorios_entregados=ac.get('entregados') or 0,
+            lineas_material=lineas,
+            lineas_pendientes=pendientes,
+            estado_materiales=_estado_materiales(lineas, pendientes),
+        ))
+    return resumenes
+
+
+def actualizar_resumenes(ordenes_ids=None, batch_size=500):
+    """Recalcula y guarda (insertando o actualizando) los resúmenes"""
+    resumenes = calcular_resumenes(ordenes_ids)
+    upsert(
+        ResumenOrdenProduccion, resumenes,
+        unique_fields=['orden'],
+        update_fields=CAMPOS_RESUMEN + ['fecha_actualizacion'],
+        batch_size=batch_size,
+    )
+    return resumenes
+
+
+def programar_actualizacion(orden_id):
+    """
+    Recalcula el resumen de una orden al confirmar la transacción actual.
+    Si la orden se eliminó en la misma transacción no hace nada.
+    """
+    if orden_id:
+        transaction.on_commit(lambda: actualizar_resumenes([orden_id]))
@@ -0,0 +1,148 @@
+"""
+Bolsa de retazos de lona y búsqueda del mejor ajuste para un corte
+American Carpas 1 SAS
+
+Un rollo ya usado cuyo metraje quedó por debajo de InventarioLona.METROS_RETAZO
+(ajuste INVENTARIO_METROS_RETAZO) se marca como retazo (es_retazo). Los
+retazos se agrupan por especificación (tipo, ancho, color, tratamiento) en
+listas ordenadas de (metros libres, pk), de modo que el mejor ajuste para un
+corte —el retazo más corto que alcanza— se encuentra con bisect en
+O(log n) mientras se reparten varios cortes. Para un solo corte basta una
+consulta ordenada por metros libres (mejor_retazo). Los cortes se asignan
+primero a retazos y solo lo que no cabe en ninguno va a rollos completos,
+para reducir el desperdicio.
+
+Las actualizaciones de metraje que no pasan por save() (F(), bulk_update)
+reclasifican los rollos con InventarioLona.clasificar_retazos().
+"""
+
+from bisect import bisect_left, insort
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from .models import InventarioLona, OrdenProduccionLona
+from . import reservas
+
+
+# Estados de rollo que no se ofrecen para cortes
+ESTADOS_NO_ASIGNABLES = ['AGOTADO', 'BAJA']
+
+
+# =============================================================================
+# BOLSA DE RETAZOS
+# =============================================================================
+
+def lonas_asignables(tipo_lona, ancho_lona, color_lona, tratamiento=None):
+    """Rollos activos de la especificación con metros libres (sin reservas)"""
+    filtro = {'tipo_lona': tipo_lona, 'ancho_lona': ancho_lona, 'color_lona': color_lona}
+    if tratamiento is not None:
+        filtro['tratamiento'] = tratamiento
+    return (
+        InventarioLona.objects
+        .filter(activo=True, **filtro)
+        .exclude(estado__in=ESTADOS_NO_ASIGNABLES)
+        .annotate(libre=ExpressionWrapper(
+            F('metros_disponibles') - F('metros_reservados'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+        .filter(libre__gt=0)
+    )
+
+
+def bolsa_retazos(tipo_lona, ancho_lona, color_lona, tratamiento=None):
+    """
+    Retazos de una especificación como lista ordenada de (metros_libres, pk).
+    Con `tratamiento` None no se filtra por tratamiento.
+    """
+    return list(
+        lonas_asignables(tipo_lona, ancho_lona, color_lona, tratamiento)
+        .filter(es_retazo=True)
+        .order_by('libre', 'pk')
+        .values_list('libre', 'pk')
+    )
+
+
+def mejor_ajuste(bolsa, largo):
+    """
+    Posición en `bolsa` del retazo más corto que alcanza para `largo`
+    (bisect sobre la lista ordenada), o None si ninguno alcanza.
+    """
+    posicion = bisect_left(bolsa, (Decimal(largo),))
+    return posicion if posicion < len(bolsa) else None
+
+
+def mejor_retazo(tipo_lona, ancho_lona, color_lona, largo, tratamiento=None):
+    """Retazo (InventarioLona) con el menor sobrante para el corte, o None (una consulta)"""
+    return (
+        lonas_asignables(tipo_lona, ancho_lona, color_lona, tratamiento)
+        .filter(es_retazo=True, libre__gte=Decimal(largo))
+        .select_related('ubicacion')
+        .order_by('libre', 'pk')
+        .first()
+    )
+
+
+def asignar_cortes(tipo_lona, ancho_lona, color_lona, largos, tratamiento=None):
+    """
+    Asigna varios cortes a retazos con "mejor ajuste decreciente": del corte
+    más largo al más corto, cada uno va al retazo más corto que lo contiene y
+    el sobrante vuelve a la bolsa para los cortes siguientes.
+
+    Retorna una lista de {'largo', 'lona_id', 'sobrante'} en el orden de
+    `largos`; lona_id es None cuando el corte debe salir de un rollo completo.
+    """
+    bolsa = bolsa_retazos(tipo_lona, ancho_lona, color_lona, tratamiento)
+    asignaciones = [None] * len(largos)
+    orden = sorted(range(len(largos)), key=lambda i: Decimal(largos[i]), reverse=True)
+    for i in orden:
+        largo = Decimal(largos[i])
+        posicion = mejor_ajuste(bolsa, largo)
+        if posicion is None:
+            asignaciones[i] = {'largo': largo, 'lona_id': None, 'sobrante': None}
+            continue
+        libre, pk = bolsa.pop(posicion)
+        sobrante = libre - largo
+        if sobrante > 0:
+            insort(bolsa, (sobrante, pk))
+        asignaciones[i] = {'largo': largo, 'lona_id': pk, 'sobrante': sobrante}
+    return asignaciones
+
+
+# =============================================================================
+# SUGERENCIAS PARA ÓRDENES DE PRODUCCIÓN
+# =============================================================================
+
+def sugerencias_corte(tipo_lona, ancho_lona, color_lona, largo, tratamiento=None, limite=10):
+    """
+    Rollos que alcanzan para el corte, ordenados por menor sobrante: primero
+    los retazos y después los rollos completos. Cada elemento es el
+    InventarioLona con los atributos `libre` y `sobrante`.
+    """
+    largo = Decimal(largo)
+    lonas = (
+        lonas_asignables(tipo_lona, ancho_lona, color_lona, tratamiento)
+        .filter(libre__gte=largo)
+        .select_related('tipo_lona', 'ancho_lona', 'color_lona', 'tratamiento', 'ubicacion')
+    )
+    retazos = list(lonas.filter(es_retazo=True).order_by('libre', 'pk')[:limite])
+    completos = list(lonas.filter(es_retazo=False).order_by('libre', 'pk')[:limite])
+    for lona in retazos + completos:
+        lona.sobrante = lona.libre - largo
+    return {'retazos': retazos, 'completos': completos}
+
+
+@transaction.atomic
+def asignar_lona_orden(orden, lona, metros, usuario=None, item=None):
+    """
+    Agrega el rollo al detalle de lonas de la orden y reserva los metros en
+    la misma transacción, para que otra orden no tome el mismo retazo.
+    """
+    reservas.reservar(orden, lona, metros, usuario=usuario)
+    return OrdenProduccionLona.objects.create(
+        orden=orden,
+        item=item,
+        lona=lona,
+        metros_requeridos=Decimal(metros),
+    )
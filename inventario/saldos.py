@@ -0,0 +1,206 @@
+"""
+Reconstrucción de existencias a una fecha (saldos "as-of")
+American Carpas 1 SAS
+
+El saldo de cada ítem a una fecha se obtiene partiendo del corte
+(SaldoInventario) más cercano y sumando con signo los movimientos del
+historial entre el corte y la fecha pedida, en una sola consulta agrupada:
+
+- Corte anterior a la fecha: saldo = corte + movimientos (corte, fecha]
+- Solo hay corte posterior: saldo = corte - movimientos (fecha, corte]
+- No hay cortes: saldo = existencia actual - movimientos posteriores a la fecha
+
+El cálculo desde un corte supone que cada lote tiene su movimiento de
+ENTRADA: lo registran la recepción masiva y los formularios de creación
+(recepcion.registrar_entrada).
+
+Las cantidades están en la unidad de control de cada ítem (metros, piezas
+o unidades), igual que en HistorialInventario.
+"""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, When
+from django.utils import timezone
+
+from .models import HistorialInventario, SaldoInventario
+from .reservas import MODELOS_INVENTARIO, codigo_item
+
+
+CERO = Decimal('0')
+
+
+def _fin_del_dia(fecha):
+    """Primer instante del día siguiente (límite superior exclusivo)"""
+    return datetime.combine(fecha + timedelta(days=1), time.min)
+
+
+def _clave(tipo_inventario, lona_id, estructura_id, accesorio_id):
+    return (tipo_inventario, lona_id or estructura_id or accesorio_id)
+
+
+def cantidad_con_signo():
+    """Expresión SQL: +cantidad para entradas, -cantidad para salidas, 0 para reservas"""
+    return Case(
+        When(tipo_movimiento__in=HistorialInventario.MOVIMIENTOS_ENTRADA, then=F('cantidad_movimiento')),
+        When(tipo_movimiento__in=HistorialInventario.MOVIMIENTOS_SALIDA, then=-F('cantidad_movimiento')),
+        default=CERO,
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def movimiento_neto(desde, hasta, tipo_inventario=None):
+    """
+    Variación neta por ítem para movimientos con desde <= fecha_movimiento < hasta.
+    Una sola consulta agrupada. Retorna {(tipo_inventario, pk): cantidad}.
+    """
+    filtro = Q()
+    if desde is not None:
+        filtro &= Q(fecha_movimiento__gte=desde)
+    if hasta is not None:
+        filtro &= Q(fecha_movimiento__lt=hasta)
+    if tipo_inventario:
+        filtro &= Q(tipo_inventario=tipo_inventario)
+
+    filas = (
+        HistorialInventario.objects
+        .filter(filtro)
+        .exclude(tipo_movimiento__in=['RESERVA', 'LIBERACION'])
+        .values('tipo_inventario', 'lona_id', 'estructura_id', 'accesorio_id')
+        .annotate(neto=Sum(cantidad_con_signo()))
+        .order_by()
+    )
+    return {
+        _clave(f['tipo_inventario'], f['lona_id'], f['estructura_id'], f['accesorio_id']): f['neto'] or CERO
+        for f in filas
+        if f['lona_id'] or f['estructura_id'] or f['accesorio_id']
+    }
+
+
+def existencias_actuales(tipo_inventario=None, ingresados_hasta=None):
+    """
+    Existencia física actual por ítem, leída de los contadores.
+    Retorna {(tipo_inventario, pk): cantidad}.
+    """
+    saldos = {}
+    tipos = [tipo_inventario] if tipo_inventario else list(MODELOS_INVENTARIO)
+    for tipo in tipos:
+        modelo, _ = MODELOS_INVENTARIO[tipo]
+        qs = modelo.objects.all()
+        if ingresados_hasta is not None:
+            qs = qs.filter(fecha_ingreso__lte=ingresados_hasta)
+        if tipo == 'LONA':
+            filas = qs.values_list('pk', 'metros_disponibles')
+        elif tipo == 'ESTRUCTURA':
+            filas = qs.annotate(
+                cantidad_actual=Case(
+                    When(tipo_control='PIEZAS', then=F('piezas_disponibles')),
+                    default=F('metros_disponibles'),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ).values_list('pk', 'cantidad_actual')
+        else:
+            filas = qs.values_list('pk', 'cantidad_disponible')
+        for pk, cantidad in filas:
+            saldos[(tipo, pk)] = Decimal(cantidad)
+    return saldos
+
+
+def _saldos_corte(fecha_corte, tipo_inventario=None):
+    qs = SaldoInventario.objects.filter(fecha_corte=fecha_corte)
+    if tipo_inventario:
+        qs = qs.filter(tipo_inventario=tipo_inventario)
+    return {
+        _clave(t, l, e, a): cantidad
+        for t, l, e, a, cantidad in qs.values_list(
+            'tipo_inventario', 'lona_id', 'estructura_id', 'accesorio_id', 'cantidad'
+        )
+    }
+
+
+def _combinar(base, variacion, signo):
+    saldos = dict(base)
+    for clave, neto in variacion.items():
+        saldos[clave] = saldos.get(clave, CERO) + signo * neto
+    return saldos
+
+
+def saldos_a_fecha(fecha, tipo_inventario=None):
+    """
+    Existencia de cada ítem al cierre de `fecha`.
+    Retorna (saldos, origen) donde saldos es {(tipo_inventario, pk): cantidad}
+    y origen describe el punto de partida usado.
+    """
+    limite = _fin_del_dia(fecha)
+    cortes = SaldoInventario.objects.all()
+    if tipo_inventario:
+        cortes = cortes.filter(tipo_inventario=tipo_inventario)
+
+    anterior = cortes.filter(fecha_corte__lte=fecha).order_by('-fecha_corte').values_list('fecha_corte', flat=True).first()
+    if anterior:
+        variacion = movimiento_neto(_fin_del_dia(anterior), limite, tipo_inventario)
+        return _combinar(_saldos_corte(anterior, tipo_inventario), variacion, 1), f'Corte {anterior}'
+
+    posterior = cortes.filter(fecha_corte__gt=fecha).order_by('fecha_corte').values_list('fecha_corte', flat=True).first()
+    if posterior:
+        variacion = movimiento_neto(limite, _fin_del_dia(posterior), tipo_inventario)
+        return _combinar(_saldos_corte(posterior, tipo_inventario), variacion, -1), f'Corte {posterior}'
+
+    variacion = movimiento_neto(limite, None, tipo_inventario)
+    actuales = existencias_actuales(tipo_inventario, ingresados_hasta=fecha)
+    # Ítems ingresados después de la fecha no existían todavía
+    variacion = {clave: neto for clave, neto in variacion.items() if clave in actuales}
+    return _combinar(actuales, variacion, -1), 'Existencias actuales'
+
+
+def detalle_saldos(saldos, incluir_ceros=False):
+    """
+    Enriquece los saldos con código y unidad (una consulta por tabla).
+    Retorna una lista ordenada por tipo y código.
+    """
+    filas = []
+    for tipo, (modelo, _) in MODELOS_INVENTARIO.items():
+        ids = [pk for (t, pk), cantidad in saldos.items() if t == tipo and (incluir_ceros or cantidad)]
+        if not ids:
+            continue
+        for pk, item in modelo.objects.in_bulk(ids).items():
+            if tipo == 'ESTRUCTURA':
+                unidad = 'piezas' if item.tipo_control == 'PIEZAS' else 'metros'
+            else:
+                unidad = 'metros' if tipo == 'LONA' else 'unidades'
+            filas.append({
+                'tipo_inventario': tipo,
+                'id': pk,
+                'codigo': codigo_item(item),
+                'cantidad': saldos[(tipo, pk)],
+                'unidad': unidad,
+            })
+    return sorted(filas, key=lambda f: (f['tipo_inventario'], f['codigo']))
+
+
+@transaction.atomic
+def generar_corte(fecha=None):
+    """
+    Guarda el corte de saldos al cierre de una fecha (por defecto ayer, que ya
+    está cerrado). Si el corte ya existía se reemplaza.
+    """
+    fecha = fecha or timezone.now().date() - timedelta(days=1)
+    SaldoInventario.objects.filter(fecha_corte=fecha).delete()
+    saldos, _ = saldos_a_fecha(fecha)
+
+    ahora = timezone.now()
+    registros = []
+    for fila in detalle_saldos(saldos, incluir_ceros=True):
+        _, campo_fk = MODELOS_INVENTARIO[fila['tipo_inventario']]
+        registros.append(SaldoInventario(
+            fecha_corte=fecha,
+            tipo_inventario=fila['tipo_inventario'],
+            cantidad=fila['cantidad'],
+            unidad_medida=fila['unidad'],
+            fecha_creacion=ahora,
+            **{f'{campo_fk}_id': fila['id']},
+        ))
+    SaldoInventario.objects.bulk_create(registros, batch_size=1000)
+    return registros
@@ -0,0 +1,99 @@
+"""
+Signals del módulo de Inventario de Carpas
+American Carpas 1 SAS
+
+Invalida la caché de reportes cuando cambia el stock y la de estadísticas
+de órdenes de producción cuando cambia una orden, y recalcula el resumen
+de la orden cuando cambian sus ítems o su detalle de material. También costea
+cada movimiento nuevo del historial y cierra las reservas de las órdenes
+que se completan o se cancelan. Las operaciones masivas (update() /
+bulk_create()) no disparan signals; los servicios que las usan (p. ej.
+reservas.py) llaman por su cuenta a invalidar_stock() y a
+costeo.programar_costeo_lote(). El comando recostear_inventario recoge lo
+que haya quedado sin costear.
+"""
+
+from django.db.models.signals import post_save, post_delete, pre_save
+
+from american_carpas_project.estadisticas import registrar_invalidacion
+
+from .cache_inventario import invalidar_stock
+from .models import (
+    UbicacionAlmacen, InventarioLona, InventarioEstructura, InventarioAccesorio,
+    HistorialInventario, OrdenProduccion, OrdenProduccionItem,
+    OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio,
+)
+from .resumen_ordenes import programar_actualizacion
+from .costeo import programar_costeo
+from .reservas import ESTADOS_ORDEN_RESERVABLES, cerrar_reservas_orden
+
+
+# Las ubicaciones se incluyen porque forman parte del reporte de ocupación
+MODELOS_STOCK = [InventarioLona, InventarioEstructura, InventarioAccesorio, HistorialInventario, UbicacionAlmacen]
+
+for _modelo in MODELOS_STOCK:
+    post_save.connect(invalidar_stock, sender=_modelo, dispatch_uid=f'invalidar_stock_save_{_modelo.__name__}')
+    post_delete.connect(invalidar_stock, sender=_modelo, dispatch_uid=f'invalidar_stock_delete_{_modelo.__name__}')
+
+registrar_invalidacion(OrdenProduccion)
+
+
+# =============================================================================
+# RESUMEN DE ÓRDENES DE PRODUCCIÓN
+# =============================================================================
+
+MODELOS_DETALLE_ORDEN = [
+    OrdenProduccionItem, OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio,
+]
+
+
+def actualizar_resumen_orden(sender, instance, **kwargs):
+    programar_actualizacion(instance.orden_id)
+
+
+def crear_resumen_orden(sender, instance, created, **kwargs):
+    if created:
+        programar_actualizacion(instance.pk)
+
+
+post_save.connect(crear_resumen_orden, sender=OrdenProduccion, dispatch_uid='resumen_orden_crear')
+
+for _modelo in MODELOS_DETALLE_ORDEN:
+    post_save.connect(actualizar_resumen_orden, sender=_modelo, dispatch_uid=f'resumen_orden_save_{_modelo.__name__}')
+    post_delete.connect(actualizar_resumen_orden, sender=_modelo, dispatch_uid=f'resumen_orden_delete_{_modelo.__name__}')
+
+
+# =============================================================================
+# COSTEO DE MOVIMIENTOS
+# =============================================================================
+
+def costear_movimiento(sender, instance, created, **kwargs):
+    if created:
+        programar_costeo(instance)
+
+
+post_save.connect(costear_movimiento, sender=HistorialInventario, dispatch_uid='costeo_historial_crear')
+
+
+# =============================================================================
+# CIERRE DE RESERVAS AL CAMBIAR EL ESTADO DE LA ORDEN
+# =============================================================================
+
+def leer_estado_anterior(sender, instance, raw=False, **kwargs):
+    """Guarda en la instancia el estado que tiene la orden en la base de datos"""
+    instance._estado_anterior = None
+    if raw or instance.pk is None:
+        return
+    instance._estado_anterior = sender.objects.filter(pk=instance.pk).values_list('estado', flat=True).first()
+
+
+def cerrar_reservas(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    anterior = getattr(instance, '_estado_anterior', None)
+    if anterior in ESTADOS_ORDEN_RESERVABLES and instance.estado not in ESTADOS_ORDEN_RESERVABLES:
+        cerrar_reservas_orden(instance, usuario=getattr(instance, '_usuario_cambio', None))
+
+
+pre_save.connect(leer_estado_anterior, sender=OrdenProduccion, dispatch_uid='reservas_orden_pre_save')
+post_save.connect(cerrar_reservas, sender=OrdenProduccion, dispatch_uid='reservas_orden_cerrar')
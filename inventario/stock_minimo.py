@@ -0,0 +1,170 @@
+"""
+Alertas de stock mínimo y sugerencias de reposición
+American Carpas 1 SAS
+
+Las consultas comparan columna contra columna en SQL
+(p. ej. metros_disponibles <= metros_minimo_alerta) apoyadas en índices de
+cobertura, en lugar de recorrer cada ítem con en_stock_minimo().
+La sugerencia de pedido usa el ritmo de consumo (SALIDAS del historial).
+"""
+
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .cache_inventario import obtener
+from .models import (
+    InventarioLona, InventarioEstructura, InventarioAccesorio,
+    HistorialInventario, SugerenciaReposicion,
+)
+from .reservas import codigo_item
+
+
+# Días de historial usados para calcular el consumo promedio
+VENTANA_CONSUMO_DIAS = 30
+
+# Días de consumo que debe cubrir el pedido, además del tiempo de entrega
+DIAS_COBERTURA_OBJETIVO = 30
+
+
+# =============================================================================
+# CONSULTAS DE STOCK MÍNIMO
+# =============================================================================
+
+def lonas_en_minimo():
+    return InventarioLona.objects.filter(
+        activo=True,
+        metros_disponibles__lte=F('metros_minimo_alerta'),
+    ).exclude(estado='BAJA')
+
+
+def estructuras_en_minimo():
+    return InventarioEstructura.objects.filter(
+        Q(tipo_control='METROS', metros_disponibles__lte=F('metros_minimo_alerta')) |
+        Q(tipo_control='PIEZAS', piezas_disponibles__lte=F('piezas_minimo_alerta')),
+        activo=True,
+    ).exclude(estado='BAJA')
+
+
+def accesorios_en_minimo():
+    return InventarioAccesorio.objects.filter(
+        activo=True,
+        cantidad_disponible__lte=F('cantidad_minima_alerta'),
+    ).exclude(estado='BAJA')
+
+
+def conteo_en_minimo():
+    """Cantidad de ítems en stock mínimo por tipo (en caché hasta el próximo movimiento)"""
+    return obtener('stock_minimo:conteo', lambda: {
+        'lonas': lonas_en_minimo().count(),
+        'estructuras': estructuras_en_minimo().count(),
+        'accesorios': accesorios_en_minimo().count(),
+    })
+
+
+# =============================================================================
+# CONSUMO Y SUGERENCIAS
+# =============================================================================
+
+def consumo_por_item(campo_fk, desde):
+    """
+    Total de SALIDAS por ítem desde la fecha indicada, en una consulta agrupada.
+    Retorna {pk_item: cantidad}.
+    """
+    filas = (
+        HistorialInventario.objects
+        .filter(tipo_movimiento='SALIDA', fecha_movimiento__gte=desde, **{f'{campo_fk}__isnull': False})
+        .values(campo_fk)
+        .annotate(total=Sum('cantidad_movimiento'))
+        .order_by()
+    )
+    return {fila[campo_fk]: fila['total'] for fila in filas}
+
+
+def _sugerencia(item, tipo, disponible, minimo, unidad, consumo_total, ventana, cobertura, fecha):
+    """Calcula una fila de reposición para un ítem"""
+    disponible = Decimal(disponible)
+    minimo = Decimal(minimo)
+    consumo_diario = Decimal(consumo_total or 0) / ventana
+
+    entrega = item.proveedor.tiempo_entrega_promedio if item.proveedor_id else 0
+    objetivo = minimo + consumo_diario * (entrega + cobertura)
+    sugerida = max(objetivo - disponible, Decimal('0'))
+    if unidad in ('piezas', 'unidades'):
+        sugerida = Decimal(math.ceil(sugerida))
+    if sugerida == 0:
+        # En mínimo pero sin consumo: al menos reponer hasta el mínimo
+        sugerida = max(minimo - disponible, Decimal('0'))
+
+    return SugerenciaReposicion(
+        fecha_reporte=fecha,
+        tipo_inventario=tipo,
+        codigo=codigo_item(item),
+        descripcion=str(item)[:200],
+        proveedor_id=item.proveedor_id,
+        unidad_medida=unidad,
+        cantidad_disponible=disponible,
+        cantidad_minima=minimo,
+        consumo_diario=consumo_diario.quantize(Decimal('0.01')),
+        dias_cobertura=(disponible / consumo_diario).quantize(Decimal('0.1')) if consumo_diario else None,
+        cantidad_sugerida=sugerida.quantize(Decimal('0.01')),
+        **{tipo.lower(): item},
+    )
+
+
+def calcular_sugerencias(fecha=None, ventana=VENTANA_CONSUMO_DIAS, cobertura=DIAS_COBERTURA_OBJETIVO):
+    """
+    Sugerencias de reposición para todos los ítems en stock mínimo.
+    Hace una consulta por tabla de inventario y una agrupada por tabla de historial.
+    """
+    fecha = fecha or timezone.now().date()
+    desde = timezone.now() - timedelta(days=ventana)
+    sugerencias = []
+
+    consumo = consumo_por_item('lona', desde)
+    for lona in lonas_en_minimo().select_related('tipo_lona', 'ancho_lona', 'color_lona', 'proveedor'):
+        sugerencias.append(_sugerencia(
+            lona, 'LONA', lona.metros_disponibles, lona.metros_minimo_alerta, 'metros',
+            consumo.get(lona.pk), ventana, cobertura, fecha,
+        ))
+
+    consumo = consumo_por_item('estructura', desde)
+    for est in estructuras_en_minimo().select_related('tipo_estructura', 'medida_tubo', 'calibre', 'proveedor'):
+        if est.tipo_control == 'PIEZAS':
+            datos = (est.piezas_disponibles, est.piezas_minimo_alerta, 'piezas')
+        else:
+            datos = (est.metros_disponibles, est.metros_minimo_alerta, 'metros')
+        sugerencias.append(_sugerencia(
+            est, 'ESTRUCTURA', *datos, consumo.get(est.pk), ventana, cobertura, fecha,
+        ))
+
+    consumo = consumo_por_item('accesorio', desde)
+    for acc in accesorios_en_minimo().select_related('proveedor'):
+        sugerencias.append(_sugerencia(
+            acc, 'ACCESORIO', acc.cantidad_disponible, acc.cantidad_minima_alerta, 'unidades',
+            consumo.get(acc.pk), ventana, cobertura, fecha,
+        ))
+
+    return sugerencias
+
+
+@transaction.atomic
+def generar_reporte_reposicion(fecha=None, ventana=VENTANA_CONSUMO_DIAS, cobertura=DIAS_COBERTURA_OBJETIVO):
+    """Guarda la foto del día (reemplaza la de la misma fecha si ya existía)"""
+    fecha = fecha or timezone.now().date()
+    sugerencias = calcular_sugerencias(fecha, ventana, cobertura)
+    SugerenciaReposicion.objects.filter(fecha_reporte=fecha).delete()
+    SugerenciaReposicion.objects.bulk_create(sugerencias, batch_size=500)
+    return sugerencias
+
+
+def ultimo_reporte():
+    """Sugerencias del reporte más reciente"""
+    fecha = SugerenciaReposicion.objects.order_by('-fecha_reporte').values_list('fecha_reporte', flat=True).first()
+    if fecha is None:
+        return None, SugerenciaReposicion.objects.none()
+    return fecha, SugerenciaReposicion.objects.filter(fecha_reporte=fecha).select_related('proveedor')
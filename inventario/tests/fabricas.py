@@ -0,0 +1,106 @@
+"""
+Datos mínimos para las pruebas del módulo de Inventario
+American Carpas 1 SAS
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from trabajadores.models import TrabajadorPersonal
+
+from inventario.models import (
+    UbicacionAlmacen, TipoAccesorio, InventarioAccesorio,
+    TipoLona, AnchoLona, ColorLona, InventarioLona,
+    TipoEstructura, MedidaTubo, Calibre, InventarioEstructura,
+    OrdenProduccion, OrdenProduccionAccesorio,
+)
+
+
+def crear_trabajador(documento='1000000001'):
+    return TrabajadorPersonal.objects.create(
+        id_trabajador=documento,
+        nombres='Ana',
+        apellidos='Pérez',
+        fecha_expedicion_doc=date(2010, 1, 1),
+        fecha_nacimiento=date(1990, 1, 1),
+    )
+
+
+def crear_ubicacion(codigo='A-01'):
+    return UbicacionAlmacen.objects.create(codigo=codigo, nombre=f'Ubicación {codigo}', bodega='Principal')
+
+
+def crear_accesorio(nombre='Tensor galvanizado', cantidad=10, costo='1000', tipo=None, ubicacion=None):
+    tipo = tipo or TipoAccesorio.objects.get_or_create(codigo='TEN', defaults={'nombre': 'Tensores'})[0]
+    ubicacion = ubicacion or UbicacionAlmacen.objects.first() or crear_ubicacion()
+    return InventarioAccesorio.objects.create(
+        tipo_accesorio=tipo,
+        nombre=nombre,
+        cantidad_inicial=cantidad,
+        cantidad_disponible=cantidad,
+        costo_unitario=Decimal(costo),
+        ubicacion=ubicacion,
+        fecha_ingreso=date.today(),
+    )
+
+
+def especificacion_lona(color='Blanco'):
+    """(tipo, ancho, color) de lona, creados si no existen"""
+    tipo = TipoLona.objects.get_or_create(codigo='PVC', defaults={'nombre': 'PVC'})[0]
+    ancho = AnchoLona.objects.get_or_create(valor_metros=Decimal('2.50'))[0]
+    color = ColorLona.objects.get_or_create(nombre=color)[0]
+    return tipo, ancho, color
+
+
+def crear_lona(metros, metros_iniciales=50, reservados=0, color='Blanco', costo='10000', ubicacion=None):
+    tipo, ancho, color = especificacion_lona(color)
+    ubicacion = ubicacion or UbicacionAlmacen.objects.first() or crear_ubicacion()
+    return InventarioLona.objects.create(
+        tipo_lona=tipo,
+        ancho_lona=ancho,
+        color_lona=color,
+        metros_iniciales=Decimal(metros_iniciales),
+        metros_disponibles=Decimal(metros),
+        metros_reservados=Decimal(reservados),
+        costo_por_metro=Decimal(costo),
+        ubicacion=ubicacion,
+        fecha_ingreso=date.today(),
+    )
+
+
+def crear_estructura(tipo_control='METROS', metros=0, piezas=0, costo_metro='0', costo_pieza='0', ubicacion=None):
+    tipo = TipoEstructura.objects.get_or_create(codigo='TUB', defaults={'nombre': 'Tubo'})[0]
+    medida = MedidaTubo.objects.get_or_create(valor_medida='1"')[0]
+    calibre = Calibre.objects.get_or_create(valor_calibre=Decimal('18'))[0]
+    ubicacion = ubicacion or UbicacionAlmacen.objects.first() or crear_ubicacion()
+    return InventarioEstructura.objects.create(
+        tipo_estructura=tipo,
+        medida_tubo=medida,
+        calibre=calibre,
+        tipo_control=tipo_control,
+        metros_iniciales=Decimal(metros),
+        metros_disponibles=Decimal(metros),
+        piezas_iniciales=piezas,
+        piezas_disponibles=piezas,
+        costo_por_metro=Decimal(costo_metro),
+        costo_por_pieza=Decimal(costo_pieza),
+        ubicacion=ubicacion,
+        fecha_ingreso=date.today(),
+    )
+
+
+def crear_orden(solicitado_por=None, estado='EN_PROCESO', **campos):
+    solicitado_por = solicitado_por or TrabajadorPersonal.objects.first() or crear_trabajador()
+    campos.setdefault('fecha_entrega_requerida', date.today())
+    return OrdenProduccion.objects.create(
+        cliente='Cliente de prueba',
+        solicitado_por=solicitado_por,
+        estado=estado,
+        **campos,
+    )
+
+
+def pedir_accesorio(orden, accesorio, cantidad):
+    return OrdenProduccionAccesorio.objects.create(
+        orden=orden, accesorio=accesorio, cantidad_requerida=cantidad,
+    )
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase
+
+from inventario import cache_inventario, valorizacion
+from inventario.models import InventarioAccesorio
+
+from .fabricas import crear_accesorio, crear_estructura, crear_lona
+
+
+class VersionStockTests(TestCase):
+
+    def test_se_incrementa_una_vez_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                cache_inventario.invalidar_stock()
+                cache_inventario.invalidar_stock()
+                self.assertEqual(cache_inventario.version_stock(), 0)
+        self.assertEqual(cache_inventario.version_stock(), 1)
+
+    def test_los_signals_de_stock_invalidan(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_accesorio()
+        self.assertEqual(cache_inventario.version_stock(), 1)
+
+    def test_sin_confirmar_no_invalida(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    cache_inventario.invalidar_stock()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(cache_inventario.version_stock(), 0)
+
+    def test_los_reportes_se_recalculan_con_la_version_nueva(self):
+        calculos = []
+
+        def calcular():
+            calculos.append(1)
+            return len(calculos)
+
+        self.assertEqual(cache_inventario.obtener('prueba', calcular), 1)
+        self.assertEqual(cache_inventario.obtener('prueba', calcular), 1)
+        cache_inventario.incrementar_version()
+        self.assertEqual(cache_inventario.obtener('prueba', calcular), 2)
+
+
+class ValorizacionTests(TestCase):
+
+    def setUp(self):
+        self.items = [
+            crear_lona('12.5', costo='8000'),
+            crear_estructura('METROS', metros='30', costo_metro='4500'),
+            crear_estructura('PIEZAS', piezas=7, costo_pieza='12000', costo_metro='99999'),
+            crear_accesorio(cantidad=9, costo='1500'),
+        ]
+        inactivo = crear_accesorio('Inactivo', cantidad=3, costo='1000')
+        InventarioAccesorio.objects.filter(pk=inactivo.pk).update(activo=False)
+
+    def test_el_valor_en_sql_coincide_con_valor_inventario(self):
+        calculado = {}
+        for consulta in valorizacion.consultas_con_valor():
+            calculado.update(consulta.values_list('codigo_item', 'valor'))
+
+        for item in self.items:
+            item.refresh_from_db()
+            codigo = getattr(item, 'codigo_rollo', None) or getattr(item, 'codigo_lote', None) or item.codigo
+            self.assertEqual(calculado[codigo], item.valor_inventario)
+
+    def test_el_reporte_suma_solo_los_activos(self):
+        reporte = valorizacion.calcular_valorizacion()
+
+        total = sum((item.valor_inventario for item in self.items), Decimal('0'))
+        self.assertEqual(reporte['valor_total'], total)
+        self.assertEqual(reporte['lotes_total'], 4)
+        por_categoria = {fila['categoria']: fila['valor'] for fila in reporte['por_dimension']['categoria']}
+        self.assertEqual(por_categoria['ESTRUCTURA'], Decimal('30') * 4500 + 7 * 12000)
+        self.assertEqual(valorizacion.calcular_valorizacion(solo_activos=False)['lotes_total'], 5)
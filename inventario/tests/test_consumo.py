@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from american_carpas_project.tests import como_mysql, upserts
+from inventario import consumo
+from inventario.models import ConsumoMaterialDiario, HistorialInventario
+
+from .fabricas import crear_accesorio
+
+
+class ActualizarConsumoTests(TestCase):
+
+    def setUp(self):
+        self.tensor = crear_accesorio('Tensor')
+        self.hoy = timezone.now().replace(microsecond=0)
+
+    def salida(self, cantidad, fecha=None, **campos):
+        return HistorialInventario.objects.create(
+            fecha_movimiento=fecha or self.hoy,
+            tipo_movimiento='SALIDA',
+            tipo_inventario='ACCESORIO',
+            accesorio=self.tensor,
+            cantidad_anterior=0,
+            cantidad_movimiento=Decimal(cantidad),
+            cantidad_nueva=0,
+            unidad_medida='unidades',
+            **campos,
+        )
+
+    def consumo_del_dia(self, fecha):
+        return ConsumoMaterialDiario.objects.get(fecha=fecha.date())
+
+    def test_resume_las_salidas_por_dia(self):
+        ayer = self.hoy - timedelta(days=1)
+        self.salida(3)
+        self.salida(2)
+        self.salida(4, fecha=ayer)
+
+        self.assertEqual(consumo.actualizar_consumo(), 2)
+
+        hoy = self.consumo_del_dia(self.hoy)
+        self.assertEqual((hoy.cantidad, hoy.movimientos), (Decimal('5'), 2))
+        self.assertEqual(self.consumo_del_dia(ayer).cantidad, Decimal('4'))
+
+    def test_incremental_no_toca_dias_antiguos_sin_salidas_nuevas(self):
+        self.salida(4, fecha=datetime(2020, 1, 6, 8, 0))
+        consumo.actualizar_consumo()
+
+        self.assertEqual(consumo.actualizar_consumo(), 0)
+
+    def test_incluye_salidas_confirmadas_tarde_con_id_menor(self):
+        primera = self.salida(3)
+        self.salida(2, id_historial=primera.pk + 10)
+        consumo.actualizar_consumo()
+
+        # Otra transacción obtuvo un id menor pero confirmó después
+        self.salida(4, id_historial=primera.pk + 5)
+        consumo.actualizar_consumo()
+
+        hoy = self.consumo_del_dia(self.hoy)
+        self.assertEqual((hoy.cantidad, hoy.movimientos), (Decimal('9'), 3))
+
+    def test_en_mysql_el_upsert_no_indica_unique_fields(self):
+        self.salida(3)
+
+        with como_mysql() as llamadas:
+            consumo.actualizar_consumo()
+
+        self.assertEqual(len(upserts(llamadas)), 1)
+        self.assertNotIn('unique_fields', upserts(llamadas)[0])
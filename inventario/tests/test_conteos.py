@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from inventario import conteos
+from inventario.models import HistorialInventario, InventarioAccesorio
+
+from .fabricas import crear_accesorio, crear_lona, crear_ubicacion
+
+
+class InterpretarLecturasTests(SimpleTestCase):
+
+    def test_acepta_codigo_solo_o_con_cantidad(self):
+        lecturas = conteos.interpretar_lecturas('acc-1\n\n  ACC-2;3\nLN-1 2,5\nACC-3\t4\n')
+
+        self.assertEqual(lecturas, [
+            ('ACC-1', None), ('ACC-2', Decimal('3')), ('LN-1', Decimal('2.5')), ('ACC-3', Decimal('4')),
+        ])
+
+    def test_rechaza_cantidades_no_finitas_negativas_o_invalidas(self):
+        texto = '\n'.join(['ACC-1;NaN', 'ACC-2;sNaN', 'ACC-3;Infinity', 'ACC-4;-1', 'ACC-5;abc', 'ACC-6;1'])
+
+        with self.assertRaises(ValidationError) as error:
+            conteos.interpretar_lecturas(texto)
+
+        self.assertEqual(len(error.exception.messages), 5)
+        self.assertTrue(error.exception.messages[0].startswith('Línea 1:'))
+
+
+class ConciliarTests(TestCase):
+
+    def setUp(self):
+        self.ubicacion = crear_ubicacion()
+        self.tensor = crear_accesorio('Tensor', cantidad=10, ubicacion=self.ubicacion)
+        self.argolla = crear_accesorio('Argolla', cantidad=5, ubicacion=self.ubicacion)
+        self.lona = crear_lona(20, ubicacion=self.ubicacion)
+        self.conteo = conteos.iniciar_conteo(self.ubicacion)
+
+    def test_congela_la_existencia_de_la_ubicacion(self):
+        esperado = dict(self.conteo.detalles.values_list('codigo', 'cantidad_esperada'))
+
+        self.assertEqual(esperado, {
+            self.tensor.codigo: Decimal('10'), self.argolla.codigo: Decimal('5'), self.lona.codigo_rollo: Decimal('20'),
+        })
+        with self.assertRaises(ValidationError):
+            conteos.iniciar_conteo(self.ubicacion)
+
+    def test_aplica_la_diferencia_sobre_la_existencia_actual(self):
+        conteos.registrar_conteos(self.conteo, [(self.tensor.codigo, Decimal('5')), (self.lona.codigo_rollo, None)])
+        conteos.registrar_conteos(self.conteo, [(self.tensor.codigo, Decimal('3'))])
+        # Una salida de 3 mientras el conteo estaba abierto
+        InventarioAccesorio.objects.filter(pk=self.tensor.pk).update(cantidad_disponible=7)
+
+        movimientos = conteos.conciliar(self.conteo)
+
+        self.assertEqual(len(movimientos), 1)
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.tensor.cantidad_disponible, 5)
+        ajuste = HistorialInventario.objects.get(accesorio=self.tensor)
+        self.assertEqual((ajuste.tipo_movimiento, ajuste.cantidad_movimiento), ('AJUSTE_NEGATIVO', Decimal('2')))
+        self.argolla.refresh_from_db()
+        self.assertEqual(self.argolla.cantidad_disponible, 5)
+        self.conteo.refresh_from_db()
+        self.assertEqual(self.conteo.estado, 'CONCILIADO')
+
+    def test_los_no_contados_pueden_ajustarse_a_cero(self):
+        conteos.conciliar(self.conteo, no_contados='CERO')
+
+        self.argolla.refresh_from_db()
+        self.assertEqual((self.argolla.cantidad_disponible, self.argolla.estado), (0, 'AGOTADO'))
+
+    def test_unidades_enteras_y_codigos_desconocidos(self):
+        with self.assertRaises(ValidationError):
+            conteos.registrar_conteos(self.conteo, [(self.tensor.codigo, Decimal('1.5'))])
+
+        resultado = conteos.registrar_conteos(self.conteo, [('NO-EXISTE', Decimal('1'))])
+        self.assertEqual(resultado, {'actualizados': 0, 'no_encontrados': ['NO-EXISTE']})
@@ -0,0 +1,103 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from inventario import costeo
+from inventario.models import CosteoMovimiento, HistorialInventario
+
+from .fabricas import crear_accesorio, crear_orden
+
+
+def movimiento(item, tipo_movimiento, cantidad, dia, orden=None):
+    return HistorialInventario.objects.create(
+        fecha_movimiento=datetime(2026, 3, dia, 8, 0),
+        tipo_movimiento=tipo_movimiento,
+        tipo_inventario='ACCESORIO',
+        accesorio=item,
+        orden_produccion=orden,
+        cantidad_anterior=0,
+        cantidad_movimiento=cantidad,
+        cantidad_nueva=0,
+        unidad_medida='unidades',
+    )
+
+
+class CosteoTests(TestCase):
+    """Dos lotes del mismo accesorio (misma especificación) con costos distintos"""
+
+    def setUp(self):
+        self.orden = crear_orden()
+        self.lote_barato = crear_accesorio('Tensor', cantidad=10, costo='1000')
+        self.lote_caro = crear_accesorio('Tensor', cantidad=10, costo='2000', tipo=self.lote_barato.tipo_accesorio)
+        movimiento(self.lote_barato, 'ENTRADA', 10, 1)
+        movimiento(self.lote_caro, 'ENTRADA', 10, 2)
+        self.salida = movimiento(self.lote_caro, 'SALIDA', 15, 3, orden=self.orden)
+
+    def test_fifo_consume_primero_las_capas_antiguas(self):
+        costeo.recostear(metodo='FIFO')
+
+        resultado = CosteoMovimiento.objects.get(historial=self.salida)
+        self.assertEqual(resultado.costo_total, Decimal('-20000.00'))
+        self.assertEqual(resultado.saldo_cantidad, 5)
+        self.assertEqual(resultado.saldo_valor, Decimal('10000.00'))
+        self.assertEqual(costeo.costo_material_orden(self.orden), Decimal('20000.00'))
+
+    def test_promedio_ponderado(self):
+        costeo.recostear(metodo='PROMEDIO')
+
+        resultado = CosteoMovimiento.objects.get(historial=self.salida)
+        self.assertEqual(resultado.costo_unitario, Decimal('1500.0000'))
+        self.assertEqual(resultado.costo_total, Decimal('-22500.00'))
+        self.assertEqual(resultado.saldo_valor, Decimal('7500.00'))
+
+    def test_salida_sin_saldo_se_valora_al_costo_del_lote(self):
+        otro = crear_accesorio('Argolla', cantidad=5, costo='300', tipo=self.lote_barato.tipo_accesorio)
+        salida = movimiento(otro, 'SALIDA', 2, 4)
+
+        costeo.recostear(metodo='FIFO')
+
+        self.assertEqual(CosteoMovimiento.objects.get(historial=salida).costo_total, Decimal('-600.00'))
+
+    def test_recosteo_desde_un_movimiento_conserva_el_saldo_anterior(self):
+        costeo.recostear(metodo='PROMEDIO')
+        nueva_salida = movimiento(self.lote_barato, 'SALIDA', 5, 4)
+
+        costeo.costear_movimiento(nueva_salida.pk, metodo='PROMEDIO')
+
+        resultado = CosteoMovimiento.objects.get(historial=nueva_salida)
+        self.assertEqual(resultado.costo_total, Decimal('-7500.00'))
+        self.assertEqual(resultado.saldo_cantidad, 0)
+        self.assertEqual(CosteoMovimiento.objects.count(), 4)
+
+    def test_nombre_con_espacios_se_recostea(self):
+        lote = crear_accesorio(' Ojalete ', cantidad=4, costo='50', tipo=self.lote_barato.tipo_accesorio)
+        entrada = movimiento(lote, 'ENTRADA', 4, 5)
+
+        costeo.costear_movimiento(entrada.pk, metodo='FIFO')
+        costeo.costear_movimiento(entrada.pk, metodo='FIFO')
+
+        resultado = CosteoMovimiento.objects.get(historial=entrada)
+        self.assertTrue(resultado.clave_material.endswith('|OJALETE'))
+
+    def test_con_otro_metodo_guardado_recostea_la_clave_completa(self):
+        costeo.recostear(metodo='FIFO')
+        nueva_salida = movimiento(self.lote_barato, 'SALIDA', 5, 4)
+
+        costeo.costear_movimiento(nueva_salida.pk, metodo='PROMEDIO')
+
+        self.assertEqual(set(CosteoMovimiento.objects.values_list('metodo', flat=True)), {'PROMEDIO'})
+        self.assertEqual(CosteoMovimiento.objects.get(historial=self.salida).costo_total, Decimal('-22500.00'))
+        self.assertEqual(CosteoMovimiento.objects.get(historial=nueva_salida).costo_total, Decimal('-7500.00'))
+
+    def test_un_error_al_confirmar_deja_el_movimiento_pendiente(self):
+        with mock.patch.object(costeo, '_costear', side_effect=RuntimeError('falla')), \
+                self.assertLogs('inventario.costeo', 'ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            salida = movimiento(self.lote_barato, 'SALIDA', 1, 4)
+
+        self.assertFalse(CosteoMovimiento.objects.filter(historial=salida).exists())
+        self.assertIn(costeo.clave_material(
+            HistorialInventario.objects.filter(pk=salida.pk).values(*costeo.CAMPOS_FILA).get()
+        ), costeo.inicios_pendientes())
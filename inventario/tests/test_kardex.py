@@ -0,0 +1,127 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import openpyxl
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario import kardex
+from inventario.models import HistorialInventario
+
+from .fabricas import crear_accesorio
+
+
+INICIO = datetime(2024, 3, 1, 8, 0)
+
+
+def registrar(accesorio, fecha, cantidad=1, saldo=0, tipo='ENTRADA'):
+    return HistorialInventario.objects.create(
+        fecha_movimiento=fecha,
+        tipo_movimiento=tipo,
+        tipo_inventario='ACCESORIO',
+        accesorio=accesorio,
+        cantidad_anterior=Decimal(saldo) - Decimal(cantidad),
+        cantidad_movimiento=Decimal(cantidad),
+        cantidad_nueva=Decimal(saldo),
+        unidad_medida='unidades',
+    )
+
+
+class CursorKardexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        accesorio = crear_accesorio()
+        # Dos movimientos comparten fecha: el desempate es id_historial
+        cls.movimientos = [
+            registrar(accesorio, INICIO + timedelta(hours=min(n, 3)), saldo=n + 1)
+            for n in range(5)
+        ]
+
+    def ids(self, resultado):
+        return [mov.id_historial for mov in resultado['movimientos']]
+
+    def test_codificar_y_decodificar_cursor(self):
+        mov = self.movimientos[0]
+        self.assertEqual(
+            kardex.decodificar_cursor(kardex.codificar_cursor(mov)),
+            (mov.fecha_movimiento, mov.id_historial),
+        )
+
+    def test_cursor_invalido(self):
+        for cursor in ('basura', '2024-03-01T08:00:00_x', 'x_1', None):
+            self.assertIsNone(kardex.decodificar_cursor(cursor))
+
+        # Un cursor inválido se trata como la primera página
+        resultado = kardex.pagina(HistorialInventario.objects.all(), despues='basura', tamano=2)
+        self.assertEqual(self.ids(resultado), [m.id_historial for m in self.movimientos[:2]])
+        self.assertFalse(resultado['hay_anterior'])
+
+    def test_recorre_hacia_adelante(self):
+        qs = HistorialInventario.objects.all()
+        primera = kardex.pagina(qs, tamano=2)
+        self.assertEqual(self.ids(primera), [m.id_historial for m in self.movimientos[:2]])
+        self.assertFalse(primera['hay_anterior'])
+        self.assertTrue(primera['hay_siguiente'])
+
+        segunda = kardex.pagina(qs, despues=primera['cursor_siguiente'], tamano=2)
+        self.assertEqual(self.ids(segunda), [m.id_historial for m in self.movimientos[2:4]])
+        self.assertTrue(segunda['hay_anterior'])
+        self.assertTrue(segunda['hay_siguiente'])
+
+        ultima = kardex.pagina(qs, despues=segunda['cursor_siguiente'], tamano=2)
+        self.assertEqual(self.ids(ultima), [self.movimientos[4].id_historial])
+        self.assertTrue(ultima['hay_anterior'])
+        self.assertFalse(ultima['hay_siguiente'])
+
+    def test_recorre_hacia_atras(self):
+        qs = HistorialInventario.objects.all()
+        anterior = kardex.pagina(qs, antes=kardex.codificar_cursor(self.movimientos[4]), tamano=2)
+        self.assertEqual(self.ids(anterior), [m.id_historial for m in self.movimientos[2:4]])
+        self.assertTrue(anterior['hay_anterior'])
+        self.assertTrue(anterior['hay_siguiente'])
+
+        primera = kardex.pagina(qs, antes=anterior['cursor_anterior'], tamano=2)
+        self.assertEqual(self.ids(primera), [m.id_historial for m in self.movimientos[:2]])
+        self.assertFalse(primera['hay_anterior'])
+        self.assertTrue(primera['hay_siguiente'])
+
+
+class ExportarKardexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.accesorio = crear_accesorio()
+        otro = crear_accesorio(nombre='Grillete')
+        registrar(cls.accesorio, INICIO, cantidad=10, saldo=10)
+        registrar(otro, INICIO + timedelta(hours=1), cantidad=4, saldo=4)
+        registrar(cls.accesorio, INICIO + timedelta(hours=2), cantidad=3, saldo=7, tipo='SALIDA')
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('bodega'))
+
+    def exportar(self, **parametros):
+        return self.client.get(reverse('inventario:kardex_exportar'), parametros)
+
+    def test_csv_sin_saldo_cuando_se_mezclan_items(self):
+        response = self.exportar(tipo='ACCESORIO')
+        filas = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8-sig'))))
+
+        self.assertEqual(filas[0], kardex.columnas_exportacion(con_saldo=False))
+        self.assertNotIn('Saldo', filas[0])
+        self.assertEqual(len(filas), 4)
+        self.assertTrue(all(len(fila) == len(filas[0]) for fila in filas))
+
+    def test_xlsx_con_saldo_para_un_item(self):
+        response = self.exportar(tipo='ACCESORIO', codigo=self.accesorio.codigo, formato='xlsx')
+        self.assertIn('kardex_inventario.xlsx', response['Content-Disposition'])
+
+        libro = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        filas = list(libro.active.iter_rows(values_only=True))
+        self.assertEqual(list(filas[0]), kardex.COLUMNAS_EXPORTACION)
+        posicion = kardex.COLUMNAS_EXPORTACION.index('Saldo')
+        self.assertEqual([fila[posicion] for fila in filas[1:]], [10, 7])
@@ -0,0 +1,74 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventario import planificacion
+from inventario.models import EstacionTrabajo, OrdenProduccionItem
+
+from .fabricas import crear_orden
+
+
+VIERNES = date(2024, 3, 1)
+
+
+def orden_con_carpa(dimensiones, **campos):
+    orden = crear_orden(**campos)
+    OrdenProduccionItem.objects.create(
+        orden=orden, numero_linea=1, tipo_producto='CARPA TRADICIONAL', dimensiones=dimensiones,
+    )
+    return orden
+
+
+class PlanificacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for codigo in planificacion.CAPACIDAD_POR_DEFECTO:
+            EstacionTrabajo.objects.create(codigo=codigo, capacidad_diaria=Decimal('100'), trabaja_sabado=False)
+
+    def test_area_item(self):
+        self.assertEqual(planificacion.area_item('10x20'), 200)
+        self.assertEqual(planificacion.area_item('2,5 X 2 MTS'), 5)
+        self.assertEqual(planificacion.area_item('sin medidas'), planificacion.AREA_POR_DEFECTO_M2)
+
+    def test_salta_fines_de_semana(self):
+        orden = orden_con_carpa('10x20', fecha_entrega_requerida=date(2024, 3, 5))
+
+        plan = planificacion.planificar([orden], inicio=VIERNES)
+
+        fila = plan['ordenes'][0]
+        # 200 m² a 100 m²/día: viernes y lunes; la pintura sigue martes y miércoles
+        self.assertEqual(fila['fases']['ESTRUCTURA'], (VIERNES, date(2024, 3, 4)))
+        self.assertEqual(fila['fases']['PINTURA'], (date(2024, 3, 5), date(2024, 3, 6)))
+        self.assertEqual(fila['fases']['CONFECCION'], (VIERNES, date(2024, 3, 4)))
+        self.assertEqual(fila['fecha_fin_proyectada'], date(2024, 3, 6))
+        self.assertTrue(fila['atrasada'])
+        self.assertEqual(fila['dias_atraso'], 1)
+
+        # Los días de carga cuentan solo días laborables
+        self.assertEqual(plan['carga']['ESTRUCTURA']['dias_ocupados'], 2)
+        self.assertEqual(plan['carga']['ESTRUCTURA']['hasta'], date(2024, 3, 4))
+        self.assertEqual(plan['carga']['PINTURA']['dias_ocupados'], 4)
+        self.assertEqual(plan['carga']['PINTURA']['hasta'], date(2024, 3, 6))
+
+    def test_sabado_laborable_si_la_estacion_lo_trabaja(self):
+        EstacionTrabajo.objects.filter(codigo='ESTRUCTURA').update(trabaja_sabado=True)
+        orden = orden_con_carpa('10x20', estructura_pintada=True, lona_fabricada=True)
+
+        plan = planificacion.planificar([orden], inicio=VIERNES)
+
+        self.assertEqual(plan['ordenes'][0]['fases']['ESTRUCTURA'], (VIERNES, date(2024, 3, 2)))
+        self.assertEqual(plan['carga']['ESTRUCTURA']['dias_ocupados'], 2)
+        self.assertEqual(plan['carga']['PINTURA']['dias_ocupados'], 0)
+        self.assertIsNone(plan['carga']['PINTURA']['hasta'])
+
+    def test_urgentes_primero_y_capacidad_compartida(self):
+        normal = orden_con_carpa('3x3', prioridad=1)
+        urgente = orden_con_carpa('10x20', es_urgente=True, prioridad=5)
+
+        plan = planificacion.planificar([normal, urgente], inicio=VIERNES)
+
+        self.assertEqual([fila['orden'] for fila in plan['ordenes']], [urgente, normal])
+        # La urgente llena viernes y lunes; la normal empieza el martes
+        self.assertEqual(plan['ordenes'][1]['fases']['ESTRUCTURA'], (date(2024, 3, 5), date(2024, 3, 5)))
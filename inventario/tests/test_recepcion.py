@@ -0,0 +1,87 @@
+import io
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from inventario import recepcion
+from inventario.models import HistorialInventario, InventarioAccesorio, TipoAccesorio
+
+from .fabricas import crear_ubicacion
+
+
+def archivo_csv(*lineas):
+    return SimpleUploadedFile('recepcion.csv', '\n'.join(lineas).encode('utf-8-sig'))
+
+
+def archivo_xlsx(*filas):
+    libro = openpyxl.Workbook()
+    for fila in filas:
+        libro.active.append(fila)
+    contenido = io.BytesIO()
+    libro.save(contenido)
+    return SimpleUploadedFile('recepcion.xlsx', contenido.getvalue())
+
+
+class RecepcionAccesoriosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        crear_ubicacion('A-01')
+        TipoAccesorio.objects.create(codigo='TEN', nombre='Tensores')
+
+    def test_reporta_los_errores_por_fila(self):
+        lotes, errores = recepcion.validar_archivo(archivo_csv(
+            'Tipo Accesorio;Nombre;Cantidad;Costo Unitario;Ubicación',
+            'TEN;Tensor;10;1500;A-01',
+            'XXX;Tensor;10;1500;A-01',
+            'TEN;Tensor;1,5;1500;A-01',
+            'TEN;;3;1500;A-01',
+            'TEN;Tensor;3;1500;Z-99',
+        ), 'ACCESORIO')
+
+        self.assertEqual([numero for numero, *_ in lotes], [2])
+        self.assertEqual([numero for numero, _ in errores], [3, 4, 5, 6])
+        self.assertIn('tipo_accesorio', errores[0][1])
+
+    def test_archivo_sin_filas_o_formato_no_soportado(self):
+        _, errores = recepcion.validar_archivo(archivo_csv('tipo_accesorio;nombre'), 'ACCESORIO')
+        self.assertEqual(errores, [(0, 'El archivo no tiene filas para importar')])
+
+        _, errores = recepcion.validar_archivo(SimpleUploadedFile('datos.txt', b'x'), 'ACCESORIO')
+        self.assertEqual(errores, [(0, 'Formato no soportado, use .xlsx o .csv')])
+
+    def test_registrar_crea_lotes_codigos_y_entradas(self):
+        lotes, errores = recepcion.validar_archivo(archivo_xlsx(
+            ['tipo_accesorio', 'nombre', 'cantidad', 'costo_unitario', 'ubicacion'],
+            ['TEN', 'Tensor', 10, 1500, 'A-01'],
+            ['Tensores', 'Argolla', 4, '200', 'a-01'],
+        ), 'ACCESORIO')
+        self.assertEqual(errores, [])
+
+        creados = recepcion.registrar_recepcion('ACCESORIO', lotes, documento='FAC-1')
+
+        self.assertEqual(len(creados), 2)
+        self.assertEqual(
+            sorted(InventarioAccesorio.objects.values_list('codigo', 'nombre', 'cantidad_disponible')),
+            [('ACC-0001', 'Tensor', 10), ('ACC-0002', 'Argolla', 4)],
+        )
+        entradas = HistorialInventario.objects.filter(tipo_movimiento='ENTRADA', documento_referencia='FAC-1')
+        self.assertEqual(sorted(entradas.values_list('cantidad_movimiento', flat=True)), [Decimal('4'), Decimal('10')])
+
+    def test_cierra_el_libro_aunque_se_corte_la_lectura(self):
+        archivo = archivo_xlsx(
+            ['tipo_accesorio', 'nombre', 'cantidad', 'costo_unitario', 'ubicacion'],
+            ['TEN', 'Tensor', 10, 1500, 'A-01'],
+            ['TEN', 'Argolla', 4, 200, 'A-01'],
+        )
+        cerrar = mock.patch.object(openpyxl.Workbook, 'close', autospec=True)
+
+        with cerrar as close, mock.patch.object(recepcion, 'MAXIMO_FILAS', 1):
+            _, errores = recepcion.validar_archivo(archivo, 'ACCESORIO')
+
+        self.assertEqual(errores, [(3, 'El archivo supera el máximo de 1 filas')])
+        close.assert_called_once()
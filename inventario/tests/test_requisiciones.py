@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from inventario import requisiciones
+
+
+def faltante(clave, cantidad):
+    return {'clave': clave, 'faltante': Decimal(cantidad), 'tipo_inventario': 'ACCESORIO', 'descripcion': clave}
+
+
+def oferta(pk, proveedor, precio, minimo_pedido=0, factor=1, cantidad_minima=1, entrega=5, stock=None):
+    return {
+        'id_producto_servicio': pk,
+        'id_proveedor_id': proveedor,
+        'id_proveedor__razon_social': f'Proveedor {proveedor}',
+        'id_proveedor__monto_minimo_pedido': Decimal(minimo_pedido),
+        'id_proveedor__calificacion': Decimal('4'),
+        'precio_cop': Decimal(precio),
+        'factor': Decimal(factor),
+        'cantidad_minima': cantidad_minima,
+        'tiempo_entrega_dias': entrega,
+        'stock_disponible': stock,
+    }
+
+
+class CotizarTests(SimpleTestCase):
+
+    def test_redondea_a_unidades_del_producto_y_respeta_la_cantidad_minima(self):
+        linea = requisiciones.cotizar(faltante('LONA', '45'), oferta(1, 'A', '1000', factor=20))
+        self.assertEqual(linea['cantidad_pedida'], 3)
+        self.assertEqual(linea['subtotal_cop'], Decimal('3000.00'))
+
+        linea = requisiciones.cotizar(faltante('LONA', '45'), oferta(1, 'A', '1000', factor=20, cantidad_minima=5))
+        self.assertEqual(linea['cantidad_pedida'], 5)
+
+    def test_descarta_ofertas_sin_stock_suficiente(self):
+        self.assertIsNone(requisiciones.cotizar(faltante('TENSOR', '10'), oferta(1, 'A', '100', stock=4)))
+
+
+class AsignarTests(SimpleTestCase):
+
+    def candidatas(self, faltantes, ofertas):
+        return requisiciones._candidatas(faltantes, ofertas)
+
+    def test_gana_la_oferta_mas_barata(self):
+        candidatas = self.candidatas(
+            [faltante('TENSOR', '10')],
+            {'TENSOR': [oferta(1, 'A', '1500'), oferta(2, 'B', '1000')]},
+        )
+        asignadas, totales, _ = requisiciones._asignar(candidatas)
+
+        self.assertEqual(asignadas['TENSOR']['proveedor_id'], 'B')
+        self.assertEqual(totales, {'B': Decimal('10000.00')})
+
+    def test_reasigna_las_lineas_de_quien_no_alcanza_el_minimo(self):
+        candidatas = self.candidatas(
+            [faltante('TENSOR', '10'), faltante('LONA', '20')],
+            {
+                'TENSOR': [oferta(1, 'Beta', '1000', minimo_pedido=1000000), oferta(2, 'Alfa', '1500')],
+                'LONA': [oferta(3, 'Alfa', '5000')],
+            },
+        )
+        asignadas, totales, minimos = requisiciones._asignar(candidatas)
+
+        self.assertEqual(asignadas['TENSOR']['proveedor_id'], 'Alfa')
+        self.assertEqual(asignadas['LONA']['proveedor_id'], 'Alfa')
+        self.assertEqual(totales, {'Alfa': Decimal('115000.00')})
+        self.assertEqual(minimos['Beta'], Decimal('1000000'))
+
+    def test_sin_alternativa_la_linea_queda_en_el_proveedor_que_no_cumple(self):
+        candidatas = self.candidatas(
+            [faltante('TENSOR', '10')],
+            {'TENSOR': [oferta(1, 'Beta', '1000', minimo_pedido=1000000)]},
+        )
+        asignadas, totales, minimos = requisiciones._asignar(candidatas)
+
+        self.assertEqual(asignadas['TENSOR']['proveedor_id'], 'Beta')
+        self.assertLess(totales['Beta'], minimos['Beta'])
+
+    def test_no_reasigna_a_otro_proveedor_que_tampoco_cumple(self):
+        candidatas = self.candidatas(
+            [faltante('TENSOR', '10')],
+            {'TENSOR': [
+                oferta(1, 'Beta', '1000', minimo_pedido=1000000),
+                oferta(2, 'Gamma', '1200', minimo_pedido=500000),
+                oferta(3, 'Alfa', '1500'),
+            ]},
+        )
+        asignadas, _, _ = requisiciones._asignar(candidatas)
+
+        self.assertEqual(asignadas['TENSOR']['proveedor_id'], 'Alfa')
@@ -0,0 +1,119 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from inventario import reservas
+from inventario.models import OrdenProduccion, ReservaInventario
+
+from .fabricas import crear_accesorio, crear_orden, pedir_accesorio
+
+
+class ReservarOrdenTests(TestCase):
+
+    def setUp(self):
+        self.orden = crear_orden()
+        self.tensor = crear_accesorio('Tensor', cantidad=10)
+        self.argolla = crear_accesorio('Argolla', cantidad=3)
+
+    def test_sin_existencia_suficiente_no_reserva_nada(self):
+        pedir_accesorio(self.orden, self.tensor, 4)
+        pedir_accesorio(self.orden, self.argolla, 5)
+
+        with self.assertRaises(ValidationError) as error:
+            reservas.reservar_orden(self.orden)
+
+        self.assertEqual(len(error.exception.messages), 1)
+        self.assertIn(self.argolla.codigo, error.exception.messages[0])
+        self.assertFalse(ReservaInventario.objects.exists())
+        for item in (self.tensor, self.argolla):
+            item.refresh_from_db()
+            self.assertEqual(item.cantidad_reservada, 0)
+
+    def test_reporta_todos_los_faltantes(self):
+        pedir_accesorio(self.orden, self.tensor, 11)
+        pedir_accesorio(self.orden, self.argolla, 5)
+
+        with self.assertRaises(ValidationError) as error:
+            reservas.reservar_orden(self.orden)
+
+        self.assertEqual(len(error.exception.messages), 2)
+
+    def test_descuenta_lo_reservado_por_otras_ordenes(self):
+        otra = crear_orden()
+        pedir_accesorio(otra, self.tensor, 8)
+        reservas.reservar_orden(otra)
+        pedir_accesorio(self.orden, self.tensor, 4)
+
+        with self.assertRaises(ValidationError):
+            reservas.reservar_orden(self.orden)
+
+    def test_reserva_lo_pendiente(self):
+        pedir_accesorio(self.orden, self.tensor, 4)
+
+        creadas = reservas.reservar_orden(self.orden)
+
+        self.assertEqual(len(creadas), 1)
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.tensor.cantidad_reservada, 4)
+        self.assertEqual(self.tensor.cantidad_disponible, 10)
+        self.assertEqual(reservas.reservar_orden(self.orden), [])
+
+    def test_una_segunda_llamada_reserva_solo_lo_nuevo(self):
+        linea = pedir_accesorio(self.orden, self.tensor, 4)
+        reservas.reservar_orden(self.orden)
+        linea.cantidad_requerida = 6
+        linea.save()
+
+        reservadas = reservas.reservar_orden(self.orden)
+
+        self.assertEqual([r.cantidad_reservada for r in reservadas], [6])
+        self.assertEqual(ReservaInventario.objects.filter(orden=self.orden).count(), 1)
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.tensor.cantidad_reservada, 6)
+
+    def test_valida_el_estado_guardado_de_la_orden(self):
+        pedir_accesorio(self.orden, self.tensor, 4)
+        OrdenProduccion.objects.filter(pk=self.orden.pk).update(estado='CANCELADA')
+
+        with self.assertRaises(ValidationError):
+            reservas.reservar_orden(self.orden)
+        self.assertFalse(ReservaInventario.objects.exists())
+
+
+class CierreReservasTests(TestCase):
+
+    def setUp(self):
+        self.orden = crear_orden()
+        self.tensor = crear_accesorio('Tensor', cantidad=10)
+        pedir_accesorio(self.orden, self.tensor, 4)
+        reservas.reservar_orden(self.orden)
+
+    def test_cancelar_la_orden_libera_las_reservas(self):
+        self.orden.estado = 'CANCELADA'
+        self.orden.save()
+
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.tensor.cantidad_reservada, 0)
+        self.assertEqual(self.tensor.cantidad_disponible, 10)
+        self.assertEqual(self.orden.reservas.get().estado, 'LIBERADA')
+
+    def test_completar_la_orden_consume_lo_pendiente(self):
+        self.orden.estado = 'COMPLETADA'
+        self.orden.save()
+
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.tensor.cantidad_reservada, 0)
+        self.assertEqual(self.tensor.cantidad_disponible, 6)
+        self.assertEqual(self.orden.reservas.get().estado, 'CONSUMIDA')
+        self.assertEqual(self.orden.detalle_accesorios.get().estado, 'ENTREGADO')
+
+    def test_consumo_parcial(self):
+        reserva = self.orden.reservas.get()
+
+        reservas.consumir(reserva, cantidad=1)
+
+        reserva.refresh_from_db()
+        self.tensor.refresh_from_db()
+        self.assertEqual(reserva.estado, 'ACTIVA')
+        self.assertEqual(reserva.cantidad_pendiente, 3)
+        self.assertEqual(self.tensor.cantidad_disponible, 9)
+        self.assertEqual(self.tensor.cantidad_reservada, 3)
@@ -0,0 +1,62 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from american_carpas_project.tests import como_mysql, upserts
+from inventario import resumen_ordenes
+from inventario.models import OrdenProduccionLona, ResumenOrdenProduccion
+
+from .fabricas import crear_accesorio, crear_lona, crear_orden, pedir_accesorio
+
+
+class ResumenOrdenesTests(TestCase):
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.orden = crear_orden()
+        self.tensor = crear_accesorio('Tensor', cantidad=10)
+        self.lona = crear_lona(20)
+
+    def resumen(self):
+        return ResumenOrdenProduccion.objects.get(orden=self.orden)
+
+    def test_los_signals_mantienen_el_resumen(self):
+        self.assertEqual(self.resumen().estado_materiales, 'SIN_MATERIAL')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            linea = pedir_accesorio(self.orden, self.tensor, 4)
+            OrdenProduccionLona.objects.create(
+                orden=self.orden, lona=self.lona, metros_requeridos=Decimal('6.5'),
+            )
+        resumen = self.resumen()
+        self.assertEqual((resumen.accesorios_requeridos, resumen.metros_lona_requeridos), (4, Decimal('6.5')))
+        self.assertEqual((resumen.lineas_material, resumen.lineas_pendientes), (2, 2))
+        self.assertEqual(resumen.estado_materiales, 'PENDIENTE')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            linea.estado = 'ENTREGADO'
+            linea.cantidad_entregada = 4
+            linea.save()
+        self.assertEqual(self.resumen().estado_materiales, 'PARCIAL')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrdenProduccionLona.objects.filter(orden=self.orden).delete()
+        resumen = self.resumen()
+        self.assertEqual((resumen.lineas_material, resumen.estado_materiales), (1, 'COMPLETO'))
+
+    def test_actualizar_recalcula_lo_cargado_sin_signals(self):
+        pedir_accesorio(self.orden, self.tensor, 4)
+        ResumenOrdenProduccion.objects.all().delete()
+
+        resumen_ordenes.actualizar_resumenes()
+        resumen_ordenes.actualizar_resumenes([self.orden.pk])
+
+        self.assertEqual(ResumenOrdenProduccion.objects.count(), 1)
+        self.assertEqual(self.resumen().accesorios_requeridos, 4)
+
+    def test_en_mysql_el_upsert_no_indica_unique_fields(self):
+        with como_mysql() as llamadas:
+            resumen_ordenes.actualizar_resumenes([self.orden.pk])
+
+        self.assertEqual(len(upserts(llamadas)), 1)
+        self.assertNotIn('unique_fields', upserts(llamadas)[0])
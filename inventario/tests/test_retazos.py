@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario import retazos
+from inventario.models import OrdenProduccionLona
+
+from .fabricas import crear_lona, crear_orden, especificacion_lona
+
+
+class AsignarCortesTests(TestCase):
+
+    def setUp(self):
+        self.especificacion = especificacion_lona()
+        self.retazo_5 = crear_lona(5)
+        self.retazo_8 = crear_lona(8)
+        self.retazo_12 = crear_lona(12)
+        self.rollo = crear_lona(50)
+        crear_lona(6, color='Azul')
+
+    def asignar(self, largos):
+        return retazos.asignar_cortes(*self.especificacion, largos)
+
+    def test_solo_los_rollos_usados_y_cortos_son_retazos(self):
+        self.assertTrue(self.retazo_5.es_retazo)
+        self.assertFalse(self.rollo.es_retazo)
+        self.assertEqual(
+            retazos.bolsa_retazos(*self.especificacion),
+            [(Decimal('5'), self.retazo_5.pk), (Decimal('8'), self.retazo_8.pk), (Decimal('12'), self.retazo_12.pk)],
+        )
+
+    def test_cada_corte_va_al_retazo_mas_corto_que_alcanza(self):
+        asignaciones = self.asignar([4, 7, 11])
+
+        self.assertEqual(
+            [a['lona_id'] for a in asignaciones],
+            [self.retazo_5.pk, self.retazo_8.pk, self.retazo_12.pk],
+        )
+        self.assertEqual([a['sobrante'] for a in asignaciones], [1, 1, 1])
+
+    def test_lo_que_no_cabe_sale_de_un_rollo_completo(self):
+        asignacion, = self.asignar([30])
+
+        self.assertIsNone(asignacion['lona_id'])
+        self.assertIsNone(asignacion['sobrante'])
+
+    def test_el_sobrante_vuelve_a_la_bolsa(self):
+        asignaciones = self.asignar([2, 2, 2])
+
+        # 2 -> retazo de 5 (quedan 3), 2 -> ese mismo (queda 1), 2 -> retazo de 8
+        self.assertEqual(
+            [a['lona_id'] for a in asignaciones],
+            [self.retazo_5.pk, self.retazo_5.pk, self.retazo_8.pk],
+        )
+
+    def test_los_metros_reservados_no_se_ofrecen(self):
+        reservado = crear_lona(9, reservados=7)
+
+        asignaciones = self.asignar([4, 2])
+
+        self.assertEqual(asignaciones[0]['lona_id'], self.retazo_5.pk)
+        self.assertEqual(asignaciones[1]['lona_id'], reservado.pk)
+
+
+class MejorRetazoTests(TestCase):
+
+    def setUp(self):
+        self.especificacion = especificacion_lona()
+        self.retazo_5 = crear_lona(5)
+        self.retazo_8 = crear_lona(8)
+        crear_lona(50)
+
+    def test_elige_el_retazo_mas_corto_que_alcanza(self):
+        with self.assertNumQueries(1):
+            lona = retazos.mejor_retazo(*self.especificacion, 6)
+            self.assertEqual(lona.ubicacion.codigo, 'A-01')
+        self.assertEqual(lona.pk, self.retazo_8.pk)
+        self.assertEqual(retazos.mejor_retazo(*self.especificacion, 5).pk, self.retazo_5.pk)
+        self.assertIsNone(retazos.mejor_retazo(*self.especificacion, 9))
+
+
+class AsignarLonaVistaTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('bodega'))
+        self.orden = crear_orden()
+        self.retazo = crear_lona(8)
+        self.azul = crear_lona(8, color='Azul')
+
+    def asignar(self, lona):
+        tipo, ancho, color = especificacion_lona()
+        return self.client.post(reverse('inventario:orden_asignar_lona', args=[self.orden.pk]), {
+            'tipo_lona': tipo.pk, 'ancho_lona': ancho.pk, 'color_lona': color.pk, 'metros': '3', 'lona': lona.pk,
+        })
+
+    def test_asigna_un_rollo_de_la_especificacion(self):
+        respuesta = self.asignar(self.retazo)
+
+        self.assertRedirects(respuesta, reverse('inventario:orden_detail', args=[self.orden.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(OrdenProduccionLona.objects.get(orden=self.orden).lona, self.retazo)
+
+    def test_rechaza_un_rollo_de_otra_especificacion(self):
+        respuesta = self.asignar(self.azul)
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(OrdenProduccionLona.objects.exists())
+        self.azul.refresh_from_db()
+        self.assertEqual(self.azul.metros_reservados, 0)
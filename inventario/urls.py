@@ -117,6 +117,31 @@ urlpatterns = [
     path('accesorios/<int:pk>/editar/', views.InventarioAccesorioUpdateView.as_view(), name='accesorio_update'),
     path('accesorios/<int:pk>/eliminar/', views.InventarioAccesorioDeleteView.as_view(), name='accesorio_delete'),
 
+    # =========================================================================
+    # RECEPCIÓN MASIVA
+    # =========================================================================
+    path('recepcion/', views.recepcion_masiva, name='recepcion_masiva'),
+    path('recepcion/plantilla/<str:tipo>/', views.recepcion_plantilla, name='recepcion_plantilla'),
+
+    # =========================================================================
+    # ETIQUETAS Y ESCANEO
+    # =========================================================================
+    path('etiquetas/<str:tipo>/', views.etiquetas_pdf, name='etiquetas'),
+    path('escanear/', views.escanear, name='escanear'),
+
+    # =========================================================================
+    # OCUPACIÓN DEL ALMACÉN
+    # =========================================================================
+    path('almacen/mapa/', views.mapa_almacen, name='mapa_almacen'),
+
+    # =========================================================================
+    # CONTEO FÍSICO
+    # =========================================================================
+    path('conteos/', views.conteo_list, name='conteo_list'),
+    path('conteos/<int:pk>/', views.conteo_detail, name='conteo_detail'),
+    path('conteos/<int:pk>/conciliar/', views.conteo_conciliar, name='conteo_conciliar'),
+    path('conteos/<int:pk>/cancelar/', views.conteo_cancelar, name='conteo_cancelar'),
+
     # =========================================================================
     # ÓRDENES DE PRODUCCIÓN
     # =========================================================================
@@ -128,4 +153,33 @@ urlpatterns = [
     
     # Agregar ítems a orden
     path('ordenes/<int:orden_pk>/items/nuevo/', views.OrdenItemCreateView.as_view(), name='orden_item_create'),
-]
\ No newline at end of file
+
+    # Reservas de material
+    path('ordenes/<int:pk>/reservar/', views.orden_reservar, name='orden_reservar'),
+    path('ordenes/<int:pk>/liberar/', views.orden_liberar, name='orden_liberar'),
+    path('ordenes/<int:pk>/consumir/', views.orden_consumir, name='orden_consumir'),
+
+    # Asignación de lona (retazos primero)
+    path('ordenes/<int:pk>/asignar-lona/', views.orden_asignar_lona, name='orden_asignar_lona'),
+
+    # Planificación de producción
+    path('ordenes/planificacion/', views.planificacion_produccion, name='planificacion'),
+
+    # =========================================================================
+    # REPORTES
+    # =========================================================================
+    path('reportes/valorizacion/', views.valorizacion_inventario, name='valorizacion'),
+    path('reportes/valorizacion/excel/', views.valorizacion_exportar_excel, name='valorizacion_excel'),
+    path('reportes/stock-minimo/', views.stock_minimo_list, name='stock_minimo'),
+    path('reportes/kardex/', views.kardex_list, name='kardex'),
+    path('reportes/kardex/exportar/', views.kardex_exportar, name='kardex_exportar'),
+    path('reportes/consumo/', views.consumo_materiales, name='consumo_materiales'),
+
+    # API
+    path('api/saldos/', views.saldos_api, name='saldos_api'),
+    path('api/escanear/', views.escanear_api, name='escanear_api'),
+    path('api/ocupacion/', views.ocupacion_api, name='ocupacion_api'),
+    path('api/ubicaciones-libres/', views.ubicaciones_libres_api, name='ubicaciones_libres_api'),
+    path('api/consumo/', views.consumo_api, name='consumo_api'),
+    path('api/retazos/buscar/', views.retazos_api, name='retazos_api'),
+]
@@ -0,0 +1,189 @@
+"""
+Valorización del inventario calculada en la base de datos
+American Carpas 1 SAS
+
+El valor de cada ítem se calcula con expresiones SQL equivalentes a la
+propiedad valor_inventario de cada modelo, y se agrupa con una sola
+consulta UNION ALL sobre las tres tablas de inventario. Python solo
+consolida los grupos (pocas filas), nunca recorre los lotes.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, Sum, Value, When,
+)
+
+from .cache_inventario import obtener
+from .models import InventarioLona, InventarioEstructura, InventarioAccesorio
+
+
+CAMPO_VALOR = DecimalField(max_digits=18, decimal_places=2)
+
+# Dimensiones disponibles para agrupar el reporte
+DIMENSIONES = OrderedDict([
+    ('categoria', 'Categoría'),
+    ('tipo', 'Tipo'),
+    ('color', 'Color'),
+    ('ubicacion', 'Ubicación'),
+    ('estado', 'Estado'),
+])
+
+CATEGORIAS = OrderedDict([
+    ('LONA', 'Lonas'),
+    ('ESTRUCTURA', 'Estructura'),
+    ('ACCESORIO', 'Accesorios'),
+])
+
+
+# =============================================================================
+# EXPRESIONES DE VALOR
+# =============================================================================
+
+def valor_lona():
+    """Equivalente SQL de InventarioLona.valor_inventario"""
+    return ExpressionWrapper(F('metros_disponibles') * F('costo_por_metro'), output_field=CAMPO_VALOR)
+
+
+def valor_estructura():
+    """Equivalente SQL de InventarioEstructura.valor_inventario (METROS/PIEZAS)"""
+    return Case(
+        When(tipo_control='METROS', then=F('metros_disponibles') * F('costo_por_metro')),
+        default=F('piezas_disponibles') * F('costo_por_pieza'),
+        output_field=CAMPO_VALOR,
+    )
+
+
+def valor_accesorio():
+    """Equivalente SQL de InventarioAccesorio.valor_inventario"""
+    return ExpressionWrapper(F('cantidad_disponible') * F('costo_unitario'), output_field=CAMPO_VALOR)
+
+
+def consultas_con_valor(solo_activos=True):
+    """
+    Querysets de las tres tablas anotados con columnas homogéneas
+    (categoria, codigo, tipo, color, ubicacion, estado, valor) para poder
+    unirlos o recorrerlos con el mismo código.
+    """
+    texto = CharField()
+    lonas = InventarioLona.objects.annotate(
+        categoria=Value('LONA', output_field=texto),
+        codigo_item=F('codigo_rollo'),
+        tipo=F('tipo_lona__nombre'),
+        color=F('color_lona__nombre'),
+        ubicacion_codigo=F('ubicacion__codigo'),
+        estado_item=F('estado'),
+        valor=valor_lona(),
+    )
+    estructuras = InventarioEstructura.objects.annotate(
+        categoria=Value('ESTRUCTURA', output_field=texto),
+        codigo_item=F('codigo_lote'),
+        tipo=F('tipo_estructura__nombre'),
+        color=F('acabado__nombre'),
+        ubicacion_codigo=F('ubicacion__codigo'),
+        estado_item=F('estado'),
+        valor=valor_estructura(),
+    )
+    accesorios = InventarioAccesorio.objects.annotate(
+        categoria=Value('ACCESORIO', output_field=texto),
+        codigo_item=F('codigo'),
+        tipo=F('tipo_accesorio__nombre'),
+        color=Value(None, output_field=texto),
+        ubicacion_codigo=F('ubicacion__codigo'),
+        estado_item=F('estado'),
+        valor=valor_accesorio(),
+    )
+    consultas = [lonas, estructuras, accesorios]
+    if solo_activos:
+        consultas = [qs.filter(activo=True) for qs in consultas]
+    return consultas
+
+
+# =============================================================================
+# REPORTE AGRUPADO
+# =============================================================================
+
+def grupos_valorizacion(solo_activos=True):
+    """
+    Una sola consulta UNION ALL con el valor y cantidad de lotes agrupados por
+    categoría, tipo, color, ubicación y estado.
+    """
+    grupos = ['categoria', 'tipo', 'color', 'ubicacion_codigo', 'estado_item']
+    lonas, estructuras, accesorios = [
+        qs.values(*grupos).annotate(lotes=Count('pk'), valor_total=Sum('valor')).order_by()
+        for qs in consultas_con_valor(solo_activos)
+    ]
+    return [
+        {
+            'categoria': fila['categoria'],
+            'tipo': fila['tipo'] or 'Sin tipo',
+            'color': fila['color'] or '-',
+            'ubicacion': fila['ubicacion_codigo'] or 'Sin ubicación',
+            'estado': fila['estado_item'],
+            'lotes': fila['lotes'],
+            'valor': fila['valor_total'] or Decimal('0'),
+        }
+        for fila in lonas.union(estructuras, accesorios, all=True)
+    ]
+
+
+def _consolidar(grupos, dimension):
+    """Suma lotes y valor de los grupos por una dimensión, de mayor a menor valor"""
+    totales = {}
+    for fila in grupos:
+        clave = fila['categoria'] if dimension == 'categoria' else (fila['categoria'], fila[dimension])
+        acumulado = totales.setdefault(clave, {'lotes': 0, 'valor': Decimal('0')})
+        acumulado['lotes'] += fila['lotes']
+        acumulado['valor'] += fila['valor']
+
+    filas = []
+    for clave, acumulado in totales.items():
+        if dimension == 'categoria':
+            fila = {'categoria': clave, 'nombre': CATEGORIAS.get(clave, clave)}
+        else:
+            fila = {'categoria': clave[0], 'nombre': clave[1]}
+        fila.update(acumulado)
+        filas.append(fila)
+    return sorted(filas, key=lambda f: f['valor'], reverse=True)
+
+
+def calcular_valorizacion(solo_activos=True):
+    """Reporte completo de valorización (sin caché)"""
+    grupos = grupos_valorizacion(solo_activos)
+    total = sum((g['valor'] for g in grupos), Decimal('0'))
+    return {
+        'valor_total': total,
+        'lotes_total': sum(g['lotes'] for g in grupos),
+        'por_dimension': OrderedDict(
+            (dimension, _consolidar(grupos, dimension)) for dimension in DIMENSIONES
+        ),
+        'grupos': grupos,
+    }
+
+
+def reporte_valorizacion(solo_activos=True):
+    """Reporte de valorización desde caché; se invalida con cada movimiento de stock"""
+    return obtener(
+        f'valorizacion:{int(solo_activos)}',
+        lambda: calcular_valorizacion(solo_activos),
+    )
+
+
+def valor_total_inventario(solo_activos=True):
+    """Valor total del inventario"""
+    return reporte_valorizacion(solo_activos)['valor_total']
+
+
+# =============================================================================
+# DETALLE POR LOTE (PARA EXPORTAR)
+# =============================================================================
+
+def detalle_valorizacion(solo_activos=True, tamano_lote=2000):
+    """
+    Recorre lote por lote las tres tablas con el valor calculado en SQL,
+    usando iterator() para no cargar todo en memoria.
+    """
+    campos = ['categoria', 'codigo_item', 'tipo', 'color', 'ubicacion_codigo', 'estado_item', 'valor']
+    for qs in consultas_con_valor(solo_activos):
+        yield from qs.order_by('pk').values_list(*campos).iterator(chunk_size=tamano_lote)
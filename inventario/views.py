@@ -5,13 +5,28 @@ American Carpas 1 SAS
 Versión: 2.0 - Fase 2: Catálogos Básicos
 """
 
-from django.shortcuts import render, get_object_or_404
-from django.urls import reverse_lazy
+import tempfile
+from datetime import date
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from django.core.exceptions import ValidationError
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib import messages
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q
+
+from american_carpas_project.estadisticas import contar_en_cache
 
 from .models import (
     UbicacionAlmacen,
@@ -20,6 +35,12 @@ from .models import (
     TipoAccesorio,
     InventarioLona, InventarioEstructura, InventarioAccesorio,
     OrdenProduccion, OrdenProduccionItem,
+    OrdenProduccionLona, OrdenProduccionEstructura, OrdenProduccionAccesorio, ResumenOrdenProduccion,
+    HistorialInventario, EstacionTrabajo, ConteoFisico, ReservaInventario,
+)
+from . import (
+    reservas, valorizacion, stock_minimo, saldos, kardex, planificacion,
+    recepcion, etiquetas, conteos, ocupacion, costeo, consumo, retazos,
 )
 from .forms import (
     UbicacionAlmacenForm,
@@ -28,6 +49,8 @@ from .forms import (
     TipoAccesorioForm,
     InventarioLonaForm, InventarioEstructuraForm, InventarioAccesorioForm,
     OrdenProduccionForm, OrdenProduccionItemForm,
+    RecepcionMasivaForm, ConteoFisicoForm, LecturasConteoForm, ConciliarConteoForm,
+    AsignarLonaForm,
 )
 
 
@@ -55,6 +78,7 @@ def home_inventario(request):
     context = {
         'titulo': 'Módulo de Inventario de Carpas',
         'mensaje': 'Módulo en desarrollo - Fase de migración completada',
+        'stock_minimo': stock_minimo.conteo_en_minimo(),
         'show_module_nav': True,
         'active_module': 'inventarios',
     }
@@ -779,6 +803,16 @@ class TipoAccesorioDeleteView(LoginRequiredMixin, InventarioContextMixin, Delete
 # INVENTARIO DE LONAS
 # =============================================================================
 
+class EntradaInicialMixin:
+    """Registra el movimiento de ENTRADA del lote creado desde el formulario"""
+
+    def form_valid(self, form):
+        with transaction.atomic():
+            respuesta = super().form_valid(form)
+            recepcion.registrar_entrada(self.object, self.request.user)
+        return respuesta
+
+
 class InventarioLonaListView(LoginRequiredMixin, InventarioContextMixin, ListView):
     model = InventarioLona
     template_name = 'inventario/lona_list.html'
@@ -801,7 +835,7 @@ class InventarioLonaDetailView(LoginRequiredMixin, InventarioContextMixin, Detai
     context_object_name = 'lona'
 
 
-class InventarioLonaCreateView(LoginRequiredMixin, InventarioContextMixin, CreateView):
+class InventarioLonaCreateView(LoginRequiredMixin, InventarioContextMixin, EntradaInicialMixin, CreateView):
     model = InventarioLona
     form_class = InventarioLonaForm
     template_name = 'inventario/lona_form.html'
@@ -855,7 +889,7 @@ class InventarioEstructuraDetailView(LoginRequiredMixin, InventarioContextMixin,
     context_object_name = 'estructura'
 
 
-class InventarioEstructuraCreateView(LoginRequiredMixin, InventarioContextMixin, CreateView):
+class InventarioEstructuraCreateView(LoginRequiredMixin, InventarioContextMixin, EntradaInicialMixin, CreateView):
     model = InventarioEstructura
     form_class = InventarioEstructuraForm
     template_name = 'inventario/estructura_form.html'
@@ -909,7 +943,7 @@ class InventarioAccesorioDetailView(LoginRequiredMixin, InventarioContextMixin,
     context_object_name = 'accesorio'
 
 
-class InventarioAccesorioCreateView(LoginRequiredMixin, InventarioContextMixin, CreateView):
+class InventarioAccesorioCreateView(LoginRequiredMixin, InventarioContextMixin, EntradaInicialMixin, CreateView):
     model = InventarioAccesorio
     form_class = InventarioAccesorioForm
     template_name = 'inventario/accesorio_form.html'
@@ -937,6 +971,316 @@ class InventarioAccesorioDeleteView(LoginRequiredMixin, InventarioContextMixin,
     success_url = reverse_lazy('inventario:accesorio_list')
 
 
+# =============================================================================
+# RECEPCIÓN MASIVA
+# =============================================================================
+
+@login_required
+def recepcion_masiva(request):
+    """Ingreso de muchos lotes desde la planilla de entrega del proveedor"""
+    creados, errores = [], []
+    if request.method == 'POST':
+        form = RecepcionMasivaForm(request.POST, request.FILES)
+        if form.is_valid():
+            tipo = form.cleaned_data['tipo_inventario']
+            creados, errores = recepcion.recibir_archivo(
+                form.cleaned_data['archivo'], tipo, request.user, form.cleaned_data['documento'] or None,
+            )
+            if errores:
+                messages.error(request, f'La planilla tiene {len(errores)} errores. No se registró ningún lote.')
+            else:
+                messages.success(request, f'Se registraron {len(creados)} lotes con su entrada de inventario.')
+                form = RecepcionMasivaForm(initial={'tipo_inventario': tipo})
+    else:
+        form = RecepcionMasivaForm()
+
+    context = {
+        'form': form,
+        'creados': [reservas.codigo_item(item) for item in creados],
+        'creados_ids': ','.join(str(item.pk) for item in creados),
+        'tipo_creados': form['tipo_inventario'].value(),
+        'errores': errores,
+        'columnas': recepcion.COLUMNAS_PLANTILLA,
+        'columnas_comunes': recepcion.COLUMNAS_COMUNES,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/recepcion_masiva.html', context)
+
+
+@login_required
+def recepcion_plantilla(request, tipo):
+    """Plantilla Excel vacía con los encabezados de la recepción masiva"""
+    if tipo not in recepcion.COLUMNAS_PLANTILLA:
+        return redirect('inventario:recepcion_masiva')
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = tipo.capitalize()
+    columnas = recepcion.COLUMNAS_PLANTILLA[tipo] + recepcion.COLUMNAS_COMUNES
+    ws.append(columnas)
+    for col, _ in enumerate(columnas, start=1):
+        celda = ws.cell(row=1, column=col)
+        celda.font = Font(bold=True, color="FFFFFF")
+        celda.fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
+        ws.column_dimensions[celda.column_letter].width = 18
+
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="plantilla_recepcion_{tipo.lower()}.xlsx"'
+    wb.save(response)
+    return response
+
+
+# =============================================================================
+# ETIQUETAS Y ESCANEO
+# =============================================================================
+
+@login_required
+def etiquetas_pdf(request, tipo):
+    """Hoja de etiquetas (Code128 + QR) para los ítems ?ids=1,2,3"""
+    if tipo not in reservas.MODELOS_INVENTARIO:
+        return redirect('inventario:home')
+    ids = [int(v) for v in request.GET.get('ids', '').split(',') if v.strip().isdigit()]
+    copias = request.GET.get('copias', '1')
+    copias = min(int(copias), 50) if copias.isdigit() and int(copias) > 0 else 1
+
+    items = etiquetas.items_para_etiquetas(tipo, ids)
+    if not items:
+        messages.warning(request, 'No se encontraron ítems para imprimir etiquetas.')
+        return redirect('inventario:home')
+
+    response = HttpResponse(etiquetas.generar_etiquetas_pdf(items, copias), content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="etiquetas_{tipo.lower()}.pdf"'
+    return response
+
+
+@login_required
+def escanear(request):
+    """Pantalla para lectores de código de barras / QR"""
+    context = {
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/escanear.html', context)
+
+
+@login_required
+def escanear_api(request):
+    """Ítem por código escaneado (?codigo=LON-0001) en formato JSON compacto"""
+    tipo, item = etiquetas.buscar_por_codigo(request.GET.get('codigo'))
+    if item is None:
+        return JsonResponse({'encontrado': False, 'codigo': request.GET.get('codigo', '')}, status=404)
+    return JsonResponse(etiquetas.tarjeta(tipo, item))
+
+
+@login_required
+def ocupacion_api(request):
+    """Árbol de ocupación del almacén (?bodega=) en JSON"""
+    return JsonResponse(ocupacion.arbol_ocupacion(request.GET.get('bodega') or None))
+
+
+@login_required
+def ubicaciones_libres_api(request):
+    """
+    Ubicaciones libres para guardar material.
+    GET ?tipo=LONA|ESTRUCTURA|ACCESORIO&bodega=&zona=&limite=10
+    """
+    tipo = request.GET.get('tipo') or None
+    if tipo and tipo not in reservas.MODELOS_INVENTARIO:
+        return JsonResponse({'error': f'Tipo de inventario inválido: {tipo}'}, status=400)
+    limite = request.GET.get('limite', '10')
+    limite = min(int(limite), 100) if limite.isdigit() and int(limite) > 0 else 10
+    libres = ocupacion.ubicaciones_libres(
+        tipo, bodega=request.GET.get('bodega') or None, zona=request.GET.get('zona') or None, limite=limite,
+    )
+    return JsonResponse({'total': len(libres), 'ubicaciones': libres})
+
+
+@login_required
+def retazos_api(request):
+    """
+    Mejor retazo para un corte (el que deja menor sobrante).
+    GET ?tipo_lona=&ancho=&color=&tratamiento=&largo=
+    """
+    form = AsignarLonaForm({
+        'tipo_lona': request.GET.get('tipo_lona'),
+        'ancho_lona': request.GET.get('ancho'),
+        'color_lona': request.GET.get('color'),
+        'tratamiento': request.GET.get('tratamiento'),
+        'metros': request.GET.get('largo'),
+    })
+    if not form.is_valid():
+        errores = {campo: [str(e) for e in lista] for campo, lista in form.errors.items()}
+        return JsonResponse({'error': 'Parámetros inválidos', 'campos': errores}, status=400)
+
+    datos = form.cleaned_data
+    lona = retazos.mejor_retazo(
+        datos['tipo_lona'], datos['ancho_lona'], datos['color_lona'], datos['metros'],
+        tratamiento=datos['tratamiento'],
+    )
+    if lona is None:
+        return JsonResponse({'encontrado': False, 'largo': float(datos['metros'])})
+    libre = lona.metros_reales_disponibles
+    return JsonResponse({
+        'encontrado': True,
+        'largo': float(datos['metros']),
+        'id': lona.pk,
+        'codigo': lona.codigo_rollo,
+        'libre': float(libre),
+        'sobrante': float(libre - datos['metros']),
+        'ubicacion': lona.ubicacion.codigo if lona.ubicacion_id else None,
+        'url': reverse('inventario:lona_detail', args=[lona.pk]),
+    })
+
+
+# =============================================================================
+# OCUPACIÓN DEL ALMACÉN
+# =============================================================================
+
+@login_required
+def mapa_almacen(request):
+    """Mapa de ocupación bodega -> zona -> estante -> nivel"""
+    bodega = request.GET.get('bodega') or None
+    arbol = ocupacion.arbol_ocupacion(bodega)
+    context = {
+        'arbol': arbol,
+        'bodega': bodega,
+        'bodegas': sorted({u['bodega'] for u in ocupacion.ocupacion_ubicaciones()}),
+        'tipos_inventario': RecepcionMasivaForm.TIPO_CHOICES,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/mapa_almacen.html', context)
+
+
+# =============================================================================
+# CONTEO FÍSICO
+# =============================================================================
+
+@login_required
+def conteo_list(request):
+    """Conteos físicos por ubicación y apertura de un conteo nuevo"""
+    if request.method == 'POST':
+        form = ConteoFisicoForm(request.POST)
+        if form.is_valid():
+            try:
+                conteo = conteos.iniciar_conteo(
+                    form.cleaned_data['ubicacion'],
+                    usuario=request.user,
+                    tipo_inventario=form.cleaned_data['tipo_inventario'] or None,
+                    observaciones=form.cleaned_data['observaciones'] or None,
+                )
+            except ValidationError as e:
+                for mensaje in e.messages:
+                    messages.error(request, mensaje)
+            else:
+                messages.success(request, f'Conteo {conteo.codigo} abierto')
+                return redirect('inventario:conteo_detail', pk=conteo.pk)
+    else:
+        form = ConteoFisicoForm()
+
+    lista = (
+        ConteoFisico.objects
+        .select_related('ubicacion', 'creado_por')
+        .annotate(
+            lineas=Count('detalles'),
+            contadas=Count('detalles', filter=Q(detalles__cantidad_contada__isnull=False)),
+        )
+    )
+    context = {
+        'form': form,
+        'conteos': lista[:50],
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/conteo_list.html', context)
+
+
+@login_required
+def conteo_detail(request, pk):
+    """Líneas del conteo y registro de lecturas del escáner en bloque"""
+    conteo = get_object_or_404(ConteoFisico.objects.select_related('ubicacion'), pk=pk)
+    no_encontrados = []
+    if request.method == 'POST':
+        form = LecturasConteoForm(request.POST)
+        if form.is_valid():
+            try:
+                lecturas = conteos.interpretar_lecturas(form.cleaned_data['lecturas'])
+                resultado = conteos.registrar_conteos(
+                    conteo, lecturas, usuario=request.user, acumular=form.cleaned_data['acumular'],
+                )
+            except ValidationError as e:
+                for mensaje in e.messages:
+                    messages.error(request, mensaje)
+            else:
+                messages.success(request, f'{resultado["actualizados"]} líneas contadas')
+                no_encontrados = resultado['no_encontrados']
+                if no_encontrados:
+                    messages.warning(
+                        request, f'{len(no_encontrados)} códigos no pertenecen a este conteo'
+                    )
+                form = LecturasConteoForm()
+    else:
+        form = LecturasConteoForm()
+
+    filtro = request.GET.get('filtro', '')
+    detalles = conteo.detalles.all()
+    if filtro == 'pendientes':
+        detalles = detalles.filter(cantidad_contada__isnull=True)
+    elif filtro == 'diferencias':
+        detalles = detalles.filter(cantidad_contada__isnull=False).exclude(
+            cantidad_contada=F('cantidad_esperada')
+        )
+    pagina = Paginator(detalles, 100).get_page(request.GET.get('page'))
+
+    context = {
+        'conteo': conteo,
+        'form': form,
+        'form_conciliar': ConciliarConteoForm(),
+        'resumen': conteos.resumen_conteo(conteo),
+        'page_obj': pagina,
+        'filtro': filtro,
+        'no_encontrados': no_encontrados,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/conteo_detail.html', context)
+
+
+@login_required
+@require_POST
+def conteo_conciliar(request, pk):
+    """Aplica las diferencias del conteo como ajustes de inventario"""
+    conteo = get_object_or_404(ConteoFisico, pk=pk)
+    form = ConciliarConteoForm(request.POST)
+    no_contados = form.cleaned_data['no_contados'] if form.is_valid() else 'IGNORAR'
+    try:
+        movimientos = conteos.conciliar(conteo, usuario=request.user, no_contados=no_contados)
+    except ValidationError as e:
+        for mensaje in e.messages:
+            messages.error(request, mensaje)
+    else:
+        messages.success(request, f'Conteo {conteo.codigo} conciliado con {len(movimientos)} ajustes')
+    return redirect('inventario:conteo_detail', pk=conteo.pk)
+
+
+@login_required
+@require_POST
+def conteo_cancelar(request, pk):
+    """Cancela un conteo abierto sin ajustar existencias"""
+    conteo = get_object_or_404(ConteoFisico, pk=pk)
+    try:
+        conteos.cancelar(conteo)
+    except ValidationError as e:
+        for mensaje in e.messages:
+            messages.error(request, mensaje)
+    else:
+        messages.info(request, f'Conteo {conteo.codigo} cancelado')
+    return redirect('inventario:conteo_detail', pk=conteo.pk)
+
+
 # =============================================================================
 # VISTAS - ÓRDENES DE PRODUCCIÓN
 # =============================================================================
@@ -949,8 +1293,19 @@ class OrdenProduccionListView(LoginRequiredMixin, InventarioContextMixin, ListVi
     paginate_by = 15
     ordering = ['-fecha_orden', '-numero_orden']
     
+    # Ordenamientos permitidos desde ?orden=
+    ORDENAMIENTOS = {
+        'avance': ['porcentaje_avance', '-fecha_orden'],
+        '-avance': ['-porcentaje_avance', '-fecha_orden'],
+        'entrega': ['fecha_entrega_requerida', '-numero_orden'],
+        'materiales': ['resumen__lineas_pendientes', '-fecha_orden'],
+    }
+    
+    def get_ordering(self):
+        return self.ORDENAMIENTOS.get(self.request.GET.get('orden'), self.ordering)
+    
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('proyecto', 'resumen')
         
         # Filtro por estado
         estado = self.request.GET.get('estado')
@@ -962,6 +1317,19 @@ class OrdenProduccionListView(LoginRequiredMixin, InventarioContextMixin, ListVi
         if urgente == '1':
             queryset = queryset.filter(es_urgente=True)
         
+        # Filtro por avance mínimo / máximo (columna almacenada)
+        avance_min = self.request.GET.get('avance_min')
+        if avance_min and avance_min.isdigit():
+            queryset = queryset.filter(porcentaje_avance__gte=int(avance_min))
+        avance_max = self.request.GET.get('avance_max')
+        if avance_max and avance_max.isdigit():
+            queryset = queryset.filter(porcentaje_avance__lte=int(avance_max))
+        
+        # Filtro por estado de materiales (resumen precalculado)
+        materiales = self.request.GET.get('materiales')
+        if materiales:
+            queryset = queryset.filter(resumen__estado_materiales=materiales)
+        
         # Filtro por proyecto
         proyecto = self.request.GET.get('proyecto')
         if proyecto:
@@ -981,15 +1349,21 @@ class OrdenProduccionListView(LoginRequiredMixin, InventarioContextMixin, ListVi
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Estadísticas
-        from django.db.models import Count
-        context['stats'] = {
-            'total': OrdenProduccion.objects.count(),
-            'pendientes': OrdenProduccion.objects.filter(estado='PENDIENTE').count(),
-            'en_proceso': OrdenProduccion.objects.filter(estado='EN_PROCESO').count(),
-            'completadas': OrdenProduccion.objects.filter(estado='COMPLETADA').count(),
-            'urgentes': OrdenProduccion.objects.filter(es_urgente=True, estado__in=['PENDIENTE', 'EN_PROCESO']).count(),
-        }
+        # Estadísticas (una sola consulta, en caché hasta que cambie una orden)
+        context['stats'] = contar_en_cache('orden_list', OrdenProduccion, {
+            'total': None,
+            'pendientes': Q(estado='PENDIENTE'),
+            'en_proceso': Q(estado='EN_PROCESO'),
+            'completadas': Q(estado='COMPLETADA'),
+            'urgentes': Q(es_urgente=True, estado__in=['PENDIENTE', 'EN_PROCESO']),
+        })
+        
+        context['estados_materiales'] = ResumenOrdenProduccion.ESTADO_MATERIALES_CHOICES
+        
+        # Filtros actuales para conservarlos al paginar
+        filtros = self.request.GET.copy()
+        filtros.pop('page', None)
+        context['filtros'] = filtros.urlencode()
         
         return context
 
@@ -1000,15 +1374,35 @@ class OrdenProduccionDetailView(LoginRequiredMixin, InventarioContextMixin, Deta
     template_name = 'inventario/orden_detail.html'
     context_object_name = 'orden'
     
+    def get_queryset(self):
+        # Orden, resumen y detalle de materiales en un número fijo de consultas
+        return OrdenProduccion.objects.select_related(
+            'proyecto', 'resumen', 'solicitado_por', 'autorizado_por', 'creado_por'
+        ).prefetch_related(
+            'items',
+            Prefetch('detalle_lonas', queryset=OrdenProduccionLona.objects.select_related('lona')),
+            Prefetch('detalle_estructuras', queryset=OrdenProduccionEstructura.objects.select_related('estructura')),
+            Prefetch('detalle_accesorios', queryset=OrdenProduccionAccesorio.objects.select_related('accesorio')),
+        )
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        orden = self.get_object()
+        orden = self.object
         
         # Obtener ítems relacionados
         context['items'] = orden.items.all()
-        context['consumo_lonas'] = orden.lonas_consumidas.all()
-        context['consumo_estructura'] = orden.estructura_consumida.all()
-        context['consumo_accesorios'] = orden.accesorios_consumidos.all()
+        context['consumo_lonas'] = orden.detalle_lonas.all()
+        context['consumo_estructura'] = orden.detalle_estructuras.all()
+        context['consumo_accesorios'] = orden.detalle_accesorios.all()
+        context['resumen'] = getattr(orden, 'resumen', None)
+        context['costo_material'] = costeo.costo_material_orden(orden)
+
+        # Reservas de material
+        context['disponibilidad'] = reservas.disponibilidad_orden(orden)
+        context['reservas_activas'] = orden.reservas.filter(estado='ACTIVA').select_related(
+            'lona', 'estructura', 'accesorio'
+        )
+        context['admite_reservas'] = orden.estado in reservas.ESTADOS_ORDEN_RESERVABLES
         
         return context
 
@@ -1036,8 +1430,12 @@ class OrdenProduccionUpdateView(LoginRequiredMixin, InventarioContextMixin, Upda
         return f'/inventario/ordenes/{self.object.pk}/'
     
     def form_valid(self, form):
+        # Usuario para el historial si el cambio de estado cierra las reservas
+        form.instance._usuario_cambio = self.request.user
+        with transaction.atomic():
+            respuesta = super().form_valid(form)
         messages.success(self.request, f'Orden {self.object.numero_orden} actualizada exitosamente')
-        return super().form_valid(form)
+        return respuesta
 
 
 class OrdenProduccionDeleteView(LoginRequiredMixin, InventarioContextMixin, DeleteView):
@@ -1075,3 +1473,438 @@ class OrdenItemCreateView(LoginRequiredMixin, InventarioContextMixin, CreateView
     
     def get_success_url(self):
         return f'/inventario/ordenes/{self.orden.pk}/'
+
+
+# =============================================================================
+# RESERVAS DE MATERIAL
+# =============================================================================
+
+@login_required
+@require_POST
+def orden_reservar(request, pk):
+    """Reserva todo el material pendiente de la orden"""
+    orden = get_object_or_404(OrdenProduccion, pk=pk)
+    try:
+        creadas = reservas.reservar_orden(orden, usuario=request.user)
+    except ValidationError as e:
+        for mensaje in e.messages:
+            messages.error(request, mensaje)
+    else:
+        if creadas:
+            messages.success(request, f'Material reservado para la orden {orden.numero_orden} ({len(creadas)} ítems)')
+        else:
+            messages.info(request, 'La orden no tiene material pendiente por reservar')
+    return redirect('inventario:orden_detail', pk=orden.pk)
+
+
+@login_required
+@require_POST
+def orden_liberar(request, pk):
+    """Libera las reservas activas de la orden"""
+    orden = get_object_or_404(OrdenProduccion, pk=pk)
+    liberadas = reservas.liberar_orden(orden, usuario=request.user)
+    if liberadas:
+        messages.success(request, f'Se liberaron {liberadas} reservas de la orden {orden.numero_orden}')
+    else:
+        messages.info(request, 'La orden no tiene reservas activas')
+    return redirect('inventario:orden_detail', pk=orden.pk)
+
+
+@login_required
+@require_POST
+def orden_consumir(request, pk):
+    """
+    Descarga del inventario el material reservado que se cortó o entregó.
+    Con 'reserva' consume solo esa reserva (y 'cantidad' si se indica);
+    sin ella consume todo lo pendiente de la orden.
+    """
+    orden = get_object_or_404(OrdenProduccion, pk=pk)
+    reserva_id = request.POST.get('reserva')
+    try:
+        if reserva_id:
+            reserva = get_object_or_404(ReservaInventario, pk=reserva_id, orden=orden)
+            cantidad = request.POST.get('cantidad') or None
+            reservas.consumir(reserva, cantidad=cantidad, usuario=request.user)
+            consumidas = 1
+        else:
+            consumidas = reservas.consumir_orden(orden, usuario=request.user)
+    except ValidationError as e:
+        for mensaje in e.messages:
+            messages.error(request, mensaje)
+    else:
+        if consumidas:
+            messages.success(request, f'Material descargado para la orden {orden.numero_orden}')
+        else:
+            messages.info(request, 'La orden no tiene reservas activas')
+    return redirect('inventario:orden_detail', pk=orden.pk)
+
+
+# =============================================================================
+# ASIGNACIÓN DE LONA (RETAZOS PRIMERO)
+# =============================================================================
+
+@login_required
+def orden_asignar_lona(request, pk):
+    """
+    Asigna un rollo de lona a la orden. Para la especificación y el largo del
+    corte sugiere primero los retazos con menor sobrante y luego los rollos
+    completos; al asignar se crea el detalle y se reservan los metros.
+    """
+    orden = get_object_or_404(OrdenProduccion, pk=pk)
+
+    if request.method == 'POST':
+        form = AsignarLonaForm(request.POST, orden=orden)
+        if form.is_valid():
+            datos = form.cleaned_data
+            # Solo rollos de la especificación del formulario con metros libres
+            lona_id = request.POST.get('lona', '')
+            lona = retazos.lonas_asignables(
+                datos['tipo_lona'], datos['ancho_lona'], datos['color_lona'], datos['tratamiento'],
+            ).filter(pk=lona_id).first() if lona_id.isdigit() else None
+            if lona is None:
+                messages.error(request, 'Seleccione un rollo de la especificación indicada con metros libres')
+            else:
+                try:
+                    retazos.asignar_lona_orden(
+                        orden, lona, datos['metros'], usuario=request.user, item=datos['item'],
+                    )
+                except ValidationError as e:
+                    for mensaje in e.messages:
+                        messages.error(request, mensaje)
+                else:
+                    tipo_rollo = 'retazo' if lona.es_retazo else 'rollo'
+                    messages.success(
+                        request,
+                        f'Se asignaron {datos["metros"]} m del {tipo_rollo} {lona.codigo_rollo} '
+                        f'a la orden {orden.numero_orden}'
+                    )
+                    return redirect('inventario:orden_detail', pk=orden.pk)
+    else:
+        form = AsignarLonaForm(request.GET or None, orden=orden)
+
+    sugerencias = None
+    if form.is_bound and form.is_valid():
+        datos = form.cleaned_data
+        encontrados = retazos.sugerencias_corte(
+            datos['tipo_lona'], datos['ancho_lona'], datos['color_lona'], datos['metros'],
+            tratamiento=datos['tratamiento'],
+        )
+        sugerencias = [
+            ('Retazos', 'bi-puzzle', 'bg-success text-white', encontrados['retazos']),
+            ('Rollos Completos', 'bi-layers', '', encontrados['completos']),
+        ]
+
+    context = {
+        'orden': orden,
+        'form': form,
+        'sugerencias': sugerencias,
+        'metros_retazo': InventarioLona.METROS_RETAZO,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/orden_asignar_lona.html', context)
+
+
+# =============================================================================
+# REPORTES: VALORIZACIÓN
+# =============================================================================
+
+@login_required
+def valorizacion_inventario(request):
+    """Tablero de valorización del inventario agrupado por tipo, color, ubicación y estado"""
+    solo_activos = request.GET.get('incluir_inactivos') != '1'
+    reporte = valorizacion.reporte_valorizacion(solo_activos)
+    dimensiones = [
+        (clave, etiqueta, reporte['por_dimension'][clave])
+        for clave, etiqueta in valorizacion.DIMENSIONES.items()
+    ]
+    context = {
+        'reporte': reporte,
+        'dimensiones': dimensiones,
+        'solo_activos': solo_activos,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/valorizacion.html', context)
+
+
+@login_required
+def valorizacion_exportar_excel(request):
+    """Exporta la valorización (resumen y detalle por lote) a Excel"""
+    solo_activos = request.GET.get('incluir_inactivos') != '1'
+    reporte = valorizacion.reporte_valorizacion(solo_activos)
+
+    # write_only: las filas se escriben en streaming, sin mantener la hoja en memoria
+    wb = openpyxl.Workbook(write_only=True)
+    header_fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+
+    def encabezado(ws, columnas):
+        celdas = []
+        for titulo in columnas:
+            celda = WriteOnlyCell(ws, value=titulo)
+            celda.fill = header_fill
+            celda.font = header_font
+            celdas.append(celda)
+        ws.append(celdas)
+
+    ws = wb.create_sheet("Resumen")
+    encabezado(ws, ['Categoría', 'Tipo', 'Color', 'Ubicación', 'Estado', 'Lotes', 'Valor'])
+    for g in reporte['grupos']:
+        ws.append([g['categoria'], g['tipo'], g['color'], g['ubicacion'], g['estado'], g['lotes'], g['valor']])
+    ws.append(['TOTAL', '', '', '', '', reporte['lotes_total'], reporte['valor_total']])
+
+    ws = wb.create_sheet("Detalle")
+    encabezado(ws, ['Categoría', 'Código', 'Tipo', 'Color', 'Ubicación', 'Estado', 'Valor'])
+    for fila in valorizacion.detalle_valorizacion(solo_activos):
+        ws.append(list(fila))
+
+    response = HttpResponse(
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    response['Content-Disposition'] = 'attachment; filename=valorizacion_inventario.xlsx'
+    wb.save(response)
+    return response
+
+
+# =============================================================================
+# REPORTES: STOCK MÍNIMO Y REPOSICIÓN
+# =============================================================================
+
+@login_required
+def stock_minimo_list(request):
+    """Ítems en stock mínimo y último reporte de reposición"""
+    fecha_reporte, sugerencias = stock_minimo.ultimo_reporte()
+    context = {
+        'lonas': stock_minimo.lonas_en_minimo().select_related('tipo_lona', 'color_lona', 'ubicacion'),
+        'estructuras': stock_minimo.estructuras_en_minimo().select_related('tipo_estructura', 'medida_tubo', 'ubicacion'),
+        'accesorios': stock_minimo.accesorios_en_minimo().select_related('tipo_accesorio', 'ubicacion'),
+        'fecha_reporte': fecha_reporte,
+        'sugerencias': sugerencias,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/stock_minimo.html', context)
+
+
+# =============================================================================
+# REPORTES - CONSUMO Y PRONÓSTICO
+# =============================================================================
+
+def _parametros_consumo(request):
+    tipo = request.GET.get('tipo') or None
+    if tipo not in reservas.MODELOS_INVENTARIO:
+        tipo = None
+    semanas = request.GET.get('semanas', '')
+    semanas = min(int(semanas), 104) if semanas.isdigit() and int(semanas) >= 4 else consumo.SEMANAS_HISTORIA
+    return tipo, semanas
+
+
+@login_required
+def consumo_materiales(request):
+    """Consumo semanal por especificación con pronóstico y cobertura"""
+    tipo, semanas = _parametros_consumo(request)
+    fechas, filas = consumo.pronosticos(tipo, semanas)
+    context = {
+        'filas': filas,
+        'fechas': fechas,
+        'tipo': tipo,
+        'semanas': semanas,
+        'tipos_inventario': RecepcionMasivaForm.TIPO_CHOICES,
+        'opciones_semanas': [12, 26, 52],
+        'ventana': consumo.VENTANA_PROMEDIO_MOVIL,
+        'alfa': consumo.ALFA_SUAVIZADO,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/consumo_materiales.html', context)
+
+
+@login_required
+def consumo_api(request):
+    """
+    Series semanales de consumo y pronósticos en JSON.
+    GET ?tipo=LONA|ESTRUCTURA|ACCESORIO&semanas=26
+    """
+    tipo, semanas = _parametros_consumo(request)
+    fechas, filas = consumo.pronosticos(tipo, semanas)
+    return JsonResponse({
+        'semanas': [fecha.isoformat() for fecha in fechas],
+        'materiales': [
+            {
+                'clave': fila['clave'],
+                'tipo': fila['tipo'],
+                'descripcion': fila['descripcion'],
+                'unidad': fila['unidad'],
+                'serie': [float(valor) for valor in fila['serie']],
+                'promedio_movil': float(fila['promedio_movil']),
+                'suavizado': float(fila['suavizado']),
+                'existencia': float(fila['existencia']),
+                'semanas_cobertura': float(fila['semanas_cobertura']) if fila['semanas_cobertura'] is not None else None,
+            }
+            for fila in filas
+        ],
+    })
+
+
+# =============================================================================
+# API: SALDOS A UNA FECHA
+# =============================================================================
+
+@login_required
+def saldos_api(request):
+    """
+    Existencias de todos los ítems al cierre de una fecha.
+    GET ?fecha=AAAA-MM-DD&tipo=LONA|ESTRUCTURA|ACCESORIO&incluir_ceros=1
+    """
+    fecha_txt = request.GET.get('fecha')
+    try:
+        fecha = date.fromisoformat(fecha_txt) if fecha_txt else timezone.now().date()
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida, use el formato AAAA-MM-DD'}, status=400)
+
+    tipo = request.GET.get('tipo') or None
+    if tipo and tipo not in reservas.MODELOS_INVENTARIO:
+        return JsonResponse({'error': f'Tipo de inventario inválido: {tipo}'}, status=400)
+
+    resultado, origen = saldos.saldos_a_fecha(fecha, tipo)
+    filas = saldos.detalle_saldos(resultado, incluir_ceros=request.GET.get('incluir_ceros') == '1')
+    return JsonResponse({
+        'fecha': fecha.isoformat(),
+        'origen': origen,
+        'total_items': len(filas),
+        'saldos': filas,
+    })
+
+
+# =============================================================================
+# KARDEX DE MOVIMIENTOS
+# =============================================================================
+
+def _filtros_kardex(request):
+    """Lee los filtros del kardex desde GET. Retorna (queryset, filtros, error)."""
+    tipo = request.GET.get('tipo') or ''
+    codigo = (request.GET.get('codigo') or '').strip()
+    filtros = {'tipo': tipo, 'codigo': codigo, 'desde': None, 'hasta': None, 'item': None}
+    error = None
+
+    for campo in ('desde', 'hasta'):
+        valor = request.GET.get(campo)
+        if valor:
+            try:
+                filtros[campo] = date.fromisoformat(valor)
+            except ValueError:
+                error = 'Fecha inválida, use el formato AAAA-MM-DD'
+
+    if tipo and tipo not in reservas.MODELOS_INVENTARIO:
+        tipo = filtros['tipo'] = ''
+    if codigo:
+        if not tipo:
+            error = 'Seleccione el tipo de inventario para buscar por código'
+        else:
+            filtros['item'] = kardex.buscar_item(tipo, codigo)
+            if filtros['item'] is None:
+                error = f'No existe un ítem con código {codigo}'
+
+    if error:
+        return HistorialInventario.objects.none(), filtros, error
+
+    qs = kardex.movimientos(
+        tipo_inventario=tipo or None,
+        item=filtros['item'],
+        desde=filtros['desde'],
+        hasta=filtros['hasta'],
+    )
+    return qs, filtros, None
+
+
+@login_required
+def kardex_list(request):
+    """Kardex por ítem o por tipo de inventario con paginación por llave"""
+    qs, filtros, error = _filtros_kardex(request)
+    if error:
+        messages.error(request, error)
+
+    resultado = kardex.pagina(
+        qs,
+        despues=request.GET.get('despues'),
+        antes=request.GET.get('antes'),
+    )
+
+    # Parámetros de filtro para reutilizar en los enlaces de paginación/exportación
+    parametros = request.GET.copy()
+    for clave in ('despues', 'antes', 'formato'):
+        parametros.pop(clave, None)
+
+    context = {
+        **resultado,
+        'filtros': filtros,
+        'parametros': parametros.urlencode(),
+        'tipos_inventario': HistorialInventario.TIPO_INVENTARIO_CHOICES,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/kardex.html', context)
+
+
+@login_required
+def kardex_exportar(request):
+    """Exporta el kardex filtrado en CSV (streaming) o Excel"""
+    qs, filtros, error = _filtros_kardex(request)
+    if error:
+        messages.error(request, error)
+        return redirect('inventario:kardex')
+
+    # El saldo corrido solo tiene sentido para un único ítem
+    con_saldo = filtros['item'] is not None
+
+    if request.GET.get('formato') == 'xlsx':
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Kardex")
+        header_fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        celdas = []
+        for titulo in kardex.columnas_exportacion(con_saldo):
+            celda = WriteOnlyCell(ws, value=titulo)
+            celda.fill = header_fill
+            celda.font = header_font
+            celdas.append(celda)
+        ws.append(celdas)
+        for fila in kardex.filas_exportacion(qs, con_saldo):
+            ws.append(fila)
+
+        # Se escribe a un temporal en disco y se envía por bloques
+        archivo = tempfile.NamedTemporaryFile(suffix='.xlsx')
+        wb.save(archivo)
+        archivo.seek(0)
+        return FileResponse(
+            archivo,
+            as_attachment=True,
+            filename='kardex_inventario.xlsx',
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    response = StreamingHttpResponse(
+        kardex.csv_en_streaming(qs, con_saldo), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename=kardex_inventario.csv'
+    return response
+
+
+# =============================================================================
+# PLANIFICACIÓN DE PRODUCCIÓN
+# =============================================================================
+
+@login_required
+def planificacion_produccion(request):
+    """Plan de producción por estación con fecha proyectada y órdenes atrasadas"""
+    plan = planificacion.planificar()
+    if request.GET.get('atrasadas') == '1':
+        plan['ordenes'] = [p for p in plan['ordenes'] if p['atrasada']]
+    context = {
+        'plan': plan,
+        'estaciones': EstacionTrabajo.CODIGO_CHOICES,
+        'show_module_nav': True,
+        'active_module': 'inventarios',
+    }
+    return render(request, 'inventario/planificacion.html', context)
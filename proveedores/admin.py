@@ -11,7 +11,10 @@ from .models import (
     Proveedor,
     ContactoProveedor,
     DocumentoProveedor,
-    ProductoServicioProveedor
+    ProductoServicioProveedor,
+    IndicadorProveedor,
+    HistorialPrecioProducto,
+    ResumenPrecioMensual
 )
 
 
@@ -42,6 +45,7 @@ class TipoProveedorAdmin(admin.ModelAdmin):
 class CategoriaProveedorAdmin(admin.ModelAdmin):
     list_display = ['nombre_categoria', 'categoria_padre', 'activo', 'fecha_creacion']
     list_filter = ['activo', 'categoria_padre']
+    list_select_related = ['categoria_padre']
     search_fields = ['nombre_categoria', 'descripcion']
     ordering = ['nombre_categoria']
     
@@ -378,4 +382,84 @@ class ProductoServicioProveedorAdmin(admin.ModelAdmin):
     def disponibilidad(self, obj):
         """Mostrar disponibilidad"""
         return obj.get_texto_disponibilidad()
-    disponibilidad.short_description = 'Disponibilidad'
\ No newline at end of file
+    disponibilidad.short_description = 'Disponibilidad'
+
+
+# =====================================================
+# ADMIN PARA INDICADORES DE PROVEEDORES
+# =====================================================
+
+@admin.register(IndicadorProveedor)
+class IndicadorProveedorAdmin(admin.ModelAdmin):
+    """Solo lectura: lo calcula el comando actualizar_indicadores_proveedores"""
+    list_display = [
+        'proveedor',
+        'puntaje',
+        'cumplimiento_documental',
+        'competitividad_precio',
+        'cumplimiento_entrega',
+        'frescura_catalogo',
+        'fecha_calculo'
+    ]
+    search_fields = ['proveedor__razon_social', 'proveedor__numero_documento']
+    ordering = ['-puntaje']
+    list_select_related = ['proveedor']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# =====================================================
+# ADMIN PARA HISTORIAL DE PRECIOS
+# =====================================================
+
+@admin.register(HistorialPrecioProducto)
+class HistorialPrecioProductoAdmin(admin.ModelAdmin):
+    """Solo lectura: el historial es de solo inserción"""
+    list_display = [
+        'clave',
+        'unidad_medida',
+        'proveedor',
+        'moneda',
+        'precio_final',
+        'precio_cop',
+        'origen',
+        'fecha'
+    ]
+    list_filter = ['origen', 'moneda', 'unidad_medida']
+    search_fields = ['clave', 'proveedor__razon_social']
+    date_hierarchy = 'fecha'
+    list_select_related = ['proveedor']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenPrecioMensual)
+class ResumenPrecioMensualAdmin(admin.ModelAdmin):
+    """Solo lectura: lo calcula proveedores/historial_precios.py"""
+    list_display = [
+        'clave',
+        'unidad_medida',
+        'mes',
+        'precio_minimo',
+        'precio_promedio',
+        'precio_maximo',
+        'observaciones',
+        'proveedores'
+    ]
+    list_filter = ['unidad_medida']
+    search_fields = ['clave']
+    date_hierarchy = 'mes'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,13 @@ class ProveedoresConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'proveedores'
     verbose_name = 'Gestión de Proveedores'
+
+    def ready(self):
+        """
+        Invalida las estadísticas del tablero cuando cambian los catálogos
+        y conecta los signals del índice de búsqueda.
+        """
+        from american_carpas_project.estadisticas import registrar_invalidacion
+        from .models import TipoProveedor, CategoriaProveedor, TipoDocumentoProveedor
+        registrar_invalidacion(TipoProveedor, CategoriaProveedor, TipoDocumentoProveedor)
+        from . import signals  # noqa: F401
@@ -0,0 +1,240 @@
+"""
+Búsqueda de proveedores y productos/servicios
+American Carpas 1 SAS
+
+Índice invertido propio (IndiceBusqueda) en lugar de LIKE '%texto%', que
+recorre tablas completas. Los textos se normalizan quitando tildes y
+mayúsculas ("Lonas Pérez" -> "lonas", "perez"), así "perez" encuentra
+"Pérez". Cada término guarda el peso del campo donde aparece (un SKU pesa
+más que una descripción).
+
+La consulta busca cada término por prefijo (los de una o dos letras,
+exactos) sobre el índice único (termino, tipo_objeto, id_objeto), exige que
+el objeto tenga todos los términos buscados y ordena por la suma de pesos,
+con bonificación para las coincidencias exactas. Es una sola consulta
+agrupada más una por tipo para cargar los objetos encontrados.
+
+El índice se mantiene desde los signals de guardado/eliminación
+(proveedores/signals.py); reconstruir_indice() lo rehace completo
+(comando reconstruir_indice_busqueda).
+"""
+
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, Value, When
+
+from .models import IndiceBusqueda, Proveedor, ProductoServicioProveedor
+
+
+LARGO_TERMINO = IndiceBusqueda._meta.get_field('termino').max_length
+
+# Campos indexados por tipo: campo -> (peso, es_codigo)
+# En los códigos se indexa además la versión compacta ("LN-650" -> "ln650")
+CAMPOS = {
+    'PROVEEDOR': {
+        'razon_social': (5, False),
+        'nombre_comercial': (5, False),
+        'numero_documento': (8, True),
+        'ciudad': (1, False),
+        'actividad_economica': (1, False),
+    },
+    'PRODUCTO': {
+        'sku_codigo': (8, True),
+        'nombre': (5, False),
+        'marca': (3, False),
+        'descripcion': (1, False),
+        'especificaciones_tecnicas': (1, False),
+    },
+}
+
+MODELOS = {
+    'PROVEEDOR': Proveedor,
+    'PRODUCTO': ProductoServicioProveedor,
+}
+
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'e', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'para', 'por', 'sin', 'un', 'una', 'y',
+}
+
+# Términos que se toman en cuenta de una búsqueda
+MAXIMO_TERMINOS_CONSULTA = 8
+
+# Los términos más cortos no se buscan por prefijo (coincidirían con casi todo)
+LARGO_MINIMO_PREFIJO = 3
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+# =============================================================================
+# NORMALIZACIÓN
+# =============================================================================
+
+def plegar(texto):
+    """Minúsculas sin tildes ni diéresis ("Ñandú Pérez" -> "nandu perez")"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def terminos(texto):
+    """Términos normalizados de un texto, en orden y sin palabras vacías"""
+    return [
+        termino[:LARGO_TERMINO]
+        for termino in _NO_ALFANUMERICO.split(plegar(texto))
+        if termino and termino not in PALABRAS_VACIAS
+    ]
+
+
+def terminos_objeto(objeto, tipo):
+    """{termino: peso} de un proveedor o producto"""
+    pesos = {}
+    for campo, (peso, es_codigo) in CAMPOS[tipo].items():
+        valor = getattr(objeto, campo)
+        if not valor:
+            continue
+        encontrados = set(terminos(valor))
+        if es_codigo:
+            compacto = _NO_ALFANUMERICO.sub('', plegar(valor))[:LARGO_TERMINO]
+            if compacto:
+                encontrados.add(compacto)
+        for termino in encontrados:
+            pesos[termino] = pesos.get(termino, 0) + peso
+    return pesos
+
+
+# =============================================================================
+# MANTENIMIENTO DEL ÍNDICE
+# =============================================================================
+
+@transaction.atomic
+def indexar(tipo, objetos):
+    """Reindexa un bloque de objetos del mismo tipo: un DELETE y un bulk_create"""
+    objetos = list(objetos)
+    if not objetos:
+        return 0
+    IndiceBusqueda.objects.filter(tipo_objeto=tipo, id_objeto__in=[o.pk for o in objetos]).delete()
+    filas = [
+        IndiceBusqueda(termino=termino, tipo_objeto=tipo, id_objeto=objeto.pk, peso=peso)
+        for objeto in objetos
+        for termino, peso in terminos_objeto(objeto, tipo).items()
+    ]
+    IndiceBusqueda.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def desindexar(tipo, ids):
+    """Elimina del índice los objetos indicados"""
+    return IndiceBusqueda.objects.filter(tipo_objeto=tipo, id_objeto__in=list(ids)).delete()[0]
+
+
+def reconstruir_indice(tamano_bloque=2000):
+    """Rehace el índice completo. Retorna {tipo: filas creadas}."""
+    resultado = {}
+    for tipo, modelo in MODELOS.items():
+        IndiceBusqueda.objects.filter(tipo_objeto=tipo).delete()
+        campos = ['pk', *CAMPOS[tipo]]
+        bloque, filas = [], 0
+        for objeto in modelo.objects.only(*campos).order_by('pk').iterator(chunk_size=tamano_bloque):
+            bloque.append(objeto)
+            if len(bloque) == tamano_bloque:
+                filas += indexar(tipo, bloque)
+                bloque = []
+        filas += indexar(tipo, bloque)
+        resultado[tipo] = filas
+    return resultado
+
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+
+def _condicion_termino(termino):
+    """Prefijo para los términos largos; los cortos ("s", "2") deben ser exactos"""
+    if len(termino) >= LARGO_MINIMO_PREFIJO:
+        return Q(termino__startswith=termino)
+    return Q(termino=termino)
+
+
+def usa_indice(texto):
+    """
+    Si la búsqueda tiene algún término que el índice resuelva bien. Las que
+    solo traen palabras vacías o términos de una o dos letras ("de", "lt")
+    se resuelven mejor con icontains sobre los campos.
+    """
+    return any(len(termino) >= LARGO_MINIMO_PREFIJO for termino in terminos(texto))
+
+
+def consulta_coincidencias(texto, tipo=None):
+    """
+    Consulta (sin ejecutar ni limitar) de los objetos que contienen todos los
+    términos buscados, con su puntaje: filas (tipo_objeto, id_objeto, puntaje)
+    ordenadas por relevancia. None si la búsqueda no tiene términos.
+    """
+    buscados = list(dict.fromkeys(terminos(texto)))[:MAXIMO_TERMINOS_CONSULTA]
+    if not buscados:
+        return None
+
+    condiciones = [_condicion_termino(termino) for termino in buscados]
+    filtro = Q()
+    for condicion in condiciones:
+        filtro |= condicion
+    filas = IndiceBusqueda.objects.filter(filtro)
+    if tipo:
+        filas = filas.filter(tipo_objeto=tipo)
+
+    # Cuántos de los términos buscados tiene cada objeto
+    terminos_encontrados = sum(
+        Max(Case(When(condicion, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for condicion in condiciones
+    )
+    # Las coincidencias exactas valen el doble que las de prefijo
+    puntaje = Sum(Case(
+        When(termino__in=buscados, then=F('peso') * Value(2)),
+        default=F('peso'),
+        output_field=IntegerField(),
+    ))
+    return (
+        filas.values('tipo_objeto', 'id_objeto')
+        .annotate(encontrados=terminos_encontrados, puntaje=puntaje)
+        .filter(encontrados=len(buscados))
+        .order_by('-puntaje', 'tipo_objeto', 'id_objeto')
+    )
+
+
+def coincidencias(texto, tipo=None, limite=50):
+    """
+    Objetos que contienen todos los términos buscados (por prefijo),
+    ordenados por relevancia. Retorna [(tipo, id, puntaje), ...].
+    """
+    consulta = consulta_coincidencias(texto, tipo)
+    if consulta is None:
+        return []
+    return list(consulta.values_list('tipo_objeto', 'id_objeto', 'puntaje')[:limite])
+
+
+def buscar(texto, tipo=None, limite=50):
+    """
+    Resultados listos para mostrar, de proveedores y productos mezclados por
+    relevancia: [{'tipo', 'objeto', 'puntaje'}, ...].
+    """
+    encontrados = coincidencias(texto, tipo, limite)
+
+    objetos = {}
+    for tipo_objeto, modelo in MODELOS.items():
+        ids = [id_objeto for t, id_objeto, _ in encontrados if t == tipo_objeto]
+        if not ids:
+            continue
+        consulta = modelo.objects.all()
+        if tipo_objeto == 'PRODUCTO':
+            consulta = consulta.select_related('id_proveedor')
+        else:
+            consulta = consulta.select_related('tipo_proveedor')
+        objetos[tipo_objeto] = consulta.in_bulk(ids)
+
+    return [
+        {'tipo': tipo_objeto, 'objeto': objetos[tipo_objeto][id_objeto], 'puntaje': puntaje}
+        for tipo_objeto, id_objeto, puntaje in encontrados
+        if id_objeto in objetos.get(tipo_objeto, {})
+    ]
@@ -0,0 +1,126 @@
+"""
+Árbol de categorías de proveedores
+American Carpas 1 SAS
+
+CategoriaProveedor guarda su jerarquía como ruta materializada (ruta, nivel).
+ArbolCategorias carga todas las categorías con una consulta y resuelve en
+memoria nombres completos ("Textiles > Lonas > PVC"), ancestros, hijos y el
+recorrido para los desplegables, sin una consulta por nivel.
+calcular_rutas() y reconstruir_rutas() rehacen las rutas desde categoria_padre
+(migración y reparación).
+"""
+
+from django.db import transaction
+
+from .models import CategoriaProveedor
+
+
+SEPARADOR_NOMBRES = ' > '
+# Espacios no separables: en un <option> los espacios normales se colapsan
+SANGRIA = '\u00a0' * 4
+
+
+def calcular_rutas(padres):
+    """
+    {id: (ruta, nivel)} a partir de {id: id_padre}. Un padre inexistente o un
+    ciclo deja a la categoría como principal.
+    """
+    rutas = {}
+
+    def resolver(pk, visitados):
+        if pk in rutas:
+            return rutas[pk]
+        padre = padres.get(pk)
+        if padre is None or padre not in padres or padre in visitados:
+            rutas[pk] = (CategoriaProveedor.segmento_ruta(pk), 0)
+        else:
+            ruta_padre, nivel_padre = resolver(padre, visitados | {pk})
+            rutas[pk] = (ruta_padre + CategoriaProveedor.segmento_ruta(pk), nivel_padre + 1)
+        return rutas[pk]
+
+    for pk in padres:
+        resolver(pk, frozenset())
+    return rutas
+
+
+@transaction.atomic
+def reconstruir_rutas():
+    """Recalcula ruta y nivel de todas las categorías. Retorna cuántas cambiaron."""
+    categorias = list(CategoriaProveedor.objects.only('pk', 'categoria_padre', 'ruta', 'nivel'))
+    rutas = calcular_rutas({c.pk: c.categoria_padre_id for c in categorias})
+    cambiadas = []
+    for categoria in categorias:
+        if (categoria.ruta, categoria.nivel) != rutas[categoria.pk]:
+            categoria.ruta, categoria.nivel = rutas[categoria.pk]
+            cambiadas.append(categoria)
+    CategoriaProveedor.objects.bulk_update(cambiadas, ['ruta', 'nivel'], batch_size=500)
+    return len(cambiadas)
+
+
+class ArbolCategorias:
+    """Todas las categorías en memoria, indexadas por id y por padre"""
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = CategoriaProveedor.objects.all()
+        self.categorias = {c.pk: c for c in queryset.order_by('ruta')}
+        self.hijos = {}
+        for categoria in self.categorias.values():
+            self.hijos.setdefault(categoria.categoria_padre_id, []).append(categoria)
+            # El padre cargado evita la consulta de __str__
+            if categoria.categoria_padre_id in self.categorias:
+                categoria.categoria_padre = self.categorias[categoria.categoria_padre_id]
+        for hermanos in self.hijos.values():
+            hermanos.sort(key=lambda c: c.nombre_categoria.lower())
+
+    def __contains__(self, pk):
+        return pk in self.categorias
+
+    def get(self, pk):
+        return self.categorias.get(pk)
+
+    def ancestros(self, pk, incluir_propia=False):
+        """Categorías de la raíz a la indicada (las que estén cargadas)"""
+        categoria = self.categorias.get(pk)
+        if categoria is None:
+            return []
+        ids = CategoriaProveedor.ids_ruta(categoria.ruta)
+        if not incluir_propia:
+            ids = ids[:-1]
+        return [self.categorias[i] for i in ids if i in self.categorias]
+
+    def nombre_completo(self, pk):
+        """ "Textiles > Lonas > PVC" """
+        return SEPARADOR_NOMBRES.join(
+            c.nombre_categoria for c in self.ancestros(pk, incluir_propia=True)
+        )
+
+    def recorrido(self, excluir=None):
+        """
+        Categorías en preorden (hermanos por nombre) como (categoria, nivel).
+        `excluir` omite esa categoría y todo su subárbol.
+        """
+        pila = [(c, 0) for c in reversed(self.raices())]
+        while pila:
+            categoria, nivel = pila.pop()
+            if categoria.pk == excluir:
+                continue
+            yield categoria, nivel
+            pila.extend((hijo, nivel + 1) for hijo in reversed(self.hijos.get(categoria.pk, [])))
+
+    def raices(self):
+        """Categorías sin padre cargado (las principales o las que quedaron sueltas)"""
+        return sorted(
+            (c for c in self.categorias.values()
+             if c.categoria_padre_id is None or c.categoria_padre_id not in self.categorias),
+            key=lambda c: c.nombre_categoria.lower(),
+        )
+
+    def opciones(self, excluir=None, vacio=None):
+        """Choices con sangría por nivel para un <select>"""
+        opciones = [('', vacio)] if vacio is not None else []
+        opciones.extend(
+            (categoria.pk, SANGRIA * nivel + categoria.nombre_categoria)
+            for categoria, nivel in self.recorrido(excluir)
+        )
+        return opciones
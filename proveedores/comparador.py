@@ -0,0 +1,176 @@
+"""
+Comparador de precios entre proveedores
+American Carpas 1 SAS
+
+Compara en la base de datos las ofertas de ProductoServicioProveedor de un
+mismo material. Todo se calcula con expresiones SQL sobre las ofertas
+filtradas, sin cargar el catálogo en memoria:
+
+- precio_final: precio especial o precio con descuento (igual que
+  ProductoServicioProveedor.get_precio_final()).
+- precio_cop: precio final llevado a pesos con PROVEEDORES_TASAS_CAMBIO;
+  las ofertas en monedas sin tasa configurada quedan fuera de la comparación.
+- Grupo de comparación: el SKU normalizado (o el nombre si no hay SKU) y la
+  unidad de medida, porque no hay factores de conversión entre unidades.
+- Posición y mínimos del grupo con funciones de ventana (RANK, MIN, COUNT).
+- puntaje: combina precio, tiempo de entrega y calificación del proveedor
+  con los pesos PROVEEDORES_PESOS_OFERTA; la mejor oferta es la de mayor puntaje.
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import (
+    Case, CharField, Count, DecimalField, ExpressionWrapper, F, FloatField, Min, Q, Value, When, Window,
+)
+from django.db.models.functions import Coalesce, NullIf, Rank, Trim, Upper
+
+from .models import ProductoServicioProveedor
+
+
+# Pesos a COP por unidad de cada moneda
+TASAS_CAMBIO = getattr(settings, 'PROVEEDORES_TASAS_CAMBIO', {'COP': 1})
+
+# Peso de cada criterio en el puntaje de la mejor oferta (suman 1)
+PESOS_OFERTA = getattr(settings, 'PROVEEDORES_PESOS_OFERTA', {
+    'precio': Decimal('0.60'),
+    'entrega': Decimal('0.25'),
+    'calificacion': Decimal('0.15'),
+})
+
+CALIFICACION_MAXIMA = Decimal('5')
+
+DINERO = DecimalField(max_digits=20, decimal_places=4)
+PUNTAJE = DecimalField(max_digits=12, decimal_places=6)
+
+
+# =============================================================================
+# EXPRESIONES
+# =============================================================================
+
+def precio_final():
+    """Precio especial si existe, si no el precio unitario con descuento"""
+    return Case(
+        When(precio_especial__gt=0, then=F('precio_especial')),
+        When(
+            descuento_porcentaje__gt=0,
+            then=F('precio_unitario') - F('precio_unitario') * F('descuento_porcentaje') / Value(Decimal('100')),
+        ),
+        default=F('precio_unitario'),
+        output_field=DINERO,
+    )
+
+
+def precio_normalizado():
+    """Precio final en COP según la moneda de la oferta (NULL si no hay tasa)"""
+    return Case(
+        *[
+            When(moneda=moneda, then=precio_final() * Value(Decimal(str(tasa))))
+            for moneda, tasa in TASAS_CAMBIO.items()
+        ],
+        default=None,
+        output_field=DINERO,
+    )
+
+
+def clave_comparacion():
+    """SKU en mayúsculas sin espacios de borde, o el nombre si no hay SKU"""
+    return Coalesce(
+        NullIf(Upper(Trim('sku_codigo')), Value('')),
+        Upper(Trim('nombre')),
+        output_field=CharField(),
+    )
+
+
+# =============================================================================
+# OFERTAS COMPARADAS
+# =============================================================================
+
+def ofertas_comparables(sku=None, texto=None, unidad_medida=None):
+    """
+    Ofertas activas y disponibles de proveedores activos, con precio en COP.
+    `sku` busca el código exacto (sin distinguir mayúsculas) y `texto` busca
+    en nombre o SKU.
+    """
+    filtro = Q(activo=True, disponible=True, id_proveedor__estado='ACTIVO', moneda__in=list(TASAS_CAMBIO))
+    if sku:
+        filtro &= Q(sku_codigo__iexact=sku.strip())
+    if texto:
+        filtro &= Q(nombre__icontains=texto) | Q(sku_codigo__icontains=texto)
+    if unidad_medida:
+        filtro &= Q(unidad_medida=unidad_medida)
+    return ProductoServicioProveedor.objects.filter(filtro)
+
+
+def anotar_comparacion(queryset):
+    """
+    Anota precio_final, precio_cop, clave y, por grupo (clave, unidad), la
+    posición por precio, el número de ofertas, los mínimos y el puntaje.
+    """
+    queryset = queryset.annotate(
+        precio_final=precio_final(),
+        precio_cop=precio_normalizado(),
+        clave=clave_comparacion(),
+    )
+    grupo = [F('clave'), F('unidad_medida')]
+    queryset = queryset.annotate(
+        # El orden de la ventana va como FloatField: en SQLite un DecimalField
+        # hace que Django envuelva el ORDER BY en un CAST inválido
+        posicion_precio=Window(
+            Rank(), partition_by=grupo,
+            order_by=ExpressionWrapper(F('precio_cop'), output_field=FloatField()).asc(),
+        ),
+        ofertas_grupo=Window(Count('pk'), partition_by=grupo),
+        precio_minimo=Window(Min('precio_cop'), partition_by=grupo),
+        entrega_minima=Window(Min('tiempo_entrega_dias'), partition_by=grupo),
+    )
+    return queryset.annotate(
+        puntaje=ExpressionWrapper(
+            # Cada término multiplica antes de dividir para no perder decimales
+            Coalesce(
+                Value(Decimal(str(PESOS_OFERTA['precio']))) * F('precio_minimo') / NullIf(F('precio_cop'), Value(0)),
+                Value(Decimal(str(PESOS_OFERTA['precio']))),
+            )
+            + Value(Decimal(str(PESOS_OFERTA['entrega'])))
+            * (F('entrega_minima') + Value(Decimal('1'))) / (F('tiempo_entrega_dias') + Value(Decimal('1')))
+            + Value(Decimal(str(PESOS_OFERTA['calificacion'])))
+            * F('id_proveedor__calificacion') / Value(CALIFICACION_MAXIMA),
+            output_field=PUNTAJE,
+        ),
+    )
+
+
+def comparar(sku=None, texto=None, unidad_medida=None, limite_grupos=20):
+    """
+    Grupos de ofertas comparables ordenados por clave. Cada grupo trae sus
+    ofertas de menor a mayor precio y la mejor oferta según el puntaje.
+    """
+    filas = (
+        anotar_comparacion(ofertas_comparables(sku, texto, unidad_medida))
+        .order_by('clave', 'unidad_medida', 'posicion_precio', 'tiempo_entrega_dias')
+        .values(
+            'id_producto_servicio', 'clave', 'nombre', 'sku_codigo', 'unidad_medida', 'moneda',
+            'precio_unitario', 'precio_final', 'precio_cop', 'tiempo_entrega_dias', 'cantidad_minima',
+            'id_proveedor_id', 'id_proveedor__razon_social', 'id_proveedor__calificacion',
+            'posicion_precio', 'ofertas_grupo', 'precio_minimo', 'puntaje',
+        )
+    )
+
+    grupos = {}
+    for fila in filas:
+        clave = (fila['clave'], fila['unidad_medida'])
+        if clave not in grupos:
+            if len(grupos) == limite_grupos:
+                break
+            grupos[clave] = {
+                'clave': fila['clave'],
+                'unidad_medida': fila['unidad_medida'],
+                'ofertas_total': fila['ofertas_grupo'],
+                'precio_minimo': fila['precio_minimo'],
+                'ofertas': [],
+            }
+        grupos[clave]['ofertas'].append(fila)
+
+    for grupo in grupos.values():
+        grupo['mejor_oferta'] = max(grupo['ofertas'], key=lambda o: (o['puntaje'], -o['precio_cop']))
+    return list(grupos.values())
@@ -0,0 +1,385 @@
+"""
+Exportación del directorio de proveedores (Excel y PDF)
+American Carpas 1 SAS
+
+Exporta los proveedores de un queryset (con los filtros del listado) con sus
+contactos, documentos y catálogo de productos/servicios:
+
+- Excel: un .xlsx en modo write-only de openpyxl con una hoja por entidad
+  (Proveedores, Contactos, Documentos, Productos). Las filas se escriben a
+  disco a medida que se agregan.
+- PDF: directorio dibujado con el canvas de reportlab, proveedor por
+  proveedor, sin armar la lista completa de flowables.
+
+Los proveedores se leen por bloques de TAMANO_BLOQUE con prefetch de sus
+contactos, documentos y productos, así en memoria solo está un bloque a la
+vez. Las funciones escriben en cualquier archivo abierto en modo binario: la
+vista lo hace sobre un archivo temporal que se devuelve en streaming y el
+comando exportar_proveedores sobre disco (para ejecutarlo en segundo plano
+con cron o una tarea programada).
+"""
+
+from datetime import date
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import (
+    ESTADO_DOCUMENTO_CHOICES,
+    ContactoProveedor,
+    DocumentoProveedor,
+    ProductoServicioProveedor,
+    Proveedor,
+)
+from .vigencia import anotar_estado
+
+
+TAMANO_BLOQUE = 200
+
+FORMATOS = {
+    'excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'pdf': ('pdf', 'application/pdf'),
+}
+
+ESTADOS_DOCUMENTO = dict(ESTADO_DOCUMENTO_CHOICES)
+
+
+def _si_no(valor):
+    return 'Sí' if valor else 'No'
+
+
+# Columnas de cada hoja: (encabezado, ancho, valor)
+COLUMNAS_PROVEEDOR = [
+    ('ID', 8, lambda p: p.id_proveedor),
+    ('Razón Social', 40, lambda p: p.razon_social),
+    ('Nombre Comercial', 30, lambda p: p.nombre_comercial),
+    ('Documento', 18, lambda p: p.get_documento_completo()),
+    ('Tipo Persona', 12, lambda p: p.get_tipo_persona_display()),
+    ('Tipo de Proveedor', 20, lambda p: p.tipo_proveedor.nombre_tipo if p.tipo_proveedor_id else ''),
+    ('Categoría', 25, lambda p: p.categoria_principal.nombre_categoria if p.categoria_principal_id else ''),
+    ('Estado', 12, lambda p: p.get_estado_display()),
+    ('Ciudad', 18, lambda p: p.ciudad),
+    ('Dirección', 35, lambda p: p.direccion),
+    ('Teléfono', 16, lambda p: p.telefono_principal),
+    ('Email', 30, lambda p: p.email_principal),
+    ('Condiciones de Pago', 18, lambda p: p.condiciones_pago),
+    ('Entrega Promedio (días)', 12, lambda p: p.tiempo_entrega_promedio),
+    ('Calificación', 10, lambda p: p.calificacion),
+    ('Puntaje', 10, lambda p: p.indicador.puntaje if _indicador(p) else None),
+    ('Contactos', 10, lambda p: len(p.contactos.all())),
+    ('Documentos', 10, lambda p: len(p.documentos.all())),
+    ('Productos', 10, lambda p: len(p.productos_servicios.all())),
+    ('Fecha de Registro', 18, lambda p: p.fecha_registro.replace(tzinfo=None)),
+]
+
+COLUMNAS_CONTACTO = [
+    ('ID Proveedor', 8, lambda c: c.id_proveedor_id),
+    ('Proveedor', 40, lambda c: c.id_proveedor.razon_social),
+    ('Nombres', 20, lambda c: c.nombres),
+    ('Apellidos', 20, lambda c: c.apellidos),
+    ('Cargo', 20, lambda c: c.cargo),
+    ('Área', 18, lambda c: c.area_responsabilidad),
+    ('Teléfono Fijo', 16, lambda c: c.telefono_fijo),
+    ('Teléfono Móvil', 16, lambda c: c.telefono_movil),
+    ('Email', 30, lambda c: c.email),
+    ('Principal', 10, lambda c: _si_no(c.es_contacto_principal)),
+    ('Activo', 8, lambda c: _si_no(c.activo)),
+]
+
+COLUMNAS_DOCUMENTO = [
+    ('ID Proveedor', 8, lambda d: d.id_proveedor_id),
+    ('Proveedor', 40, lambda d: d.id_proveedor.razon_social),
+    ('Tipo de Documento', 28, lambda d: d.id_tipo_documento.nombre_tipo_documento),
+    ('Número', 18, lambda d: d.numero_documento),
+    ('Emisión', 12, lambda d: d.fecha_emision),
+    ('Vencimiento', 12, lambda d: d.fecha_vencimiento),
+    ('Estado', 12, lambda d: ESTADOS_DOCUMENTO.get(d.estado_vigente, d.estado_vigente)),
+    ('Entidad Emisora', 25, lambda d: d.entidad_emisora),
+    ('Archivo', 30, lambda d: d.nombre_archivo_original),
+]
+
+COLUMNAS_PRODUCTO = [
+    ('ID Proveedor', 8, lambda p: p.id_proveedor_id),
+    ('Proveedor', 40, lambda p: p.id_proveedor.razon_social),
+    ('Tipo', 10, lambda p: p.get_tipo_display()),
+    ('SKU', 16, lambda p: p.sku_codigo),
+    ('Nombre', 35, lambda p: p.nombre),
+    ('Marca', 16, lambda p: p.marca),
+    ('Unidad', 14, lambda p: p.get_unidad_medida_display()),
+    ('Moneda', 8, lambda p: p.moneda),
+    ('Precio Unitario', 14, lambda p: p.precio_unitario),
+    ('Precio Especial', 14, lambda p: p.precio_especial),
+    ('Descuento %', 10, lambda p: p.descuento_porcentaje),
+    ('Precio Final', 14, lambda p: p.get_precio_final()),
+    ('Entrega (días)', 10, lambda p: p.tiempo_entrega_dias),
+    ('Cantidad Mínima', 10, lambda p: p.cantidad_minima),
+    ('Disponible', 10, lambda p: _si_no(p.disponible)),
+    ('Activo', 8, lambda p: _si_no(p.activo)),
+]
+
+
+def _indicador(proveedor):
+    try:
+        return proveedor.indicador
+    except Proveedor.indicador.RelatedObjectDoesNotExist:
+        return None
+
+
+# =============================================================================
+# LECTURA POR BLOQUES
+# =============================================================================
+
+def bloques(queryset, tamano=TAMANO_BLOQUE):
+    """
+    Listas de a lo sumo `tamano` proveedores, en el orden del queryset, con
+    contactos, documentos (con su estado a hoy) y productos precargados. Solo
+    los ids del queryset completo quedan en memoria.
+    """
+    ids = list(queryset.values_list('pk', flat=True))
+    documentos = anotar_estado(DocumentoProveedor.objects.select_related('id_tipo_documento')).order_by(
+        'id_tipo_documento__nombre_tipo_documento', '-fecha_vencimiento'
+    )
+    for inicio in range(0, len(ids), tamano):
+        bloque = ids[inicio:inicio + tamano]
+        proveedores = Proveedor.objects.filter(pk__in=bloque).select_related(
+            'tipo_proveedor', 'categoria_principal', 'indicador'
+        ).prefetch_related(
+            Prefetch('contactos', queryset=ContactoProveedor.objects.order_by(
+                '-es_contacto_principal', 'apellidos', 'nombres'
+            )),
+            Prefetch('documentos', queryset=documentos),
+            Prefetch('productos_servicios', queryset=ProductoServicioProveedor.objects.order_by('tipo', 'nombre')),
+        )
+        por_id = {proveedor.pk: proveedor for proveedor in proveedores}
+        yield [por_id[pk] for pk in bloque if pk in por_id]
+
+
+def _relacionados(proveedor, relacion):
+    # Las filas hijas apuntan al proveedor ya cargado (sin consultas extra)
+    for objeto in getattr(proveedor, relacion).all():
+        objeto.id_proveedor = proveedor
+        yield objeto
+
+
+# =============================================================================
+# EXCEL
+# =============================================================================
+
+def _valor_celda(valor):
+    if isinstance(valor, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', valor)
+    return valor
+
+
+def _hoja(libro, titulo, columnas):
+    hoja = libro.create_sheet(titulo)
+    hoja.freeze_panes = 'A2'
+    for numero, (_, ancho, _) in enumerate(columnas, start=1):
+        hoja.column_dimensions[get_column_letter(numero)].width = ancho
+    relleno = PatternFill(start_color='198754', end_color='198754', fill_type='solid')
+    fuente = Font(bold=True, color='FFFFFF')
+    encabezados = []
+    for encabezado, _, _ in columnas:
+        celda = WriteOnlyCell(hoja, value=encabezado)
+        celda.fill = relleno
+        celda.font = fuente
+        encabezados.append(celda)
+    hoja.append(encabezados)
+    return hoja
+
+
+def _fila(columnas, objeto):
+    return [_valor_celda(valor(objeto)) for _, _, valor in columnas]
+
+
+def exportar_excel(queryset, destino):
+    """Escribe el .xlsx en `destino`. Retorna cuántos proveedores se exportaron."""
+    libro = openpyxl.Workbook(write_only=True)
+    hojas = {
+        'proveedores': _hoja(libro, 'Proveedores', COLUMNAS_PROVEEDOR),
+        'contactos': _hoja(libro, 'Contactos', COLUMNAS_CONTACTO),
+        'documentos': _hoja(libro, 'Documentos', COLUMNAS_DOCUMENTO),
+        'productos_servicios': _hoja(libro, 'Productos', COLUMNAS_PRODUCTO),
+    }
+    relaciones = [
+        ('contactos', COLUMNAS_CONTACTO),
+        ('documentos', COLUMNAS_DOCUMENTO),
+        ('productos_servicios', COLUMNAS_PRODUCTO),
+    ]
+    total = 0
+    for bloque in bloques(queryset):
+        for proveedor in bloque:
+            hojas['proveedores'].append(_fila(COLUMNAS_PROVEEDOR, proveedor))
+            for relacion, columnas in relaciones:
+                for objeto in _relacionados(proveedor, relacion):
+                    hojas[relacion].append(_fila(columnas, objeto))
+        total += len(bloque)
+    libro.save(destino)
+    return total
+
+
+# =============================================================================
+# PDF
+# =============================================================================
+
+class _DirectorioPDF:
+    """Escribe líneas y filas de tabla sobre el canvas, con salto de página"""
+
+    ANCHO, ALTO = landscape(letter)
+    MARGEN = 12 * mm
+    FUENTE = 'Helvetica'
+    NEGRITA = 'Helvetica-Bold'
+
+    def __init__(self, destino, titulo):
+        self.canvas = canvas.Canvas(destino, pagesize=(self.ANCHO, self.ALTO))
+        self.canvas.setTitle(titulo)
+        self.titulo = titulo
+        self.pagina = 0
+        self._nueva_pagina()
+
+    def _nueva_pagina(self):
+        if self.pagina:
+            self.canvas.showPage()
+        self.pagina += 1
+        self.canvas.setFont(self.FUENTE, 7)
+        self.canvas.drawString(self.MARGEN, self.MARGEN / 2, f'American Carpas 1 SAS - {self.titulo}')
+        self.canvas.drawRightString(self.ANCHO - self.MARGEN, self.MARGEN / 2, f'Página {self.pagina}')
+        self.y = self.ALTO - self.MARGEN
+
+    def espacio(self, alto):
+        """Salta de página si no caben `alto` puntos"""
+        if self.y - alto < self.MARGEN:
+            self._nueva_pagina()
+
+    def _recortar(self, texto, fuente, tamano, ancho):
+        texto = '' if texto is None else str(texto)
+        if stringWidth(texto, fuente, tamano) <= ancho:
+            return texto
+        while texto and stringWidth(texto + '…', fuente, tamano) > ancho:
+            texto = texto[:-1]
+        return texto + '…'
+
+    def linea(self, texto, tamano=9, negrita=False, sangria=0):
+        alto = tamano + 3
+        self.espacio(alto)
+        self.y -= alto
+        fuente = self.NEGRITA if negrita else self.FUENTE
+        self.canvas.setFont(fuente, tamano)
+        ancho = self.ANCHO - 2 * self.MARGEN - sangria
+        self.canvas.drawString(self.MARGEN + sangria, self.y, self._recortar(texto, fuente, tamano, ancho))
+
+    def fila(self, valores, anchos, tamano=7, negrita=False, sangria=6 * mm):
+        alto = tamano + 3
+        self.espacio(alto)
+        self.y -= alto
+        fuente = self.NEGRITA if negrita else self.FUENTE
+        self.canvas.setFont(fuente, tamano)
+        x = self.MARGEN + sangria
+        for valor, ancho in zip(valores, anchos):
+            self.canvas.drawString(x, self.y, self._recortar(valor, fuente, tamano, ancho - 2))
+            x += ancho
+
+    def separador(self):
+        self.espacio(6)
+        self.y -= 4
+        self.canvas.setLineWidth(0.3)
+        self.canvas.line(self.MARGEN, self.y, self.ANCHO - self.MARGEN, self.y)
+
+    def guardar(self):
+        self.canvas.save()
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+# Columnas de las tablas del PDF: (encabezado, ancho en mm, valor)
+PDF_CONTACTOS = [
+    ('Nombre', 55, lambda c: f'{c.nombres} {c.apellidos}' + (' (principal)' if c.es_contacto_principal else '')),
+    ('Cargo', 45, lambda c: c.cargo),
+    ('Teléfono', 35, lambda c: c.telefono_movil or c.telefono_fijo),
+    ('Email', 70, lambda c: c.email),
+]
+
+PDF_DOCUMENTOS = [
+    ('Documento', 70, lambda d: d.id_tipo_documento.nombre_tipo_documento),
+    ('Número', 40, lambda d: d.numero_documento),
+    ('Vencimiento', 25, lambda d: d.fecha_vencimiento),
+    ('Estado', 25, lambda d: ESTADOS_DOCUMENTO.get(d.estado_vigente, d.estado_vigente)),
+]
+
+PDF_PRODUCTOS = [
+    ('SKU', 28, lambda p: p.sku_codigo),
+    ('Nombre', 80, lambda p: p.nombre),
+    ('Unidad', 25, lambda p: p.get_unidad_medida_display()),
+    ('Precio Final', 30, lambda p: f'{p.moneda} {p.get_precio_final():,.2f}'),
+    ('Entrega', 18, lambda p: f'{p.tiempo_entrega_dias} días'),
+    ('Disponible', 18, lambda p: _si_no(p.disponible)),
+]
+
+
+def _tabla_pdf(pdf, titulo, columnas, objetos):
+    if not objetos:
+        return
+    anchos = [ancho * mm for _, ancho, _ in columnas]
+    pdf.linea(f'{titulo} ({len(objetos)})', tamano=8, negrita=True, sangria=3 * mm)
+    pdf.fila([encabezado for encabezado, _, _ in columnas], anchos, negrita=True)
+    for objeto in objetos:
+        pdf.fila([_texto(valor(objeto)) for _, _, valor in columnas], anchos)
+
+
+def exportar_pdf(queryset, destino):
+    """Escribe el directorio en PDF en `destino`. Retorna cuántos proveedores se exportaron."""
+    pdf = _DirectorioPDF(destino, f'Directorio de Proveedores {date.today():%Y-%m-%d}')
+    pdf.linea('Directorio de Proveedores', tamano=16, negrita=True)
+    pdf.linea(f'Generado el {timezone.now():%Y-%m-%d %H:%M}', tamano=8)
+    total = 0
+    for bloque in bloques(queryset):
+        for proveedor in bloque:
+            pdf.separador()
+            # Que el encabezado no quede solo al final de una página
+            pdf.espacio(45)
+            pdf.linea(f'{proveedor.razon_social} - {proveedor.get_documento_completo()}', tamano=11, negrita=True)
+            pdf.linea(
+                f'{proveedor.get_estado_display()} | {proveedor.ciudad} | {proveedor.direccion} | '
+                f'Tel. {proveedor.telefono_principal} | {proveedor.email_principal}',
+                tamano=8,
+            )
+            pdf.linea(
+                f'Pago: {proveedor.condiciones_pago or "-"} | '
+                f'Entrega promedio: {proveedor.tiempo_entrega_promedio} días | '
+                f'Calificación: {proveedor.calificacion}',
+                tamano=8,
+            )
+            _tabla_pdf(pdf, 'Contactos', PDF_CONTACTOS, list(proveedor.contactos.all()))
+            _tabla_pdf(pdf, 'Documentos', PDF_DOCUMENTOS, list(proveedor.documentos.all()))
+            _tabla_pdf(pdf, 'Productos y Servicios', PDF_PRODUCTOS, list(proveedor.productos_servicios.all()))
+        total += len(bloque)
+    if not total:
+        pdf.linea('No hay proveedores para exportar.', tamano=9)
+    pdf.guardar()
+    return total
+
+
+EXPORTADORES = {
+    'excel': exportar_excel,
+    'pdf': exportar_pdf,
+}
+
+
+def nombre_archivo(formato):
+    return f"proveedores_{timezone.now():%Y%m%d_%H%M}.{FORMATOS[formato][0]}"
@@ -14,6 +14,7 @@ from .models import (
     DocumentoProveedor,
     ProductoServicioProveedor
 )
+from .categorias import ArbolCategorias
 
 
 # =====================================================
@@ -131,10 +132,14 @@ class CategoriaProveedorForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        campo = self.fields['categoria_padre']
         if self.instance.pk:
-            self.fields['categoria_padre'].queryset = CategoriaProveedor.objects.filter(
-                activo=True
-            ).exclude(pk=self.instance.pk)
+            # Ni la misma categoría ni sus subcategorías pueden ser el padre
+            campo.queryset = CategoriaProveedor.objects.filter(activo=True).exclude(
+                CategoriaProveedor.filtro_subarbol(self.instance.ruta)
+            )
+        # Opciones en forma de árbol, cargado con una sola consulta
+        campo.choices = ArbolCategorias(campo.queryset).opciones(vacio=campo.empty_label)
 
 
 class TipoDocumentoProveedorForm(forms.ModelForm):
@@ -640,6 +645,11 @@ class ProveedorForm(forms.ModelForm):
             )
         
         return numero_documento
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campo = self.fields['categoria_principal']
+        campo.choices = ArbolCategorias(campo.queryset).opciones(vacio=campo.empty_label)
 
 
 # =====================================================
@@ -1132,4 +1142,33 @@ class ProductoServicioProveedorForm(forms.ModelForm):
         if commit:
             producto.save()
         
-        return producto
\ No newline at end of file
+        return producto
+
+
+# =====================================================
+# IMPORTACIÓN DE CATÁLOGO
+# =====================================================
+
+class ImportarCatalogoForm(forms.Form):
+    """Carga de la lista de precios de un proveedor (.xlsx o .csv)"""
+    
+    archivo = forms.FileField(
+        label='Lista de Precios',
+        widget=forms.FileInput(attrs={
+            'class': 'form-control',
+            'accept': '.xlsx,.csv'
+        }),
+        help_text='Formatos permitidos: Excel (.xlsx) o CSV. La primera fila debe tener los encabezados'
+    )
+    
+    simular = forms.BooleanField(
+        label='Solo simular (ver cambios sin guardar)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError('Formato no soportado, use .xlsx o .csv')
+        return archivo
@@ -0,0 +1,229 @@
+"""
+Historial de precios de productos/servicios de proveedores
+American Carpas 1 SAS
+
+HistorialPrecioProducto es de solo inserción: una fila al crear un producto,
+en cada cambio de precio (signals de proveedores/signals.py) y en las
+importaciones de listas (proveedores/importacion.py), donde los precios
+confirmados sin cambio se registran una sola vez por mes y producto.
+
+ResumenPrecioMensual guarda por material (clave + unidad) y mes el mínimo,
+promedio y máximo en COP. Al registrar precios solo se recalculan los meses
+y materiales afectados, con una consulta agrupada y un upsert; así las
+gráficas de inflación por material no recorren el historial completo.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from american_carpas_project.upsert import upsert
+
+from .comparador import TASAS_CAMBIO
+from .models import HistorialPrecioProducto, ProductoServicioProveedor, ResumenPrecioMensual
+
+
+# Campos del producto que cuentan como cambio de precio
+CAMPOS_PRECIO = ('precio_unitario', 'moneda', 'precio_especial', 'descuento_porcentaje')
+
+TAMANO_LOTE = 1000
+
+DOS_DECIMALES = Decimal('0.01')
+
+
+# =============================================================================
+# REGISTRO
+# =============================================================================
+
+def clave_material(producto):
+    """SKU en mayúsculas o, sin SKU, el nombre (como comparador.clave_comparacion)"""
+    return ((producto.sku_codigo or '').strip() or producto.nombre.strip()).upper()[:200]
+
+
+def valores_precio(producto):
+    """Tupla con los campos de precio (normalizados), para detectar cambios"""
+    return tuple(
+        producto._meta.get_field(campo).to_python(getattr(producto, campo))
+        for campo in CAMPOS_PRECIO
+    )
+
+
+def entrada(producto, origen, fecha):
+    """Fila de historial (sin guardar) con el precio actual del producto"""
+    precio_final = Decimal(producto.get_precio_final()).quantize(DOS_DECIMALES)
+    tasa = TASAS_CAMBIO.get(producto.moneda)
+    precio_cop = None
+    if tasa is not None:
+        precio_cop = (precio_final * Decimal(str(tasa))).quantize(DOS_DECIMALES)
+    return HistorialPrecioProducto(
+        producto_id=producto.pk,
+        proveedor_id=producto.id_proveedor_id,
+        clave=clave_material(producto),
+        unidad_medida=producto.unidad_medida,
+        moneda=producto.moneda,
+        precio_unitario=producto.precio_unitario,
+        precio_final=precio_final,
+        precio_cop=precio_cop,
+        origen=origen,
+        fecha=fecha,
+    )
+
+
+def registrar(productos, origen, fecha=None):
+    """
+    Agrega una fila por producto y actualiza el resumen de los materiales
+    y el mes afectados. Retorna cuántas filas se agregaron.
+    """
+    fecha = fecha or timezone.now()
+    filas = [entrada(producto, origen, fecha) for producto in productos]
+    if not filas:
+        return 0
+    HistorialPrecioProducto.objects.bulk_create(filas, batch_size=TAMANO_LOTE)
+    actualizar_resumen({(fila.clave, fila.unidad_medida) for fila in filas}, fecha.date())
+    return len(filas)
+
+
+def sin_registro_en_mes(ids_productos, fecha=None):
+    """De los productos indicados, los que no tienen historial en el mes de `fecha`"""
+    mes = inicio_mes((fecha or timezone.now()).date())
+    ids = list(ids_productos)
+    con_registro = set()
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        con_registro.update(
+            HistorialPrecioProducto.objects
+            .filter(producto_id__in=ids[inicio:inicio + TAMANO_LOTE], fecha__gte=mes)
+            .values_list('producto_id', flat=True)
+        )
+    return [pk for pk in ids if pk not in con_registro]
+
+
+def inicializar_historial():
+    """
+    Registra el precio actual de los productos que no tienen historial
+    (productos anteriores al historial). Retorna cuántos se registraron.
+    """
+    ids = list(
+        ProductoServicioProveedor.objects
+        .filter(historial_precios__isnull=True)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+    )
+    fecha = timezone.now()
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        registrar(
+            ProductoServicioProveedor.objects.filter(pk__in=ids[inicio:inicio + TAMANO_LOTE]),
+            'MANUAL',
+            fecha,
+        )
+    return len(ids)
+
+
+# =============================================================================
+# RESUMEN MENSUAL
+# =============================================================================
+
+def inicio_mes(dia):
+    return dia.replace(day=1)
+
+
+def siguiente_mes(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _guardar_resumen(filas):
+    ahora = timezone.now()
+    upsert(
+        ResumenPrecioMensual,
+        [
+            ResumenPrecioMensual(
+                clave=fila['clave'],
+                unidad_medida=fila['unidad_medida'],
+                mes=fila['mes'].date() if hasattr(fila['mes'], 'date') else fila['mes'],
+                precio_minimo=fila['minimo'],
+                precio_promedio=fila['promedio'].quantize(DOS_DECIMALES),
+                precio_maximo=fila['maximo'],
+                observaciones=fila['observaciones'],
+                proveedores=fila['proveedores'],
+                fecha_actualizacion=ahora,
+            )
+            for fila in filas
+        ],
+        unique_fields=['clave', 'unidad_medida', 'mes'],
+        update_fields=[
+            'precio_minimo', 'precio_promedio', 'precio_maximo',
+            'observaciones', 'proveedores', 'fecha_actualizacion',
+        ],
+        batch_size=TAMANO_LOTE,
+    )
+    return len(filas)
+
+
+def _agregar(historial):
+    """Mínimo, promedio y máximo en COP por material y mes"""
+    return list(
+        historial
+        .filter(precio_cop__isnull=False)
+        .annotate(mes=TruncMonth('fecha'))
+        .values('clave', 'unidad_medida', 'mes')
+        .annotate(
+            minimo=Min('precio_cop'),
+            promedio=Avg('precio_cop'),
+            maximo=Max('precio_cop'),
+            observaciones=Count('pk'),
+            proveedores=Count('proveedor', distinct=True),
+        )
+        .order_by()
+    )
+
+
+def actualizar_resumen(materiales, dia):
+    """Recalcula el mes de `dia` para los materiales [(clave, unidad), ...]"""
+    mes = inicio_mes(dia)
+    materiales = set(materiales)
+    claves = sorted({clave for clave, _ in materiales})
+    filas = []
+    for inicio in range(0, len(claves), TAMANO_LOTE):
+        filas.extend(
+            fila for fila in _agregar(HistorialPrecioProducto.objects.filter(
+                clave__in=claves[inicio:inicio + TAMANO_LOTE],
+                fecha__gte=mes,
+                fecha__lt=siguiente_mes(mes),
+            ))
+            if (fila['clave'], fila['unidad_medida']) in materiales
+        )
+    return _guardar_resumen(filas)
+
+
+def reconstruir_resumen(desde=None):
+    """Recalcula el resumen completo (o desde el mes de `desde`). Retorna las filas escritas."""
+    historial = HistorialPrecioProducto.objects.all()
+    if desde:
+        historial = historial.filter(fecha__gte=inicio_mes(desde))
+    return _guardar_resumen(_agregar(historial))
+
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+
+def serie_producto(producto_id, desde=None):
+    """Serie compacta [(fecha, precio_final, moneda), ...] de un producto, en orden"""
+    historial = HistorialPrecioProducto.objects.filter(producto_id=producto_id)
+    if desde:
+        historial = historial.filter(fecha__gte=desde)
+    return list(historial.order_by('fecha', 'pk').values_list('fecha', 'precio_final', 'moneda'))
+
+
+def serie_mensual(clave, unidad_medida=None, desde=None, hasta=None):
+    """Resumen mensual de un material, del mes más antiguo al más reciente"""
+    resumen = ResumenPrecioMensual.objects.filter(clave=clave.strip().upper())
+    if unidad_medida:
+        resumen = resumen.filter(unidad_medida=unidad_medida)
+    if desde:
+        resumen = resumen.filter(mes__gte=inicio_mes(desde))
+    if hasta:
+        resumen = resumen.filter(mes__lte=hasta)
+    return list(resumen.order_by('unidad_medida', 'mes'))
@@ -0,0 +1,418 @@
+"""
+Importación masiva del catálogo (lista de precios) de un proveedor
+American Carpas 1 SAS
+
+Lee un .xlsx (openpyxl en modo solo lectura) o .csv fila por fila y cruza
+cada fila con los productos existentes del proveedor por SKU (sin distinguir
+mayúsculas), con un diccionario cargado en una sola consulta:
+
+- SKU nuevo: se crea el producto (bulk_create).
+- SKU existente con algún dato distinto: se actualizan solo esas filas
+  (bulk_update) y, si cambió el precio, se marca
+  fecha_ultima_actualizacion_precio.
+- SKU existente sin cambios: la lista confirma el precio, se marca la fecha
+  con un solo UPDATE.
+
+Si alguna fila tiene errores no se guarda nada y se reportan por número de
+fila. El resultado incluye el informe de cambios de precio (anterior, nuevo,
+variación). Como las operaciones masivas no disparan signals, el índice de
+búsqueda se actualiza aquí para los productos creados o con textos nuevos, y
+el historial de precios registra los productos nuevos, los cambios de precio
+y (una vez por mes y producto) los precios confirmados.
+
+Encabezados (sin importar mayúsculas, tildes ni espacios):
+
+    sku, nombre (obligatorio para productos nuevos), precio,
+    tipo*, moneda*, unidad_medida*, precio_especial*, descuento*,
+    tiempo_entrega_dias*, cantidad_minima*, marca*, descripcion*,
+    disponible* (si/no)
+
+    (* opcionales: si la columna no está, el dato existente no se modifica)
+"""
+
+import csv
+import io
+import unicodedata
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from openpyxl.utils.exceptions import InvalidFileException
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    MONEDA_CHOICES,
+    TIPO_PRODUCTO_SERVICIO_CHOICES,
+    UNIDAD_MEDIDA_CHOICES,
+    ProductoServicioProveedor,
+)
+from . import busqueda, historial_precios
+
+
+# Máximo de filas por archivo
+MAXIMO_FILAS = 50000
+
+TAMANO_LOTE = 1000
+
+# Límite de los campos de precio (DecimalField de 15 dígitos, 2 decimales)
+VALOR_MAXIMO = Decimal('1E13')
+
+# Columnas de la plantilla descargable
+COLUMNAS_PLANTILLA = [
+    'sku', 'nombre', 'precio', 'tipo', 'moneda', 'unidad_medida', 'precio_especial', 'descuento',
+    'tiempo_entrega_dias', 'cantidad_minima', 'marca', 'descripcion', 'disponible',
+]
+
+# Otros nombres aceptados para los encabezados
+ALIAS_COLUMNAS = {
+    'sku_codigo': 'sku',
+    'codigo': 'sku',
+    'referencia': 'sku',
+    'precio_unitario': 'precio',
+    'valor': 'precio',
+    'unidad': 'unidad_medida',
+    'descuento_porcentaje': 'descuento',
+    'entrega_dias': 'tiempo_entrega_dias',
+}
+
+# Campos que cuentan como cambio de precio
+CAMPOS_PRECIO = set(historial_precios.CAMPOS_PRECIO)
+
+# Campos que alimentan el índice de búsqueda
+CAMPOS_INDEXADOS = set(busqueda.CAMPOS['PRODUCTO'])
+
+VALORES_SI = {'si', 's', 'x', '1', 'true', 'verdadero'}
+VALORES_NO = {'no', 'n', '0', 'false', 'falso'}
+
+
+class ErrorFila(Exception):
+    """Error de validación de una celda de la lista de precios"""
+
+
+# =============================================================================
+# LECTURA DEL ARCHIVO
+# =============================================================================
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni espacios extremos: 'Unidad Medida ' -> 'unidad medida'"""
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(texto.lower().split())
+
+
+def _encabezado(valor):
+    encabezado = normalizar(valor or '').replace(' ', '_')
+    return ALIAS_COLUMNAS.get(encabezado, encabezado)
+
+
+def leer_filas(archivo):
+    """
+    Genera (número_de_fila, {encabezado: valor}) sin cargar todo el archivo
+    en memoria. Acepta .xlsx y .csv (UTF-8 o UTF-8 con BOM).
+    """
+    nombre = (getattr(archivo, 'name', '') or '').lower()
+    libro = None
+    if nombre.endswith('.csv'):
+        texto = io.TextIOWrapper(getattr(archivo, 'file', archivo), encoding='utf-8-sig', newline='')
+        muestra = texto.read(4096)
+        texto.seek(0)
+        # Excel en español guarda los CSV separados por ';'
+        separador = ';' if muestra.count(';') > muestra.count(',') else ','
+        filas = enumerate(csv.reader(texto, delimiter=separador), start=1)
+    elif nombre.endswith('.xlsx'):
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        filas = enumerate(libro.active.iter_rows(values_only=True), start=1)
+    else:
+        raise ErrorFila('Formato no soportado, use .xlsx o .csv')
+
+    # En modo solo lectura openpyxl deja el archivo abierto hasta close()
+    try:
+        encabezados = None
+        for numero, valores in filas:
+            if encabezados is None:
+                encabezados = [_encabezado(v) for v in valores]
+                if 'sku' not in encabezados or 'precio' not in encabezados:
+                    raise ErrorFila("La primera fila debe tener al menos las columnas 'sku' y 'precio'")
+                continue
+            if not any(v not in (None, '') for v in valores):
+                continue
+            yield numero, dict(zip(encabezados, valores))
+    finally:
+        if libro is not None:
+            libro.close()
+
+
+# =============================================================================
+# VALIDACIÓN DE CELDAS
+# =============================================================================
+
+def _opciones(choices):
+    """{código o etiqueta normalizados: código} de unos choices"""
+    mapa = {}
+    for codigo, etiqueta in choices:
+        mapa[normalizar(codigo)] = codigo
+        mapa[normalizar(codigo.replace('_', ' '))] = codigo
+        mapa[normalizar(etiqueta)] = codigo
+    return mapa
+
+
+MONEDAS = _opciones(MONEDA_CHOICES)
+UNIDADES = _opciones(UNIDAD_MEDIDA_CHOICES)
+TIPOS = _opciones(TIPO_PRODUCTO_SERVICIO_CHOICES)
+
+
+def _texto(fila, campo, requerido=False, largo=None):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if requerido and not valor:
+        raise ErrorFila(f"'{campo}' es obligatorio")
+    if largo and len(valor) > largo:
+        raise ErrorFila(f"'{campo}' supera {largo} caracteres")
+    return valor or None
+
+
+def _decimal(fila, campo, requerido=False, minimo=None, maximo=None):
+    valor = fila.get(campo)
+    if valor in (None, ''):
+        if requerido:
+            raise ErrorFila(f"'{campo}' es obligatorio")
+        return None
+    try:
+        numero = Decimal(str(valor).strip().replace('$', '').replace(',', '.'))
+    except InvalidOperation:
+        raise ErrorFila(f"'{campo}' no es un número: {valor}")
+    if not numero.is_finite():
+        raise ErrorFila(f"'{campo}' no es un número: {valor}")
+    if abs(numero) >= VALOR_MAXIMO:
+        raise ErrorFila(f"'{campo}' es demasiado grande: {valor}")
+    if minimo is not None and numero < minimo:
+        raise ErrorFila(f"'{campo}' debe ser mayor o igual a {minimo}")
+    if maximo is not None and numero > maximo:
+        raise ErrorFila(f"'{campo}' debe ser menor o igual a {maximo}")
+    return numero.quantize(Decimal('0.01'))
+
+
+def _entero(fila, campo, minimo=0):
+    numero = _decimal(fila, campo, minimo=minimo)
+    if numero is None:
+        return None
+    if numero != numero.to_integral_value():
+        raise ErrorFila(f"'{campo}' debe ser un número entero")
+    return int(numero)
+
+
+def _opcion(fila, campo, mapa):
+    valor = _texto(fila, campo)
+    if valor is None:
+        return None
+    codigo = mapa.get(normalizar(valor))
+    if codigo is None:
+        raise ErrorFila(f"'{campo}' no es un valor válido: {valor}")
+    return codigo
+
+
+def _booleano(fila, campo):
+    valor = _texto(fila, campo)
+    if valor is None:
+        return None
+    valor = normalizar(valor)
+    if valor in VALORES_SI:
+        return True
+    if valor in VALORES_NO:
+        return False
+    raise ErrorFila(f"'{campo}' debe ser SI o NO: {valor}")
+
+
+def datos_fila(fila):
+    """
+    {campo del modelo: valor} de una fila. Solo incluye las columnas
+    presentes en el archivo y con valor, para no borrar datos existentes.
+    """
+    datos = {
+        'sku_codigo': _texto(fila, 'sku', requerido=True, largo=50),
+        'precio_unitario': _decimal(fila, 'precio', requerido=True, minimo=0),
+        'nombre': _texto(fila, 'nombre', largo=200),
+        'moneda': _opcion(fila, 'moneda', MONEDAS),
+        'unidad_medida': _opcion(fila, 'unidad_medida', UNIDADES),
+        'tipo': _opcion(fila, 'tipo', TIPOS),
+        'precio_especial': _decimal(fila, 'precio_especial', minimo=0),
+        'descuento_porcentaje': _decimal(fila, 'descuento', minimo=0, maximo=100),
+        'tiempo_entrega_dias': _entero(fila, 'tiempo_entrega_dias'),
+        'cantidad_minima': _entero(fila, 'cantidad_minima', minimo=1),
+        'marca': _texto(fila, 'marca', largo=100),
+        'descripcion': _texto(fila, 'descripcion'),
+        'disponible': _booleano(fila, 'disponible'),
+    }
+    return {campo: valor for campo, valor in datos.items() if valor is not None}
+
+
+def clave_sku(sku):
+    return sku.strip().upper()
+
+
+# =============================================================================
+# IMPORTACIÓN
+# =============================================================================
+
+def _variacion(anterior, nuevo):
+    if not anterior:
+        return None
+    return ((nuevo - anterior) * 100 / anterior).quantize(Decimal('0.01'))
+
+
+def validar_catalogo(proveedor, archivo):
+    """
+    Cruza el archivo con el catálogo del proveedor sin guardar nada.
+    Retorna un dict con 'nuevos' (instancias sin guardar), 'actualizados'
+    [(producto, campos cambiados)], 'sin_cambios' [pk], 'cambios_precio'
+    (informe) y 'errores' [(número_fila, mensaje)].
+    """
+    existentes = {
+        clave_sku(producto.sku_codigo): producto
+        for producto in ProductoServicioProveedor.objects.filter(
+            id_proveedor=proveedor, sku_codigo__isnull=False
+        ).exclude(sku_codigo='')
+    }
+    hoy = timezone.now().date()
+    resultado = {'nuevos': [], 'actualizados': [], 'sin_cambios': [], 'cambios_precio': [], 'errores': []}
+    errores = resultado['errores']
+    vistos = {}
+    filas = 0
+
+    try:
+        for numero, fila in leer_filas(archivo):
+            filas += 1
+            if filas > MAXIMO_FILAS:
+                errores.append((numero, f'El archivo supera el máximo de {MAXIMO_FILAS} filas'))
+                break
+            try:
+                datos = datos_fila(fila)
+                clave = clave_sku(datos['sku_codigo'])
+                if clave in vistos:
+                    raise ErrorFila(f"El SKU {datos['sku_codigo']} ya aparece en la fila {vistos[clave]}")
+                vistos[clave] = numero
+
+                producto = existentes.get(clave)
+                if producto is None:
+                    if 'nombre' not in datos:
+                        raise ErrorFila("'nombre' es obligatorio para productos nuevos")
+                    resultado['nuevos'].append(ProductoServicioProveedor(
+                        id_proveedor=proveedor, fecha_ultima_actualizacion_precio=hoy, **datos
+                    ))
+                    continue
+
+                # El SKU se conserva como está guardado
+                datos.pop('sku_codigo')
+                cambiados = {campo for campo, valor in datos.items() if getattr(producto, campo) != valor}
+                if not cambiados:
+                    resultado['sin_cambios'].append(producto.pk)
+                    continue
+
+                if cambiados & CAMPOS_PRECIO:
+                    anterior = producto.get_precio_final()
+                    moneda_anterior = producto.moneda
+                for campo in cambiados:
+                    setattr(producto, campo, datos[campo])
+                if cambiados & CAMPOS_PRECIO:
+                    nuevo = producto.get_precio_final()
+                    resultado['cambios_precio'].append({
+                        'fila': numero,
+                        'sku': producto.sku_codigo,
+                        'nombre': producto.nombre,
+                        'moneda_anterior': moneda_anterior,
+                        'precio_anterior': anterior,
+                        'moneda': producto.moneda,
+                        'precio_nuevo': nuevo,
+                        'variacion': _variacion(anterior, nuevo) if moneda_anterior == producto.moneda else None,
+                    })
+                resultado['actualizados'].append((producto, cambiados))
+            except ErrorFila as e:
+                errores.append((numero, str(e)))
+    except ErrorFila as e:
+        errores.append((0, str(e)))
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, InvalidFileException, OSError, KeyError) as e:
+        errores.append((0, f'No se pudo leer el archivo: {e}'))
+
+    if not filas and not errores:
+        errores.append((0, 'El archivo no tiene filas para importar'))
+    return resultado
+
+
+@transaction.atomic
+def guardar_catalogo(proveedor, resultado):
+    """Aplica un resultado de validar_catalogo() sin errores"""
+    ahora = timezone.now()
+    hoy = ahora.date()
+
+    # bulk_update no aplica auto_now: fecha_modificacion se pone a mano para
+    # que los indicadores detecten el cambio
+    campos = {'fecha_modificacion'}
+    actualizados = []
+    reindexar = []
+    cambios_precio = []
+    for producto, cambiados in resultado['actualizados']:
+        if cambiados & CAMPOS_PRECIO:
+            producto.fecha_ultima_actualizacion_precio = hoy
+            cambios_precio.append(producto)
+            cambiados = cambiados | {'fecha_ultima_actualizacion_precio'}
+        producto.fecha_modificacion = ahora
+        campos |= cambiados
+        actualizados.append(producto)
+        if cambiados & CAMPOS_INDEXADOS:
+            reindexar.append(producto)
+    ProductoServicioProveedor.objects.bulk_update(actualizados, sorted(campos), batch_size=TAMANO_LOTE)
+
+    # Precios confirmados por la lista (sin cambios)
+    sin_cambios = resultado['sin_cambios']
+    for inicio in range(0, len(sin_cambios), TAMANO_LOTE):
+        ProductoServicioProveedor.objects.filter(pk__in=sin_cambios[inicio:inicio + TAMANO_LOTE]).update(
+            fecha_ultima_actualizacion_precio=hoy, fecha_modificacion=ahora,
+        )
+
+    nuevos = resultado['nuevos']
+    ProductoServicioProveedor.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+
+    # MySQL no devuelve las llaves de bulk_create: recuperarlas por SKU
+    skus = [producto.sku_codigo for producto in nuevos]
+    creados = []
+    for inicio in range(0, len(skus), TAMANO_LOTE):
+        creados.extend(ProductoServicioProveedor.objects.filter(
+            id_proveedor=proveedor, sku_codigo__in=skus[inicio:inicio + TAMANO_LOTE]
+        ))
+    reindexar.extend(creados)
+    for inicio in range(0, len(reindexar), TAMANO_LOTE):
+        busqueda.indexar('PRODUCTO', reindexar[inicio:inicio + TAMANO_LOTE])
+
+    historial_precios.registrar(creados + cambios_precio, 'IMPORTACION', ahora)
+    confirmados = historial_precios.sin_registro_en_mes(sin_cambios, ahora)
+    for inicio in range(0, len(confirmados), TAMANO_LOTE):
+        historial_precios.registrar(
+            ProductoServicioProveedor.objects.filter(pk__in=confirmados[inicio:inicio + TAMANO_LOTE]),
+            'CONFIRMACION',
+            ahora,
+        )
+
+    return {
+        'creados': len(nuevos),
+        'actualizados': len(actualizados),
+        'sin_cambios': len(sin_cambios),
+    }
+
+
+def importar_catalogo(proveedor, archivo, simular=False):
+    """
+    Valida y, si todas las filas son correctas y no es una simulación,
+    guarda. Retorna el resultado de validar_catalogo() con el resumen.
+    """
+    resultado = validar_catalogo(proveedor, archivo)
+    resultado['resumen'] = {
+        'creados': len(resultado['nuevos']),
+        'actualizados': len(resultado['actualizados']),
+        'sin_cambios': len(resultado['sin_cambios']),
+    }
+    resultado['guardado'] = False
+    if not resultado['errores'] and not simular:
+        resultado['resumen'] = guardar_catalogo(proveedor, resultado)
+        resultado['guardado'] = True
+    return resultado
@@ -0,0 +1,359 @@
+"""
+Indicadores de desempeño de proveedores
+American Carpas 1 SAS
+
+Calcula por proveedor, con consultas agrupadas y no proveedor por proveedor:
+
+- Cumplimiento documental: tipos de documento obligatorios cubiertos por un
+  documento no vencido (o, si no hay obligatorios, documentos no vencidos
+  sobre el total), con el estado de proveedores/vigencia.py.
+- Competitividad de precio: promedio de precio_mínimo_del_grupo / precio de
+  cada oferta comparable (proveedores/comparador.py); 100 = siempre el más
+  barato.
+- Entrega: promedio, mínimo y máximo de tiempo_entrega_dias del catálogo, y
+  un indicador contra PROVEEDORES_DIAS_ENTREGA_REFERENCIA.
+- Frescura del catálogo: productos con precio actualizado en los últimos
+  PROVEEDORES_DIAS_PRECIO_VIGENTE días.
+
+El puntaje es el promedio ponderado (PROVEEDORES_PESOS_INDICADOR) de los
+indicadores que el proveedor tenga; los que no aplican no cuentan.
+
+Actualización incremental: se recalculan los proveedores sin indicador, los
+calculados antes de hoy (los estados de documentos y la frescura dependen de
+la fecha), los que tuvieron cambios en su ficha, documentos o productos
+después del último cálculo, los que tienen menos documentos o productos
+activos que los guardados (eliminaciones) y los que ofrecen un material cuyo
+grupo de comparación cambió: otra oferta del grupo (o su proveedor) se
+modificó después del cálculo, o se eliminó un producto del grupo de un
+proveedor pendiente (se reconoce por el historial de precios). Así la primera
+corrida del día lo recalcula todo y las siguientes solo lo que cambió, y la
+competitividad se calcula solo sobre los grupos de los proveedores que se
+recalculan.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Avg, Count, Exists, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from american_carpas_project.upsert import upsert
+
+from .models import (
+    DocumentoProveedor,
+    HistorialPrecioProducto,
+    IndicadorProveedor,
+    ProductoServicioProveedor,
+    Proveedor,
+    TipoDocumentoProveedor,
+)
+from .vigencia import anotar_estado
+from . import comparador
+
+
+# Peso de cada indicador en el puntaje (se renormalizan si falta alguno)
+PESOS_INDICADOR = getattr(settings, 'PROVEEDORES_PESOS_INDICADOR', {
+    'documentos': Decimal('0.35'),
+    'precio': Decimal('0.30'),
+    'entrega': Decimal('0.20'),
+    'catalogo': Decimal('0.15'),
+})
+
+# Plazo de entrega que obtiene el 100% del indicador de entrega
+DIAS_ENTREGA_REFERENCIA = getattr(settings, 'PROVEEDORES_DIAS_ENTREGA_REFERENCIA', 5)
+
+# Antigüedad máxima de un precio para considerarlo vigente
+DIAS_PRECIO_VIGENTE = getattr(settings, 'PROVEEDORES_DIAS_PRECIO_VIGENTE', 90)
+
+TAMANO_BLOQUE = 500
+
+CIEN = Decimal('100')
+DOS_DECIMALES = Decimal('0.01')
+
+ESTADOS_VALIDOS = ['VIGENTE', 'POR_VENCER', 'NO_APLICA']
+
+
+def _porcentaje(parte, total):
+    if not total:
+        return None
+    return (Decimal(parte) * CIEN / Decimal(total)).quantize(DOS_DECIMALES)
+
+
+# =============================================================================
+# SELECCIÓN INCREMENTAL
+# =============================================================================
+
+def _conteo(modelo, **filtros):
+    """Subconsulta con cuántas filas de `modelo` tiene el proveedor (0 si ninguna)"""
+    return Coalesce(
+        Subquery(
+            modelo.objects.filter(id_proveedor=OuterRef('pk'), **filtros)
+            .order_by().values('id_proveedor').annotate(total=Count('pk')).values('total')
+        ),
+        0,
+    )
+
+
+def _con_grupo(queryset):
+    """Anota clave_grupo: la clave de comparación de la oferta (ver comparador)"""
+    return queryset.annotate(clave_grupo=comparador.clave_comparacion())
+
+
+def _mismo_grupo(queryset):
+    return queryset.filter(clave_grupo=OuterRef('clave_grupo'), unidad_medida=OuterRef('unidad_medida'))
+
+
+def proveedores_pendientes(hoy=None):
+    """
+    Ids de proveedores cuyo indicador falta, es de otro día o quedó
+    desactualizado: cambios en la ficha, documentos o productos (incluidos
+    los eliminados, que se notan en los conteos guardados) y cambios en los
+    grupos de comparación de sus ofertas.
+    """
+    hoy = hoy or timezone.now().date()
+    calculo = OuterRef('indicador__fecha_calculo')
+    proveedores = Proveedor.objects.annotate(
+        documentos_actuales=_conteo(DocumentoProveedor),
+        productos_actuales=_conteo(ProductoServicioProveedor, activo=True),
+    )
+    eliminaron = ~Q(indicador__documentos_total=F('documentos_actuales')) \
+        | ~Q(indicador__productos_activos=F('productos_actuales'))
+    pendientes = set(
+        proveedores
+        .filter(
+            Q(indicador__isnull=True)
+            | Q(indicador__fecha_calculo__date__lt=hoy)
+            | Q(fecha_modificacion__gt=F('indicador__fecha_calculo'))
+            | Exists(DocumentoProveedor.objects.filter(
+                id_proveedor=OuterRef('pk'), fecha_modificacion__gt=calculo
+            ))
+            | Exists(ProductoServicioProveedor.objects.filter(
+                id_proveedor=OuterRef('pk'), fecha_modificacion__gt=calculo
+            ))
+            | eliminaron
+        )
+        .values_list('pk', flat=True)
+    )
+
+    # El mínimo de cada grupo depende de todos sus proveedores: también queda
+    # pendiente quien tenga una oferta comparable en un grupo con otra oferta
+    # (o proveedor) modificada después de su cálculo, o con un producto
+    # eliminado por un proveedor pendiente por eliminaciones
+    calculo = OuterRef('id_proveedor__indicador__fecha_calculo')
+    modificadas = _mismo_grupo(_con_grupo(ProductoServicioProveedor.objects)).filter(
+        Q(fecha_modificacion__gt=calculo) | Q(id_proveedor__fecha_modificacion__gt=calculo)
+    )
+    eliminadas = HistorialPrecioProducto.objects.filter(
+        producto__isnull=True,
+        proveedor__in=proveedores.filter(eliminaron).values('pk'),
+        clave=OuterRef('clave_grupo'),
+        unidad_medida=OuterRef('unidad_medida'),
+    )
+    pendientes.update(
+        _con_grupo(comparador.ofertas_comparables())
+        .filter(id_proveedor__indicador__isnull=False)
+        .filter(Exists(modificadas) | Exists(eliminadas))
+        .order_by()
+        .values_list('id_proveedor_id', flat=True)
+        .distinct()
+    )
+    return sorted(pendientes)
+
+
+# =============================================================================
+# INDICADORES POR FUENTE
+# =============================================================================
+
+def _documentos(ids, hoy, obligatorios):
+    """{proveedor: {total, vigentes, por_vencer, vencidos, obligatorios_cubiertos}}"""
+    documentos = anotar_estado(DocumentoProveedor.objects.filter(id_proveedor__in=ids), hoy)
+    resultado = {
+        fila['id_proveedor']: dict(fila, obligatorios_cubiertos=0)
+        for fila in documentos.values('id_proveedor').annotate(
+            total=Count('pk'),
+            vigentes=Count('pk', filter=Q(estado_vigente__in=['VIGENTE', 'NO_APLICA'])),
+            por_vencer=Count('pk', filter=Q(estado_vigente='POR_VENCER')),
+            vencidos=Count('pk', filter=Q(estado_vigente='VENCIDO')),
+        ).order_by()
+    }
+    if obligatorios:
+        cubiertos = (
+            documentos
+            .filter(id_tipo_documento__in=obligatorios, estado_vigente__in=ESTADOS_VALIDOS)
+            .values('id_proveedor')
+            .annotate(tipos=Count('id_tipo_documento', distinct=True))
+            .order_by()
+        )
+        for fila in cubiertos:
+            resultado[fila['id_proveedor']]['obligatorios_cubiertos'] = fila['tipos']
+    return resultado
+
+
+def _productos(ids, hoy):
+    """{proveedor: {activos, entrega_*, precio_vigente, ultima_actualizacion}}"""
+    limite = hoy - timedelta(days=DIAS_PRECIO_VIGENTE)
+    filas = (
+        ProductoServicioProveedor.objects
+        .filter(id_proveedor__in=ids, activo=True)
+        .values('id_proveedor')
+        .annotate(
+            activos=Count('pk'),
+            entrega_promedio=Avg('tiempo_entrega_dias'),
+            entrega_minima=Min('tiempo_entrega_dias'),
+            entrega_maxima=Max('tiempo_entrega_dias'),
+            precio_vigente=Count('pk', filter=Q(fecha_ultima_actualizacion_precio__gte=limite)),
+            ultima_actualizacion=Max('fecha_ultima_actualizacion_precio'),
+        )
+        .order_by()
+    )
+    return {fila['id_proveedor']: fila for fila in filas}
+
+
+def competitividad_por_proveedor(proveedores=None):
+    """
+    {proveedor: (ofertas comparables, competitividad %)}. El mínimo de cada
+    grupo depende de todos sus proveedores: con `proveedores` se recorren
+    completos los grupos en que ellos tienen ofertas y solo se retornan
+    ellos; sin `proveedores`, todas las ofertas comparables.
+    """
+    ofertas = comparador.ofertas_comparables()
+    if proveedores is not None:
+        ofertas = _con_grupo(ofertas).filter(Exists(
+            _mismo_grupo(_con_grupo(comparador.ofertas_comparables()).filter(id_proveedor__in=proveedores))
+        ))
+    acumulado = {}
+    filas = (
+        comparador.anotar_comparacion(ofertas)
+        .order_by()
+        .values_list('id_proveedor_id', 'precio_cop', 'precio_minimo', 'ofertas_grupo')
+    )
+    for proveedor, precio, minimo, ofertas in filas:
+        if ofertas < 2 or not precio:
+            continue
+        cantidad, suma = acumulado.get(proveedor, (0, Decimal('0')))
+        acumulado[proveedor] = (cantidad + 1, suma + Decimal(minimo) / Decimal(precio))
+    if proveedores is not None:
+        proveedores = set(proveedores)
+        acumulado = {proveedor: valor for proveedor, valor in acumulado.items() if proveedor in proveedores}
+    return {
+        proveedor: (cantidad, (suma * CIEN / cantidad).quantize(DOS_DECIMALES))
+        for proveedor, (cantidad, suma) in acumulado.items()
+    }
+
+
+def indicador_entrega(promedio):
+    """100% hasta el plazo de referencia, proporcionalmente menos después"""
+    if promedio is None:
+        return None
+    promedio = Decimal(str(promedio))
+    referencia = Decimal(DIAS_ENTREGA_REFERENCIA)
+    return min(CIEN, CIEN * (referencia + 1) / (promedio + 1)).quantize(DOS_DECIMALES)
+
+
+def puntaje(indicadores):
+    """Promedio ponderado de los indicadores que no son None"""
+    disponibles = {
+        clave: valor for clave, valor in indicadores.items()
+        if valor is not None and PESOS_INDICADOR.get(clave)
+    }
+    if not disponibles:
+        return None
+    pesos = sum(Decimal(str(PESOS_INDICADOR[clave])) for clave in disponibles)
+    total = sum(Decimal(str(PESOS_INDICADOR[clave])) * valor for clave, valor in disponibles.items())
+    return (total / pesos).quantize(DOS_DECIMALES)
+
+
+def _construir(proveedor, documentos, productos, precios, total_obligatorios, fecha_calculo):
+    documentos = documentos or {}
+    productos = productos or {}
+    comparables, competitividad = precios or (0, None)
+
+    if total_obligatorios:
+        cumplimiento = _porcentaje(documentos.get('obligatorios_cubiertos', 0), total_obligatorios)
+    else:
+        total = documentos.get('total', 0)
+        cumplimiento = _porcentaje(total - documentos.get('vencidos', 0), total)
+
+    promedio = productos.get('entrega_promedio')
+    indicador = IndicadorProveedor(
+        proveedor_id=proveedor,
+        documentos_total=documentos.get('total', 0),
+        documentos_vigentes=documentos.get('vigentes', 0),
+        documentos_por_vencer=documentos.get('por_vencer', 0),
+        documentos_vencidos=documentos.get('vencidos', 0),
+        obligatorios_faltantes=total_obligatorios - documentos.get('obligatorios_cubiertos', 0),
+        cumplimiento_documental=cumplimiento,
+        productos_activos=productos.get('activos', 0),
+        productos_comparables=comparables,
+        competitividad_precio=competitividad,
+        entrega_promedio_dias=Decimal(str(promedio)).quantize(Decimal('0.1')) if promedio is not None else None,
+        entrega_minima_dias=productos.get('entrega_minima'),
+        entrega_maxima_dias=productos.get('entrega_maxima'),
+        cumplimiento_entrega=indicador_entrega(promedio),
+        productos_precio_vigente=productos.get('precio_vigente', 0),
+        ultima_actualizacion_precio=productos.get('ultima_actualizacion'),
+        frescura_catalogo=_porcentaje(productos.get('precio_vigente', 0), productos.get('activos', 0)),
+        fecha_calculo=fecha_calculo,
+    )
+    indicador.puntaje = puntaje({
+        'documentos': indicador.cumplimiento_documental,
+        'precio': indicador.competitividad_precio,
+        'entrega': indicador.cumplimiento_entrega,
+        'catalogo': indicador.frescura_catalogo,
+    })
+    return indicador
+
+
+# =============================================================================
+# ACTUALIZACIÓN
+# =============================================================================
+
+CAMPOS_CALCULADOS = [
+    campo.name for campo in IndicadorProveedor._meta.concrete_fields
+    if campo.name not in ('id_indicador', 'proveedor')
+]
+
+
+def actualizar_indicadores(ids=None, completo=False, hoy=None):
+    """
+    Recalcula y guarda (upsert) los indicadores. Sin `ids` toma los
+    pendientes, o todos los proveedores con `completo`. Retorna cuántos
+    proveedores se recalcularon.
+    """
+    # La marca se toma antes de leer: lo que cambie durante el cálculo
+    # queda pendiente para la siguiente corrida
+    fecha_calculo = timezone.now()
+    hoy = hoy or fecha_calculo.date()
+    if ids is None:
+        if completo:
+            ids = list(Proveedor.objects.order_by('pk').values_list('pk', flat=True))
+        else:
+            ids = proveedores_pendientes(hoy)
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    # Con muchos proveedores es más barato recorrer todas las ofertas una vez
+    # que filtrar los grupos de cada uno
+    precios = competitividad_por_proveedor(None if completo or len(ids) > TAMANO_BLOQUE else ids)
+    obligatorios = list(
+        TipoDocumentoProveedor.objects.filter(activo=True, obligatorio=True).values_list('pk', flat=True)
+    )
+
+    for inicio in range(0, len(ids), TAMANO_BLOQUE):
+        bloque = ids[inicio:inicio + TAMANO_BLOQUE]
+        documentos = _documentos(bloque, hoy, obligatorios)
+        productos = _productos(bloque, hoy)
+        upsert(
+            IndicadorProveedor,
+            [
+                _construir(pk, documentos.get(pk), productos.get(pk), precios.get(pk),
+                           len(obligatorios), fecha_calculo)
+                for pk in bloque
+            ],
+            unique_fields=['proveedor'],
+            update_fields=CAMPOS_CALCULADOS,
+        )
+    return len(ids)
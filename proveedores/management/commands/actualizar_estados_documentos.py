@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para recalcular el estado de vigencia de los documentos de proveedores
+Uso: python manage.py actualizar_estados_documentos [--fecha AAAA-MM-DD]
+
+Pensado para ejecutarse una vez al día (cron / tarea programada). Recalcula
+VIGENTE / POR_VENCER / VENCIDO / NO_APLICA de todos los documentos con un
+solo UPDATE que solo escribe los que cambiaron de estado.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedores.vigencia import actualizar_estados
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el estado de vigencia de todos los documentos de proveedores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha de referencia AAAA-MM-DD (por defecto hoy)',
+        )
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+
+        cambiados = actualizar_estados(hoy)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Estados de documentos actualizados ({cambiados} cambiaron)'
+        ))
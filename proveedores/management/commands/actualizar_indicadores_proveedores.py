@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para recalcular los indicadores de desempeño de proveedores
+Uso: python manage.py actualizar_indicadores_proveedores [--completo] [--fecha AAAA-MM-DD]
+
+Pensado para ejecutarse periódicamente (cron / tarea programada, p. ej. cada
+hora). Por defecto solo recalcula los proveedores pendientes: sin indicador,
+calculados otro día o con cambios desde el último cálculo. --completo
+recalcula todos.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedores.indicadores import actualizar_indicadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los indicadores (puntaje) de los proveedores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Recalcular todos los proveedores, no solo los pendientes',
+        )
+        parser.add_argument(
+            '--fecha',
+            help='Fecha de referencia AAAA-MM-DD (por defecto hoy)',
+        )
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+
+        recalculados = actualizar_indicadores(completo=options['completo'], hoy=hoy)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Indicadores de proveedores actualizados ({recalculados} recalculados)'
+        ))
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para exportar el directorio de proveedores
+Uso: python manage.py exportar_proveedores [--formato excel|pdf] [--estado ACTIVO] [--salida RUTA]
+
+Genera el mismo archivo que el botón de exportación del listado (proveedores
+con contactos, documentos y productos) leyendo por bloques, para exportar la
+base completa en segundo plano (cron / tarea programada) sin ocupar un
+proceso web. Por defecto escribe en MEDIA_ROOT/exportaciones/.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedores import exportacion
+from proveedores.models import ESTADO_CHOICES, Proveedor
+
+
+class Command(BaseCommand):
+    help = 'Exporta los proveedores con contactos, documentos y productos a Excel o PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--formato',
+            default='excel',
+            choices=sorted(exportacion.FORMATOS),
+            help='Formato del archivo (por defecto excel)',
+        )
+        parser.add_argument(
+            '--estado',
+            choices=[valor for valor, _ in ESTADO_CHOICES],
+            help='Exportar solo los proveedores en este estado',
+        )
+        parser.add_argument(
+            '--salida',
+            help='Ruta del archivo a generar',
+        )
+
+    def handle(self, *args, **options):
+        formato = options['formato']
+        proveedores = Proveedor.objects.order_by('razon_social')
+        if options['estado']:
+            proveedores = proveedores.filter(estado=options['estado'])
+
+        salida = options['salida'] or os.path.join(
+            settings.MEDIA_ROOT, 'exportaciones', exportacion.nombre_archivo(formato)
+        )
+        directorio = os.path.dirname(os.path.abspath(salida))
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            with open(salida, 'wb') as destino:
+                total = exportacion.EXPORTADORES[formato](proveedores, destino)
+        except OSError as error:
+            raise CommandError(f'No se pudo escribir {salida}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ {total} proveedores exportados a {salida}'))
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para reconstruir el índice de búsqueda de proveedores y productos
+Uso: python manage.py reconstruir_indice_busqueda
+
+El índice se mantiene solo al guardar cada registro; este comando lo rehace
+completo (después de cargas masivas con bulk_create/update o si se cambian
+los campos o pesos indexados en proveedores/busqueda.py).
+"""
+
+from django.core.management.base import BaseCommand
+
+from proveedores.busqueda import reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de proveedores y productos/servicios'
+
+    def handle(self, *args, **options):
+        resultado = reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Índice reconstruido ({resultado['PROVEEDOR']} términos de proveedores, "
+            f"{resultado['PRODUCTO']} de productos)"
+        ))
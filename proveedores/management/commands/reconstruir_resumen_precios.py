@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para reconstruir el resumen mensual de precios por material
+Uso: python manage.py reconstruir_resumen_precios [--desde AAAA-MM-DD] [--inicializar]
+
+El resumen se actualiza al registrar cada precio; este comando lo recalcula
+desde el historial (completo o desde el mes de --desde), por ejemplo después
+de cambiar PROVEEDORES_TASAS_CAMBIO o de cargas con bulk_create/update.
+--inicializar registra antes el precio actual de los productos que aún no
+tienen historial (primera ejecución tras instalar el historial).
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from proveedores.historial_precios import inicializar_historial, reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen mensual de precios desde el historial'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            help='Recalcular desde el mes de esta fecha AAAA-MM-DD (por defecto todo)',
+        )
+        parser.add_argument(
+            '--inicializar',
+            action='store_true',
+            help='Registrar el precio actual de los productos sin historial',
+        )
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+
+        if options['inicializar']:
+            registrados = inicializar_historial()
+            self.stdout.write(f'Productos registrados en el historial: {registrados}')
+
+        filas = reconstruir_resumen(desde)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Resumen mensual de precios reconstruido ({filas} meses por material)'
+        ))
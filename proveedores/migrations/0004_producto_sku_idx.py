@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0003_alter_tipodocumentoproveedor_dias_alerta_vencimiento'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productoservicioproveedor',
+            index=models.Index(fields=['sku_codigo', 'activo', 'disponible'], name='prov_prod_sku_idx'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:10
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Copia de las reglas de proveedores/busqueda.py al momento de esta migración
+# (una migración no debe importar código de la app, que cambia con el tiempo)
+LARGO_TERMINO = 40
+TAMANO_LOTE = 2000
+
+CAMPOS = {
+    'PROVEEDOR': {
+        'razon_social': (5, False),
+        'nombre_comercial': (5, False),
+        'numero_documento': (8, True),
+        'ciudad': (1, False),
+        'actividad_economica': (1, False),
+    },
+    'PRODUCTO': {
+        'sku_codigo': (8, True),
+        'nombre': (5, False),
+        'marca': (3, False),
+        'descripcion': (1, False),
+        'especificaciones_tecnicas': (1, False),
+    },
+}
+
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'e', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'para', 'por', 'sin', 'un', 'una', 'y',
+}
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def _plegar(texto):
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def _terminos_objeto(objeto, tipo):
+    pesos = {}
+    for campo, (peso, es_codigo) in CAMPOS[tipo].items():
+        valor = getattr(objeto, campo)
+        if not valor:
+            continue
+        encontrados = {
+            termino[:LARGO_TERMINO]
+            for termino in _NO_ALFANUMERICO.split(_plegar(valor))
+            if termino and termino not in PALABRAS_VACIAS
+        }
+        if es_codigo:
+            compacto = _NO_ALFANUMERICO.sub('', _plegar(valor))[:LARGO_TERMINO]
+            if compacto:
+                encontrados.add(compacto)
+        for termino in encontrados:
+            pesos[termino] = pesos.get(termino, 0) + peso
+    return pesos
+
+
+def construir_indice(apps, schema_editor):
+    """Indexa los proveedores y productos existentes, por lotes"""
+    IndiceBusqueda = apps.get_model('proveedores', 'IndiceBusqueda')
+    modelos = {
+        'PROVEEDOR': apps.get_model('proveedores', 'Proveedor'),
+        'PRODUCTO': apps.get_model('proveedores', 'ProductoServicioProveedor'),
+    }
+    for tipo, modelo in modelos.items():
+        objetos = modelo.objects.only('pk', *CAMPOS[tipo]).order_by('pk').iterator(chunk_size=TAMANO_LOTE)
+        filas = []
+        for objeto in objetos:
+            filas.extend(
+                IndiceBusqueda(termino=termino, tipo_objeto=tipo, id_objeto=objeto.pk, peso=peso)
+                for termino, peso in _terminos_objeto(objeto, tipo).items()
+            )
+            if len(filas) >= TAMANO_LOTE:
+                IndiceBusqueda.objects.bulk_create(filas, batch_size=1000)
+                filas = []
+        IndiceBusqueda.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0004_producto_sku_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('id_indice', models.BigAutoField(primary_key=True, serialize=False)),
+                ('termino', models.CharField(max_length=40, verbose_name='Término')),
+                ('tipo_objeto', models.CharField(choices=[('PROVEEDOR', 'Proveedor'), ('PRODUCTO', 'Producto/Servicio')], max_length=10, verbose_name='Tipo de Objeto')),
+                ('id_objeto', models.IntegerField(verbose_name='ID del Objeto')),
+                ('peso', models.PositiveSmallIntegerField(default=1, help_text='Suma de los pesos de los campos donde aparece el término', verbose_name='Peso')),
+            ],
+            options={
+                'verbose_name': 'Término del Índice de Búsqueda',
+                'verbose_name_plural': 'Índice de Búsqueda',
+                'db_table': 'indice_busqueda_proveedores',
+                'indexes': [models.Index(fields=['tipo_objeto', 'id_objeto'], name='prov_busq_objeto_idx')],
+                'unique_together': {('termino', 'tipo_objeto', 'id_objeto')},
+            },
+        ),
+        migrations.RunPython(construir_indice, migrations.RunPython.noop),
+    ]
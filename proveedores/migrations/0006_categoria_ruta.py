@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:14
+
+from django.db import migrations, models
+
+
+def _segmento(pk):
+    return f"{pk:06d}/"
+
+
+def calcular_rutas_existentes(apps, schema_editor):
+    """
+    Ruta materializada de las categorías existentes a partir de categoria_padre
+    (mismas reglas que proveedores/categorias.py, copiadas aquí para no
+    importar código de la app: un padre inexistente o un ciclo deja a la
+    categoría como principal).
+    """
+    CategoriaProveedor = apps.get_model('proveedores', 'CategoriaProveedor')
+    categorias = list(CategoriaProveedor.objects.only('pk', 'categoria_padre'))
+    padres = {c.pk: c.categoria_padre_id for c in categorias}
+    rutas = {}
+
+    def resolver(pk, visitados):
+        if pk in rutas:
+            return rutas[pk]
+        padre = padres.get(pk)
+        if padre is None or padre not in padres or padre in visitados:
+            rutas[pk] = (_segmento(pk), 0)
+        else:
+            ruta_padre, nivel_padre = resolver(padre, visitados | {pk})
+            rutas[pk] = (ruta_padre + _segmento(pk), nivel_padre + 1)
+        return rutas[pk]
+
+    for categoria in categorias:
+        categoria.ruta, categoria.nivel = resolver(categoria.pk, frozenset())
+    CategoriaProveedor.objects.bulk_update(categorias, ['ruta', 'nivel'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0005_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoriaproveedor',
+            name='nivel',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Nivel'),
+        ),
+        migrations.AddField(
+            model_name='categoriaproveedor',
+            name='ruta',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Ruta'),
+        ),
+        migrations.AddIndex(
+            model_name='categoriaproveedor',
+            index=models.Index(fields=['ruta'], name='prov_cat_ruta_idx'),
+        ),
+        migrations.RunPython(calcular_rutas_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0006_categoria_ruta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicadorProveedor',
+            fields=[
+                ('id_indicador', models.AutoField(primary_key=True, serialize=False)),
+                ('documentos_total', models.PositiveIntegerField(default=0, verbose_name='Documentos')),
+                ('documentos_vigentes', models.PositiveIntegerField(default=0, verbose_name='Documentos Vigentes')),
+                ('documentos_por_vencer', models.PositiveIntegerField(default=0, verbose_name='Documentos por Vencer')),
+                ('documentos_vencidos', models.PositiveIntegerField(default=0, verbose_name='Documentos Vencidos')),
+                ('obligatorios_faltantes', models.PositiveIntegerField(default=0, help_text='Tipos de documento obligatorios sin un documento vigente', verbose_name='Obligatorios Faltantes')),
+                ('cumplimiento_documental', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Cumplimiento Documental (%)')),
+                ('productos_activos', models.PositiveIntegerField(default=0, verbose_name='Productos Activos')),
+                ('productos_comparables', models.PositiveIntegerField(default=0, help_text='Ofertas con al menos otra oferta del mismo material', verbose_name='Productos Comparables')),
+                ('competitividad_precio', models.DecimalField(blank=True, decimal_places=2, help_text='100 = siempre el precio más bajo del mercado', max_digits=5, null=True, verbose_name='Competitividad de Precio (%)')),
+                ('entrega_promedio_dias', models.DecimalField(blank=True, decimal_places=1, max_digits=6, null=True, verbose_name='Entrega Promedio (días)')),
+                ('entrega_minima_dias', models.IntegerField(blank=True, null=True, verbose_name='Entrega Mínima (días)')),
+                ('entrega_maxima_dias', models.IntegerField(blank=True, null=True, verbose_name='Entrega Máxima (días)')),
+                ('cumplimiento_entrega', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Indicador de Entrega (%)')),
+                ('productos_precio_vigente', models.PositiveIntegerField(default=0, verbose_name='Productos con Precio Vigente')),
+                ('ultima_actualizacion_precio', models.DateField(blank=True, null=True, verbose_name='Última Actualización de Precio')),
+                ('frescura_catalogo', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, verbose_name='Frescura del Catálogo (%)')),
+                ('puntaje', models.DecimalField(blank=True, decimal_places=2, help_text='0 a 100, promedio ponderado de los indicadores disponibles', max_digits=5, null=True, verbose_name='Puntaje')),
+                ('fecha_calculo', models.DateTimeField(verbose_name='Fecha de Cálculo')),
+                ('proveedor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='indicador', to='proveedores.proveedor', verbose_name='Proveedor')),
+            ],
+            options={
+                'verbose_name': 'Indicador de Proveedor',
+                'verbose_name_plural': 'Indicadores de Proveedores',
+                'db_table': 'indicadores_proveedores',
+                'indexes': [models.Index(fields=['puntaje'], name='prov_ind_puntaje_idx'), models.Index(fields=['fecha_calculo'], name='prov_ind_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('proveedores', '0007_indicador_proveedor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPrecioMensual',
+            fields=[
+                ('id_resumen', models.AutoField(primary_key=True, serialize=False)),
+                ('clave', models.CharField(max_length=200, verbose_name='Clave del Material')),
+                ('unidad_medida', models.CharField(choices=[('UNIDAD', 'Unidad'), ('METRO', 'Metro'), ('METRO_CUADRADO', 'Metro cuadrado'), ('KILOGRAMO', 'Kilogramo'), ('LITRO', 'Litro'), ('CAJA', 'Caja'), ('PAQUETE', 'Paquete'), ('ROLLO', 'Rollo'), ('SERVICIO', 'Servicio'), ('OTRO', 'Otro')], max_length=30, verbose_name='Unidad de Medida')),
+                ('mes', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('precio_minimo', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Precio Mínimo (COP)')),
+                ('precio_promedio', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Precio Promedio (COP)')),
+                ('precio_maximo', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Precio Máximo (COP)')),
+                ('observaciones', models.PositiveIntegerField(default=0, verbose_name='Registros')),
+                ('proveedores', models.PositiveIntegerField(default=0, verbose_name='Proveedores')),
+                ('fecha_actualizacion', models.DateTimeField(verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual de Precios',
+                'verbose_name_plural': 'Resumen Mensual de Precios',
+                'db_table': 'resumen_precios_mensual',
+                'ordering': ['clave', 'unidad_medida', 'mes'],
+                'unique_together': {('clave', 'unidad_medida', 'mes')},
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialPrecioProducto',
+            fields=[
+                ('id_historial', models.BigAutoField(primary_key=True, serialize=False)),
+                ('clave', models.CharField(max_length=200, verbose_name='Clave del Material')),
+                ('unidad_medida', models.CharField(choices=[('UNIDAD', 'Unidad'), ('METRO', 'Metro'), ('METRO_CUADRADO', 'Metro cuadrado'), ('KILOGRAMO', 'Kilogramo'), ('LITRO', 'Litro'), ('CAJA', 'Caja'), ('PAQUETE', 'Paquete'), ('ROLLO', 'Rollo'), ('SERVICIO', 'Servicio'), ('OTRO', 'Otro')], max_length=30, verbose_name='Unidad de Medida')),
+                ('moneda', models.CharField(choices=[('COP', 'Pesos colombianos (COP)'), ('USD', 'Dólares (USD)'), ('EUR', 'Euros (EUR)')], max_length=3, verbose_name='Moneda')),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Precio Unitario')),
+                ('precio_final', models.DecimalField(decimal_places=2, help_text='Precio especial o con descuento', max_digits=15, verbose_name='Precio Final')),
+                ('precio_cop', models.DecimalField(blank=True, decimal_places=2, help_text='Precio final en pesos según PROVEEDORES_TASAS_CAMBIO al momento del registro', max_digits=18, null=True, verbose_name='Precio en COP')),
+                ('origen', models.CharField(choices=[('MANUAL', 'Registro manual'), ('IMPORTACION', 'Importación de lista'), ('CONFIRMACION', 'Confirmado en lista')], max_length=15, verbose_name='Origen')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial_precios', to='proveedores.productoservicioproveedor', verbose_name='Producto/Servicio')),
+                ('proveedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='historial_precios', to='proveedores.proveedor', verbose_name='Proveedor')),
+            ],
+            options={
+                'verbose_name': 'Historial de Precio',
+                'verbose_name_plural': 'Historial de Precios',
+                'db_table': 'historial_precios_proveedores',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='prov_hist_prod_fecha_idx'), models.Index(fields=['clave', 'unidad_medida', 'fecha'], name='prov_hist_clave_fecha_idx'), models.Index(fields=['fecha'], name='prov_hist_fecha_idx')],
+            },
+        ),
+    ]
@@ -4,7 +4,10 @@ American Carpas 1 SAS
 Incluye: Catálogos, Proveedores, Contactos, Documentos y Productos/Servicios
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -132,7 +135,15 @@ class CategoriaProveedor(models.Model):
     """
     Catálogo de categorías de proveedores con jerarquía
     Ejemplos: Textiles, Metalmecánica, Servicios, etc.
+
+    La jerarquía se guarda además como ruta materializada: `ruta` son los ids
+    de los ancestros y el propio, con ancho fijo ("000001/000007/"), y `nivel`
+    la profundidad. Ancestros, descendientes y proveedores de un subárbol se
+    obtienen con una consulta sobre el índice de `ruta`.
     """
+    ANCHO_SEGMENTO = 6
+    SEPARADOR = '/'
+
     id_categoria = models.AutoField(primary_key=True)
     nombre_categoria = models.CharField(max_length=100, unique=True, verbose_name="Nombre de la Categoría")
     descripcion = models.TextField(blank=True, null=True, verbose_name="Descripción")
@@ -149,25 +160,129 @@ class CategoriaProveedor(models.Model):
     activo = models.BooleanField(default=True, verbose_name="Activo")
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     
+    # Ruta materializada (se mantiene en save/delete)
+    ruta = models.CharField(max_length=255, default='', editable=False, verbose_name="Ruta")
+    nivel = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Nivel")
+    
     class Meta:
         db_table = 'categorias_proveedores'
         verbose_name = 'Categoría de Proveedor'
         verbose_name_plural = 'Categorías de Proveedores'
         ordering = ['nombre_categoria']
+        indexes = [
+            models.Index(fields=['ruta'], name='prov_cat_ruta_idx'),
+        ]
     
     def __str__(self):
-        if self.categoria_padre:
+        # Sin consultas: el padre se nombra solo si ya está cargado
+        # (select_related o ArbolCategorias); si no, solo se indica que es subcategoría
+        if self.categoria_padre_id is None:
+            return self.nombre_categoria
+        if CategoriaProveedor.categoria_padre.is_cached(self):
             return f"{self.categoria_padre.nombre_categoria} > {self.nombre_categoria}"
-        return self.nombre_categoria
+        if self.nivel == 0:
+            return self.nombre_categoria
+        return f"… > {self.nombre_categoria}"
     
     def get_nivel(self):
         """Retorna el nivel de jerarquía de la categoría"""
-        nivel = 0
-        categoria_actual = self
-        while categoria_actual.categoria_padre:
-            nivel += 1
-            categoria_actual = categoria_actual.categoria_padre
-        return nivel
+        return self.nivel
+    
+    # ====== JERARQUÍA (RUTA MATERIALIZADA) ======
+    
+    @classmethod
+    def segmento_ruta(cls, pk):
+        """Segmento de ruta de una categoría: "000007/" """
+        return f"{pk:0{cls.ANCHO_SEGMENTO}d}{cls.SEPARADOR}"
+    
+    @classmethod
+    def ids_ruta(cls, ruta):
+        """Ids de la ruta, de la raíz a la categoría"""
+        return [int(segmento) for segmento in ruta.split(cls.SEPARADOR) if segmento]
+    
+    @classmethod
+    def filtro_subarbol(cls, ruta, campo='ruta'):
+        """
+        Q de las rutas que empiezan por `ruta`, escrito como rango
+        (ruta <= x < ruta con el separador incrementado) para que use el
+        índice en cualquier motor. `campo` permite filtrar desde otra tabla
+        ('categoria_principal__ruta').
+        """
+        siguiente = ruta[:-1] + chr(ord(cls.SEPARADOR) + 1)
+        return Q(**{f'{campo}__gte': ruta, f'{campo}__lt': siguiente})
+    
+    def clean(self):
+        super().clean()
+        if not (self.pk and self.categoria_padre_id):
+            return
+        # Rutas leídas de la base: las instancias en memoria pueden estar desactualizadas
+        ruta = CategoriaProveedor.objects.filter(pk=self.pk).values_list('ruta', flat=True).first()
+        if self.categoria_padre_id == self.pk or (ruta and CategoriaProveedor.objects.filter(
+            self.filtro_subarbol(ruta), pk=self.categoria_padre_id
+        ).exists()):
+            raise ValidationError({
+                'categoria_padre': 'La categoría padre no puede ser la misma categoría ni una de sus subcategorías.'
+            })
+    
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.actualizar_ruta()
+    
+    def delete(self, *args, **kwargs):
+        """Las subcategorías quedan como principales (SET_NULL) y se recalculan sus rutas"""
+        with transaction.atomic():
+            hijos = list(self.subcategorias.all())
+            resultado = super().delete(*args, **kwargs)
+            for hijo in hijos:
+                hijo.categoria_padre = None
+                hijo.actualizar_ruta()
+        return resultado
+    
+    def actualizar_ruta(self):
+        """
+        Recalcula la ruta a partir del padre y, si cambió, la de todo el
+        subárbol con un solo UPDATE que reemplaza el prefijo.
+        """
+        modelo = type(self)
+        anterior = modelo.objects.filter(pk=self.pk).values_list('ruta', 'nivel').first()
+        ruta_padre, nivel = '', 0
+        if self.categoria_padre_id:
+            ruta_padre, nivel_padre = modelo.objects.filter(
+                pk=self.categoria_padre_id
+            ).values_list('ruta', 'nivel').get()
+            nivel = nivel_padre + 1
+        ruta = ruta_padre + modelo.segmento_ruta(self.pk)
+        
+        if anterior and anterior[0] and anterior[0] != ruta:
+            ruta_anterior, nivel_anterior = anterior
+            if ruta.startswith(ruta_anterior):
+                raise ValidationError('Una categoría no puede quedar dentro de su propio subárbol.')
+            modelo.objects.filter(modelo.filtro_subarbol(ruta_anterior)).update(
+                ruta=Concat(Value(ruta), Substr('ruta', len(ruta_anterior) + 1)),
+                nivel=F('nivel') + (nivel - nivel_anterior),
+            )
+        elif not anterior or anterior != (ruta, nivel):
+            modelo.objects.filter(pk=self.pk).update(ruta=ruta, nivel=nivel)
+        self.ruta, self.nivel = ruta, nivel
+    
+    def get_ancestros(self):
+        """Categorías superiores, de la raíz al padre (consulta por pk)"""
+        ids = self.ids_ruta(self.ruta)[:-1]
+        return CategoriaProveedor.objects.filter(pk__in=ids).order_by('nivel')
+    
+    def get_descendientes(self, incluir_propia=False):
+        """Subcategorías de todos los niveles, en orden de ruta"""
+        descendientes = CategoriaProveedor.objects.filter(self.filtro_subarbol(self.ruta))
+        if not incluir_propia:
+            descendientes = descendientes.exclude(pk=self.pk)
+        return descendientes.order_by('ruta')
+    
+    def get_proveedores_subarbol(self):
+        """Proveedores cuya categoría principal es esta o una de sus subcategorías"""
+        return Proveedor.objects.filter(
+            self.filtro_subarbol(self.ruta, campo='categoria_principal__ruta')
+        )
     
     # ====== NUEVAS PROPIEDADES AÑADIDAS ======
     
@@ -846,6 +961,15 @@ class DocumentoProveedor(models.Model):
     def __str__(self):
         return f"{self.id_tipo_documento.nombre_tipo_documento} - {self.id_proveedor.razon_social}"
     
+    def save(self, *args, **kwargs):
+        """
+        Override save para dejar el estado al día al cargar o editar el documento.
+        El recálculo diario de todos los documentos lo hace el comando
+        actualizar_estados_documentos.
+        """
+        self.actualizar_estado()
+        super().save(*args, **kwargs)
+    
     def actualizar_estado(self):
         """
         Actualiza el estado del documento según las fechas
@@ -858,7 +982,7 @@ class DocumentoProveedor(models.Model):
         
         hoy = date.today()
         dias_diferencia = (self.fecha_vencimiento - hoy).days
-        dias_alerta = self.id_tipo_documento.dias_alerta_vencimiento
+        dias_alerta = self.id_tipo_documento.dias_alerta_vencimiento or 0
         
         if dias_diferencia < 0:
             self.estado_documento = 'VENCIDO'
@@ -1124,6 +1248,10 @@ class ProductoServicioProveedor(models.Model):
         verbose_name_plural = 'Productos/Servicios de Proveedores'
         ordering = ['nombre']
         unique_together = [['id_proveedor', 'sku_codigo']]
+        indexes = [
+            # Comparación de precios del mismo SKU entre proveedores
+            models.Index(fields=['sku_codigo', 'activo', 'disponible'], name='prov_prod_sku_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.id_proveedor.razon_social}"
@@ -1181,4 +1309,285 @@ class ProductoServicioProveedor(models.Model):
         elif self.stock_disponible is not None and self.stock_disponible == 0:
             return 'Sin stock'
         else:
-            return 'Disponible'
\ No newline at end of file
+            return 'Disponible'
+
+# =====================================================
+# ÍNDICE DE BÚSQUEDA
+# =====================================================
+
+class IndiceBusqueda(models.Model):
+    """
+    Índice invertido para la búsqueda de proveedores y productos/servicios.
+    Cada fila es un término normalizado (minúsculas, sin tildes) de un
+    objeto con el peso del campo de donde salió. Se mantiene desde los
+    signals de guardado (ver proveedores/busqueda.py).
+    """
+    TIPO_OBJETO_CHOICES = [
+        ('PROVEEDOR', 'Proveedor'),
+        ('PRODUCTO', 'Producto/Servicio'),
+    ]
+    
+    id_indice = models.BigAutoField(primary_key=True)
+    
+    termino = models.CharField(
+        max_length=40,
+        verbose_name="Término"
+    )
+    
+    tipo_objeto = models.CharField(
+        max_length=10,
+        choices=TIPO_OBJETO_CHOICES,
+        verbose_name="Tipo de Objeto"
+    )
+    
+    id_objeto = models.IntegerField(verbose_name="ID del Objeto")
+    
+    peso = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name="Peso",
+        help_text="Suma de los pesos de los campos donde aparece el término"
+    )
+    
+    class Meta:
+        db_table = 'indice_busqueda_proveedores'
+        verbose_name = 'Término del Índice de Búsqueda'
+        verbose_name_plural = 'Índice de Búsqueda'
+        unique_together = [['termino', 'tipo_objeto', 'id_objeto']]
+        indexes = [
+            # Reindexar / eliminar los términos de un objeto
+            models.Index(fields=['tipo_objeto', 'id_objeto'], name='prov_busq_objeto_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.termino} -> {self.tipo_objeto} {self.id_objeto}"
+
+
+# =====================================================
+# INDICADORES DE PROVEEDORES
+# =====================================================
+
+class IndicadorProveedor(models.Model):
+    """
+    Resumen precalculado del desempeño de un proveedor: cumplimiento
+    documental, competitividad de precios, plazos de entrega y vigencia del
+    catálogo, con un puntaje de 0 a 100. Lo llena el comando
+    actualizar_indicadores_proveedores (ver proveedores/indicadores.py); las
+    pantallas solo lo leen.
+    """
+    id_indicador = models.AutoField(primary_key=True)
+    
+    proveedor = models.OneToOneField(
+        Proveedor,
+        on_delete=models.CASCADE,
+        related_name='indicador',
+        verbose_name="Proveedor"
+    )
+    
+    # ===== DOCUMENTOS =====
+    documentos_total = models.PositiveIntegerField(default=0, verbose_name="Documentos")
+    documentos_vigentes = models.PositiveIntegerField(default=0, verbose_name="Documentos Vigentes")
+    documentos_por_vencer = models.PositiveIntegerField(default=0, verbose_name="Documentos por Vencer")
+    documentos_vencidos = models.PositiveIntegerField(default=0, verbose_name="Documentos Vencidos")
+    obligatorios_faltantes = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Obligatorios Faltantes",
+        help_text="Tipos de documento obligatorios sin un documento vigente"
+    )
+    cumplimiento_documental = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        verbose_name="Cumplimiento Documental (%)"
+    )
+    
+    # ===== PRECIOS =====
+    productos_activos = models.PositiveIntegerField(default=0, verbose_name="Productos Activos")
+    productos_comparables = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Productos Comparables",
+        help_text="Ofertas con al menos otra oferta del mismo material"
+    )
+    competitividad_precio = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        verbose_name="Competitividad de Precio (%)",
+        help_text="100 = siempre el precio más bajo del mercado"
+    )
+    
+    # ===== ENTREGA =====
+    entrega_promedio_dias = models.DecimalField(
+        max_digits=6, decimal_places=1, null=True, blank=True,
+        verbose_name="Entrega Promedio (días)"
+    )
+    entrega_minima_dias = models.IntegerField(null=True, blank=True, verbose_name="Entrega Mínima (días)")
+    entrega_maxima_dias = models.IntegerField(null=True, blank=True, verbose_name="Entrega Máxima (días)")
+    cumplimiento_entrega = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        verbose_name="Indicador de Entrega (%)"
+    )
+    
+    # ===== CATÁLOGO =====
+    productos_precio_vigente = models.PositiveIntegerField(default=0, verbose_name="Productos con Precio Vigente")
+    ultima_actualizacion_precio = models.DateField(null=True, blank=True, verbose_name="Última Actualización de Precio")
+    frescura_catalogo = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        verbose_name="Frescura del Catálogo (%)"
+    )
+    
+    # ===== RESULTADO =====
+    puntaje = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        verbose_name="Puntaje",
+        help_text="0 a 100, promedio ponderado de los indicadores disponibles"
+    )
+    fecha_calculo = models.DateTimeField(verbose_name="Fecha de Cálculo")
+    
+    class Meta:
+        db_table = 'indicadores_proveedores'
+        verbose_name = 'Indicador de Proveedor'
+        verbose_name_plural = 'Indicadores de Proveedores'
+        indexes = [
+            # Ordenar y filtrar el listado de proveedores por puntaje
+            models.Index(fields=['puntaje'], name='prov_ind_puntaje_idx'),
+            models.Index(fields=['fecha_calculo'], name='prov_ind_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.proveedor} - {self.puntaje}"
+    
+    def get_badge_puntaje(self):
+        """Clase de badge según el puntaje"""
+        if self.puntaje is None:
+            return 'secondary'
+        if self.puntaje >= 80:
+            return 'success'
+        if self.puntaje >= 60:
+            return 'warning'
+        return 'danger'
+
+
+# =====================================================
+# HISTORIAL DE PRECIOS
+# =====================================================
+
+class HistorialPrecioProducto(models.Model):
+    """
+    Registro de solo inserción de los precios de cada producto/servicio.
+    Se agrega una fila al crear un producto, en cada cambio de precio y en
+    las importaciones de listas (ver proveedores/historial_precios.py).
+    `clave` y `unidad_medida` identifican el material entre proveedores
+    (SKU en mayúsculas o, sin SKU, el nombre), igual que el comparador.
+    """
+    ORIGEN_CHOICES = [
+        ('MANUAL', 'Registro manual'),
+        ('IMPORTACION', 'Importación de lista'),
+        ('CONFIRMACION', 'Confirmado en lista'),
+    ]
+    
+    id_historial = models.BigAutoField(primary_key=True)
+    
+    producto = models.ForeignKey(
+        ProductoServicioProveedor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='historial_precios',
+        verbose_name="Producto/Servicio"
+    )
+    
+    proveedor = models.ForeignKey(
+        Proveedor,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='historial_precios',
+        verbose_name="Proveedor"
+    )
+    
+    clave = models.CharField(max_length=200, verbose_name="Clave del Material")
+    
+    unidad_medida = models.CharField(
+        max_length=30,
+        choices=UNIDAD_MEDIDA_CHOICES,
+        verbose_name="Unidad de Medida"
+    )
+    
+    moneda = models.CharField(max_length=3, choices=MONEDA_CHOICES, verbose_name="Moneda")
+    
+    precio_unitario = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Precio Unitario")
+    
+    precio_final = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name="Precio Final",
+        help_text="Precio especial o con descuento"
+    )
+    
+    precio_cop = models.DecimalField(
+        max_digits=18,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Precio en COP",
+        help_text="Precio final en pesos según PROVEEDORES_TASAS_CAMBIO al momento del registro"
+    )
+    
+    origen = models.CharField(max_length=15, choices=ORIGEN_CHOICES, verbose_name="Origen")
+    
+    fecha = models.DateTimeField(verbose_name="Fecha")
+    
+    class Meta:
+        db_table = 'historial_precios_proveedores'
+        verbose_name = 'Historial de Precio'
+        verbose_name_plural = 'Historial de Precios'
+        ordering = ['-fecha']
+        indexes = [
+            # Serie de precios de un producto
+            models.Index(fields=['producto', 'fecha'], name='prov_hist_prod_fecha_idx'),
+            # Resumen mensual por material
+            models.Index(fields=['clave', 'unidad_medida', 'fecha'], name='prov_hist_clave_fecha_idx'),
+            models.Index(fields=['fecha'], name='prov_hist_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.clave} {self.moneda} {self.precio_final} ({self.fecha:%Y-%m-%d})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('El historial de precios es de solo inserción')
+        super().save(*args, **kwargs)
+
+
+class ResumenPrecioMensual(models.Model):
+    """
+    Mínimo, promedio y máximo mensual del precio en COP de un material
+    (clave + unidad) entre todos los proveedores, calculado desde
+    HistorialPrecioProducto. Se actualiza al registrar precios.
+    """
+    id_resumen = models.AutoField(primary_key=True)
+    
+    clave = models.CharField(max_length=200, verbose_name="Clave del Material")
+    
+    unidad_medida = models.CharField(
+        max_length=30,
+        choices=UNIDAD_MEDIDA_CHOICES,
+        verbose_name="Unidad de Medida"
+    )
+    
+    mes = models.DateField(verbose_name="Mes", help_text="Primer día del mes")
+    
+    precio_minimo = models.DecimalField(max_digits=18, decimal_places=2, verbose_name="Precio Mínimo (COP)")
+    precio_promedio = models.DecimalField(max_digits=18, decimal_places=2, verbose_name="Precio Promedio (COP)")
+    precio_maximo = models.DecimalField(max_digits=18, decimal_places=2, verbose_name="Precio Máximo (COP)")
+    
+    observaciones = models.PositiveIntegerField(default=0, verbose_name="Registros")
+    proveedores = models.PositiveIntegerField(default=0, verbose_name="Proveedores")
+    
+    fecha_actualizacion = models.DateTimeField(verbose_name="Última Actualización")
+    
+    class Meta:
+        db_table = 'resumen_precios_mensual'
+        verbose_name = 'Resumen Mensual de Precios'
+        verbose_name_plural = 'Resumen Mensual de Precios'
+        ordering = ['clave', 'unidad_medida', 'mes']
+        unique_together = [['clave', 'unidad_medida', 'mes']]
+    
+    def __str__(self):
+        return f"{self.clave} {self.mes:%Y-%m}: {self.precio_minimo}-{self.precio_maximo}"
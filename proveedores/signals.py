@@ -0,0 +1,60 @@
+"""
+Signals del módulo de Proveedores
+American Carpas 1 SAS
+
+Mantiene el índice de búsqueda al guardar o eliminar proveedores y
+productos/servicios, y registra en el historial de precios los productos
+nuevos y los cambios de precio. Las operaciones masivas (update() /
+bulk_create()) no disparan signals; quien las use debe llamar a
+busqueda.indexar() y historial_precios.registrar() con los objetos
+afectados (o ejecutar el comando reconstruir_indice_busqueda).
+"""
+
+from django.db.models.signals import post_save, post_delete, pre_save
+
+from . import historial_precios
+from .busqueda import indexar, desindexar
+from .models import Proveedor, ProductoServicioProveedor
+
+
+TIPOS_INDEXADOS = {
+    Proveedor: 'PROVEEDOR',
+    ProductoServicioProveedor: 'PRODUCTO',
+}
+
+
+def indexar_objeto(sender, instance, **kwargs):
+    indexar(TIPOS_INDEXADOS[sender], [instance])
+
+
+def desindexar_objeto(sender, instance, **kwargs):
+    desindexar(TIPOS_INDEXADOS[sender], [instance.pk])
+
+
+for _modelo in TIPOS_INDEXADOS:
+    post_save.connect(indexar_objeto, sender=_modelo, dispatch_uid=f'busqueda_save_{_modelo.__name__}')
+    post_delete.connect(desindexar_objeto, sender=_modelo, dispatch_uid=f'busqueda_delete_{_modelo.__name__}')
+
+
+def leer_precio_anterior(sender, instance, raw=False, **kwargs):
+    """Guarda en la instancia el precio que tiene en la base de datos"""
+    instance._precio_anterior = None
+    if raw or instance.pk is None:
+        return
+    instance._precio_anterior = (
+        sender.objects
+        .filter(pk=instance.pk)
+        .values_list(*historial_precios.CAMPOS_PRECIO)
+        .first()
+    )
+
+
+def registrar_precio(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or historial_precios.valores_precio(instance) != getattr(instance, '_precio_anterior', None):
+        historial_precios.registrar([instance], 'MANUAL')
+
+
+pre_save.connect(leer_precio_anterior, sender=ProductoServicioProveedor, dispatch_uid='historial_precio_pre_save')
+post_save.connect(registrar_precio, sender=ProductoServicioProveedor, dispatch_uid='historial_precio_save')
@@ -0,0 +1,290 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import openpyxl
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from american_carpas_project.tests import como_mysql, upserts
+
+from . import busqueda, historial_precios, importacion, indicadores
+from .models import (
+    CategoriaProveedor,
+    HistorialPrecioProducto,
+    IndicadorProveedor,
+    ProductoServicioProveedor,
+    Proveedor,
+    ResumenPrecioMensual,
+    TipoProveedor,
+)
+
+
+def crear_proveedor(numero_documento='900123456', razon_social='Lonas del Valle SAS'):
+    return Proveedor.objects.create(
+        razon_social=razon_social,
+        numero_documento=numero_documento,
+        tipo_proveedor=TipoProveedor.objects.get_or_create(nombre_tipo='Materia prima')[0],
+        categoria_principal=CategoriaProveedor.objects.get_or_create(nombre_categoria='Textiles')[0],
+        ciudad='Cali',
+        direccion='Calle 1 # 2-3',
+        telefono_principal='6020000000',
+        email_principal=f'ventas{numero_documento}@proveedor.co',
+    )
+
+
+def archivo_csv(*lineas):
+    return SimpleUploadedFile('lista.csv', '\n'.join(lineas).encode('utf-8'))
+
+
+class ImportacionCatalogoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        hace_un_mes = date.today() - timedelta(days=30)
+        cls.lona = ProductoServicioProveedor.objects.create(
+            id_proveedor=cls.proveedor, sku_codigo='LN-650', nombre='Lona PVC 650',
+            precio_unitario=Decimal('10000'), fecha_ultima_actualizacion_precio=hace_un_mes,
+        )
+        cls.tensor = ProductoServicioProveedor.objects.create(
+            id_proveedor=cls.proveedor, sku_codigo='TN-12', nombre='Tensor 1/2',
+            precio_unitario=Decimal('2500'), fecha_ultima_actualizacion_precio=hace_un_mes,
+        )
+        # Catálogo cargado en meses anteriores: sin historial en el mes actual
+        HistorialPrecioProducto.objects.all().delete()
+
+    def validar(self, *lineas):
+        return importacion.validar_catalogo(self.proveedor, archivo_csv(*lineas))
+
+    def test_cruza_por_sku_sin_distinguir_mayusculas(self):
+        resultado = self.validar(
+            'SKU;Nombre;Precio',
+            'ln-650;;11000',
+            'tn-12;;2500',
+            'OJ-1;Ojalete;300',
+        )
+
+        self.assertEqual(resultado['errores'], [])
+        self.assertEqual([p.sku_codigo for p in resultado['nuevos']], ['OJ-1'])
+        self.assertEqual([(p.pk, c) for p, c in resultado['actualizados']], [(self.lona.pk, {'precio_unitario'})])
+        self.assertEqual(resultado['sin_cambios'], [self.tensor.pk])
+        cambio, = resultado['cambios_precio']
+        self.assertEqual(cambio['precio_anterior'], Decimal('10000'))
+        self.assertEqual(cambio['precio_nuevo'], Decimal('11000'))
+        self.assertEqual(cambio['variacion'], Decimal('10.00'))
+
+    def test_reporta_los_errores_por_fila(self):
+        resultado = self.validar(
+            'sku,nombre,precio,descuento',
+            'NUEVO-1,,100,',
+            'LN-650,,abc,',
+            'TN-12,,2500,',
+            'TN-12,,2500,',
+            'OJ-1,Ojalete,300,120',
+        )
+
+        self.assertEqual([numero for numero, _ in resultado['errores']], [2, 3, 5, 6])
+        self.assertIn("'nombre' es obligatorio", resultado['errores'][0][1])
+        self.assertIn('ya aparece en la fila 4', resultado['errores'][2][1])
+        self.assertIn("'descuento'", resultado['errores'][3][1])
+
+    def test_exige_las_columnas_sku_y_precio(self):
+        resultado = self.validar('codigo;nombre', 'X;Y')
+
+        self.assertEqual(len(resultado['errores']), 1)
+        self.assertEqual(resultado['errores'][0][0], 0)
+
+    def test_con_errores_no_se_guarda_nada(self):
+        archivo = archivo_csv('sku;nombre;precio', 'LN-650;;11000', 'OJ-1;;300')
+
+        resultado = importacion.importar_catalogo(self.proveedor, archivo)
+
+        self.assertFalse(resultado['guardado'])
+        self.lona.refresh_from_db()
+        self.assertEqual(self.lona.precio_unitario, Decimal('10000'))
+        self.assertFalse(ProductoServicioProveedor.objects.filter(sku_codigo='OJ-1').exists())
+
+    def test_la_simulacion_no_guarda(self):
+        archivo = archivo_csv('sku;nombre;precio', 'OJ-1;Ojalete;300')
+
+        resultado = importacion.importar_catalogo(self.proveedor, archivo, simular=True)
+
+        self.assertFalse(resultado['guardado'])
+        self.assertEqual(resultado['resumen']['creados'], 1)
+        self.assertFalse(ProductoServicioProveedor.objects.filter(sku_codigo='OJ-1').exists())
+
+    def test_guardar_crea_actualiza_y_confirma_precios(self):
+        resultado = self.validar(
+            'sku;nombre;precio;marca',
+            'LN-650;;11000;',
+            'TN-12;;2500;',
+            'OJ-1;Ojalete bronce;300;Acme',
+        )
+
+        resumen = importacion.guardar_catalogo(self.proveedor, resultado)
+
+        self.assertEqual(resumen, {'creados': 1, 'actualizados': 1, 'sin_cambios': 1})
+        self.lona.refresh_from_db()
+        self.tensor.refresh_from_db()
+        self.assertEqual(self.lona.precio_unitario, Decimal('11000'))
+        self.assertEqual(self.lona.fecha_ultima_actualizacion_precio, date.today())
+        self.assertEqual(self.tensor.fecha_ultima_actualizacion_precio, date.today())
+
+        ojalete = ProductoServicioProveedor.objects.get(id_proveedor=self.proveedor, sku_codigo='OJ-1')
+        self.assertEqual(ojalete.marca, 'Acme')
+        self.assertEqual(
+            [r['objeto'].pk for r in busqueda.buscar('ojalete bronce', 'PRODUCTO')], [ojalete.pk]
+        )
+        origenes = dict(HistorialPrecioProducto.objects.values_list('producto_id', 'origen'))
+        self.assertEqual(origenes[ojalete.pk], 'IMPORTACION')
+        self.assertEqual(origenes[self.lona.pk], 'IMPORTACION')
+        self.assertEqual(origenes[self.tensor.pk], 'CONFIRMACION')
+
+    def test_cierra_el_libro_xlsx(self):
+        libro = openpyxl.Workbook()
+        libro.active.append(['sku', 'precio'])
+        libro.active.append(['LN-650', 11000])
+        contenido = io.BytesIO()
+        libro.save(contenido)
+
+        with mock.patch.object(openpyxl.Workbook, 'close', autospec=True) as close:
+            resultado = importacion.validar_catalogo(
+                self.proveedor, SimpleUploadedFile('lista.xlsx', contenido.getvalue())
+            )
+
+        self.assertEqual(resultado['errores'], [])
+        close.assert_called_once()
+
+    def test_en_mysql_los_productos_existentes_no_se_guardan_con_upsert(self):
+        resultado = self.validar('sku;precio', 'LN-650;11000')
+
+        with como_mysql() as llamadas:
+            importacion.guardar_catalogo(self.proveedor, resultado)
+
+        self.assertNotIn(ProductoServicioProveedor, [modelo for modelo, kwargs in llamadas if kwargs.get('update_conflicts')])
+        for kwargs in upserts(llamadas):
+            self.assertNotIn('unique_fields', kwargs)
+        self.lona.refresh_from_db()
+        self.assertEqual(self.lona.precio_unitario, Decimal('11000'))
+
+
+class HistorialPreciosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = crear_proveedor()
+        cls.otro_proveedor = crear_proveedor('800999888', 'Carpas Andinas SAS')
+
+    def crear_producto(self, proveedor, precio, sku='LN-650'):
+        return ProductoServicioProveedor.objects.create(
+            id_proveedor=proveedor, sku_codigo=sku, nombre='Lona PVC 650', precio_unitario=Decimal(precio),
+        )
+
+    def test_crear_un_producto_registra_su_precio(self):
+        producto = self.crear_producto(self.proveedor, '1000')
+
+        fila = HistorialPrecioProducto.objects.get(producto=producto)
+        self.assertEqual((fila.origen, fila.clave, fila.precio_cop), ('MANUAL', 'LN-650', Decimal('1000.00')))
+
+    def test_solo_los_cambios_de_precio_agregan_filas(self):
+        producto = self.crear_producto(self.proveedor, '1000')
+
+        producto.marca = 'Acme'
+        producto.precio_unitario = Decimal('1000.00')
+        producto.save()
+        self.assertEqual(HistorialPrecioProducto.objects.filter(producto=producto).count(), 1)
+
+        producto.descuento_porcentaje = Decimal('10')
+        producto.save()
+        self.assertEqual(
+            list(HistorialPrecioProducto.objects.filter(producto=producto).order_by('pk').values_list('precio_final', flat=True)),
+            [Decimal('1000.00'), Decimal('900.00')],
+        )
+
+    def test_resumen_mensual_por_material(self):
+        producto = self.crear_producto(self.proveedor, '1000')
+        self.crear_producto(self.otro_proveedor, '3000', sku=' ln-650 ')
+        self.crear_producto(self.otro_proveedor, '99999', sku='OTRO')
+        producto.precio_unitario = Decimal('2000')
+        producto.save()
+
+        resumen = ResumenPrecioMensual.objects.get(clave='LN-650')
+        self.assertEqual(resumen.mes, date.today().replace(day=1))
+        self.assertEqual(
+            (resumen.precio_minimo, resumen.precio_promedio, resumen.precio_maximo),
+            (Decimal('1000.00'), Decimal('2000.00'), Decimal('3000.00')),
+        )
+        self.assertEqual((resumen.observaciones, resumen.proveedores), (3, 2))
+        self.assertEqual(historial_precios.reconstruir_resumen(), 2)
+        self.assertEqual(ResumenPrecioMensual.objects.count(), 2)
+
+    def test_en_mysql_el_resumen_no_indica_unique_fields(self):
+        with como_mysql() as llamadas:
+            historial_precios.actualizar_resumen([('LN-650', 'UNIDAD')], date.today())
+            self.crear_producto(self.proveedor, '1000')
+
+        self.assertTrue(upserts(llamadas))
+        for kwargs in upserts(llamadas):
+            self.assertNotIn('unique_fields', kwargs)
+
+
+class IndicadoresTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.barato = crear_proveedor()
+        cls.caro = crear_proveedor('800999888', 'Carpas Andinas SAS')
+        cls.aparte = crear_proveedor('700111222', 'Herrajes del Sur SAS')
+
+    def setUp(self):
+        self.lona = self.crear_producto(self.barato, 'LN-650', '1000')
+        self.crear_producto(self.caro, 'LN-650', '2000')
+        self.crear_producto(self.aparte, 'TN-12', '500')
+        indicadores.actualizar_indicadores()
+
+    def crear_producto(self, proveedor, sku, precio):
+        return ProductoServicioProveedor.objects.create(
+            id_proveedor=proveedor, sku_codigo=sku, nombre=sku, precio_unitario=Decimal(precio),
+        )
+
+    def competitividad(self, proveedor):
+        return IndicadorProveedor.objects.get(proveedor=proveedor).competitividad_precio
+
+    def test_calcula_la_competitividad_por_grupo(self):
+        self.assertEqual(self.competitividad(self.barato), Decimal('100.00'))
+        self.assertEqual(self.competitividad(self.caro), Decimal('50.00'))
+        self.assertIsNone(self.competitividad(self.aparte))
+        self.assertEqual(indicadores.proveedores_pendientes(), [])
+        self.assertEqual(indicadores.actualizar_indicadores(), 0)
+
+    def test_un_precio_nuevo_recalcula_solo_su_grupo(self):
+        self.lona.precio_unitario = Decimal('4000')
+        self.lona.save()
+
+        self.assertEqual(indicadores.proveedores_pendientes(), sorted([self.barato.pk, self.caro.pk]))
+        self.assertEqual(indicadores.actualizar_indicadores(), 2)
+        self.assertEqual(self.competitividad(self.barato), Decimal('50.00'))
+        self.assertEqual(self.competitividad(self.caro), Decimal('100.00'))
+
+    def test_un_producto_eliminado_recalcula_su_grupo(self):
+        self.lona.delete()
+
+        self.assertEqual(indicadores.proveedores_pendientes(), sorted([self.barato.pk, self.caro.pk]))
+        indicadores.actualizar_indicadores()
+        self.assertIsNone(self.competitividad(self.caro))
+
+    def test_la_competitividad_de_algunos_recorre_sus_grupos_completos(self):
+        self.assertEqual(
+            indicadores.competitividad_por_proveedor([self.caro.pk]),
+            {self.caro.pk: (1, Decimal('50.00'))},
+        )
+
+    def test_en_mysql_el_upsert_no_indica_unique_fields(self):
+        with como_mysql() as llamadas:
+            indicadores.actualizar_indicadores(completo=True)
+
+        self.assertEqual(len(upserts(llamadas)), 1)
+        self.assertNotIn('unique_fields', upserts(llamadas)[0])
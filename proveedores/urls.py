@@ -35,10 +35,12 @@ urlpatterns = [
     # CRUD PROVEEDORES - FASE 2
     # ====================================
     path('listado/', views.proveedor_list, name='proveedor_list'),
+    path('buscar/', views.busqueda_general, name='busqueda'),
     path('nuevo/', views.proveedor_create, name='proveedor_create'),
     path('<int:id_proveedor>/', views.proveedor_detail, name='proveedor_detail'),
     path('<int:id_proveedor>/editar/', views.proveedor_update, name='proveedor_update'),
     path('<int:id_proveedor>/eliminar/', views.proveedor_delete, name='proveedor_delete'),
+    path('exportar/<str:formato>/', views.proveedor_exportar, name='proveedor_exportar'),
     
     # ====================================
     # GESTIÓN DE CONTACTOS - FASE 3
@@ -61,4 +63,17 @@ urlpatterns = [
     path('<int:id_proveedor>/producto/nuevo/', views.producto_create, name='producto_create'),
     path('producto/<int:id_producto_servicio>/editar/', views.producto_update, name='producto_update'),
     path('producto/<int:id_producto_servicio>/eliminar/', views.producto_delete, name='producto_delete'),
+    path('<int:id_proveedor>/producto/importar/', views.producto_importar, name='producto_importar'),
+    path('producto/plantilla/', views.producto_plantilla, name='producto_plantilla'),
+
+    # ====================================
+    # COMPARADOR DE PRECIOS
+    # ====================================
+    path('api/mejor-oferta/', views.mejor_oferta_api, name='mejor_oferta_api'),
+
+    # ====================================
+    # HISTORIAL DE PRECIOS
+    # ====================================
+    path('api/precios/serie/', views.serie_precios_api, name='serie_precios_api'),
+    path('api/precios/mensual/', views.resumen_precios_api, name='resumen_precios_api'),
 ]
@@ -1,8 +1,18 @@
+import tempfile
+from datetime import date
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db import models  # Para usar Q
-from django.http import FileResponse, Http404, HttpResponse  # ✅ IMPORTS NECESARIOS PARA MANEJO DE ARCHIVOS
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse  # ✅ IMPORTS NECESARIOS PARA MANEJO DE ARCHIVOS
+from django.contrib.auth.decorators import login_required
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+
+from american_carpas_project.estadisticas import contar_varios_en_cache
 
 # ✅ IMPORTAR TODOS LOS MODELOS AL INICIO
 from .models import (
@@ -12,7 +22,8 @@ from .models import (
     Proveedor,
     ContactoProveedor,
     DocumentoProveedor,
-    ProductoServicioProveedor
+    ProductoServicioProveedor,
+    IndiceBusqueda,
 )
 
 # ✅ IMPORTAR TODOS LOS FORMULARIOS AL INICIO
@@ -23,8 +34,12 @@ from .forms import (
     ProveedorForm,
     ContactoProveedorForm,
     DocumentoProveedorForm,
-    ProductoServicioProveedorForm
+    ProductoServicioProveedorForm,
+    ImportarCatalogoForm
 )
+from .categorias import ArbolCategorias
+from .vigencia import anotar_estado
+from . import busqueda, comparador, exportacion, historial_precios, importacion
 
 
 # =====================================================
@@ -33,10 +48,16 @@ from .forms import (
 
 def home_proveedores(request):
     """Página principal del módulo de proveedores con menú de iconos"""
+    activos = {'total': models.Q(activo=True)}
+    tipos, categorias, tipos_documentos = contar_varios_en_cache('home_proveedores', [
+        (TipoProveedor, activos),
+        (CategoriaProveedor, activos),
+        (TipoDocumentoProveedor, activos),
+    ])
     context = {
-        'total_tipos': TipoProveedor.objects.filter(activo=True).count(),
-        'total_categorias': CategoriaProveedor.objects.filter(activo=True).count(),
-        'total_tipos_documentos': TipoDocumentoProveedor.objects.filter(activo=True).count(),
+        'total_tipos': tipos['total'],
+        'total_categorias': categorias['total'],
+        'total_tipos_documentos': tipos_documentos['total'],
         'show_module_nav': True,
         'active_module': 'proveedores'
     }
@@ -141,7 +162,7 @@ def tipo_proveedor_delete(request, id_tipo_proveedor):
 def categoria_proveedor_list(request):
     """Listado de categorías con búsqueda y paginación"""
     query = request.GET.get('q', '')
-    categorias = CategoriaProveedor.objects.all()
+    categorias = CategoriaProveedor.objects.select_related('categoria_padre')
     
     if query:
         categorias = categorias.filter(nombre_categoria__icontains=query)
@@ -321,18 +342,32 @@ def tipo_documento_delete(request, id_tipo_documento):
 # =====================================================
 
 
-def proveedor_list(request):
-    """Listado de proveedores con búsqueda y filtros"""
+def _proveedores_filtrados(request, arbol_categorias):
+    """Proveedores con la búsqueda, filtros y orden del listado (parámetros GET)"""
     query = request.GET.get('q', '')
     estado_filtro = request.GET.get('estado', '')
     tipo_filtro = request.GET.get('tipo', '')
+    categoria_filtro = request.GET.get('categoria', '')
+    orden = request.GET.get('orden', '')
+    puntaje_min = request.GET.get('puntaje_min', '')
     
     proveedores = Proveedor.objects.select_related(
-        'tipo_proveedor', 'categoria_principal'
+        'tipo_proveedor', 'categoria_principal', 'indicador'
     ).all()
     
-    # Filtros
-    if query:
+    # Filtros: la búsqueda usa el índice de búsqueda, ordenado por relevancia
+    # (sin tope: todos los que coinciden); si no trae términos que el índice
+    # resuelva ("de", "lt") se busca con icontains como antes
+    relevancia = False
+    if query and busqueda.usa_indice(query):
+        encontrados = busqueda.consulta_coincidencias(query, 'PROVEEDOR')
+        proveedores = proveedores.annotate(
+            relevancia=models.Subquery(
+                encontrados.filter(id_objeto=models.OuterRef('pk')).values('puntaje')[:1]
+            )
+        ).filter(relevancia__isnull=False)
+        relevancia = True
+    elif query:
         proveedores = proveedores.filter(
             models.Q(razon_social__icontains=query) |
             models.Q(nombre_comercial__icontains=query) |
@@ -345,7 +380,37 @@ def proveedor_list(request):
     if tipo_filtro:
         proveedores = proveedores.filter(tipo_proveedor__id_tipo_proveedor=tipo_filtro)
     
-    proveedores = proveedores.order_by('razon_social')
+    # La categoría incluye sus subcategorías (rango sobre la ruta materializada)
+    if categoria_filtro.isdigit() and int(categoria_filtro) in arbol_categorias:
+        ruta = arbol_categorias.get(int(categoria_filtro)).ruta
+        proveedores = proveedores.filter(
+            CategoriaProveedor.filtro_subarbol(ruta, campo='categoria_principal__ruta')
+        )
+    
+    # Puntaje precalculado (IndicadorProveedor), no se calcula nada aquí
+    if puntaje_min.isdigit():
+        proveedores = proveedores.filter(indicador__puntaje__gte=int(puntaje_min))
+    
+    if orden == 'puntaje':
+        proveedores = proveedores.order_by(models.F('indicador__puntaje').desc(nulls_last=True), 'razon_social')
+    elif relevancia:
+        proveedores = proveedores.order_by('-relevancia', 'razon_social')
+    else:
+        proveedores = proveedores.order_by('razon_social')
+    return proveedores
+
+
+def proveedor_list(request):
+    """Listado de proveedores con búsqueda y filtros"""
+    query = request.GET.get('q', '')
+    estado_filtro = request.GET.get('estado', '')
+    tipo_filtro = request.GET.get('tipo', '')
+    categoria_filtro = request.GET.get('categoria', '')
+    orden = request.GET.get('orden', '')
+    puntaje_min = request.GET.get('puntaje_min', '')
+    arbol_categorias = ArbolCategorias()
+    
+    proveedores = _proveedores_filtrados(request, arbol_categorias)
     
     # Paginación
     paginator = Paginator(proveedores, 12)
@@ -358,13 +423,22 @@ def proveedor_list(request):
     # Obtener las opciones de estado del modelo Proveedor
     estado_choices = Proveedor._meta.get_field('estado').choices
     
+    # La exportación usa los mismos filtros, sin la página
+    parametros = request.GET.copy()
+    parametros.pop('page', None)
+    
     context = {
         'page_obj': page_obj,
         'query': query,
         'estado_filtro': estado_filtro,
         'tipo_filtro': tipo_filtro,
         'tipos_proveedor': tipos_proveedor,
+        'categoria_filtro': categoria_filtro,
+        'opciones_categoria': arbol_categorias.opciones(),
+        'orden': orden,
+        'puntaje_min': puntaje_min,
         'estados': estado_choices,
+        'parametros_exportacion': parametros.urlencode(),
         'show_module_nav': True,
         'active_module': 'proveedores'
     }
@@ -373,17 +447,20 @@ def proveedor_list(request):
 
 def proveedor_detail(request, id_proveedor):
     """Detalle completo del proveedor"""
+    documentos = anotar_estado(DocumentoProveedor.objects.select_related('id_tipo_documento'))
     proveedor = get_object_or_404(
         Proveedor.objects.select_related(
-            'tipo_proveedor', 'categoria_principal'
-        ).prefetch_related('contactos', 'documentos', 'productos_servicios'),
+            'tipo_proveedor', 'categoria_principal', 'indicador'
+        ).prefetch_related(
+            'contactos', Prefetch('documentos', queryset=documentos), 'productos_servicios'
+        ),
         id_proveedor=id_proveedor
     )
     
-    # Actualizar estado de todos los documentos
+    # Estado calculado al leer (solo lectura: el guardado lo hace
+    # el comando actualizar_estados_documentos)
     for doc in proveedor.documentos.all():
-        doc.actualizar_estado()
-        doc.save()
+        doc.estado_documento = doc.estado_vigente
     
     context = {
         'proveedor': proveedor,
@@ -465,6 +542,28 @@ def proveedor_delete(request, id_proveedor):
     return render(request, 'proveedores/proveedor_confirm_delete.html', context)
 
 
+@login_required
+def proveedor_exportar(request, formato):
+    """
+    Exporta los proveedores del listado (mismos filtros) con contactos,
+    documentos y productos a Excel (una hoja por entidad) o PDF. El archivo
+    se genera por bloques en un temporal y se envía en streaming.
+    """
+    if formato not in exportacion.FORMATOS:
+        raise Http404('Formato de exportación no soportado')
+    proveedores = _proveedores_filtrados(request, ArbolCategorias())
+    
+    archivo = tempfile.TemporaryFile()
+    exportacion.EXPORTADORES[formato](proveedores, archivo)
+    archivo.seek(0)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=exportacion.nombre_archivo(formato),
+        content_type=exportacion.FORMATOS[formato][1],
+    )
+
+
 # =====================================================
 # GESTIÓN DE CONTACTOS - FASE 3
 # =====================================================
@@ -816,4 +915,223 @@ def producto_delete(request, id_producto_servicio):
         'show_module_nav': True,
         'active_module': 'proveedores',
     }
-    return render(request, 'proveedores/producto_confirm_delete.html', context)
\ No newline at end of file
+    return render(request, 'proveedores/producto_confirm_delete.html', context)
+
+
+# Filas del informe de cambios de precio que se muestran en pantalla
+CAMBIOS_PRECIO_VISIBLES = 500
+
+
+@login_required
+def producto_importar(request, id_proveedor):
+    """Importación masiva de la lista de precios del proveedor"""
+    proveedor = get_object_or_404(Proveedor, id_proveedor=id_proveedor)
+    resultado = None
+    
+    if request.method == 'POST':
+        form = ImportarCatalogoForm(request.POST, request.FILES)
+        if form.is_valid():
+            resultado = importacion.importar_catalogo(
+                proveedor, form.cleaned_data['archivo'], simular=form.cleaned_data['simular']
+            )
+            resumen = resultado['resumen']
+            if resultado['errores']:
+                messages.error(
+                    request,
+                    f'La lista tiene {len(resultado["errores"])} errores. No se guardó ningún producto.'
+                )
+            elif resultado['guardado']:
+                messages.success(
+                    request,
+                    f'✅ Catálogo importado: {resumen["creados"]} nuevos, '
+                    f'{resumen["actualizados"]} actualizados, {resumen["sin_cambios"]} sin cambios.'
+                )
+            else:
+                messages.info(request, 'Simulación: no se guardó ningún cambio.')
+    else:
+        form = ImportarCatalogoForm()
+    
+    context = {
+        'form': form,
+        'proveedor': proveedor,
+        'resultado': resultado,
+        'cambios_precio': resultado['cambios_precio'][:CAMBIOS_PRECIO_VISIBLES] if resultado else [],
+        'cambios_visibles': CAMBIOS_PRECIO_VISIBLES,
+        'columnas': importacion.COLUMNAS_PLANTILLA,
+        'show_module_nav': True,
+        'active_module': 'proveedores',
+    }
+    return render(request, 'proveedores/producto_importar.html', context)
+
+
+@login_required
+def producto_plantilla(request):
+    """Plantilla Excel vacía con los encabezados de la lista de precios"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Lista de precios'
+    ws.append(importacion.COLUMNAS_PLANTILLA)
+    for col, _ in enumerate(importacion.COLUMNAS_PLANTILLA, start=1):
+        celda = ws.cell(row=1, column=col)
+        celda.font = Font(bold=True, color="FFFFFF")
+        celda.fill = PatternFill(start_color="198754", end_color="198754", fill_type="solid")
+        ws.column_dimensions[celda.column_letter].width = 18
+    
+    response = HttpResponse(
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = 'attachment; filename="plantilla_lista_precios.xlsx"'
+    wb.save(response)
+    return response
+
+
+# =====================================================
+# COMPARADOR DE PRECIOS
+# =====================================================
+
+def _oferta_json(oferta):
+    return {
+        'id': oferta['id_producto_servicio'],
+        'proveedor_id': oferta['id_proveedor_id'],
+        'proveedor': oferta['id_proveedor__razon_social'],
+        'calificacion': float(oferta['id_proveedor__calificacion']),
+        'nombre': oferta['nombre'],
+        'sku': oferta['sku_codigo'],
+        'moneda': oferta['moneda'],
+        'precio_unitario': float(oferta['precio_unitario']),
+        'precio_final': float(oferta['precio_final']),
+        'precio_cop': float(oferta['precio_cop']),
+        'tiempo_entrega_dias': oferta['tiempo_entrega_dias'],
+        'cantidad_minima': oferta['cantidad_minima'],
+        'posicion_precio': oferta['posicion_precio'],
+        'puntaje': round(float(oferta['puntaje']), 4),
+    }
+
+
+@login_required
+def mejor_oferta_api(request):
+    """
+    Ofertas del mismo material entre proveedores y la mejor según precio,
+    tiempo de entrega y calificación.
+    GET ?sku=&q=&unidad=&limite=20 (se requiere sku o q)
+    """
+    sku = request.GET.get('sku', '').strip()
+    texto = request.GET.get('q', '').strip()
+    if not sku and not texto:
+        return JsonResponse({'error': 'Indique el parámetro sku o q'}, status=400)
+    limite = request.GET.get('limite', '20')
+    limite = min(int(limite), 100) if limite.isdigit() and int(limite) > 0 else 20
+
+    grupos = comparador.comparar(
+        sku=sku or None, texto=texto or None,
+        unidad_medida=request.GET.get('unidad') or None, limite_grupos=limite,
+    )
+    return JsonResponse({
+        'total': len(grupos),
+        'grupos': [
+            {
+                'clave': grupo['clave'],
+                'unidad_medida': grupo['unidad_medida'],
+                'ofertas_total': grupo['ofertas_total'],
+                'precio_minimo_cop': float(grupo['precio_minimo']),
+                'mejor_oferta': _oferta_json(grupo['mejor_oferta']),
+                'ofertas': [_oferta_json(oferta) for oferta in grupo['ofertas']],
+            }
+            for grupo in grupos
+        ],
+    })
+
+
+# =====================================================
+# HISTORIAL DE PRECIOS
+# =====================================================
+
+def _fecha_parametro(request, nombre):
+    """Fecha AAAA-MM-DD de un parámetro GET (None si no viene); ValueError si es inválida"""
+    valor = request.GET.get(nombre, '').strip()
+    return date.fromisoformat(valor) if valor else None
+
+
+@login_required
+def serie_precios_api(request):
+    """
+    Serie de precios de un producto/servicio, del registro más antiguo al
+    más reciente, como [fecha, precio_final, moneda].
+    GET ?producto=&desde=AAAA-MM-DD
+    """
+    producto = request.GET.get('producto', '')
+    if not producto.isdigit():
+        return JsonResponse({'error': 'Indique el parámetro producto'}, status=400)
+    try:
+        desde = _fecha_parametro(request, 'desde')
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida, use el formato AAAA-MM-DD'}, status=400)
+
+    serie = historial_precios.serie_producto(int(producto), desde)
+    return JsonResponse({
+        'producto': int(producto),
+        'total': len(serie),
+        'serie': [
+            [fecha.isoformat(timespec='seconds'), float(precio), moneda]
+            for fecha, precio, moneda in serie
+        ],
+    })
+
+
+@login_required
+def resumen_precios_api(request):
+    """
+    Mínimo, promedio y máximo mensual en COP de un material entre todos los
+    proveedores (clave = SKU o nombre, como en el comparador).
+    GET ?clave=&unidad=&desde=AAAA-MM-DD&hasta=AAAA-MM-DD
+    """
+    clave = request.GET.get('clave', '').strip()
+    if not clave:
+        return JsonResponse({'error': 'Indique el parámetro clave'}, status=400)
+    try:
+        desde = _fecha_parametro(request, 'desde')
+        hasta = _fecha_parametro(request, 'hasta')
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida, use el formato AAAA-MM-DD'}, status=400)
+
+    series = {}
+    for resumen in historial_precios.serie_mensual(clave, request.GET.get('unidad') or None, desde, hasta):
+        series.setdefault(resumen.unidad_medida, []).append([
+            resumen.mes.strftime('%Y-%m'),
+            float(resumen.precio_minimo),
+            float(resumen.precio_promedio),
+            float(resumen.precio_maximo),
+            resumen.observaciones,
+            resumen.proveedores,
+        ])
+    return JsonResponse({
+        'clave': clave.upper(),
+        'columnas': ['mes', 'minimo', 'promedio', 'maximo', 'registros', 'proveedores'],
+        'series': [
+            {'unidad_medida': unidad, 'meses': meses}
+            for unidad, meses in series.items()
+        ],
+    })
+
+
+# =====================================================
+# BÚSQUEDA DE PROVEEDORES Y PRODUCTOS
+# =====================================================
+
+def busqueda_general(request):
+    """Búsqueda en proveedores y productos/servicios ordenada por relevancia"""
+    query = request.GET.get('q', '').strip()
+    tipo = request.GET.get('tipo', '')
+    if tipo not in busqueda.MODELOS:
+        tipo = ''
+    resultados = busqueda.buscar(query, tipo or None) if query else []
+
+    context = {
+        'query': query,
+        'tipo': tipo,
+        'tipos': IndiceBusqueda.TIPO_OBJETO_CHOICES,
+        'resultados': resultados,
+        'show_module_nav': True,
+        'active_module': 'proveedores',
+    }
+    return render(request, 'proveedores/busqueda.html', context)
@@ -0,0 +1,67 @@
+"""
+Estado de vigencia de los documentos de proveedores
+American Carpas 1 SAS
+
+El estado (VIGENTE, POR_VENCER, VENCIDO, NO_APLICA) depende de la fecha de
+hoy y de los días de alerta del tipo de documento. En lugar de recalcularlo
+documento por documento al mostrar un proveedor, se mantiene con un UPDATE
+por conjunto (management command actualizar_estados_documentos, una vez al
+día) y las pantallas lo calculan al leer con la misma expresión CASE, de
+modo que se ven bien aunque la tarea programada no haya corrido.
+"""
+
+from datetime import date, timedelta
+
+from django.db.models import Case, CharField, Q, Value, When
+
+from .models import DocumentoProveedor, TipoDocumentoProveedor
+
+
+def tipos_por_dias_alerta():
+    """{dias_alerta: [ids de tipo de documento]} (sin días configurados = 0)"""
+    grupos = {}
+    for id_tipo, dias in TipoDocumentoProveedor.objects.values_list(
+        'id_tipo_documento', 'dias_alerta_vencimiento'
+    ):
+        grupos.setdefault(dias or 0, []).append(id_tipo)
+    return grupos
+
+
+def expresion_estado(hoy=None, grupos=None):
+    """
+    CASE con el estado de cada documento a la fecha `hoy`. Los días de
+    alerta entran como un WHEN por cada valor distinto (normalmente pocos),
+    filtrando por id de tipo, así la expresión sirve también en un UPDATE.
+    """
+    hoy = hoy or date.today()
+    if grupos is None:
+        grupos = tipos_por_dias_alerta()
+
+    condiciones = [
+        When(fecha_vencimiento__isnull=True, then=Value('NO_APLICA')),
+        When(fecha_vencimiento__lt=hoy, then=Value('VENCIDO')),
+    ]
+    for dias, tipos in sorted(grupos.items()):
+        condiciones.append(When(
+            Q(id_tipo_documento__in=tipos, fecha_vencimiento__lte=hoy + timedelta(days=dias)),
+            then=Value('POR_VENCER'),
+        ))
+    return Case(*condiciones, default=Value('VIGENTE'), output_field=CharField())
+
+
+def actualizar_estados(hoy=None):
+    """
+    Recalcula estado_documento de todos los documentos con un solo UPDATE
+    que solo escribe las filas cuyo estado cambió. Retorna cuántas cambiaron.
+    """
+    estado = expresion_estado(hoy)
+    return (
+        DocumentoProveedor.objects
+        .exclude(estado_documento=estado)
+        .update(estado_documento=estado)
+    )
+
+
+def anotar_estado(queryset, hoy=None):
+    """Anota `estado_vigente` (estado calculado a la fecha) sin escribir nada"""
+    return queryset.annotate(estado_vigente=expresion_estado(hoy))
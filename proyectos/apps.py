@@ -10,3 +10,11 @@ class ProyectosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'proyectos'
     verbose_name = 'Gestión de Proyectos'
+
+    def ready(self):
+        """Invalida las estadísticas del tablero cuando cambian proyectos, clientes o estados"""
+        from american_carpas_project.estadisticas import registrar_dependencia, registrar_invalidacion
+        from .models import Proyecto, Cliente, EstadoProyecto
+        registrar_invalidacion(Proyecto, Cliente)
+        # proyectos_activos filtra por estado_proyecto__es_estado_final
+        registrar_dependencia(Proyecto, EstadoProyecto)
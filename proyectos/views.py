@@ -20,6 +20,7 @@ from .models import Proyecto, Actividad
 from django.utils import timezone
 
 from trabajadores.models import TrabajadorPersonal
+from american_carpas_project.estadisticas import contar_varios_en_cache
 from .models import (
     TipoProyecto,
     EstadoProyecto,
@@ -55,18 +56,18 @@ from .forms import (
 def home_proyectos(request):
     """Vista principal del módulo de proyectos"""
     
-    # Estadísticas generales
-    total_proyectos = Proyecto.objects.filter(activo=True).count()
-    total_clientes = Cliente.objects.filter(activo=True).count()
-    proyectos_activos = Proyecto.objects.filter(
-        activo=True,
-        estado_proyecto__es_estado_final=False
-    ).count()
+    # Estadísticas generales (una consulta por modelo, servidas juntas desde caché)
+    stats_proyectos, stats_clientes = contar_varios_en_cache('home_proyectos', [
+        (Proyecto, {
+            'total_proyectos': Q(activo=True),
+            'proyectos_activos': Q(activo=True, estado_proyecto__es_estado_final=False),
+        }),
+        (Cliente, {'total_clientes': Q(activo=True)}),
+    ])
     
     context = {
-        'total_proyectos': total_proyectos,
-        'total_clientes': total_clientes,
-        'proyectos_activos': proyectos_activos,
+        **stats_proyectos,
+        **stats_clientes,
         'show_module_nav': True,
         'active_module': 'proyectos',
     }
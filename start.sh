@@ -14,6 +14,9 @@ python manage.py check --database default
 echo "Ejecutando migraciones de Django..."
 python manage.py migrate --noinput
 
+echo "Creando tabla de caché compartida..."
+python manage.py createcachetable
+
 echo "Verificando migraciones..."
 python manage.py showmigrations
 
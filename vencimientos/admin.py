@@ -0,0 +1,30 @@
+"""
+Configuración del Admin para el módulo de vencimientos de documentos
+American Carpas 1 SAS
+"""
+
+from django.contrib import admin
+from .models import VencimientoDocumento
+
+
+@admin.register(VencimientoDocumento)
+class VencimientoDocumentoAdmin(admin.ModelAdmin):
+    """Solo lectura: el índice se mantiene desde los documentos de cada módulo"""
+    list_display = [
+        'fecha_vencimiento',
+        'tipo_propietario',
+        'nombre_propietario',
+        'tipo_documento',
+        'referencia',
+        'dias_alerta'
+    ]
+    list_filter = ['tipo_propietario']
+    search_fields = ['nombre_propietario', 'id_propietario', 'tipo_documento', 'referencia']
+    date_hierarchy = 'fecha_vencimiento'
+    ordering = ['fecha_vencimiento']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
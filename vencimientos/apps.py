@@ -0,0 +1,16 @@
+"""
+Configuración de la aplicación vencimientos
+American Carpas 1 SAS
+"""
+
+from django.apps import AppConfig
+
+
+class VencimientosConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'vencimientos'
+    verbose_name = 'Vencimientos de Documentos'
+
+    def ready(self):
+        """Conecta los signals que mantienen el índice de vencimientos"""
+        from . import signals  # noqa: F401
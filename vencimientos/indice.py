@@ -0,0 +1,199 @@
+"""
+Índice de vencimientos de documentos de toda la empresa
+American Carpas 1 SAS
+
+Cada módulo controla la vigencia a su manera y documento por documento
+(DocumentoProveedor.actualizar_estado, TrabajadorDocumento.get_estado_vigencia,
+DocumentoProyecto.requiere_renovacion). VencimientoDocumento reúne en una
+tabla los documentos con fecha de vencimiento de los tres, con el propietario
+y los días de alerta de su tipo:
+
+- Proveedores: documentos con fecha_vencimiento; alerta del tipo.
+- Trabajadores: documentos con vigencia_hasta cuyo tipo requiere vigencia;
+  alerta de DIAS_ALERTA_TRABAJADORES (los 30 días de get_estado_vigencia).
+- Proyectos: documentos activos con fecha_vencimiento; alerta del tipo.
+
+Los signals (vencimientos/signals.py) reindexan un documento al guardarlo o
+eliminarlo, y los documentos de un tipo o propietario cuando este cambia.
+reconstruir() rehace el índice completo.
+"""
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast, Coalesce, Concat
+
+from american_carpas_project.upsert import upsert
+from proveedores.models import DocumentoProveedor, Proveedor, TipoDocumentoProveedor
+from proyectos.models import DocumentoProyecto, Proyecto, TipoDocumentoProyecto
+from trabajadores.models import TipoDocumento, TrabajadorDocumento, TrabajadorPersonal
+
+from .models import VencimientoDocumento
+
+
+# Días de alerta de los documentos de trabajadores (su tipo no los configura)
+DIAS_ALERTA_TRABAJADORES = getattr(settings, 'VENCIMIENTOS_DIAS_ALERTA_TRABAJADORES', 30)
+
+TAMANO_LOTE = 1000
+
+# Origen de cada tipo de propietario:
+#   modelo: modelo del documento
+#   fechados: documentos que entran al índice
+#   relaciones: {modelo relacionado: campo}, al cambiar se reindexan sus documentos
+#   campos: valores de la fila del índice
+FUENTES = {
+    'PROVEEDOR': {
+        'modelo': DocumentoProveedor,
+        'fechados': Q(fecha_vencimiento__isnull=False),
+        'relaciones': {Proveedor: 'id_proveedor', TipoDocumentoProveedor: 'id_tipo_documento'},
+        'campos': {
+            'id_propietario': Cast('id_proveedor_id', CharField()),
+            'nombre_propietario': F('id_proveedor__razon_social'),
+            'tipo_documento': F('id_tipo_documento__nombre_tipo_documento'),
+            'referencia': Coalesce('numero_documento', Value('')),
+            'fecha_vencimiento': F('fecha_vencimiento'),
+            'dias_alerta': Coalesce('id_tipo_documento__dias_alerta_vencimiento', Value(0)),
+        },
+    },
+    'TRABAJADOR': {
+        'modelo': TrabajadorDocumento,
+        'fechados': Q(vigencia_hasta__isnull=False, tipo_documento__requiere_vigencia=True),
+        'relaciones': {TrabajadorPersonal: 'id_trabajador', TipoDocumento: 'tipo_documento'},
+        'campos': {
+            'id_propietario': F('id_trabajador_id'),
+            'nombre_propietario': Concat(
+                'id_trabajador__nombres', Value(' '), 'id_trabajador__apellidos',
+                output_field=CharField(),
+            ),
+            'tipo_documento': F('tipo_documento__nombre_tipo_documento'),
+            'referencia': Coalesce('nombre_archivo_original', Value('')),
+            'fecha_vencimiento': F('vigencia_hasta'),
+            'dias_alerta': Value(DIAS_ALERTA_TRABAJADORES),
+        },
+    },
+    'PROYECTO': {
+        'modelo': DocumentoProyecto,
+        'fechados': Q(fecha_vencimiento__isnull=False, activo=True),
+        'relaciones': {Proyecto: 'proyecto', TipoDocumentoProyecto: 'tipo_documento'},
+        'campos': {
+            'id_propietario': Cast('proyecto_id', CharField()),
+            'nombre_propietario': Concat(
+                'proyecto__codigo_proyecto', Value(' - '), 'proyecto__nombre_proyecto',
+                output_field=CharField(),
+            ),
+            'tipo_documento': F('tipo_documento__nombre_tipo_documento'),
+            'referencia': F('nombre_documento'),
+            'fecha_vencimiento': F('fecha_vencimiento'),
+            'dias_alerta': Coalesce('tipo_documento__dias_alerta_vencimiento', Value(0)),
+        },
+    },
+}
+
+CAMPOS_ACTUALIZABLES = [
+    'id_propietario', 'nombre_propietario', 'tipo_documento', 'referencia',
+    'fecha_vencimiento', 'dias_alerta', 'fecha_actualizacion',
+]
+
+
+# =============================================================================
+# MANTENIMIENTO DEL ÍNDICE
+# =============================================================================
+
+def valores_indice(tipo, documentos):
+    """
+    Datos de la fila del índice de cada documento fechado del queryset
+    (también sirve con los modelos históricos de una migración).
+    """
+    fuente = FUENTES[tipo]
+    # Alias con prefijo: las anotaciones no pueden llamarse igual que un campo
+    alias = {f'v_{nombre}': expresion for nombre, expresion in fuente['campos'].items()}
+    valores = documentos.filter(fuente['fechados']).annotate(**alias).order_by().values_list('pk', *alias)
+    for pk, *datos in valores.iterator(chunk_size=TAMANO_LOTE):
+        fila = dict(zip(fuente['campos'], datos))
+        yield {
+            'tipo_propietario': tipo,
+            'id_documento': pk,
+            'id_propietario': fila['id_propietario'],
+            'nombre_propietario': (fila['nombre_propietario'] or '')[:255],
+            'tipo_documento': fila['tipo_documento'][:200],
+            'referencia': (fila['referencia'] or '')[:255],
+            'fecha_vencimiento': fila['fecha_vencimiento'],
+            'dias_alerta': max(fila['dias_alerta'] or 0, 0),
+        }
+
+
+def _filas(tipo, filtro=None):
+    """Filas del índice (sin guardar) para los documentos fechados de la fuente"""
+    documentos = FUENTES[tipo]['modelo'].objects.all()
+    if filtro is not None:
+        documentos = documentos.filter(filtro)
+    for valores in valores_indice(tipo, documentos):
+        yield VencimientoDocumento(**valores)
+
+
+def indexar(tipo, ids):
+    """
+    Actualiza (upsert) las filas de los documentos indicados y elimina las de
+    los que ya no tienen fecha de vencimiento o no existen.
+    """
+    ids = list(ids)
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        bloque = ids[inicio:inicio + TAMANO_LOTE]
+        filas = list(_filas(tipo, Q(pk__in=bloque)))
+        upsert(VencimientoDocumento, filas, ['tipo_propietario', 'id_documento'], CAMPOS_ACTUALIZABLES)
+        vigentes = {fila.id_documento for fila in filas}
+        desindexar(tipo, [pk for pk in bloque if pk not in vigentes])
+
+
+def desindexar(tipo, ids):
+    ids = list(ids)
+    if ids:
+        VencimientoDocumento.objects.filter(tipo_propietario=tipo, id_documento__in=ids).delete()
+
+
+def indexar_relacionados(tipo, campo, valor):
+    """Reindexa los documentos de un propietario o tipo de documento"""
+    fuente = FUENTES[tipo]
+    ids = fuente['modelo'].objects.filter(**{campo: valor}).values_list('pk', flat=True)
+    indexar(tipo, ids)
+
+
+@transaction.atomic
+def reconstruir():
+    """Rehace el índice completo. Retorna {tipo_propietario: documentos indexados}."""
+    VencimientoDocumento.objects.all().delete()
+    resultado = {}
+    for tipo in FUENTES:
+        lote = []
+        resultado[tipo] = 0
+        for fila in _filas(tipo):
+            lote.append(fila)
+            if len(lote) == TAMANO_LOTE:
+                VencimientoDocumento.objects.bulk_create(lote)
+                resultado[tipo] += len(lote)
+                lote = []
+        VencimientoDocumento.objects.bulk_create(lote)
+        resultado[tipo] += len(lote)
+    return resultado
+
+
+# =============================================================================
+# CONSULTAS
+# =============================================================================
+
+def entre(desde, hasta):
+    """Documentos que vencen entre dos fechas (inclusive): un rango sobre el índice"""
+    return VencimientoDocumento.objects.filter(fecha_vencimiento__range=(desde, hasta))
+
+
+def proximos(dias=30, hoy=None):
+    """Todo lo que vence en los próximos `dias` días (desde hoy)"""
+    hoy = hoy or date.today()
+    return entre(hoy, hoy + timedelta(days=dias))
+
+
+def de_propietario(tipo, id_propietario):
+    """Vencimientos de un proveedor, trabajador o proyecto"""
+    return VencimientoDocumento.objects.filter(tipo_propietario=tipo, id_propietario=str(id_propietario))
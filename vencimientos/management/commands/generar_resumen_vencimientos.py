@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Management command para generar el resumen diario de vencimientos de documentos
+Uso: python manage.py generar_resumen_vencimientos [--fecha AAAA-MM-DD] [--dias 30]
+     [--formatos html,pdf,csv] [--directorio RUTA] [--correo a@x.com,b@x.com] [--consola]
+     [--reconstruir]
+
+Pensado para ejecutarse una vez al día (cron / tarea programada). Reúne los
+documentos de proveedores, trabajadores y proyectos vencidos recientemente o
+que vencen en los próximos --dias, escribe los archivos en --directorio
+(por defecto VENCIMIENTOS_DIRECTORIO_RESUMEN) y, si hay destinatarios
+(--correo o VENCIMIENTOS_DESTINATARIOS), los envía por correo. --consola
+envía con el backend de consola (imprime el correo). --reconstruir rehace
+antes el índice completo (primera ejecución o después de cargas masivas).
+"""
+
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from vencimientos import indice, resumen
+
+
+BACKEND_CONSOLA = 'django.core.mail.backends.console.EmailBackend'
+
+
+class Command(BaseCommand):
+    help = 'Genera el resumen diario de documentos vencidos y por vencer de toda la empresa'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fecha',
+            help='Fecha de corte (AAAA-MM-DD). Por defecto hoy',
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=30,
+            help='Días hacia adelante que cubre el resumen',
+        )
+        parser.add_argument(
+            '--formatos',
+            default=','.join(resumen.FORMATOS),
+            help='Formatos separados por coma: html, pdf, csv',
+        )
+        parser.add_argument(
+            '--directorio',
+            help='Carpeta donde escribir los archivos',
+        )
+        parser.add_argument(
+            '--correo',
+            help='Destinatarios separados por coma',
+        )
+        parser.add_argument(
+            '--consola',
+            action='store_true',
+            help='Enviar el correo con el backend de consola',
+        )
+        parser.add_argument(
+            '--sin-archivos',
+            action='store_true',
+            help='No escribir los archivos en disco',
+        )
+        parser.add_argument(
+            '--reconstruir',
+            action='store_true',
+            help='Reconstruir el índice de vencimientos antes de generar el resumen',
+        )
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            try:
+                hoy = date.fromisoformat(options['fecha'])
+            except ValueError:
+                raise CommandError('Fecha inválida, use el formato AAAA-MM-DD')
+        if options['dias'] < 0:
+            raise CommandError('Los días no pueden ser negativos')
+        formatos = [f.strip().lower() for f in options['formatos'].split(',') if f.strip()]
+        invalidos = set(formatos) - set(resumen.FORMATOS)
+        if invalidos:
+            raise CommandError(f"Formatos no soportados: {', '.join(sorted(invalidos))}")
+
+        if options['reconstruir']:
+            indexados = indice.reconstruir()
+            self.stdout.write('Índice reconstruido: ' + ', '.join(
+                f'{tipo}: {cantidad}' for tipo, cantidad in indexados.items()
+            ))
+
+        datos = resumen.generar(hoy=hoy, dias=options['dias'])
+
+        if not options['sin_archivos']:
+            for ruta in resumen.escribir(datos, formatos, options['directorio']):
+                self.stdout.write(f'  - {ruta}')
+
+        if options['correo']:
+            destinatarios = [d.strip() for d in options['correo'].split(',') if d.strip()]
+        else:
+            destinatarios = getattr(settings, 'VENCIMIENTOS_DESTINATARIOS', [])
+        if destinatarios:
+            resumen.enviar(
+                datos, destinatarios, formatos,
+                backend=BACKEND_CONSOLA if options['consola'] else None,
+            )
+            self.stdout.write(f"Correo enviado a {', '.join(destinatarios)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Resumen de vencimientos al {datos['hoy']:%Y-%m-%d}: "
+            f"{datos['totales']['VENCIDO']} vencidos, {datos['totales']['POR_VENCER']} en alerta, "
+            f"{datos['total']} en total"
+        ))
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:30
+
+from django.db import migrations, models
+
+
+def construir_indice(apps, schema_editor):
+    """Indexa los documentos con fecha de vencimiento existentes"""
+    from vencimientos.indice import valores_indice
+
+    VencimientoDocumento = apps.get_model('vencimientos', 'VencimientoDocumento')
+    modelos = {
+        'PROVEEDOR': apps.get_model('proveedores', 'DocumentoProveedor'),
+        'TRABAJADOR': apps.get_model('trabajadores', 'TrabajadorDocumento'),
+        'PROYECTO': apps.get_model('proyectos', 'DocumentoProyecto'),
+    }
+    for tipo, modelo in modelos.items():
+        VencimientoDocumento.objects.bulk_create(
+            [VencimientoDocumento(**valores) for valores in valores_indice(tipo, modelo.objects.all())],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('proveedores', '0008_historial_precios'),
+        ('proyectos', '0003_alter_evidenciafotografica_fecha_captura'),
+        ('trabajadores', '0012_tipodocumento_trabajadordocumento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VencimientoDocumento',
+            fields=[
+                ('id_vencimiento', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo_propietario', models.CharField(choices=[('PROVEEDOR', 'Proveedor'), ('TRABAJADOR', 'Trabajador'), ('PROYECTO', 'Proyecto')], max_length=15, verbose_name='Tipo de Propietario')),
+                ('id_documento', models.PositiveIntegerField(verbose_name='Id del Documento')),
+                ('id_propietario', models.CharField(help_text='Id del proveedor o proyecto, o documento del trabajador', max_length=50, verbose_name='Id del Propietario')),
+                ('nombre_propietario', models.CharField(max_length=255, verbose_name='Propietario')),
+                ('tipo_documento', models.CharField(max_length=200, verbose_name='Tipo de Documento')),
+                ('referencia', models.CharField(blank=True, default='', help_text='Número o nombre del documento', max_length=255, verbose_name='Referencia')),
+                ('fecha_vencimiento', models.DateField(verbose_name='Fecha de Vencimiento')),
+                ('dias_alerta', models.PositiveSmallIntegerField(default=0, help_text='Días antes del vencimiento en que empieza la alerta', verbose_name='Días de Alerta')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Vencimiento de Documento',
+                'verbose_name_plural': 'Vencimientos de Documentos',
+                'db_table': 'vencimientos_documentos',
+                'ordering': ['fecha_vencimiento', 'tipo_propietario', 'nombre_propietario'],
+                'indexes': [models.Index(fields=['fecha_vencimiento'], name='venc_fecha_idx'), models.Index(fields=['tipo_propietario', 'id_propietario'], name='venc_propietario_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='vencimientodocumento',
+            constraint=models.UniqueConstraint(fields=('tipo_propietario', 'id_documento'), name='venc_documento_unico'),
+        ),
+        migrations.RunPython(construir_indice, migrations.RunPython.noop),
+    ]
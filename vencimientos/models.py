@@ -0,0 +1,98 @@
+"""
+Modelos del módulo de Vencimientos de Documentos
+American Carpas 1 SAS
+"""
+
+from datetime import date
+
+from django.db import models
+
+
+# =====================================================
+# ÍNDICE DE VENCIMIENTOS
+# =====================================================
+
+class VencimientoDocumento(models.Model):
+    """
+    Una fila por documento con fecha de vencimiento, de proveedores,
+    trabajadores y proyectos (ver vencimientos/indice.py). Se mantiene al
+    guardar cada documento, así "todo lo que vence en los próximos 30 días"
+    es una sola consulta por rango sobre fecha_vencimiento.
+    """
+    TIPO_PROPIETARIO_CHOICES = [
+        ('PROVEEDOR', 'Proveedor'),
+        ('TRABAJADOR', 'Trabajador'),
+        ('PROYECTO', 'Proyecto'),
+    ]
+    
+    id_vencimiento = models.AutoField(primary_key=True)
+    
+    tipo_propietario = models.CharField(
+        max_length=15,
+        choices=TIPO_PROPIETARIO_CHOICES,
+        verbose_name="Tipo de Propietario"
+    )
+    
+    id_documento = models.PositiveIntegerField(verbose_name="Id del Documento")
+    
+    id_propietario = models.CharField(
+        max_length=50,
+        verbose_name="Id del Propietario",
+        help_text="Id del proveedor o proyecto, o documento del trabajador"
+    )
+    
+    nombre_propietario = models.CharField(max_length=255, verbose_name="Propietario")
+    
+    tipo_documento = models.CharField(max_length=200, verbose_name="Tipo de Documento")
+    
+    referencia = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name="Referencia",
+        help_text="Número o nombre del documento"
+    )
+    
+    fecha_vencimiento = models.DateField(verbose_name="Fecha de Vencimiento")
+    
+    dias_alerta = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Días de Alerta",
+        help_text="Días antes del vencimiento en que empieza la alerta"
+    )
+    
+    fecha_actualizacion = models.DateTimeField(auto_now=True, verbose_name="Última Actualización")
+    
+    class Meta:
+        db_table = 'vencimientos_documentos'
+        verbose_name = 'Vencimiento de Documento'
+        verbose_name_plural = 'Vencimientos de Documentos'
+        ordering = ['fecha_vencimiento', 'tipo_propietario', 'nombre_propietario']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tipo_propietario', 'id_documento'],
+                name='venc_documento_unico',
+            ),
+        ]
+        indexes = [
+            # Rango de vencimiento para toda la empresa
+            models.Index(fields=['fecha_vencimiento'], name='venc_fecha_idx'),
+            # Vencimientos de un propietario
+            models.Index(fields=['tipo_propietario', 'id_propietario'], name='venc_propietario_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo_documento} - {self.nombre_propietario} ({self.fecha_vencimiento})"
+    
+    def get_dias_para_vencer(self, hoy=None):
+        """Días que faltan para el vencimiento (negativo si ya venció)"""
+        return (self.fecha_vencimiento - (hoy or date.today())).days
+    
+    def get_estado(self, hoy=None):
+        """VENCIDO, POR_VENCER (dentro de los días de alerta) o VIGENTE"""
+        dias = self.get_dias_para_vencer(hoy)
+        if dias < 0:
+            return 'VENCIDO'
+        if dias <= self.dias_alerta:
+            return 'POR_VENCER'
+        return 'VIGENTE'
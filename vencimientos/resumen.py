@@ -0,0 +1,226 @@
+"""
+Resumen diario de vencimientos de documentos
+American Carpas 1 SAS
+
+Arma, con una consulta por rango sobre el índice de vencimientos, la lista de
+documentos vencidos en los últimos VENCIMIENTOS_DIAS_VENCIDOS días y los que
+vencen en los próximos días, y la entrega en HTML, PDF (reportlab) y CSV
+escritos en disco y/o por correo.
+"""
+
+import csv
+import io
+import os
+from datetime import date, timedelta
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+
+from .indice import entre
+from .models import VencimientoDocumento
+
+
+# Días hacia atrás que se siguen reportando los documentos vencidos
+DIAS_VENCIDOS = getattr(settings, 'VENCIMIENTOS_DIAS_VENCIDOS', 30)
+
+# Carpeta donde se escriben los archivos del resumen
+DIRECTORIO = getattr(
+    settings, 'VENCIMIENTOS_DIRECTORIO_RESUMEN', os.path.join(settings.MEDIA_ROOT, 'vencimientos')
+)
+
+FORMATOS = ('html', 'pdf', 'csv')
+
+COLUMNAS = ['Estado', 'Vence', 'Días', 'Propietario', 'Tipo', 'Documento', 'Referencia']
+
+NOMBRES_ESTADO = {
+    'VENCIDO': 'Vencido',
+    'POR_VENCER': 'Por vencer',
+    'VIGENTE': 'Vigente',
+}
+
+COLORES_ESTADO = {
+    'VENCIDO': '#dc3545',
+    'POR_VENCER': '#ffc107',
+    'VIGENTE': '#198754',
+}
+
+TIPOS_PROPIETARIO = dict(VencimientoDocumento.TIPO_PROPIETARIO_CHOICES)
+
+
+def generar(hoy=None, dias=30):
+    """
+    Datos del resumen: documentos que vencen entre hoy - DIAS_VENCIDOS y
+    hoy + `dias`, ordenados por fecha, con estado y días calculados a `hoy`.
+    """
+    hoy = hoy or date.today()
+    desde = hoy - timedelta(days=DIAS_VENCIDOS)
+    hasta = hoy + timedelta(days=dias)
+    filas = []
+    for vencimiento in entre(desde, hasta).order_by('fecha_vencimiento', 'tipo_propietario', 'nombre_propietario'):
+        vencimiento.estado = vencimiento.get_estado(hoy)
+        vencimiento.dias = vencimiento.get_dias_para_vencer(hoy)
+        filas.append(vencimiento)
+
+    totales = {estado: 0 for estado in NOMBRES_ESTADO}
+    por_propietario = {tipo: 0 for tipo in TIPOS_PROPIETARIO}
+    for fila in filas:
+        totales[fila.estado] += 1
+        por_propietario[fila.tipo_propietario] += 1
+    return {
+        'hoy': hoy,
+        'desde': desde,
+        'hasta': hasta,
+        'dias': dias,
+        'vencidos': [f for f in filas if f.estado == 'VENCIDO'],
+        'proximos': [f for f in filas if f.estado != 'VENCIDO'],
+        'totales': totales,
+        'por_propietario': [(TIPOS_PROPIETARIO[t], n) for t, n in por_propietario.items()],
+        'total': len(filas),
+    }
+
+
+def _valores(fila):
+    return [
+        NOMBRES_ESTADO[fila.estado],
+        fila.fecha_vencimiento.strftime('%Y-%m-%d'),
+        fila.dias,
+        fila.nombre_propietario,
+        TIPOS_PROPIETARIO[fila.tipo_propietario],
+        fila.tipo_documento,
+        fila.referencia,
+    ]
+
+
+# =============================================================================
+# FORMATOS
+# =============================================================================
+
+def a_html(datos):
+    return render_to_string('vencimientos/resumen_vencimientos.html', {
+        'datos': datos,
+        'colores_estado': COLORES_ESTADO,
+    })
+
+
+def a_csv(datos):
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(COLUMNAS)
+    for fila in datos['vencidos'] + datos['proximos']:
+        escritor.writerow(_valores(fila))
+    # BOM para que Excel reconozca UTF-8
+    return ('\ufeff' + salida.getvalue()).encode('utf-8')
+
+
+def a_pdf(datos):
+    buffer = io.BytesIO()
+    documento = SimpleDocTemplate(
+        buffer, pagesize=landscape(letter),
+        leftMargin=12 * mm, rightMargin=12 * mm, topMargin=12 * mm, bottomMargin=12 * mm,
+        title=f"Vencimientos {datos['hoy']:%Y-%m-%d}",
+    )
+    estilos = getSampleStyleSheet()
+    celda = estilos['BodyText'].clone('celda', fontSize=8, leading=10)
+    contenido = [
+        Paragraph('American Carpas 1 SAS - Vencimientos de Documentos', estilos['Title']),
+        Paragraph(
+            f"Corte {datos['hoy']:%Y-%m-%d}: vencidos desde {datos['desde']:%Y-%m-%d} "
+            f"y por vencer hasta {datos['hasta']:%Y-%m-%d}. Total: {datos['total']}.",
+            estilos['Normal'],
+        ),
+    ]
+    for titulo, filas in (('Vencidos', datos['vencidos']), ('Próximos a vencer', datos['proximos'])):
+        contenido += [Spacer(1, 6 * mm), Paragraph(f'{titulo} ({len(filas)})', estilos['Heading2'])]
+        if not filas:
+            contenido.append(Paragraph('Sin documentos.', estilos['Normal']))
+            continue
+        tabla = Table(
+            [COLUMNAS] + [[Paragraph(escape(str(v)), celda) for v in _valores(fila)] for fila in filas],
+            colWidths=[22 * mm, 22 * mm, 12 * mm, 70 * mm, 24 * mm, 50 * mm, 55 * mm],
+            repeatRows=1,
+        )
+        estilo = [
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#343a40')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.HexColor('#adb5bd')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]
+        for numero, fila in enumerate(filas, start=1):
+            estilo.append(('BACKGROUND', (0, numero), (0, numero), colors.HexColor(COLORES_ESTADO[fila.estado])))
+        tabla.setStyle(TableStyle(estilo))
+        contenido.append(tabla)
+    documento.build(contenido)
+    return buffer.getvalue()
+
+
+GENERADORES = {
+    'html': lambda datos: a_html(datos).encode('utf-8'),
+    'pdf': a_pdf,
+    'csv': a_csv,
+}
+
+TIPOS_MIME = {
+    'html': 'text/html',
+    'pdf': 'application/pdf',
+    'csv': 'text/csv',
+}
+
+
+# =============================================================================
+# ENTREGA
+# =============================================================================
+
+def nombre_archivo(datos, formato):
+    return f"resumen_vencimientos_{datos['hoy']:%Y-%m-%d}.{formato}"
+
+
+def archivos(datos, formatos=FORMATOS):
+    """{nombre de archivo: contenido en bytes}"""
+    return {nombre_archivo(datos, formato): GENERADORES[formato](datos) for formato in formatos}
+
+
+def escribir(datos, formatos=FORMATOS, directorio=None):
+    """Escribe los archivos del resumen. Retorna las rutas escritas."""
+    directorio = directorio or DIRECTORIO
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    for nombre, contenido in archivos(datos, formatos).items():
+        ruta = os.path.join(directorio, nombre)
+        with open(ruta, 'wb') as destino:
+            destino.write(contenido)
+        rutas.append(ruta)
+    return rutas
+
+
+def enviar(datos, destinatarios, formatos=FORMATOS, backend=None):
+    """
+    Envía el resumen en HTML como cuerpo del correo, con los demás formatos
+    adjuntos. `backend` permite forzar, por ejemplo, el de consola.
+    """
+    asunto = (
+        f"Vencimientos {datos['hoy']:%Y-%m-%d}: {datos['totales']['VENCIDO']} vencidos, "
+        f"{datos['total'] - datos['totales']['VENCIDO']} por vencer"
+    )
+    texto = '\n'.join(
+        [asunto, ''] + [' | '.join(str(v) for v in _valores(fila)) for fila in datos['vencidos'] + datos['proximos']]
+    )
+    correo = EmailMultiAlternatives(
+        subject=asunto,
+        body=texto,
+        to=list(destinatarios),
+        connection=get_connection(backend) if backend else None,
+    )
+    correo.attach_alternative(a_html(datos), 'text/html')
+    for formato in formatos:
+        if formato != 'html':
+            correo.attach(nombre_archivo(datos, formato), GENERADORES[formato](datos), TIPOS_MIME[formato])
+    return correo.send()
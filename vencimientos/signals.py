@@ -0,0 +1,49 @@
+"""
+Signals del módulo de Vencimientos
+American Carpas 1 SAS
+
+Mantienen el índice de vencimientos: cada documento se reindexa al guardarlo
+o eliminarlo, y al guardar un propietario o tipo de documento se reindexan
+sus documentos (nombre, días de alerta o requiere_vigencia pudieron cambiar).
+Las operaciones masivas (update() / bulk_create()) no disparan signals; quien
+las use debe llamar a indice.indexar() o ejecutar
+generar_resumen_vencimientos --reconstruir.
+"""
+
+from functools import partial
+
+from django.db.models.signals import post_save, post_delete
+
+from .indice import FUENTES, desindexar, indexar, indexar_relacionados
+
+
+def indexar_documento(sender, instance, tipo, raw=False, **kwargs):
+    if not raw:
+        indexar(tipo, [instance.pk])
+
+
+def desindexar_documento(sender, instance, tipo, **kwargs):
+    desindexar(tipo, [instance.pk])
+
+
+def indexar_documentos_relacionados(sender, instance, tipo, campo, raw=False, created=False, **kwargs):
+    # Un propietario o tipo recién creado todavía no tiene documentos
+    if not raw and not created:
+        indexar_relacionados(tipo, campo, instance.pk)
+
+
+for _tipo, _fuente in FUENTES.items():
+    _modelo = _fuente['modelo']
+    post_save.connect(
+        partial(indexar_documento, tipo=_tipo), sender=_modelo, weak=False,
+        dispatch_uid=f'vencimientos_save_{_modelo.__name__}',
+    )
+    post_delete.connect(
+        partial(desindexar_documento, tipo=_tipo), sender=_modelo, weak=False,
+        dispatch_uid=f'vencimientos_delete_{_modelo.__name__}',
+    )
+    for _relacionado, _campo in _fuente['relaciones'].items():
+        post_save.connect(
+            partial(indexar_documentos_relacionados, tipo=_tipo, campo=_campo), sender=_relacionado, weak=False,
+            dispatch_uid=f'vencimientos_relacion_{_relacionado._meta.label_lower}',
+        )
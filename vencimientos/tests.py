@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from django.test import TestCase
+
+from american_carpas_project.tests import como_mysql, upserts
+from proveedores.models import (
+    CategoriaProveedor,
+    DocumentoProveedor,
+    Proveedor,
+    TipoDocumentoProveedor,
+    TipoProveedor,
+)
+
+from .models import VencimientoDocumento
+
+
+class IndiceVencimientosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(
+            razon_social='Lonas del Valle SAS',
+            numero_documento='900123456',
+            tipo_proveedor=TipoProveedor.objects.create(nombre_tipo='Materia prima'),
+            categoria_principal=CategoriaProveedor.objects.create(nombre_categoria='Textiles'),
+            ciudad='Cali',
+            direccion='Calle 1 # 2-3',
+            telefono_principal='6020000000',
+            email_principal='ventas@lonasdelvalle.co',
+        )
+        cls.tipo = TipoDocumentoProveedor.objects.create(
+            nombre_tipo_documento='RUT', dias_alerta_vencimiento=15,
+        )
+
+    def crear_documento(self, vence):
+        return DocumentoProveedor.objects.create(
+            id_proveedor=self.proveedor,
+            id_tipo_documento=self.tipo,
+            archivo='proveedores/documentos/rut.pdf',
+            nombre_archivo_original='rut.pdf',
+            fecha_emision=date.today(),
+            fecha_vencimiento=vence,
+        )
+
+    def test_guardar_un_documento_lo_indexa_y_lo_actualiza(self):
+        documento = self.crear_documento(date.today() + timedelta(days=10))
+
+        fila = VencimientoDocumento.objects.get(tipo_propietario='PROVEEDOR', id_documento=documento.pk)
+        self.assertEqual(fila.nombre_propietario, 'Lonas del Valle SAS')
+        self.assertEqual(fila.dias_alerta, 15)
+
+        documento.fecha_vencimiento = date.today() + timedelta(days=40)
+        documento.save()
+
+        fila = VencimientoDocumento.objects.get(tipo_propietario='PROVEEDOR', id_documento=documento.pk)
+        self.assertEqual(fila.fecha_vencimiento, date.today() + timedelta(days=40))
+
+    def test_sin_fecha_de_vencimiento_sale_del_indice(self):
+        documento = self.crear_documento(date.today())
+
+        documento.fecha_vencimiento = None
+        documento.save()
+
+        self.assertFalse(VencimientoDocumento.objects.exists())
+
+    def test_en_mysql_el_upsert_no_indica_unique_fields(self):
+        with como_mysql() as llamadas:
+            self.crear_documento(date.today())
+
+        self.assertTrue(upserts(llamadas))
+        for kwargs in upserts(llamadas):
+            self.assertNotIn('unique_fields', kwargs)